@@ -0,0 +1,15 @@
+<?php
+/**
+ * Server-Timing header for load tests
+ *
+ * Loaded through auto_prepend_file. When WALLABAG_SERVER_TIMING is set, the
+ * total PHP request duration is sent as "Server-Timing: app;dur=<ms>" just
+ * before the response headers go out. Other components may add further
+ * metrics (e.g. "db") with header('Server-Timing: ...', false).
+ */
+if (getenv('WALLABAG_SERVER_TIMING')) {
+    header_register_callback(function () {
+        $start = $_SERVER['REQUEST_TIME_FLOAT'] ?? microtime(true);
+        header(sprintf('Server-Timing: app;dur=%.1f', (microtime(true) - $start) * 1000), false);
+    });
+}
@@ -5,6 +5,11 @@ import time
 import json
 from dotenv import load_dotenv
 
+from harness.api_client import ApiClient
+from harness.http_cache import ResponseCache
+from harness.resources import parse_size
+from harness.stats import format_bytes
+
 # Load environment variables
 load_dotenv()
 
@@ -19,6 +24,9 @@ DB_NAME = os.getenv("TEST_DATABASE_NAME", "wallabag")
 DB_USER = os.getenv("TEST_DATABASE_USER", "wallabag")
 DB_PASSWORD = os.getenv("TEST_DATABASE_PASSWORD", "wallabag")
 API_VERSION = "api"  # Default API version
+# "1" caches GET responses for the whole session, a size such as "64MB" bounds the cache
+HTTP_CACHE = os.getenv("TEST_HTTP_CACHE")
+RESPONSE_CACHE_KEY = pytest.StashKey()
 
 @pytest.fixture(scope="session")
 def api_url():
@@ -60,27 +68,21 @@ def auth_headers(oauth_token):
         "Authorization": f"Bearer {oauth_token}"
     }
 
+@pytest.fixture(scope="session")
+def response_cache(pytestconfig):
+    """Session-wide GET response cache, enabled with TEST_HTTP_CACHE"""
+    if not HTTP_CACHE or HTTP_CACHE.lower() in ("0", "false", "no"):
+        return None
+
+    max_bytes = None if HTTP_CACHE.lower() in ("1", "true", "yes") else parse_size(HTTP_CACHE)
+    cache = ResponseCache(max_bytes=max_bytes)
+    pytestconfig.stash[RESPONSE_CACHE_KEY] = cache
+    return cache
+
 @pytest.fixture
-def api_client(api_url, headers):
+def api_client(api_url, headers, response_cache):
     """API client for making requests"""
-    class ApiClient:
-        def get(self, endpoint, params=None):
-            url = f"{api_url}/{endpoint}"
-            return requests.get(url, headers=headers, params=params)
-            
-        def post(self, endpoint, data):
-            url = f"{api_url}/{endpoint}"
-            return requests.post(url, headers=headers, json=data)
-            
-        def patch(self, endpoint, data):
-            url = f"{api_url}/{endpoint}"
-            return requests.patch(url, headers=headers, json=data)
-            
-        def delete(self, endpoint):
-            url = f"{api_url}/{endpoint}"
-            return requests.delete(url, headers=headers)
-    
-    return ApiClient()
+    return ApiClient(api_url, headers, cache=response_cache)
 
 @pytest.fixture
 def create_test_article(api_client):
@@ -120,4 +122,22 @@ def wait_for_service():
             
         time.sleep(retry_interval)
     
-    pytest.skip("Service not available after waiting")
\ No newline at end of file
+    pytest.skip("Service not available after waiting")
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report how many GETs the response cache answered or found unchanged"""
+    cache = config.stash.get(RESPONSE_CACHE_KEY, None)
+    if cache is None:
+        return
+
+    stats = cache.stats()
+    terminalreporter.section("HTTP response cache")
+    terminalreporter.write_line(
+        f"GET requests: {stats['requests']}, fresh hits: {stats['hits']}, "
+        f"revalidated (304): {stats['revalidated']}, unchanged 200s: {stats['unchanged']}, "
+        f"misses: {stats['misses']}, evictions: {stats['evictions']}"
+    )
+    terminalreporter.write_line(
+        f"Received {format_bytes(stats['bytes_received'])}, saved by cache {format_bytes(stats['bytes_saved'])}, "
+        f"refetched unchanged {format_bytes(stats['bytes_redundant'])}"
+    )
@@ -1,8 +1,11 @@
 import pytest
+import copy
 import json
 import re
 from jsonschema import validate
 
+from harness.batch import BatchClient
+
 # Define the JSON schema for validating the entries response
 ENTRIES_SCHEMA = {
     "type": "object",
@@ -52,6 +55,10 @@ ENTRIES_SCHEMA = {
     }
 }
 
+# Metadata-only listings (?fields=... or detail=metadata) carry no article content
+ENTRIES_METADATA_SCHEMA = copy.deepcopy(ENTRIES_SCHEMA)
+ENTRIES_METADATA_SCHEMA["properties"]["_embedded"]["properties"]["items"]["items"]["properties"]["content"] = {"type": "null"}
+
 @pytest.fixture
 def setup_test_articles(api_client):
     """Create test articles for testing GET requests"""
@@ -71,8 +78,7 @@ def setup_test_articles(api_client):
     yield article_ids
     
     # Clean up created articles
-    for article_id in article_ids:
-        api_client.delete(f"entries/{article_id}")
+    BatchClient(api_client).delete(article_ids)
 
 class TestGetEntries:
     """Tests for the GET /api/entries endpoint"""
@@ -94,6 +100,28 @@ class TestGetEntries:
         except Exception as e:
             pytest.fail(f"Response does not match schema: {e}")
     
+    def test_get_entries_metadata_only_schema(self, api_client, setup_test_articles):
+        """Test that metadata-only listings match the slim schema"""
+        response = api_client.list_entries(metadata_only=True)
+        assert response.status_code == 200
+        
+        try:
+            validate(instance=response.json(), schema=ENTRIES_METADATA_SCHEMA)
+        except Exception as e:
+            pytest.fail(f"Metadata-only response does not match schema: {e}")
+    
+    def test_get_entries_metadata_only_is_smaller(self, api_client, setup_test_articles):
+        """Test that dropping content does not grow the listing or change the entries"""
+        full = api_client.list_entries({"perPage": 10})
+        slim = api_client.list_entries({"perPage": 10}, metadata_only=True)
+        assert full.status_code == 200
+        assert slim.status_code == 200
+        
+        assert len(slim.content) <= len(full.content)
+        full_ids = [item["id"] for item in full.json()["_embedded"]["items"]]
+        slim_ids = [item["id"] for item in slim.json()["_embedded"]["items"]]
+        assert slim_ids == full_ids
+    
     def test_get_entries_pagination(self, api_client, setup_test_articles):
         """Test pagination parameters"""
         # Test with page=1, perPage=2
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the Wallabag performance and integration test scripts
+"""
@@ -0,0 +1,200 @@
+"""
+Wallabag API client shared by the pytest fixtures and the command line tools
+"""
+
+import random
+import time
+from urllib.parse import urljoin
+
+import requests
+
+from harness.concurrency import is_overload
+from harness.http2 import Http2Session
+
+API_VERSION = "api"
+
+# Exponential backoff between retries of an overloaded request
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60
+DEFAULT_MAX_RETRIES = 5
+
+# Entry fields kept by the metadata-only listing mode
+METADATA_FIELDS = ("id", "url", "title", "domain_name", "is_archived", "is_starred", "reading_time",
+                   "created_at", "updated_at", "tags")
+
+# Ways a deployment can drop content from entry listings, in order of preference:
+# server-side field selection, or Wallabag's detail=metadata parameter
+LISTING_FIELDS = "fields"
+LISTING_DETAIL = "detail"
+
+
+def fetch_oauth_token(base_url, client_id, client_secret, username, password, timeout=30):
+    """Get an OAuth access token using the password grant"""
+    response = requests.post(urljoin(base_url, "/oauth/v2/token"), data={
+        "grant_type": "password",
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "username": username,
+        "password": password
+    }, timeout=timeout)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+class ApiClient:
+    """API client for making requests relative to the API base URL"""
+
+    def __init__(self, api_url, headers, timeout=None, session=None, cache=None, http2=False):
+        self.api_url = api_url.rstrip("/")
+        self.headers = headers
+        self.timeout = timeout
+        if session is None:
+            session = Http2Session(timeout) if http2 else requests.Session()
+        self.session = session
+        self.cache = cache
+        self.listing_mode = None
+
+    @classmethod
+    def from_credentials(cls, base_url, api_key=None, client_id=None, client_secret=None,
+                         username=None, password=None, **kwargs):
+        """Build a client using an API key, or OAuth credentials when no key is given"""
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        else:
+            token = fetch_oauth_token(base_url, client_id, client_secret, username, password)
+            headers["Authorization"] = f"Bearer {token}"
+
+        return cls(f"{base_url.rstrip('/')}/{API_VERSION}", headers, **kwargs)
+
+    def url(self, endpoint):
+        return f"{self.api_url}/{endpoint}"
+
+    def request(self, method, endpoint, params=None, data=None, headers=None):
+        """Send a request; extra headers are merged over the client headers"""
+        request_headers = dict(self.headers, **(headers or {}))
+        if self.cache is not None and method == "GET":
+            return self.cached_get(endpoint, params, request_headers)
+
+        response = self.session.request(method, self.url(endpoint), headers=request_headers,
+                                        params=params, json=data, timeout=self.timeout)
+        if self.cache is not None and response.status_code < 400:
+            self.cache.invalidate(self.url(endpoint))
+        return response
+
+    def cached_get(self, endpoint, params, request_headers):
+        """GET through the response cache, revalidating stored responses"""
+        url = self.url(endpoint)
+        key = self.cache.key(url, params, request_headers)
+        record = self.cache.lookup(key)
+        # Another thread may evict the record while this request runs
+        body = self.cache.body(record) if record is not None else None
+        if body is None:
+            record = None
+
+        if record is not None:
+            if record.is_fresh(time.monotonic()):
+                self.cache.record_hit(record)
+                return self.replay(record, body, url)
+            request_headers = dict(request_headers, **self.cache.conditional_headers(record))
+
+        response = self.session.request("GET", url, headers=request_headers, params=params, timeout=self.timeout)
+
+        if response.status_code == 304 and record is not None:
+            self.cache.record_revalidated(key, record, response.headers)
+            return self.replay(record, body, url, response)
+        if response.status_code == 200:
+            self.cache.store(key, response.status_code, response.headers, response.content)
+        return response
+
+    def replay(self, record, body, url, revalidation=None):
+        """Rebuild a full response from a cache record"""
+        response = requests.Response()
+        response.status_code = record.status_code
+        response.headers.update(record.headers)
+        response._content = body
+        response.url = revalidation.url if revalidation is not None else url
+        response.encoding = "utf-8"
+        if revalidation is not None:
+            response.request = revalidation.request
+            response.elapsed = revalidation.elapsed
+        response.from_cache = True
+        return response
+
+    def detect_listing_mode(self):
+        """Find out whether the server honours ?fields= on /entries; else use detail=metadata"""
+        if self.listing_mode is None:
+            self.listing_mode = LISTING_DETAIL
+            try:
+                response = self.get("entries", params={"perPage": 1, "fields": ",".join(METADATA_FIELDS)})
+                items = response.json().get("_embedded", {}).get("items", []) if response.status_code == 200 else []
+            except (requests.exceptions.RequestException, ValueError):
+                items = []
+            if items and set(items[0]) <= set(METADATA_FIELDS) | {"_links"}:
+                self.listing_mode = LISTING_FIELDS
+        return self.listing_mode
+
+    def listing_params(self, metadata_only=False):
+        """Query parameters that select full or metadata-only entry listings"""
+        if not metadata_only:
+            return {"detail": "full"}
+        if self.detect_listing_mode() == LISTING_FIELDS:
+            return {"fields": ",".join(METADATA_FIELDS)}
+        return {"detail": "metadata"}
+
+    def list_entries(self, params=None, metadata_only=False):
+        """GET one page of entries, optionally without content"""
+        return self.get("entries", params=dict(params or {}, **self.listing_params(metadata_only)))
+
+    def get(self, endpoint, params=None):
+        return self.request("GET", endpoint, params=params)
+
+    def post(self, endpoint, data):
+        return self.request("POST", endpoint, data=data)
+
+    def patch(self, endpoint, data):
+        return self.request("PATCH", endpoint, data=data)
+
+    def delete(self, endpoint):
+        return self.request("DELETE", endpoint)
+
+
+def call_with_backoff(client, limiter, method, endpoint, params=None, data=None,
+                      max_retries=DEFAULT_MAX_RETRIES, verbose=False):
+    """Send a request through the limiter, retrying with backoff while the server is overloaded
+
+    Returns the last response, or raises the last connection error when no
+    attempt got a response.
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        start_time = time.monotonic()
+        response = None
+        status_code = None
+        try:
+            response = client.request(method, endpoint, params=params, data=data)
+            status_code = response.status_code
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        finally:
+            limiter.release(status_code, time.monotonic() - start_time)
+
+        if response is not None and not is_overload(status_code):
+            return response
+
+        if attempt == max_retries:
+            break
+
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+
+        if verbose:
+            reason = status_code if response is not None else error
+            print(f"Retrying {method} {endpoint} in {delay:.1f}s ({reason})")
+        time.sleep(delay)
+
+    if response is not None:
+        return response
+    raise requests.exceptions.ConnectionError(error)
@@ -0,0 +1,234 @@
+"""
+Batched entry operations on top of ApiClient
+
+Wallabag has list endpoints for creating entries (POST /entries/lists),
+deleting them by URL (DELETE /entries/list) and tagging them
+(POST /entries/tags/lists), each taking up to a server-configured number of
+items per call. Operations without a list endpoint, or deployments without
+them, fall back to concurrent per-item requests kept in flight over pooled
+keep-alive connections.
+"""
+
+import copy
+import json
+import time
+import concurrent.futures
+
+import requests
+
+from harness.api_client import DEFAULT_MAX_RETRIES, call_with_backoff
+from harness.concurrency import AdaptiveConcurrencyLimiter
+
+# Items per list request; Wallabag's api_limit_mass_actions defaults to 10
+DEFAULT_LIST_BATCH_SIZE = 10
+DEFAULT_WORKERS = 8
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BatchResult:
+    """Outcome of a batch operation"""
+
+    def __init__(self, operation, mode):
+        self.operation = operation
+        self.mode = mode
+        self.succeeded = []
+        self.failed = []
+        self.requests = 0
+        self.elapsed = 0
+
+    @property
+    def throughput(self):
+        """Items done per second; failed items do not count"""
+        return len(self.succeeded) / self.elapsed if self.elapsed else 0
+
+    def as_dict(self):
+        return {
+            "operation": self.operation,
+            "mode": self.mode,
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "requests": self.requests,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+        }
+
+
+class BatchClient:
+    """Create, patch, tag and delete many entries with few round trips
+
+    use_lists=False forces per-item requests, e.g. to compare both modes.
+    """
+
+    def __init__(self, client, workers=DEFAULT_WORKERS, limiter=None, list_batch_size=DEFAULT_LIST_BATCH_SIZE,
+                 use_lists=True, max_retries=DEFAULT_MAX_RETRIES, verbose=False):
+        self.limiter = limiter or AdaptiveConcurrencyLimiter(initial=workers, maximum=workers)
+        self.list_batch_size = list_batch_size
+        self.use_lists = use_lists
+        self.max_retries = max_retries
+        self.verbose = verbose
+
+        # One pooled connection per worker, on a private session so the caller's client is left as it was;
+        # HTTP/2 sessions multiplex the workers over one connection already
+        self.client = client
+        if isinstance(client.session, requests.Session):
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.limiter.maximum)
+            self.client = copy.copy(client)
+            self.client.session = requests.Session()
+            self.client.session.mount("http://", adapter)
+            self.client.session.mount("https://", adapter)
+
+        self.list_endpoints = {}
+
+    def call(self, method, endpoint, params=None, data=None):
+        return call_with_backoff(self.client, self.limiter, method, endpoint, params=params, data=data,
+                                 max_retries=self.max_retries, verbose=self.verbose)
+
+    def run(self, result, func, groups):
+        """Apply func to every group concurrently; func returns (succeeded, failed) lists"""
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            futures = {executor.submit(func, group): group for group in groups}
+            for future in concurrent.futures.as_completed(futures):
+                result.requests += 1
+                try:
+                    succeeded, failed = future.result()
+                except requests.exceptions.RequestException as e:
+                    group = futures[future]
+                    succeeded, failed = [], [(item, str(e)) for item in (group if isinstance(group, list) else [group])]
+                result.succeeded.extend(succeeded)
+                result.failed.extend(failed)
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def list_endpoint_available(self, name, response):
+        """Remember that a list endpoint is missing (404/405) so later calls go per item"""
+        if response.status_code in (404, 405):
+            if self.list_endpoints.get(name, True) and self.verbose:
+                print(f"{name} not available; falling back to per-item requests")
+            self.list_endpoints[name] = False
+            return False
+        self.list_endpoints[name] = True
+        return True
+
+    def create(self, urls, tags=None):
+        """Create entries for urls; result.succeeded holds {"url", "id"} dicts"""
+        tag_list = ",".join(tags or [])
+
+        def create_one(url):
+            payload = {"url": url}
+            if tag_list:
+                payload["tags"] = tag_list
+            response = self.call("POST", "entries", data=payload)
+            if response.status_code >= 400:
+                return [], [(url, f"HTTP {response.status_code}")]
+            return [{"url": url, "id": response.json().get("id")}], []
+
+        def create_list(group):
+            if self.list_endpoints.get("entries/lists") is False:
+                return self.per_item(create_one, group)
+
+            params = {"urls": json.dumps(group)}
+            if tag_list:
+                params["tags"] = tag_list
+            response = self.call("POST", "entries/lists", params=params)
+            if not self.list_endpoint_available("entries/lists", response):
+                return self.per_item(create_one, group)
+            if response.status_code >= 400:
+                return [], [(url, f"HTTP {response.status_code}") for url in group]
+
+            succeeded, failed = [], []
+            for item in response.json():
+                if item.get("entry"):
+                    succeeded.append({"url": item["url"], "id": item["entry"]})
+                else:
+                    failed.append((item["url"], "not created"))
+            return succeeded, failed
+
+        if self.use_lists:
+            return self.run(BatchResult("create", "list"), create_list, chunked(list(urls), self.list_batch_size))
+        return self.run(BatchResult("create", "per-item"), create_one, list(urls))
+
+    def list_results(self, group, response, reason):
+        """Split a list group by the per-URL results of a list endpoint; entry is false where it did not apply"""
+        applied = {item["url"]: item.get("entry") for item in response.json()}
+        succeeded, failed = [], []
+        for entry in group:
+            if applied.get(entry["url"]):
+                succeeded.append(entry["id"])
+            else:
+                failed.append((entry["id"], reason))
+        return succeeded, failed
+
+    def per_item(self, func, group):
+        """Fallback for one list group: the items one after another on this worker"""
+        succeeded, failed = [], []
+        for item in group:
+            ok, errors = func(item)
+            succeeded.extend(ok)
+            failed.extend(errors)
+        return succeeded, failed
+
+    def patch(self, entry_ids, data):
+        """Apply the same PATCH (e.g. {"archive": 1}) to every entry; there is no list endpoint"""
+        def patch_one(entry_id):
+            response = self.call("PATCH", f"entries/{entry_id}", data=data)
+            if response.status_code >= 400:
+                return [], [(entry_id, f"HTTP {response.status_code}")]
+            return [entry_id], []
+
+        return self.run(BatchResult("patch", "per-item"), patch_one, list(entry_ids))
+
+    def add_tags(self, entries, tags):
+        """Tag entries given as {"url", "id"} dicts"""
+        tag_list = ",".join(tags)
+
+        def tag_one(entry):
+            response = self.call("POST", f"entries/{entry['id']}/tags", data={"tags": tag_list})
+            if response.status_code >= 400:
+                return [], [(entry["id"], f"HTTP {response.status_code}")]
+            return [entry["id"]], []
+
+        def tag_list_group(group):
+            if self.list_endpoints.get("entries/tags/lists") is False:
+                return self.per_item(tag_one, group)
+
+            payload = [{"url": entry["url"], "tags": tag_list} for entry in group]
+            response = self.call("POST", "entries/tags/lists", params={"list": json.dumps(payload)})
+            if not self.list_endpoint_available("entries/tags/lists", response):
+                return self.per_item(tag_one, group)
+            if response.status_code >= 400:
+                return [], [(entry["id"], f"HTTP {response.status_code}") for entry in group]
+            return self.list_results(group, response, "not tagged")
+
+        if self.use_lists:
+            return self.run(BatchResult("tag", "list"), tag_list_group, chunked(list(entries), self.list_batch_size))
+        return self.run(BatchResult("tag", "per-item"), tag_one, list(entries))
+
+    def delete(self, entries):
+        """Delete entries given as {"url", "id"} dicts, or as bare IDs (per-item only)"""
+        def delete_one(entry):
+            entry_id = entry["id"] if isinstance(entry, dict) else entry
+            response = self.call("DELETE", f"entries/{entry_id}")
+            # Already gone counts as deleted
+            if response.status_code >= 400 and response.status_code != 404:
+                return [], [(entry_id, f"HTTP {response.status_code}")]
+            return [entry_id], []
+
+        def delete_list(group):
+            if self.list_endpoints.get("entries/list") is False:
+                return self.per_item(delete_one, group)
+
+            response = self.call("DELETE", "entries/list", params={"urls": json.dumps([e["url"] for e in group])})
+            if not self.list_endpoint_available("entries/list", response):
+                return self.per_item(delete_one, group)
+            if response.status_code >= 400:
+                return [], [(entry["id"], f"HTTP {response.status_code}") for entry in group]
+            return self.list_results(group, response, "not deleted")
+
+        entries = list(entries)
+        if self.use_lists and entries and all(isinstance(e, dict) for e in entries):
+            return self.run(BatchResult("delete", "list"), delete_list, chunked(entries, self.list_batch_size))
+        return self.run(BatchResult("delete", "per-item"), delete_one, entries)
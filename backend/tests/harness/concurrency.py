@@ -0,0 +1,154 @@
+"""
+Adaptive concurrency limiting for API clients
+
+The limiter bounds the number of requests in flight. The window grows
+additively while requests succeed with stable latency and shrinks
+multiplicatively when the server signals overload (429 or 5xx) or when
+latency inflates well above the uncongested baseline, like TCP congestion
+control. The window it settles at is a measure of the server's capacity.
+"""
+
+import threading
+import time
+
+# HTTP status codes that mean "slow down" rather than "this request is wrong"
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+# The baseline is a slow moving average that falls faster than it rises, so
+# it sits near the uncongested latency without chasing single fast outliers,
+# and still follows a server that got permanently slower
+BASELINE_FALL = 0.05
+BASELINE_RISE = 0.001
+
+
+def is_overload(status_code):
+    """True for responses (or connection failures, status None) that signal overload"""
+    return status_code is None or status_code in OVERLOAD_STATUS_CODES
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency window shared by the worker threads of a client
+
+    latency_tolerance is the ratio of smoothed to baseline latency treated
+    as congestion; None reacts to overload responses only.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease_factor=0.5, latency_tolerance=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.initial = float(min(max(initial, minimum), maximum))
+        self.limit = self.initial
+        self.in_flight = 0
+        self.baseline_latency = None
+        self.smoothed_latency = None
+        self.decreases = {"overload": 0, "latency": 0}
+        self.history = [(0.0, self.limit)]
+
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+        self._start_time = time.monotonic()
+
+    def acquire(self):
+        """Block until a slot in the current window is free"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, status_code, latency):
+        """Free a slot and adapt the window to the outcome of the request"""
+        with self._condition:
+            # Only grow a window that is at least half used; an idle client
+            # learns nothing about capacity
+            saturated = self.in_flight * 2 >= int(self.limit)
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if is_overload(status_code):
+                self._decrease(now, latency, "overload")
+            elif self._latency_inflated(latency):
+                self._decrease(now, latency, "latency")
+            elif saturated:
+                # +1 per window's worth of successful requests
+                previous = int(self.limit)
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                if int(self.limit) != previous:
+                    self.history.append((now - self._start_time, self.limit))
+
+            self._condition.notify_all()
+
+    def _latency_inflated(self, latency):
+        """Track baseline and smoothed latency; True when latency grew past the tolerance"""
+        if self.baseline_latency is None:
+            self.baseline_latency = self.smoothed_latency = latency
+            return False
+
+        weight = BASELINE_FALL if latency < self.baseline_latency else BASELINE_RISE
+        self.baseline_latency += (latency - self.baseline_latency) * weight
+        self.smoothed_latency += (latency - self.smoothed_latency) * LATENCY_SMOOTHING
+
+        return (self.latency_tolerance is not None
+                and self.smoothed_latency > self.baseline_latency * self.latency_tolerance)
+
+    def _decrease(self, now, latency, reason):
+        # Requests already in flight when the server got overloaded fail
+        # together; shrink once per round trip rather than once per failure.
+        if now - self._last_decrease < latency:
+            return
+
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+        self._last_decrease = now
+        self.decreases[reason] += 1
+        self.history.append((now - self._start_time, self.limit))
+
+        # Requests queued behind the congestion come back slow; start the
+        # smoothed latency over so they don't trigger another cut right away
+        self.smoothed_latency = self.baseline_latency
+
+    @property
+    def current(self):
+        """Current integer window size"""
+        return int(self.limit)
+
+    def converged(self, settle_fraction=0.5):
+        """Time-weighted mean window over the last settle_fraction of the run
+
+        The window keeps probing above and backing off below capacity, so
+        its average once the start-up transient is over is the capacity
+        estimate rather than its final value.
+        """
+        with self._condition:
+            end = time.monotonic() - self._start_time
+            history = list(self.history)
+            current = self.limit
+
+        if end <= 0:
+            return current
+
+        since = end * (1 - settle_fraction)
+        weighted = 0.0
+        for index, (start, limit) in enumerate(history):
+            stop = history[index + 1][0] if index + 1 < len(history) else end
+            overlap = min(stop, end) - max(start, since)
+            if overlap > 0:
+                weighted += limit * overlap
+
+        return weighted / (end - since)
+
+    def summary(self):
+        """Window statistics for reports"""
+        limits = [limit for _, limit in self.history]
+        return {
+            "initial": self.initial,
+            "final": self.limit,
+            "converged": self.converged(),
+            "min": min(limits),
+            "max": max(limits),
+            "decreases": dict(self.decreases),
+            "baseline_latency": self.baseline_latency,
+        }
@@ -0,0 +1,153 @@
+"""
+Write contention analysis for concurrent entry updates
+
+LockSampler polls pg_stat_activity and pg_locks while a write benchmark runs
+and records how many backends wait on what. Lost updates are found after the
+run by treating each entry field as a register: its final value must be one
+written by a request that no other acknowledged write started after, so an
+acknowledged PATCH that was silently overwritten by an older one is caught.
+"""
+
+import threading
+import time
+
+from harness.db import connect
+
+DEFAULT_LOCK_SAMPLE_INTERVAL = 0.1
+
+# Wait events of active backends other than the sampler
+WAIT_EVENTS_QUERY = """
+    SELECT coalesce(wait_event_type, 'CPU'), coalesce(wait_event, 'running'), count(*)
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND state = 'active' AND pid <> pg_backend_pid()
+    GROUP BY 1, 2
+"""
+
+# Lock requests that are not granted yet, by lock type, relation and mode
+WAITING_LOCKS_QUERY = """
+    SELECT locktype, coalesce(relation::regclass::text, ''), mode, count(*)
+    FROM pg_locks
+    WHERE NOT granted AND database = (SELECT oid FROM pg_database WHERE datname = current_database())
+    GROUP BY 1, 2, 3
+"""
+
+
+def deadlock_count(conn):
+    """Deadlocks detected in the current database since statistics were reset"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+def lock_snapshot(conn):
+    """Current wait events and ungranted locks, as {label: backend count}"""
+    with conn.cursor() as cursor:
+        cursor.execute(WAIT_EVENTS_QUERY)
+        wait_events = {f"{kind}:{event}": count for kind, event, count in cursor.fetchall()}
+
+        cursor.execute(WAITING_LOCKS_QUERY)
+        waiting_locks = {" ".join(filter(None, (locktype, relation, mode))): count
+                         for locktype, relation, mode, count in cursor.fetchall()}
+
+    return {"wait_events": wait_events, "waiting_locks": waiting_locks}
+
+
+class LockSampler(threading.Thread):
+    """Background thread that samples lock waits at a short fixed interval"""
+
+    def __init__(self, interval=DEFAULT_LOCK_SAMPLE_INTERVAL, db_config=None, verbose=False):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.db_config = db_config
+        self.verbose = verbose
+        self.samples = []
+        self.deadlocks = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            # Autocommit so statistics views are re-read on every sample
+            conn = connect(self.db_config, autocommit=True)
+        except Exception as e:
+            print(f"Lock sampling disabled: {e}")
+            return
+
+        try:
+            deadlocks_before = deadlock_count(conn)
+            start_time = time.monotonic()
+            while not self._stop_event.is_set():
+                sample = lock_snapshot(conn)
+                sample["offset"] = time.monotonic() - start_time
+                self.samples.append(sample)
+                self._stop_event.wait(self.interval)
+            self.deadlocks = deadlock_count(conn) - deadlocks_before
+        except Exception as e:
+            if self.verbose:
+                print(f"Lock sampling failed: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit"""
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+def summarize_locks(samples, interval):
+    """Backend-seconds spent per wait event and the peak of each waiting lock
+
+    Every sample stands for interval seconds, so a backend seen waiting in n
+    samples waited about n * interval seconds in total.
+    """
+    wait_seconds = {}
+    peak_locks = {}
+    peak_waiters = 0
+    for sample in samples:
+        for event, count in sample["wait_events"].items():
+            wait_seconds[event] = wait_seconds.get(event, 0.0) + count * interval
+        for lock, count in sample["waiting_locks"].items():
+            peak_locks[lock] = max(peak_locks.get(lock, 0), count)
+        peak_waiters = max(peak_waiters, sum(count for event, count in sample["wait_events"].items()
+                                             if event.startswith("Lock:")))
+
+    return {
+        "samples": len(samples),
+        "lock_wait_seconds": sum(seconds for event, seconds in wait_seconds.items() if event.startswith("Lock:")),
+        "peak_lock_waiters": peak_waiters,
+        "wait_events": dict(sorted(wait_seconds.items(), key=lambda item: -item[1])),
+        "waiting_locks": dict(sorted(peak_locks.items(), key=lambda item: -item[1])),
+    }
+
+
+def outcome_unknown(write):
+    """Whether a failed write may still have been applied (no response or a server error)"""
+    return write["status"] != "success" and (write.get("status_code") is None or write["status_code"] >= 500)
+
+
+def lost_updates(writes, final_values):
+    """Fields whose final value no acknowledged or possibly-applied write could have left
+
+    writes are dicts with entry, field, value, start and end; final_values
+    maps (entry, field) to the value read back after the run. A write can be
+    the last one applied unless an acknowledged write started after it ended.
+    """
+    registers = {}
+    for write in writes:
+        if write["status"] == "success" or outcome_unknown(write):
+            registers.setdefault((write["entry"], write["field"]), []).append(write)
+
+    lost = []
+    for key, candidates in registers.items():
+        acknowledged = [w for w in candidates if w["status"] == "success"]
+        if not acknowledged or key not in final_values:
+            continue
+
+        latest_start = max(w["start"] for w in acknowledged)
+        possible = {w["value"] for w in candidates if w["end"] >= latest_start}
+        if final_values[key] not in possible:
+            entry, field = key
+            lost.append({"entry": entry, "field": field, "final": final_values[key],
+                         "possible": sorted(possible, key=repr)})
+    return lost
@@ -0,0 +1,181 @@
+"""
+Synthetic article corpus for benchmarks that need realistic entry content
+
+Articles are generated deterministically from a seed so that repeated runs
+(and different index variants within one run) see exactly the same text.
+Word choice follows a Zipf-like distribution so that common words are common
+and rare words are rare, which matters for search selectivity.
+"""
+
+import random
+import re
+
+# Vocabulary per language. The first words of each list are the most frequent.
+LANGUAGES = {
+    "en": {
+        "words": [
+            "the", "of", "and", "to", "in", "is", "that", "for", "it", "with",
+            "data", "system", "performance", "article", "reading", "database",
+            "service", "cloud", "network", "latency", "request", "server",
+            "browser", "extension", "archive", "library", "research", "history",
+            "science", "language", "climate", "economy", "government",
+            "software", "engineering", "interface", "architecture", "migration",
+            "wallabag", "throughput", "resilience", "observability", "encyclopedia",
+        ],
+        "phrases": ["reading list", "database performance", "cloud run", "open source"],
+    },
+    "fr": {
+        "words": [
+            "le", "la", "de", "et", "les", "des", "un", "une", "pour", "dans",
+            "données", "système", "lecture", "article", "bibliothèque", "recherche",
+            "serveur", "réseau", "histoire", "science", "langue", "économie",
+            "gouvernement", "logiciel", "architecture", "migration", "performance",
+            "climat", "navigateur", "extension", "archive", "encyclopédie",
+        ],
+        "phrases": ["base de données", "liste de lecture", "logiciel libre"],
+    },
+    "de": {
+        "words": [
+            "der", "die", "und", "das", "zu", "den", "von", "mit", "ist", "für",
+            "Daten", "System", "Artikel", "Leseliste", "Datenbank", "Forschung",
+            "Bibliothek", "Netzwerk", "Geschichte", "Wissenschaft", "Sprache",
+            "Wirtschaft", "Regierung", "Software", "Zusammenarbeit", "Architektur",
+            "Leistung", "Klima", "Erweiterung", "Archiv", "Enzyklopädie",
+        ],
+        "phrases": ["freie Software", "verteilte Datenbank"],
+    },
+    "es": {
+        "words": [
+            "el", "la", "de", "que", "y", "en", "los", "del", "las", "por",
+            "datos", "sistema", "artículo", "lectura", "biblioteca", "investigación",
+            "servidor", "red", "historia", "ciencia", "idioma", "economía",
+            "gobierno", "programa", "arquitectura", "rendimiento", "clima",
+            "navegador", "archivo", "enciclopedia",
+        ],
+        "phrases": ["base de datos", "software libre"],
+    },
+    "ja": {
+        # Japanese is written without spaces; tokenizers that split on
+        # whitespace treat a whole sentence as one token.
+        "words": [
+            "の", "に", "は", "を", "た", "が", "で", "て", "と", "し",
+            "データ", "システム", "記事", "読書", "図書館", "研究", "サーバー",
+            "ネットワーク", "歴史", "科学", "言語", "経済", "政府", "性能",
+            "気候", "拡張機能", "アーカイブ", "百科事典",
+        ],
+        "phrases": ["データベース性能", "読書リスト"],
+        "separator": "",
+    },
+}
+
+# Share of generated articles per language
+DEFAULT_LANGUAGE_MIX = {"en": 0.5, "fr": 0.15, "de": 0.15, "es": 0.1, "ja": 0.1}
+
+
+def _zipf_weights(count, exponent=1.1):
+    """Weights where the n-th word is roughly 1/n^s as frequent as the first"""
+    return [1.0 / ((rank + 1) ** exponent) for rank in range(count)]
+
+
+def _sentence(rng, vocab, min_words=6, max_words=18):
+    """Build one sentence from the language vocabulary"""
+    words = vocab["words"]
+    weights = _zipf_weights(len(words))
+    separator = vocab.get("separator", " ")
+
+    tokens = rng.choices(words, weights=weights, k=rng.randint(min_words, max_words))
+
+    # Sprinkle in multi-word phrases so phrase queries have something to match
+    if vocab["phrases"] and rng.random() < 0.2:
+        tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(vocab["phrases"]))
+
+    sentence = separator.join(tokens)
+    terminator = "。" if separator == "" else "."
+    return sentence[:1].upper() + sentence[1:] + terminator
+
+
+def generate_article(rng, language="en", min_paragraphs=3, max_paragraphs=12):
+    """Generate a single article as a dict with title, HTML content and language"""
+    vocab = LANGUAGES[language]
+    separator = vocab.get("separator", " ")
+
+    paragraphs = []
+    for _ in range(rng.randint(min_paragraphs, max_paragraphs)):
+        sentences = [_sentence(rng, vocab) for _ in range(rng.randint(2, 7))]
+        paragraphs.append(f"<p>{separator.join(sentences)}</p>")
+
+    title = _sentence(rng, vocab, min_words=3, max_words=8).rstrip(".。")
+
+    return {
+        "title": title,
+        "content": "\n".join(paragraphs),
+        "language": language,
+    }
+
+
+def generate_corpus(size, seed=42, language_mix=None, url_prefix="https://bench.example.org/article"):
+    """Generate size articles, each with a unique URL, following the language mix"""
+    rng = random.Random(seed)
+    language_mix = language_mix or DEFAULT_LANGUAGE_MIX
+    languages = list(language_mix.keys())
+    weights = list(language_mix.values())
+
+    corpus = []
+    for index in range(size):
+        language = rng.choices(languages, weights=weights, k=1)[0]
+        article = generate_article(rng, language)
+        article["url"] = f"{url_prefix}/{seed}/{index}"
+        corpus.append(article)
+
+    return corpus
+
+
+# Wallabag counts words with preg_split('~([^\p{L}\p{N}\']+)~u', strip_tags($text))
+# and assumes 200 words per minute
+WORDS_PER_MINUTE = 200
+TAG_PATTERN = re.compile(r"<[^>]*>")
+WORD_SEPARATOR_PATTERN = re.compile(r"[^\w']+")
+
+
+def content_of_size(size, seed=42, language="en"):
+    """HTML content of exactly size bytes (UTF-8), built from generated paragraphs
+
+    A pool of generated articles is repeated until the size is reached, so
+    multi-megabyte payloads are cheap to build; the last paragraph is cut
+    to fit. Use a language written with spaces for meaningful word counts.
+    """
+    rng = random.Random(seed)
+    pool = []
+    pool_size = 0
+    while pool_size < min(size, 256 * 1024):
+        paragraphs = generate_article(rng, language)["content"].split("\n")
+        pool.extend(paragraphs)
+        pool_size += sum(len(p.encode("utf-8")) + 1 for p in paragraphs)
+
+    parts = []
+    length = 0
+    index = 0
+    while length < size:
+        paragraph = pool[index % len(pool)]
+        encoded = (paragraph + "\n").encode("utf-8")
+        remaining = size - length
+        if len(encoded) > remaining:
+            # Cut the last paragraph's text, keeping the markup balanced where it fits;
+            # a multi-byte character cut in half is replaced by padding
+            text = paragraph[len("<p>"):-len("</p>")].encode("utf-8")[:max(remaining - len("<p></p>"), 0)]
+            encoded = f"<p>{text.decode('utf-8', 'ignore')}</p>".encode("utf-8").ljust(remaining)[:remaining]
+        parts.append(encoded)
+        length += len(encoded)
+        index += 1
+
+    return b"".join(parts).decode("utf-8", "ignore")
+
+
+def count_words(html):
+    """Word count of HTML content the way Wallabag computes it for the reading time"""
+    return len(WORD_SEPARATOR_PATTERN.split(TAG_PATTERN.sub("", html)))
+
+
+def reading_time(html):
+    """Reading time in minutes Wallabag stores for the content"""
+    return count_words(html) // WORDS_PER_MINUTE
@@ -0,0 +1,179 @@
+"""
+Local web server of generated article pages for clip benchmarks
+
+Wallabag fetches the pages it clips, so clip benchmarks against real sites
+measure the internet as much as Wallabag. This server serves deterministic
+pages from harness.corpus in a few classes that stress different parts of
+the fetch and extraction pipeline, plus valid PNG images for them, and
+counts the requests and bytes it serves.
+
+Wallabag runs in a container, so page URLs use an advertised host the
+container can reach (host.docker.internal, or the docker network gateway
+on Linux) rather than the address the server is bound to.
+"""
+
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness.corpus import generate_article
+
+# Page classes, roughly following the site categories of TEST_ARTICLES
+CORPUS_CLASSES = {
+    "text": "short article, one preview image",
+    "long": "long-form article of 60-120 paragraphs",
+    "images": "article with many inline images",
+    "complex": "article inside navigation, sidebars, comments and scripts",
+    "script": "content rendered by JavaScript, nothing to extract",
+}
+
+# Name containers reach the docker host by (mapped to host-gateway on Linux)
+DEFAULT_CORPUS_HOST = "host.docker.internal"
+
+DEFAULT_IMAGE_COUNT = 12
+DEFAULT_IMAGE_SIZE = (320, 240)
+
+
+def png_image(width, height, seed=0):
+    """Valid RGB PNG of random noise; noise does not compress, so it is ~3 bytes per pixel"""
+    rng = random.Random(seed)
+    rows = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b""))
+
+
+def _image_tag(base, name, size):
+    width, height = size
+    return f'<figure><img src="{base}/images/{name}.png" width="{width}" height="{height}" alt="{name}"></figure>'
+
+
+def page_html(corpus_class, index, base, seed=42, image_count=DEFAULT_IMAGE_COUNT, image_size=DEFAULT_IMAGE_SIZE):
+    """HTML page of one corpus class; the same arguments always give the same page"""
+    rng = random.Random(f"{seed}-{corpus_class}-{index}")
+    name = f"{corpus_class}-{index}"
+    paragraphs = (60, 120) if corpus_class == "long" else (3, 10)
+    article = generate_article(rng, "en", *paragraphs)
+    body = article["content"]
+
+    if corpus_class == "images":
+        parts = body.split("\n")
+        for i in range(image_count):
+            parts.insert(rng.randrange(len(parts) + 1), _image_tag(base, f"{name}-{i}", image_size))
+        body = "\n".join(parts)
+
+    body = f"<article><h1>{article['title']}</h1>\n{body}\n</article>"
+
+    if corpus_class == "complex":
+        links = "".join(f'<li><a href="{base}/text/{rng.randrange(1000)}.html">Section {i}</a></li>' for i in range(80))
+        comments = "".join(f'<div class="comment"><p>{generate_article(rng, "en", 1, 1)["content"]}</p></div>'
+                           for _ in range(30))
+        body = (f'<header><nav><ul>{links}</ul></nav></header>'
+                f'<script>window.analytics = {{"page": "{name}"}};</script>'
+                f'<div class="layout"><aside><ul>{links}</ul></aside><main>{body}</main>'
+                f'<aside class="related"><ul>{links}</ul></aside></div>'
+                f'<section class="comments">{comments}</section><footer><ul>{links}</ul></footer>')
+    elif corpus_class == "script":
+        escaped = body.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("/", "\\/")
+        body = f'<div id="app"></div><script>document.getElementById("app").innerHTML = "{escaped}";</script>'
+
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{article["title"]}</title>'
+            f'<meta property="og:title" content="{article["title"]}">'
+            f'<meta property="og:image" content="{base}/images/{name}-preview.png">'
+            f'</head><body>{body}</body></html>')
+
+
+class CorpusRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        corpus = self.server.corpus
+        path = self.path.split("?", 1)[0].strip("/")
+        parts = path.split("/")
+
+        if len(parts) == 2 and parts[0] == "images" and parts[1].endswith(".png"):
+            kind, content_type = "image", "image/png"
+            body = corpus.image(parts[1][:-len(".png")])
+        elif len(parts) == 2 and parts[0] in CORPUS_CLASSES and parts[1].endswith(".html"):
+            kind, content_type = "page", "text/html; charset=utf-8"
+            time.sleep(corpus.page_delay)
+            base = f"http://{self.headers.get('Host') or corpus.advertised_address}"
+            body = page_html(parts[0], parts[1][:-len(".html")], base, corpus.seed,
+                             corpus.image_count, corpus.image_size).encode("utf-8")
+        else:
+            self.send_error(404)
+            return
+
+        corpus.count(kind, len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CorpusServer:
+    """Threaded server of corpus pages and images with request and byte counters"""
+
+    def __init__(self, host="0.0.0.0", port=0, advertised_host=DEFAULT_CORPUS_HOST, seed=42,
+                 page_delay=0.0, image_count=DEFAULT_IMAGE_COUNT, image_size=DEFAULT_IMAGE_SIZE):
+        self.advertised_host = advertised_host
+        self.seed = seed
+        self.page_delay = page_delay
+        self.image_count = image_count
+        self.image_size = image_size
+
+        self._lock = threading.Lock()
+        self._images = {}
+        self._server = ThreadingHTTPServer((host, port), CorpusRequestHandler)
+        self._server.daemon_threads = True
+        self._server.corpus = self
+        self.port = self._server.server_address[1]
+        self.reset_counters()
+
+    @property
+    def advertised_address(self):
+        return f"{self.advertised_host}:{self.port}"
+
+    def page_url(self, corpus_class, index):
+        return f"http://{self.advertised_address}/{corpus_class}/{index}.html"
+
+    def image(self, name):
+        """PNG bytes for an image name; names of one size share the bytes but not the URL"""
+        size = DEFAULT_IMAGE_SIZE if name.endswith("-preview") else self.image_size
+        with self._lock:
+            if size not in self._images:
+                self._images[size] = png_image(*size, seed=self.seed)
+            return self._images[size]
+
+    def count(self, kind, size):
+        with self._lock:
+            self.counters[kind]["requests"] += 1
+            self.counters[kind]["bytes"] += size
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = {"page": {"requests": 0, "bytes": 0}, "image": {"requests": 0, "bytes": 0}}
+
+    def stats(self):
+        with self._lock:
+            return {kind: dict(counter) for kind, counter in self.counters.items()}
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
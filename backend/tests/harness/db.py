@@ -0,0 +1,53 @@
+"""
+Direct PostgreSQL access for benchmarks that inspect or seed the database
+"""
+
+import os
+from contextlib import contextmanager
+
+import psycopg2
+
+
+def get_db_config(database=None):
+    """Get database configuration from environment variables"""
+    return {
+        'host': os.getenv('TEST_DATABASE_HOST', 'localhost'),
+        'port': os.getenv('TEST_DATABASE_PORT', '5432'),
+        'database': database or os.getenv('TEST_DATABASE_NAME', 'wallabag'),
+        'user': os.getenv('TEST_DATABASE_USER', 'wallabag'),
+        'password': os.getenv('TEST_DATABASE_PASSWORD', 'wallabag')
+    }
+
+
+def connect(db_config=None, autocommit=False):
+    """Open a psycopg2 connection using the given (or environment) configuration"""
+    db_config = db_config or get_db_config()
+    conn = psycopg2.connect(
+        host=db_config['host'],
+        port=db_config['port'],
+        database=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password']
+    )
+    conn.autocommit = autocommit
+    return conn
+
+
+@contextmanager
+def scratch_database(name, db_config=None, keep=False):
+    """Create a throwaway database next to the configured one and yield its config"""
+    db_config = db_config or get_db_config()
+    admin = connect(db_config, autocommit=True)
+
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+            cursor.execute(f'CREATE DATABASE "{name}"')
+
+        scratch_config = dict(db_config, database=name)
+        yield scratch_config
+    finally:
+        if not keep:
+            with admin.cursor() as cursor:
+                cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        admin.close()
@@ -0,0 +1,114 @@
+"""
+Thin wrappers around the docker CLI for benchmarks that manage local containers
+"""
+
+import subprocess
+import time
+
+import requests
+
+# Container settings mirroring backend/docker-compose.yml
+DEFAULT_IMAGE = "self-wallabag:latest"
+DEFAULT_NETWORK = "backend_default"
+DEFAULT_CONTAINER_ENV = {
+    "WALLABAG_DATABASE_DRIVER": "pdo_pgsql",
+    "WALLABAG_DATABASE_HOST": "postgres",
+    "WALLABAG_DATABASE_PORT": "5432",
+    "WALLABAG_DATABASE_NAME": "wallabag",
+    "WALLABAG_DATABASE_USER": "wallabag",
+    "WALLABAG_DATABASE_PASSWORD": "wallabag",
+    "WALLABAG_SECRET": "wallabag_sweep_secret",
+    "WALLABAG_DOMAIN": "localhost",
+}
+
+# Application root inside the Wallabag image
+WALLABAG_ROOT = "/var/www/html"
+
+
+class DockerError(Exception):
+    """Raised when a docker command fails"""
+
+
+def docker(*args, timeout=120, check=True):
+    """Run a docker CLI command and return its stdout"""
+    try:
+        completed = subprocess.run(
+            ["docker", *args], capture_output=True, text=True, timeout=timeout
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        raise DockerError(f"docker {args[0]} failed: {e}")
+
+    if check and completed.returncode != 0:
+        raise DockerError(f"docker {' '.join(args)} failed: {completed.stderr.strip()}")
+
+    return completed.stdout.strip()
+
+
+def run_container(image, name, ports=None, env=None, env_file=None, network=None,
+                  cpus=None, memory=None, extra_args=None):
+    """Start a detached container and return its ID"""
+    args = ["run", "-d", "--name", name]
+
+    for host_port, container_port in (ports or {}).items():
+        args += ["-p", f"{host_port}:{container_port}"]
+    for key, value in (env or {}).items():
+        args += ["-e", f"{key}={value}"]
+    if env_file:
+        args += ["--env-file", env_file]
+    if network:
+        args += ["--network", network]
+    if cpus is not None:
+        args += ["--cpus", str(cpus)]
+    if memory is not None:
+        # Swap equal to memory disables swapping, like the Cloud Run memory limit
+        args += ["--memory", str(memory), "--memory-swap", str(memory)]
+
+    args += list(extra_args or [])
+    args.append(image)
+
+    return docker(*args)
+
+
+def remove_container(name):
+    """Force-remove a container, ignoring containers that do not exist"""
+    docker("rm", "-f", name, check=False)
+
+
+def exec_in_container(name, command):
+    """Run a shell command inside a running container"""
+    return docker("exec", name, "sh", "-c", command)
+
+
+def start_wallabag(image, name, port, db_port, db_host="host.docker.internal", timeout=180):
+    """Start Wallabag with its database at db_host:db_port, by default a port on the docker host
+
+    Returns the base URL once the container answers HTTP.
+    """
+    remove_container(name)
+    env = dict(DEFAULT_CONTAINER_ENV, WALLABAG_DATABASE_HOST=db_host, WALLABAG_DATABASE_PORT=str(db_port))
+    run_container(image, name, ports={port: 80}, env=env,
+                  extra_args=["--add-host", "host.docker.internal:host-gateway"])
+    base_url = f"http://localhost:{port}"
+    if wait_for_http(base_url, timeout=timeout) is None:
+        raise DockerError(f"{name} did not become ready")
+    return base_url
+
+
+def bridge_gateway(network="bridge"):
+    """Host address on a docker network; --add-host NAME:host-gateway resolves to it on Linux"""
+    return docker("network", "inspect", network, "--format", "{{range .IPAM.Config}}{{.Gateway}}{{end}}") or None
+
+
+def wait_for_http(url, timeout=180, interval=1):
+    """Wait until url answers without a server error; return seconds waited or None"""
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < timeout:
+        try:
+            response = requests.get(url, timeout=5)
+            if response.status_code < 500:
+                return time.monotonic() - start_time
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(interval)
+
+    return None
@@ -0,0 +1,64 @@
+"""
+HTTP content codings used by the timing client and the compression benchmark
+
+gzip and deflate come from zlib; br and zstd need the optional brotli and
+zstandard packages and are only offered when those are installed.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default compression levels of the servers that would produce each coding:
+# Apache mod_deflate (zlib default), mod_brotli (quality 5), zstd CLI/nginx (3)
+DEFAULT_LEVELS = {"gzip": 6, "deflate": 6, "br": 5, "zstd": 3}
+
+ENCODINGS = ("identity", "gzip", "deflate", "br", "zstd")
+
+
+def available_encodings():
+    """Content codings this client can decode"""
+    return [e for e in ENCODINGS
+            if (e != "br" or brotli is not None) and (e != "zstd" or zstandard is not None)]
+
+
+def decode(body, encoding):
+    """Undo a content coding; unknown codings are returned unchanged"""
+    encoding = (encoding or "identity").lower()
+    if encoding == "gzip":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(body)
+    if encoding == "zstd" and zstandard is not None:
+        # Streaming frames may not record the content size, so use a reader
+        with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+            return reader.read()
+    return body
+
+
+def encode(body, encoding, level=None):
+    """Apply a content coding, as a server would"""
+    level = level if level is not None else DEFAULT_LEVELS.get(encoding)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    return body
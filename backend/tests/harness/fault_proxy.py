@@ -0,0 +1,272 @@
+"""
+Fault-injecting TCP proxy for the database and client links
+
+FaultProxy forwards a local port to a target (Wallabag to Postgres, or the
+load client to Wallabag). It can add latency, jitter, a bandwidth cap and
+random connection resets in both directions, or refuse new connections
+while it is "down". Settings can be changed while connections are open, so
+one proxy serves a whole sweep.
+
+latency is the one-way delay per direction: a request/response exchange
+gains 2 * latency. Data is delayed, not serialised, so throughput only
+drops when a bandwidth cap is set. Chunks never overtake each other, so
+jitter cannot reorder a stream.
+
+The proxy also counts round trips: every time the client starts sending
+again after the server has answered. For Postgres that is one per query
+(or per Sync in the extended protocol), plus the startup and authentication
+exchanges of each new connection.
+"""
+
+import queue
+import random
+import socket
+import struct
+import threading
+import time
+
+from harness.docker import DockerError, bridge_gateway
+
+# Loopback only by default: the proxy relays to the database without authentication of its own
+DEFAULT_PROXY_PORT = 15432
+DEFAULT_PROXY_LISTEN = f"127.0.0.1:{DEFAULT_PROXY_PORT}"
+DEFAULT_DB_TARGET = "localhost:5432"
+
+CHUNK_SIZE = 65536
+CONNECT_TIMEOUT = 10
+
+SETTINGS = ("latency", "jitter", "bandwidth", "reset_probability", "down")
+
+COUNTERS = ("connections", "refused", "resets", "round_trips", "bytes_up", "bytes_down")
+
+
+def parse_address(value):
+    """Split 'host:port' into (host, port)"""
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def proxy_listen_address(listen=None, for_containers=False):
+    """Address a database proxy should listen on, host:port
+
+    An explicit address wins. A proxy that local containers must reach
+    listens on the docker bridge gateway, the address host-gateway maps to,
+    instead of on every interface.
+    """
+    if listen:
+        return listen
+    if for_containers:
+        gateway = bridge_gateway()
+        if not gateway:
+            raise DockerError("could not find the docker bridge gateway; pass --proxy-listen")
+        return f"{gateway}:{DEFAULT_PROXY_PORT}"
+    return DEFAULT_PROXY_LISTEN
+
+
+class Link:
+    """One proxied connection: client socket, upstream socket and their pumps"""
+
+    def __init__(self, proxy, client, upstream):
+        self.proxy = proxy
+        self.client = client
+        self.upstream = upstream
+        self.round_trips = 0
+        self.last_direction = None
+        self.closed = threading.Event()
+        self._open_pipes = 2
+        self._lock = threading.Lock()
+
+    def start(self):
+        for source, target, direction in ((self.client, self.upstream, "up"), (self.upstream, self.client, "down")):
+            chunks = queue.Queue()
+            threading.Thread(target=self._read, args=(source, chunks, direction), daemon=True).start()
+            threading.Thread(target=self._write, args=(target, chunks), daemon=True).start()
+
+    def _read(self, source, chunks, direction):
+        """Receive chunks and schedule their delivery time"""
+        release = 0
+        while True:
+            try:
+                data = source.recv(CHUNK_SIZE)
+            except OSError:
+                data = b""
+            if not data:
+                chunks.put((None, None))
+                return
+
+            with self._lock:
+                turn = direction == "up" and self.last_direction != "up"
+                self.last_direction = direction
+            if turn:
+                self.round_trips += 1
+                self.proxy.count("round_trips")
+            self.proxy.count(f"bytes_{direction}", len(data))
+
+            latency, jitter = self.proxy.latency, self.proxy.jitter
+            delay = max(0.0, latency + (self.proxy.random.uniform(-jitter, jitter) if jitter else 0))
+            # Never deliver before the previous chunk: jitter must not reorder the stream
+            release = max(release, time.monotonic() + delay)
+            chunks.put((release, data))
+
+            if self.proxy.reset_probability and self.proxy.random.random() < self.proxy.reset_probability:
+                self.reset()
+
+    def _write(self, target, chunks):
+        """Deliver chunks at their release time, paced by the bandwidth cap"""
+        busy_until = 0
+        while True:
+            release, data = chunks.get()
+            if data is None:
+                # Pass the EOF on, unless this is a reset (which must not send a FIN first)
+                if not self.closed.is_set():
+                    try:
+                        target.shutdown(socket.SHUT_WR)
+                    except OSError:
+                        pass
+                break
+
+            start = max(release, busy_until)
+            bandwidth = self.proxy.bandwidth
+            busy_until = start + (len(data) / bandwidth if bandwidth else 0)
+            wait = busy_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                target.sendall(data)
+            except OSError:
+                # The receiving side is gone; tear down the other direction too
+                self.close()
+                return
+
+        with self._lock:
+            self._open_pipes -= 1
+            done = self._open_pipes == 0
+        if done:
+            self.close()
+
+    def reset(self):
+        """Abort both sides with a TCP RST instead of an orderly close"""
+        if self.closed.is_set():
+            return
+        self.proxy.count("resets")
+        for sock in (self.client, self.upstream):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            except OSError:
+                pass
+        self.close()
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        for sock in (self.client, self.upstream):
+            # A blocked recv() keeps the socket open past close(); SHUT_RD wakes it
+            # without sending anything, so a reset still goes out as RST
+            for action in (lambda: sock.shutdown(socket.SHUT_RD), sock.close):
+                try:
+                    action()
+                except OSError:
+                    pass
+        self.proxy.unregister(self)
+
+
+class FaultProxy:
+    """Threaded TCP proxy from (listen_host, listen_port) to (target_host, target_port)
+
+    latency and jitter are in seconds, bandwidth in bytes per second per
+    direction (None for unlimited), reset_probability per forwarded chunk.
+    While down is set, new connections are reset as soon as they are accepted.
+    """
+
+    def __init__(self, target_host, target_port, listen_host="127.0.0.1", listen_port=0,
+                 latency=0.0, jitter=0.0, bandwidth=None, reset_probability=0.0, down=False, seed=None):
+        self.target = (target_host, int(target_port))
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.reset_probability = reset_probability
+        self.down = down
+        self.random = random.Random(seed)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+        self._links = set()
+        self._lock = threading.Lock()
+        self._sock = socket.create_server((listen_host, listen_port))
+        self._stopped = threading.Event()
+        self.host, self.port = self._sock.getsockname()[:2]
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def configure(self, **settings):
+        """Change link settings; open connections pick them up with their next chunk"""
+        for name, value in settings.items():
+            if name not in SETTINGS:
+                raise ValueError(f"Unknown proxy setting: {name}")
+            setattr(self, name, value)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """Counters plus the number of open connections"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["active"] = len(self._links)
+        return stats
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._sock.close()
+        self.reset_connections()
+
+    def reset_connections(self):
+        """Sever every open connection, as a database restart or failover would"""
+        with self._lock:
+            links = list(self._links)
+        for link in links:
+            link.reset()
+        return len(links)
+
+    def unregister(self, link):
+        with self._lock:
+            self._links.discard(link)
+
+    def _accept(self):
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._connect, args=(client,), daemon=True).start()
+
+    def _connect(self, client):
+        if self.down:
+            self.count("refused")
+            client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            client.close()
+            return
+
+        try:
+            upstream = socket.create_connection(self.target, timeout=CONNECT_TIMEOUT)
+        except OSError:
+            self.count("refused")
+            client.close()
+            return
+
+        upstream.settimeout(None)
+        for sock in (client, upstream):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        link = Link(self, client, upstream)
+        with self._lock:
+            self._links.add(link)
+            self.counters["connections"] += 1
+        link.start()
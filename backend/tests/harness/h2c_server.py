@@ -0,0 +1,185 @@
+"""
+Local stand-in API server speaking HTTP/1.1 and h2c on one port
+
+Used to check the HTTP/2 client paths without a Cloud Run deployment. Each
+connection is sniffed for the HTTP/2 connection preface: h2c (prior
+knowledge) connections are served by the h2 package with every stream
+handled on its own thread, anything else by http.server as HTTP/1.1
+keep-alive. Every request sleeps for a fixed service time and returns a
+small JSON body, so the difference between the protocols is in connection
+handling only.
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+DEFAULT_SERVICE_TIME = 0.02
+DEFAULT_BODY_SIZE = 2048
+
+
+def response_body(method, path, size):
+    """JSON body of about size bytes"""
+    body = {"id": 1, "method": method, "path": path, "padding": ""}
+    body["padding"] = "x" * max(0, size - len(json.dumps(body)))
+    return json.dumps(body).encode("utf-8")
+
+
+class H2cStandInServer:
+    """Threaded server answering every request with 200 after service_time"""
+
+    def __init__(self, host="127.0.0.1", port=0, service_time=DEFAULT_SERVICE_TIME, body_size=DEFAULT_BODY_SIZE):
+        if h2 is None:
+            raise RuntimeError("The h2c stand-in server needs the h2 package (pip install h2)")
+        self.service_time = service_time
+        self.body_size = body_size
+        self.counters = {"HTTP/1.1": {"connections": 0, "requests": 0}, "HTTP/2": {"connections": 0, "requests": 0}}
+
+        self._lock = threading.Lock()
+        self._sock = socket.create_server((host, port))
+        self._stopped = threading.Event()
+        self.host, self.port = self._sock.getsockname()[:2]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def count(self, protocol, name):
+        with self._lock:
+            self.counters[protocol][name] += 1
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._sock.close()
+
+    def _accept(self):
+        while not self._stopped.is_set():
+            try:
+                conn, address = self._sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn, address), daemon=True).start()
+
+    def _serve(self, conn, address):
+        try:
+            preface = conn.recv(len(H2_PREFACE), socket.MSG_PEEK | socket.MSG_WAITALL)
+            if preface == H2_PREFACE:
+                self.count("HTTP/2", "connections")
+                H2Connection(self, conn).serve()
+            else:
+                self.count("HTTP/1.1", "connections")
+                Http1Handler(conn, address, self)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.count("HTTP/1.1", "requests")
+        time.sleep(self.server.service_time)
+
+        body = response_body(self.command, self.path, self.server.body_size)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = respond
+
+
+class H2Connection:
+    """One h2c connection; streams are answered concurrently"""
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.requests = {}
+        # Guards the h2 state machine and the socket; notified when flow-control windows open
+        self.window = threading.Condition()
+
+    def flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+    def serve(self):
+        with self.window:
+            self.conn.initiate_connection()
+            self.flush()
+
+        while True:
+            data = self.sock.recv(65535)
+            if not data:
+                return
+            with self.window:
+                events = self.conn.receive_data(data)
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        self.requests[event.stream_id] = dict(event.headers)
+                    elif isinstance(event, h2.events.DataReceived):
+                        self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers = self.requests.pop(event.stream_id, {})
+                        threading.Thread(target=self.respond, args=(event.stream_id, headers), daemon=True).start()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        self.flush()
+                        return
+                self.window.notify_all()
+                self.flush()
+
+    def respond(self, stream_id, headers):
+        self.server.count("HTTP/2", "requests")
+        time.sleep(self.server.service_time)
+
+        body = response_body(headers.get(":method"), headers.get(":path"), self.server.body_size)
+        with self.window:
+            try:
+                self.send(stream_id, body)
+            except (h2.exceptions.ProtocolError, OSError):
+                # The client reset the stream or went away
+                pass
+
+    def send(self, stream_id, body):
+        self.conn.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "application/json"),
+            ("content-length", str(len(body))),
+        ])
+        while body:
+            # Wait for the client's WINDOW_UPDATE when the flow-control window is used up
+            while self.conn.local_flow_control_window(stream_id) == 0:
+                self.flush()
+                self.window.wait()
+            size = min(len(body), self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+            self.conn.send_data(stream_id, body[:size], end_stream=size == len(body))
+            body = body[size:]
+        self.flush()
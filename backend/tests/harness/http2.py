@@ -0,0 +1,131 @@
+"""
+HTTP/2 clients for the load engine and the API client
+
+Both need the optional httpx and h2 packages. Requests are multiplexed as
+concurrent streams over one connection per origin instead of a keep-alive
+pool of HTTP/1.1 connections. Plain http:// URLs use h2c with prior
+knowledge, which is what Cloud Run's end-to-end HTTP/2 sends to the
+container; https:// URLs negotiate h2 through ALPN.
+
+Http2Client mirrors TimedHttpClient and fills the same phases from httpx
+trace events. DNS resolution happens inside the TCP connect there, so it is
+reported as part of "connect".
+"""
+
+import threading
+import time
+
+import requests
+
+from harness.encodings import decode
+from harness.http_timing import DEFAULT_TIMEOUT, PHASES, TimedResponse
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx silently needs it for http2=True
+except ImportError:
+    httpx = None
+
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def http2_available():
+    """Whether httpx and h2 are installed"""
+    return httpx is not None
+
+
+def new_client(timeout):
+    if httpx is None:
+        raise RuntimeError("HTTP/2 needs the httpx and h2 packages (pip install httpx h2)")
+    # http1=False: h2c with prior knowledge for http://, h2-only ALPN for https://
+    return httpx.Client(http1=False, http2=True, timeout=timeout)
+
+
+class Http2Client:
+    """HTTP/2 client with per-phase timings, shared by all threads over one connection"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, accept_encoding=ACCEPT_ENCODING):
+        self.timeout = timeout
+        self.accept_encoding = accept_encoding
+        self.client = new_client(timeout)
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, params=None, json_body=None, data=None):
+        """Send a request and return a TimedResponse"""
+        timings = dict.fromkeys(PHASES, 0.0)
+        marks = {}
+
+        def trace(event, info):
+            marks[event] = time.perf_counter()
+
+        request_headers = {"Accept-Encoding": self.accept_encoding}
+        request_headers.update(headers or {})
+
+        try:
+            with self.client.stream(method, url, headers=request_headers, params=params, json=json_body,
+                                    content=data, extensions={"trace": trace}) as response:
+                start = time.perf_counter()
+                raw = b"".join(response.iter_raw())
+                timings["transfer"] = time.perf_counter() - start
+        except httpx.TransportError as e:
+            raise ConnectionError(f"{type(e).__name__}: {e}") from e
+
+        reused = "connection.connect_tcp.started" not in marks
+        if not reused:
+            with self._lock:
+                self.connections_opened += 1
+            timings["connect"] = marks["connection.connect_tcp.complete"] - marks["connection.connect_tcp.started"]
+            if "connection.start_tls.started" in marks:
+                timings["tls"] = marks["connection.start_tls.complete"] - marks["connection.start_tls.started"]
+        sent = marks.get("http2.send_request_headers.started")
+        received = marks.get("http2.receive_response_headers.complete")
+        if sent and received:
+            timings["ttfb"] = received - sent
+
+        timings["total"] = sum(timings[phase] for phase in PHASES)
+        encoding = response.headers.get("Content-Encoding")
+        start = time.perf_counter()
+        content = decode(raw, encoding)
+        timings["decode"] = time.perf_counter() - start
+        return TimedResponse(response.status_code, response.headers, content, len(raw), timings, reused, encoding)
+
+    def close(self):
+        self.client.close()
+
+
+class Http2Session:
+    """Stand-in for requests.Session that sends requests over HTTP/2
+
+    Responses are converted to requests.Response and transport errors to
+    requests exceptions, so ApiClient callers work unchanged.
+    """
+
+    def __init__(self, timeout=None):
+        self.client = new_client(timeout)
+
+    def mount(self, prefix, adapter):
+        """Connection pool adapters do not apply: streams share one connection"""
+
+    def request(self, method, url, headers=None, params=None, json=None, data=None, timeout=None):
+        try:
+            reply = self.client.request(method, url, headers=headers, params=params, json=json, data=data,
+                                        timeout=timeout if timeout is not None else self.client.timeout)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.reason = reply.reason_phrase
+        response.headers.update(reply.headers)
+        response._content = reply.content
+        response.url = str(reply.url)
+        response.encoding = reply.encoding
+        response.elapsed = reply.elapsed
+        response.http_version = reply.http_version
+        return response
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,185 @@
+"""
+Content-addressed HTTP response cache for the API client
+
+Cached GET responses are revalidated with If-None-Match/If-Modified-Since,
+so a 304 reuses the stored body. Bodies are stored once per SHA-256 digest,
+which lets the cache also count 200 responses whose body did not change:
+the bandwidth conditional requests would save if the server supported them.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Response headers kept with a cached body and replayed on a 304
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+COUNTERS = ("requests", "hits", "revalidated", "misses", "unchanged", "stored", "evictions",
+            "bytes_received", "bytes_saved", "bytes_redundant")
+
+
+def freshness_lifetime(cache_control):
+    """Seconds a response may be reused without revalidation (0 when it must be revalidated)"""
+    if not cache_control:
+        return 0
+    directives = cache_control.lower()
+    if "no-cache" in directives or "no-store" in directives:
+        return 0
+    match = re.search(r"max-age=(\d+)", directives)
+    return int(match.group(1)) if match else 0
+
+
+class CachedResponse:
+    """Validators and content digest of one cached request"""
+
+    def __init__(self, status_code, headers, digest, size, stored_at):
+        self.status_code = status_code
+        self.headers = headers
+        self.digest = digest
+        self.size = size
+        self.stored_at = stored_at
+
+    @property
+    def etag(self):
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.headers.get("Last-Modified")
+
+    def is_fresh(self, now):
+        return now - self.stored_at < freshness_lifetime(self.headers.get("Cache-Control"))
+
+
+class ResponseCache:
+    """Thread-safe LRU of GET responses, bodies stored by content digest
+
+    max_bytes bounds the total size of stored bodies; None means unbounded.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+        self._entries = OrderedDict()
+        self._bodies = {}
+        self._body_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None, headers=None):
+        """Cache key of a request; credentials are part of it so users never share entries"""
+        credentials = ""
+        if headers:
+            credentials = headers.get("Authorization") or headers.get("X-API-Key") or ""
+        query = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return url, tuple(query), hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+    def lookup(self, key):
+        """Cached record for key, marked most recently used"""
+        with self._lock:
+            self.counters["requests"] += 1
+            record = self._entries.get(key)
+            if record is not None:
+                self._entries.move_to_end(key)
+            return record
+
+    def conditional_headers(self, record):
+        """Validators to send when revalidating record"""
+        headers = {}
+        if record.etag:
+            headers["If-None-Match"] = record.etag
+        if record.last_modified:
+            headers["If-Modified-Since"] = record.last_modified
+        return headers
+
+    def body(self, record):
+        """Stored body of record, or None once it has been evicted"""
+        with self._lock:
+            stored = self._bodies.get(record.digest)
+            return stored[0] if stored else None
+
+    def record_hit(self, record):
+        """A fresh record was served without contacting the server"""
+        with self._lock:
+            self.counters["hits"] += 1
+            self.counters["bytes_saved"] += record.size
+
+    def record_revalidated(self, key, record, headers):
+        """The server answered 304; refresh the record's validators and age"""
+        with self._lock:
+            self.counters["revalidated"] += 1
+            self.counters["bytes_saved"] += record.size
+            for name in STORED_HEADERS:
+                if name in headers:
+                    record.headers[name] = headers[name]
+            record.stored_at = time.monotonic()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def store(self, key, status_code, headers, content):
+        """Record a full 200 response"""
+        digest = hashlib.sha256(content).hexdigest()
+        size = len(content)
+
+        with self._lock:
+            self.counters["bytes_received"] += size
+            previous = self._entries.get(key)
+            if previous is not None and previous.digest == digest:
+                self.counters["unchanged"] += 1
+                self.counters["bytes_redundant"] += size
+            else:
+                self.counters["misses"] += 1
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                if previous is not None:
+                    self._remove(key)
+                return
+
+            if previous is not None:
+                self._remove(key)
+            self._entries[key] = CachedResponse(
+                status_code,
+                {name: headers[name] for name in STORED_HEADERS if name in headers},
+                digest, size, time.monotonic()
+            )
+            self._add_body(digest, content)
+            self.counters["stored"] += 1
+            self._evict()
+
+    def invalidate(self, url):
+        """Drop every cached response for url or resources below it"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == url or k[0].startswith(url.rstrip("/") + "/")]:
+                self._remove(key)
+
+    def _add_body(self, digest, content):
+        if digest in self._bodies:
+            self._bodies[digest][1] += 1
+        else:
+            self._bodies[digest] = [content, 1]
+            self._body_bytes += len(content)
+
+    def _remove(self, key):
+        record = self._entries.pop(key)
+        body = self._bodies[record.digest]
+        body[1] -= 1
+        if body[1] == 0:
+            del self._bodies[record.digest]
+            self._body_bytes -= record.size
+
+    def _evict(self):
+        while self.max_bytes is not None and self._body_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        """Counters plus the current size of the cache"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bodies"] = len(self._bodies)
+            stats["body_bytes"] = self._body_bytes
+        return stats
@@ -0,0 +1,179 @@
+"""
+HTTP client that records per-phase request timings
+
+requests/urllib3 only expose the total elapsed time, so this client drives the
+socket, TLS handshake and http.client itself and timestamps each phase with
+time.perf_counter():
+
+- dns: getaddrinfo for the host
+- connect: TCP handshake
+- tls: TLS handshake (0 for plain HTTP)
+- ttfb: from sending the request until the status line and headers arrived
+- transfer: reading the response body
+
+Decompressing the body is timed separately as "decode", outside the phases.
+Reused keep-alive connections report 0 for dns/connect/tls. Connections are
+pooled per thread so the client can be shared by a ThreadPoolExecutor; close()
+closes the pools of every thread, so call it once the workers are done.
+"""
+
+import http.client
+import json
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from harness.encodings import decode
+
+DEFAULT_TIMEOUT = 60
+
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+
+
+class TimedResponse:
+    """Minimal response object mirroring the parts of requests.Response we use"""
+
+    def __init__(self, status_code, headers, content, wire_bytes, timings, reused, content_encoding=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.wire_bytes = wire_bytes
+        self.timings = timings
+        self.reused = reused
+        self.content_encoding = content_encoding or "identity"
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TimedHttpClient:
+    """HTTP/1.1 client with per-phase timings and optional keep-alive"""
+
+    def __init__(self, keep_alive=True, timeout=DEFAULT_TIMEOUT, accept_encoding="gzip, deflate"):
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.accept_encoding = accept_encoding
+        self._local = threading.local()
+        self._pools = []
+        self._pools_lock = threading.Lock()
+
+    def _pool(self):
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+            with self._pools_lock:
+                self._pools.append(self._local.connections)
+        return self._local.connections
+
+    def _open(self, scheme, host, port, timings):
+        """Resolve, connect and (for https) handshake; fill in the timings"""
+        start = time.perf_counter()
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        timings["dns"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sock = None
+        last_error = None
+        for family, socktype, proto, _, address in addresses:
+            try:
+                sock = socket.socket(family, socktype, proto)
+                sock.settimeout(self.timeout)
+                sock.connect(address)
+                break
+            except OSError as e:
+                last_error = e
+                sock.close()
+                sock = None
+        if sock is None:
+            raise last_error or OSError(f"Could not connect to {host}:{port}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        timings["connect"] = time.perf_counter() - start
+
+        timings["tls"] = 0.0
+        if scheme == "https":
+            start = time.perf_counter()
+            context = ssl.create_default_context()
+            sock = context.wrap_socket(sock, server_hostname=host)
+            timings["tls"] = time.perf_counter() - start
+
+        connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        connection.sock = sock
+        return connection
+
+    def request(self, method, url, headers=None, params=None, json_body=None, data=None):
+        """Send a request and return a TimedResponse"""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+
+        path = parts.path or "/"
+        query = parts.query
+        if params:
+            query = "&".join(q for q in [query, urlencode(params, doseq=True)] if q)
+        if query:
+            path = f"{path}?{query}"
+
+        body = data
+        request_headers = {"Accept-Encoding": self.accept_encoding, "Host": parts.netloc}
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            request_headers["Content-Type"] = "application/json"
+        request_headers.update(headers or {})
+        if not self.keep_alive:
+            request_headers["Connection"] = "close"
+
+        key = (scheme, host, port)
+        pool = self._pool()
+
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            timings = dict.fromkeys(PHASES, 0.0)
+            connection = pool.pop(key, None) if self.keep_alive else None
+            reused = connection is not None
+            if connection is None:
+                connection = self._open(scheme, host, port, timings)
+
+            try:
+                start = time.perf_counter()
+                connection.request(method, path, body=body, headers=request_headers)
+                response = connection.getresponse()
+                timings["ttfb"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                raw = response.read()
+                timings["transfer"] = time.perf_counter() - start
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+            if self.keep_alive and not response.will_close:
+                pool[key] = connection
+            else:
+                connection.close()
+
+            timings["total"] = sum(timings[phase] for phase in PHASES)
+            encoding = response.getheader("Content-Encoding")
+            start = time.perf_counter()
+            content = decode(raw, encoding)
+            timings["decode"] = time.perf_counter() - start
+            return TimedResponse(response.status, response.msg, content, len(raw), timings, reused, encoding)
+
+    def close(self):
+        """Close the pooled connections of every thread that used the client"""
+        with self._pools_lock:
+            pools = list(self._pools)
+        for pool in pools:
+            for connection in list(pool.values()):
+                connection.close()
+            pool.clear()
@@ -0,0 +1,84 @@
+"""
+Live Prometheus metrics for the load test scripts
+
+Exposes request counts, in-flight requests, latency histograms and error
+codes per endpoint on a /metrics endpoint while a test runs, so runs can be
+watched live and overlaid on the Cloud Run and Supabase dashboards.
+"""
+
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+METRICS_NAMESPACE = "wallabag_loadtest"
+
+# Buckets cover local sub-10ms responses up to the Cloud Run request timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class LoadMetrics:
+    """Prometheus collectors for one load test process"""
+
+    def __init__(self, registry=None, namespace=METRICS_NAMESPACE):
+        self.registry = registry or CollectorRegistry()
+        self.server = None
+
+        self.requests = Counter(
+            "requests", "Completed requests by endpoint and HTTP status code",
+            ["endpoint", "status_code"], namespace=namespace, registry=self.registry
+        )
+        self.errors = Counter(
+            "errors", "Failed requests by endpoint and error code (HTTP status or exception)",
+            ["endpoint", "code"], namespace=namespace, registry=self.registry
+        )
+        self.in_flight = Gauge(
+            "in_flight_requests", "Requests currently waiting for a response",
+            ["endpoint"], namespace=namespace, registry=self.registry
+        )
+        self.latency = Histogram(
+            "request_duration_seconds", "Client-side request latency",
+            ["endpoint"], namespace=namespace, registry=self.registry, buckets=LATENCY_BUCKETS
+        )
+        self.response_bytes = Counter(
+            "response_bytes", "Response body bytes received",
+            ["endpoint"], namespace=namespace, registry=self.registry
+        )
+
+    def serve(self, port, addr="0.0.0.0"):
+        """Start the /metrics HTTP endpoint in a daemon thread and return the bound port"""
+        server = start_http_server(port, addr=addr, registry=self.registry)
+        # prometheus_client >= 0.17 returns (server, thread)
+        self.server = server[0] if isinstance(server, tuple) else server
+        return self.server.server_port if self.server else port
+
+    def shutdown(self):
+        """Stop the /metrics endpoint"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @contextmanager
+    def track(self, endpoint):
+        """Count a request as in flight for the duration of the block"""
+        gauge = self.in_flight.labels(endpoint=endpoint)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    def observe(self, result):
+        """Record a finished request result dict as produced by the testers"""
+        endpoint = result["endpoint"]
+        status_code = str(result.get("status_code", "none"))
+
+        self.requests.labels(endpoint=endpoint, status_code=status_code).inc()
+        self.latency.labels(endpoint=endpoint).observe(result["time"])
+
+        if result.get("response_size"):
+            self.response_bytes.labels(endpoint=endpoint).inc(result["response_size"])
+
+        if result["status"] != "success":
+            code = status_code if "status_code" in result else "exception"
+            self.errors.labels(endpoint=endpoint, code=code).inc()
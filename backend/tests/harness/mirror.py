@@ -0,0 +1,172 @@
+"""
+Local SQLite mirror of a Wallabag account
+
+Entries and tags are stored with the entry content zlib-compressed, so the
+mirror stays small and can be queried offline. The sync client in
+tools/sync_mirror.py keeps it up to date with incremental fetches.
+"""
+
+import json
+import sqlite3
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    domain_name TEXT,
+    is_archived INTEGER NOT NULL DEFAULT 0,
+    is_starred INTEGER NOT NULL DEFAULT 0,
+    reading_time INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    content BLOB,
+    content_size INTEGER,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_updated_at ON entries (updated_at);
+CREATE INDEX IF NOT EXISTS idx_entries_url ON entries (url);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    slug TEXT
+);
+
+CREATE TABLE IF NOT EXISTS entry_tags (
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+    PRIMARY KEY (entry_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags (tag_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Entry fields stored in their own columns; everything else goes to metadata
+ENTRY_COLUMNS = ("id", "url", "title", "domain_name", "is_archived", "is_starred",
+                 "reading_time", "created_at", "updated_at")
+
+COMPRESSION_LEVEL = 6
+
+
+def compress(text):
+    """Compress entry content for storage; None stays None"""
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress(blob):
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class MirrorStore:
+    """SQLite mirror of entries and tags; use from a single thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get_state(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set_state(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                              (key, json.dumps(value)))
+
+    def upsert_tags(self, tags):
+        """Insert or update tags given as API tag objects"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO tags (id, label, slug) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET label = excluded.label, slug = excluded.slug",
+                [(int(t["id"]), t["label"], t.get("slug")) for t in tags]
+            )
+
+    def upsert_entries(self, items):
+        """Insert or replace entries given as API entry objects, with their tags
+
+        Returns (raw content bytes, stored content bytes) for the batch.
+        """
+        raw_bytes = stored_bytes = 0
+        with self.conn:
+            for item in items:
+                entry_id = int(item["id"])
+                content = item.get("content")
+                blob = compress(content)
+                if content is not None:
+                    raw_bytes += len(content.encode("utf-8"))
+                    stored_bytes += len(blob)
+
+                metadata = {k: v for k, v in item.items()
+                            if k not in ENTRY_COLUMNS and k not in ("content", "tags")}
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO entries (id, url, title, domain_name, is_archived, is_starred, "
+                    "reading_time, created_at, updated_at, content, content_size, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry_id, item["url"], item.get("title"), item.get("domain_name"),
+                     int(bool(item.get("is_archived"))), int(bool(item.get("is_starred"))),
+                     item.get("reading_time"), item.get("created_at"), item.get("updated_at"),
+                     blob, len(content) if content is not None else None, json.dumps(metadata))
+                )
+
+                tags = item.get("tags") or []
+                self.conn.executemany(
+                    "INSERT INTO tags (id, label, slug) VALUES (?, ?, ?) ON CONFLICT (id) DO NOTHING",
+                    [(int(t["id"]), t["label"], t.get("slug")) for t in tags]
+                )
+                self.conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
+                self.conn.executemany(
+                    "INSERT INTO entry_tags (entry_id, tag_id) VALUES (?, ?)",
+                    [(entry_id, int(t["id"])) for t in tags]
+                )
+
+        return raw_bytes, stored_bytes
+
+    def entry_ids(self):
+        return {row["id"] for row in self.conn.execute("SELECT id FROM entries")}
+
+    def delete_entries(self, entry_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in entry_ids])
+
+    def get_entry(self, entry_id):
+        """Entry as a dict with decompressed content and tag labels, or None"""
+        row = self.conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+
+        entry = dict(row)
+        entry["content"] = decompress(entry["content"])
+        entry["metadata"] = json.loads(entry["metadata"] or "{}")
+        entry["tags"] = [r["label"] for r in self.conn.execute(
+            "SELECT t.label FROM tags t JOIN entry_tags et ON et.tag_id = t.id "
+            "WHERE et.entry_id = ? ORDER BY t.label", (entry_id,))]
+        return entry
+
+    def stats(self):
+        """Row counts and content sizes of the mirror"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(content_size), 0) AS content_chars, "
+            "COALESCE(SUM(LENGTH(content)), 0) AS stored_bytes FROM entries"
+        ).fetchone()
+        stats = dict(row)
+        stats["tags"] = self.conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        return stats
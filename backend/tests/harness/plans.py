@@ -0,0 +1,64 @@
+"""
+PostgreSQL query plan capture for benchmarks that explain their slow queries
+
+explain() runs EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) and returns the plan
+tree; plan_outline() and plan_summary() reduce it to what fits in a report:
+the node types with the relations they touch, and the timing and buffer
+totals.
+"""
+
+import json
+
+
+def explain(cursor, sql, params=None, analyze=True):
+    """Plan of one statement as the top-level JSON object ("Plan", timings)"""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    cursor.execute(f"EXPLAIN ({options}) {sql}", params)
+    plan = cursor.fetchone()[0]
+    # psycopg2 decodes json columns; other drivers return text
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def walk(node, depth=0):
+    """Yield (depth, node) for a plan node and all nodes below it"""
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from walk(child, depth + 1)
+
+
+def describe(node):
+    """One-line label of a plan node, e.g. 'Index Scan using idx on entry'"""
+    label = node["Node Type"]
+    if node.get("Index Name"):
+        label += f" using {node['Index Name']}"
+    if node.get("Relation Name"):
+        label += f" on {node['Relation Name']}"
+    return label
+
+
+def plan_outline(plan):
+    """Indented node labels with actual rows when the plan was analyzed"""
+    lines = []
+    for depth, node in walk(plan["Plan"]):
+        line = "  " * depth + describe(node)
+        if "Actual Rows" in node:
+            line += f" (rows={node['Actual Rows'] * node.get('Actual Loops', 1)})"
+        lines.append(line)
+    return lines
+
+
+def plan_summary(plan):
+    """Execution time, buffers and scan types of an analyzed plan"""
+    top = plan["Plan"]
+    nodes = [node for _, node in walk(top)]
+    return {
+        "planning_time": plan.get("Planning Time"),
+        "execution_time": plan.get("Execution Time"),
+        "shared_hit": top.get("Shared Hit Blocks"),
+        "shared_read": top.get("Shared Read Blocks"),
+        "seq_scans": sorted({node["Relation Name"] for node in nodes
+                             if node["Node Type"] == "Seq Scan" and "Relation Name" in node}),
+        "index_scans": sorted({node["Index Name"] for node in nodes if node.get("Index Name")}),
+    }
@@ -0,0 +1,46 @@
+"""
+Bounded polling with exponential backoff
+
+Benchmarks that measure when a server-side effect becomes visible (e.g. a
+clipped entry getting its content) poll a resource after the request
+returns. Delays grow from a short first wait, so fast effects are timed
+closely without hammering the server while slow ones are pending, and the
+last sleep is cut short at the deadline.
+"""
+
+import time
+
+DEFAULT_INITIAL_DELAY = 0.1
+DEFAULT_BACKOFF_FACTOR = 1.5
+DEFAULT_MAX_DELAY = 2.0
+
+
+def backoff_delays(initial_delay=DEFAULT_INITIAL_DELAY, factor=DEFAULT_BACKOFF_FACTOR, max_delay=DEFAULT_MAX_DELAY):
+    """Endless sequence of delays growing by factor up to max_delay"""
+    delay = initial_delay
+    while True:
+        yield delay
+        delay = min(delay * factor, max_delay)
+
+
+def poll_until(fetch, done, timeout, initial_delay=DEFAULT_INITIAL_DELAY, factor=DEFAULT_BACKOFF_FACTOR,
+               max_delay=DEFAULT_MAX_DELAY, clock=time.monotonic, sleep=time.sleep):
+    """Call fetch() until done(value) is true or timeout seconds have passed
+
+    Returns (last value, number of fetches, whether done was reached). The
+    first fetch happens after the first delay.
+    """
+    deadline = clock() + timeout
+    attempts = 0
+    value = None
+
+    for delay in backoff_delays(initial_delay, factor, max_delay):
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return value, attempts, False
+        sleep(min(delay, remaining))
+
+        value = fetch()
+        attempts += 1
+        if done(value):
+            return value, attempts, True
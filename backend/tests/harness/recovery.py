@@ -0,0 +1,93 @@
+"""
+Recovery analysis for fault-injection runs
+
+Results are the open-loop request results of a steady load run: each has its
+send offset, latency and status. A request is disrupted when it failed or
+took longer than latency_tolerance times the pre-fault p95. The service has
+recovered from the earliest point that is followed by a run of undisrupted
+requests and after which no request fails and the p95 stays within that
+threshold, so a stray slow request later in the run does not count as an
+ongoing outage. Time to recovery is measured from the
+moment the fault was lifted.
+"""
+
+from harness.stats import percentile, summarize
+
+DEFAULT_LATENCY_TOLERANCE = 2.0
+
+# Undisrupted requests needed right after a candidate recovery point
+MIN_HEALTHY_REQUESTS = 5
+
+
+def recovery_metrics(results, fault_start, fault_end, latency_tolerance=DEFAULT_LATENCY_TOLERANCE):
+    """Errors, time to recovery and latency overshoot of one group of results
+
+    fault_start and fault_end are offsets on the same clock as the results'
+    "offset"; they are equal for instantaneous faults such as a connection drop.
+    """
+    before = [r for r in results if r["offset"] < fault_start]
+    after = sorted((r for r in results if r["offset"] >= fault_start), key=lambda r: r["offset"])
+
+    baseline = summarize([r["time"] for r in before if r["status"] == "success"])
+    threshold = baseline["p95"] * latency_tolerance if baseline["p95"] is not None else None
+
+    def disrupted(result):
+        return result["status"] != "success" or (threshold is not None and result["time"] > threshold)
+
+    bad = [r for r in after if disrupted(r)]
+    metrics = {
+        "requests": len(results),
+        "baseline": baseline,
+        "threshold": threshold,
+        "errors": sum(1 for r in after if r["status"] != "success"),
+        "slow": sum(1 for r in bad if r["status"] == "success"),
+        "first_error": None,
+        "recovered": True,
+        "recovered_at": None,
+        "time_to_recovery": 0.0,
+        "disruption": 0.0,
+        "peak_latency": max((r["time"] for r in after), default=None),
+        "overshoot": None,
+        "disrupted_p95": None,
+    }
+    if not bad:
+        return metrics
+
+    errors = [r for r in bad if r["status"] != "success"]
+    if errors:
+        metrics["first_error"] = errors[0]["offset"] - fault_start
+
+    def healthy_from(point):
+        tail = [r for r in after if r["offset"] >= point]
+        return (len(tail) >= MIN_HEALTHY_REQUESTS
+                and not any(disrupted(r) for r in tail[:MIN_HEALTHY_REQUESTS])
+                and all(r["status"] == "success" for r in tail)
+                and (threshold is None or percentile([r["time"] for r in tail], 95) <= threshold))
+
+    candidates = [fault_start] + sorted(r["offset"] + r["time"] for r in bad)
+    recovered_at = next((point for point in candidates if healthy_from(point)), None)
+    if recovered_at is None:
+        metrics["recovered"] = False
+        metrics["time_to_recovery"] = None
+        recovered_at = max(r["offset"] + r["time"] for r in bad)
+    else:
+        metrics["time_to_recovery"] = max(0.0, recovered_at - fault_end)
+    metrics["recovered_at"] = recovered_at
+    metrics["disruption"] = recovered_at - fault_start
+
+    window = [r["time"] for r in after if r["offset"] < recovered_at]
+    metrics["disrupted_p95"] = percentile(window, 95)
+    if baseline["p50"]:
+        metrics["overshoot"] = metrics["peak_latency"] / baseline["p50"]
+
+    return metrics
+
+
+def error_timeline(results, bucket=1.0):
+    """Failed requests per send-time bucket, as {bucket start offset: count}"""
+    timeline = {}
+    for result in results:
+        if result["status"] != "success":
+            start = int(result["offset"] // bucket) * bucket
+            timeline[start] = timeline.get(start, 0) + 1
+    return dict(sorted(timeline.items()))
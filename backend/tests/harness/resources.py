@@ -0,0 +1,280 @@
+"""
+Periodic server-side resource sampling during load runs
+
+Container memory is read with `docker stats`, so it only works against the
+local docker-compose stack. Database metrics come from pg_stat_activity and
+pg_stat_user_tables and work against any reachable PostgreSQL, including
+Supabase.
+
+TelemetrySampler reads the CPU, memory, IO and network counters of local
+containers from their cgroups at a short interval, timestamped with
+time.monotonic() so samples line up with request start and end times taken
+in the same process. phase_usage() turns the samples into the resources one
+load phase used: counters are interpolated at the phase boundaries, so
+phases shorter than a few sampling intervals still get a fair share.
+"""
+
+import re
+import subprocess
+import threading
+import time
+
+from harness.db import connect
+
+# docker stats reports sizes with binary (MiB) or decimal (MB) suffixes
+SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3,
+}
+
+DEFAULT_TELEMETRY_INTERVAL = 0.5
+
+# Cumulative cgroup counters (differences are meaningful), gauges (values are)
+# and high-water marks (only the latest value is)
+COUNTERS = ("cpu_usec", "io_read_bytes", "io_write_bytes", "net_rx_bytes", "net_tx_bytes", "oom_kills")
+GAUGES = ("memory_current", "memory_rss")
+HIGH_WATER_MARKS = ("memory_peak",)
+
+
+def parse_size(text):
+    """Convert a docker size string such as '123.4MiB' to bytes"""
+    match = re.match(r"\s*([\d.]+)\s*([a-zA-Z]+)", text or "")
+    if not match:
+        return None
+    value, unit = match.groups()
+    return int(float(value) * SIZE_UNITS.get(unit.lower(), 1))
+
+
+def container_memory(container):
+    """Return the current memory usage of a docker container in bytes"""
+    try:
+        output = subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+            capture_output=True, text=True, timeout=30, check=True
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    # Format is "<usage> / <limit>"
+    return parse_size(output.split("/")[0])
+
+
+# Counters of a container cgroup, printed as "<key> <value>" lines; cgroup v2
+# files first, then the v1 equivalents. RSS is anonymous memory, without the
+# page cache; memory_peak is a high-water mark since container start.
+TELEMETRY_COMMAND = r"""
+cg=/sys/fs/cgroup
+if [ -f $cg/cpu.stat ]; then
+  awk '$1 == "usage_usec" {print "cpu_usec", $2}' $cg/cpu.stat
+  echo "memory_current $(cat $cg/memory.current)"
+  echo "memory_peak $(cat $cg/memory.peak 2>/dev/null)"
+  awk '$1 == "anon" {print "memory_rss", $2}' $cg/memory.stat
+  awk '$1 == "oom_kill" {print "oom_kills", $2}' $cg/memory.events 2>/dev/null
+  cat $cg/io.stat 2>/dev/null | awk '{for (i = 2; i <= NF; i++) {split($i, kv, "=");
+    if (kv[1] == "rbytes") r += kv[2]; if (kv[1] == "wbytes") w += kv[2]}}
+    END {print "io_read_bytes", r + 0; print "io_write_bytes", w + 0}'
+else
+  awk '{print "cpu_usec", int($1 / 1000)}' $cg/cpuacct/cpuacct.usage
+  echo "memory_current $(cat $cg/memory/memory.usage_in_bytes)"
+  echo "memory_peak $(cat $cg/memory/memory.max_usage_in_bytes 2>/dev/null)"
+  awk '$1 == "total_rss" {print "memory_rss", $2}' $cg/memory/memory.stat
+  awk '$1 == "oom_kill" {print "oom_kills", $2}' $cg/memory/memory.oom_control 2>/dev/null
+  cat $cg/blkio/blkio.throttle.io_service_bytes 2>/dev/null | awk '$2 == "Read" {r += $3} $2 == "Write" {w += $3}
+    END {print "io_read_bytes", r + 0; print "io_write_bytes", w + 0}'
+fi
+awk 'NR > 2 {sub(/:/, " "); if ($1 != "lo") {rx += $2; tx += $10}}
+  END {print "net_rx_bytes", rx + 0; print "net_tx_bytes", tx + 0}' /proc/net/dev
+"""
+
+
+def parse_telemetry(output):
+    """Parse TELEMETRY_COMMAND output into {key: int}; missing keys are None"""
+    values = dict.fromkeys(COUNTERS + GAUGES + HIGH_WATER_MARKS)
+    for line in (output or "").splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in values and parts[1].isdigit():
+            values[parts[0]] = int(parts[1])
+    return values
+
+
+def read_telemetry(container):
+    """Current cgroup counters of a container, or None when it cannot be read
+
+    Counters are read with `docker exec` from the container's own cgroup and
+    /proc/net/dev, which works for cgroup v1 and v2 without access to the
+    host cgroup tree.
+    """
+    try:
+        output = subprocess.run(
+            ["docker", "exec", container, "sh", "-c", TELEMETRY_COMMAND],
+            capture_output=True, text=True, timeout=10, check=True
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return parse_telemetry(output)
+
+
+def cgroup_memory(container):
+    """Memory usage, peak and OOM kills of a container read from its cgroup
+
+    Unlike `docker stats`, the peak catches short spikes between samples and
+    the OOM kill count includes worker processes killed inside a container
+    that keeps running. The peak is a high-water mark since container start.
+    """
+    values = read_telemetry(container)
+    if values is None:
+        return None
+
+    return {"current": values["memory_current"], "peak": values["memory_peak"], "oom_kills": values["oom_kills"]}
+
+
+def database_metrics(conn):
+    """Return connection count and table bloat indicators for the current database"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT count(*) FROM pg_stat_activity
+            WHERE datname = current_database()
+        """)
+        connections = cursor.fetchone()[0]
+
+        cursor.execute("""
+            SELECT coalesce(sum(n_dead_tup), 0), coalesce(sum(n_live_tup), 0)
+            FROM pg_stat_user_tables
+        """)
+        dead_tuples, live_tuples = cursor.fetchone()
+
+        cursor.execute("SELECT pg_database_size(current_database())")
+        database_size = cursor.fetchone()[0]
+
+    return {
+        "db_connections": connections,
+        "dead_tuples": int(dead_tuples),
+        "dead_tuple_ratio": dead_tuples / (dead_tuples + live_tuples) if dead_tuples + live_tuples else 0.0,
+        "database_size": database_size,
+    }
+
+
+class ResourceSampler(threading.Thread):
+    """Background thread that samples server resources at a fixed interval"""
+
+    def __init__(self, interval=30, container=None, db_config=None, verbose=False):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.container = container
+        self.db_config = db_config
+        self.verbose = verbose
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._conn = None
+
+    def sample(self, offset):
+        """Take one sample; unavailable sources are recorded as None"""
+        sample = {"offset": offset, "memory_bytes": None}
+
+        if self.container:
+            sample["memory_bytes"] = container_memory(self.container)
+
+        if self.db_config:
+            try:
+                if self._conn is None or self._conn.closed:
+                    # Autocommit so statistics views are re-read on every sample
+                    self._conn = connect(self.db_config, autocommit=True)
+                sample.update(database_metrics(self._conn))
+            except Exception as e:
+                if self.verbose:
+                    print(f"Database sampling failed: {e}")
+                self._conn = None
+
+        return sample
+
+    def run(self):
+        start_time = time.monotonic()
+        while not self._stop_event.is_set():
+            self.samples.append(self.sample(time.monotonic() - start_time))
+            self._stop_event.wait(self.interval)
+
+        if self._conn is not None:
+            self._conn.close()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit"""
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+class TelemetrySampler(threading.Thread):
+    """Background thread sampling several containers; containers maps labels to container names"""
+
+    def __init__(self, containers, interval=DEFAULT_TELEMETRY_INTERVAL, read=read_telemetry, clock=time.monotonic):
+        super().__init__(daemon=True)
+        self.containers = containers
+        self.interval = interval
+        self.read = read
+        self.clock = clock
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        """Read every container once; each sample is stamped with the middle of its read"""
+        for label, container in self.containers.items():
+            before = self.clock()
+            values = self.read(container)
+            if values is not None:
+                self.samples.append(dict(values, container=label, time=(before + self.clock()) / 2))
+
+    def run(self):
+        while not self._stop_event.is_set():
+            started = self.clock()
+            self.sample()
+            self._stop_event.wait(max(self.interval - (self.clock() - started), 0))
+        # One last sample so the end of the final phase is covered
+        self.sample()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit"""
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+def counter_at(samples, key, at):
+    """Value of a cumulative counter at time at, interpolated between the surrounding samples"""
+    points = [(s["time"], s[key]) for s in samples if s.get(key) is not None]
+    if not points:
+        return None
+    points.sort()
+
+    if at <= points[0][0]:
+        return points[0][1]
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        if t0 <= at <= t1:
+            return v0 if t1 == t0 else v0 + (v1 - v0) * (at - t0) / (t1 - t0)
+    return points[-1][1]
+
+
+def phase_usage(samples, container, start, end):
+    """Resources a container used between start and end
+
+    Returns counter deltas (CPU in seconds) and the peak of each gauge over
+    the samples inside the phase, falling back to the nearest sample when
+    the phase is shorter than the sampling interval.
+    """
+    own = [s for s in samples if s["container"] == container]
+    usage = {"duration": end - start}
+
+    for key in COUNTERS:
+        first, last = counter_at(own, key, start), counter_at(own, key, end)
+        usage[key] = last - first if first is not None and last is not None else None
+    usage["cpu_seconds"] = usage.pop("cpu_usec") / 1e6 if usage["cpu_usec"] is not None else None
+
+    inside = [s for s in own if start <= s["time"] <= end]
+    if not inside and own:
+        inside = [min(own, key=lambda s: abs(s["time"] - (start + end) / 2))]
+    for key in GAUGES:
+        values = [s[key] for s in inside if s.get(key) is not None]
+        usage[f"peak_{key}"] = max(values) if values else None
+
+    return usage
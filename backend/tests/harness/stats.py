@@ -0,0 +1,67 @@
+"""
+Latency statistics helpers shared by the performance scripts
+"""
+
+import statistics
+
+# Percentiles reported by default in benchmark tables
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = rank - lower
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * weight
+
+
+def summarize(values, percentiles=DEFAULT_PERCENTILES):
+    """Summarize a list of timings into count/mean/min/max and percentiles"""
+    if not values:
+        summary = {"count": 0, "mean": None, "min": None, "max": None, "std_dev": None}
+        for pct in percentiles:
+            summary[f"p{pct}"] = None
+        return summary
+
+    summary = {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+        "std_dev": statistics.stdev(values) if len(values) > 1 else 0,
+    }
+    for pct in percentiles:
+        summary[f"p{pct}"] = percentile(values, pct)
+
+    return summary
+
+
+def format_seconds(value, unit="ms"):
+    """Format a duration in seconds for report tables"""
+    if value is None:
+        return "N/A"
+    if unit == "ms":
+        return f"{value * 1000:.1f}ms"
+    return f"{value:.3f}s"
+
+
+def format_bytes(value):
+    """Format a byte count for report tables"""
+    if value is None:
+        return "N/A"
+
+    size = float(value)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
@@ -0,0 +1,128 @@
+"""
+Read the Cloud Run sizing settings from the Terraform configuration
+
+Only the handful of scalar settings the benchmarks need are extracted, with a
+few regular expressions rather than a full HCL parser.
+"""
+
+import os
+import re
+
+DEFAULT_TERRAFORM_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "src", "terraform"
+)
+
+# Cloud Run setting -> pattern locating its value expression in cloud_run.tf
+CLOUD_RUN_SETTINGS = {
+    "container_concurrency": r'container_concurrency\s*=\s*([^\s#]+)',
+    "cpu": r'\bcpu\s*=\s*([^\s#]+)',
+    "memory": r'\bmemory\s*=\s*([^\s#]+)',
+    "timeout": r'timeout_seconds\s*=\s*([^\s#]+)',
+    "min_instances": r'"autoscaling\.knative\.dev/minScale"\s*=\s*([^\n#]+)',
+    "max_instances": r'"autoscaling\.knative\.dev/maxScale"\s*=\s*([^\n#]+)',
+}
+
+MEMORY_UNITS = {
+    "ki": 1024, "mi": 1024 ** 2, "gi": 1024 ** 3,
+    "k": 1000, "m": 1000 ** 2, "g": 1000 ** 3,
+}
+
+
+def _parse_value(text):
+    """Convert an HCL scalar literal to a Python value"""
+    text = text.strip().rstrip(",")
+    if text.startswith('"') and text.endswith('"'):
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def read_variable_defaults(path):
+    """Return the scalar default of every variable block in a .tf file"""
+    with open(path) as f:
+        content = f.read()
+
+    defaults = {}
+    for match in re.finditer(r'variable\s+"([^"]+)"\s*\{(.*?)\n\}', content, re.S):
+        name, body = match.groups()
+        default = re.search(r'^\s*default\s*=\s*([^\n{\[]+)$', body, re.M)
+        if default:
+            defaults[name] = _parse_value(default.group(1))
+
+    return defaults
+
+
+def read_tfvars(path):
+    """Return the top-level scalar assignments of a .tfvars file"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            match = re.match(r'^([A-Za-z_][A-Za-z0-9_]*)\s*=\s*([^{\[\n]+?)\s*(#.*)?$', line)
+            if match:
+                values[match.group(1)] = _parse_value(match.group(2))
+    return values
+
+
+def load_cloud_run_settings(terraform_dir=DEFAULT_TERRAFORM_DIR, tfvars=None):
+    """Resolve the effective Cloud Run sizing settings
+
+    Variable defaults from variables.tf are overridden by terraform.tfvars (or
+    the given tfvars file) and then resolved through the expressions used in
+    cloud_run.tf, so a literal value in cloud_run.tf wins over the variable.
+    """
+    variables = read_variable_defaults(os.path.join(terraform_dir, "variables.tf"))
+
+    tfvars = tfvars or os.path.join(terraform_dir, "terraform.tfvars")
+    if os.path.exists(tfvars):
+        variables.update(read_tfvars(tfvars))
+
+    with open(os.path.join(terraform_dir, "cloud_run.tf")) as f:
+        cloud_run = f.read()
+
+    settings = {}
+    for setting, pattern in CLOUD_RUN_SETTINGS.items():
+        match = re.search(pattern, cloud_run)
+        if not match:
+            settings[setting] = None
+            continue
+
+        expression = match.group(1).strip()
+        reference = re.search(r'var\.([A-Za-z_][A-Za-z0-9_]*)', expression)
+        if reference:
+            settings[setting] = variables.get(reference.group(1))
+        else:
+            settings[setting] = _parse_value(expression)
+
+    return settings
+
+
+def parse_cpu(value):
+    """Convert a Cloud Run CPU value ('1', '2', '500m') to vCPUs"""
+    text = str(value).strip()
+    if text.endswith("m"):
+        return float(text[:-1]) / 1000
+    return float(text)
+
+
+def parse_memory(value):
+    """Convert a Cloud Run memory value ('512Mi', '2Gi') to bytes"""
+    match = re.match(r'^\s*([\d.]+)\s*([A-Za-z]*)\s*$', str(value))
+    if not match:
+        raise ValueError(f"Invalid memory value: {value}")
+    number, unit = match.groups()
+    return int(float(number) * MEMORY_UNITS.get(unit.lower(), 1))
+
+
+def settings_label(settings):
+    """Short human readable label for a settings dict"""
+    return (f"concurrency={settings.get('container_concurrency')} "
+            f"cpu={settings.get('cpu')} memory={settings.get('memory')}")
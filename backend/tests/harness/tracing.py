@@ -0,0 +1,74 @@
+"""
+W3C trace context and Server-Timing helpers
+
+Every load request carries a fresh `traceparent` so it can be found in the
+Cloud Run request logs, and any `Server-Timing` response header is parsed into
+per-metric durations that can be joined with the client-side timing.
+"""
+
+import re
+import secrets
+
+# Server-Timing metrics that represent the whole server-side duration, in order of preference
+SERVER_TOTAL_METRICS = ("total", "app")
+
+
+def new_traceparent():
+    """Return a (traceparent header value, trace id) pair for a sampled trace"""
+    trace_id = secrets.token_hex(16)
+    parent_id = secrets.token_hex(8)
+    return f"00-{trace_id}-{parent_id}-01", trace_id
+
+
+def server_timing_header(headers):
+    """All Server-Timing header values of a response, comma-joined as one header
+
+    http.client messages return only the first of repeated headers from
+    get(), so every value is collected with get_all(); requests and httpx
+    headers already join repeated values.
+    """
+    if hasattr(headers, "get_all"):
+        return ", ".join(headers.get_all("Server-Timing") or []) or None
+    return headers.get("Server-Timing")
+
+
+def parse_server_timing(value):
+    """Parse a Server-Timing header into {metric: seconds}
+
+    Metrics without a dur parameter are recorded as None. Durations are given
+    in milliseconds by the spec and converted to seconds here.
+    """
+    metrics = {}
+    if not value:
+        return metrics
+
+    for entry in value.split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        name = parts[0]
+        if not name:
+            continue
+
+        duration = None
+        for param in parts[1:]:
+            match = re.match(r'^dur\s*=\s*"?([\d.]+)"?$', param)
+            if match:
+                duration = float(match.group(1)) / 1000.0
+                break
+
+        # Repeated metrics (e.g. several db entries) are summed
+        if name in metrics and metrics[name] is not None and duration is not None:
+            metrics[name] += duration
+        else:
+            metrics[name] = duration
+
+    return metrics
+
+
+def server_total(metrics):
+    """Best estimate of the total server-side time from parsed Server-Timing metrics"""
+    for name in SERVER_TOTAL_METRICS:
+        if metrics.get(name) is not None:
+            return metrics[name]
+
+    durations = [d for d in metrics.values() if d is not None]
+    return sum(durations) if durations else None
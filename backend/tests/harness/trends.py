@@ -0,0 +1,105 @@
+"""
+Trend detection for long-running (soak) measurements
+
+Uses the Mann-Kendall test to decide whether a series grows monotonically and
+a Theil-Sen estimator for the growth rate. Both are rank based, so a single
+GC pause or latency spike does not produce a false leak signal.
+"""
+
+import math
+import statistics
+
+# One-sided 95% confidence
+DEFAULT_Z_THRESHOLD = 1.645
+
+# Ignore statistically significant but negligible growth
+DEFAULT_MIN_RELATIVE_GROWTH = 0.05
+
+DEFAULT_MIN_SAMPLES = 8
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def mann_kendall(values):
+    """Return the Mann-Kendall S statistic and its normal-approximation z score"""
+    n = len(values)
+    if n < 3:
+        return 0, 0.0
+
+    s = 0
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            s += _sign(values[j] - values[i])
+
+    # Variance with tie correction
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    tie_term = sum(t * (t - 1) * (2 * t + 5) for t in counts.values() if t > 1)
+    variance = (n * (n - 1) * (2 * n + 5) - tie_term) / 18.0
+
+    if variance <= 0:
+        return s, 0.0
+
+    if s > 0:
+        z = (s - 1) / math.sqrt(variance)
+    elif s < 0:
+        z = (s + 1) / math.sqrt(variance)
+    else:
+        z = 0.0
+
+    return s, z
+
+
+def theil_sen_slope(xs, ys):
+    """Median of pairwise slopes; robust estimate of growth per unit of x"""
+    slopes = []
+    for i in range(len(xs) - 1):
+        for j in range(i + 1, len(xs)):
+            if xs[j] != xs[i]:
+                slopes.append((ys[j] - ys[i]) / (xs[j] - xs[i]))
+
+    return statistics.median(slopes) if slopes else 0.0
+
+
+def detect_growth(xs, ys, z_threshold=DEFAULT_Z_THRESHOLD,
+                  min_relative_growth=DEFAULT_MIN_RELATIVE_GROWTH,
+                  min_samples=DEFAULT_MIN_SAMPLES):
+    """Decide whether ys grows monotonically over xs
+
+    Returns a dict with the z score, Theil-Sen slope, relative growth over the
+    observed span and a "flagged" boolean. Missing (None) values are skipped.
+    """
+    points = [(x, y) for x, y in zip(xs, ys) if y is not None]
+    result = {
+        "samples": len(points),
+        "z": 0.0,
+        "slope": 0.0,
+        "relative_growth": 0.0,
+        "flagged": False,
+    }
+
+    if len(points) < min_samples:
+        return result
+
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+
+    _, z = mann_kendall(ys)
+    slope = theil_sen_slope(xs, ys)
+
+    # Baseline is the median of the first tenth of the run
+    head = ys[:max(1, len(ys) // 10)]
+    baseline = abs(statistics.median(head))
+    growth = slope * (xs[-1] - xs[0])
+    relative_growth = growth / baseline if baseline else (math.inf if growth > 0 else 0.0)
+
+    result.update({
+        "z": z,
+        "slope": slope,
+        "relative_growth": relative_growth,
+        "flagged": z >= z_threshold and relative_growth >= min_relative_growth,
+    })
+    return result
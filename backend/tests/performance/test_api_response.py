@@ -14,13 +14,29 @@ import argparse
 import requests
 import statistics
 from urllib.parse import urljoin
+import random
+import http.client
 import concurrent.futures
-import matplotlib.pyplot as plt
 from tabulate import tabulate
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.api_client import API_VERSION, ApiClient
+from harness.concurrency import AdaptiveConcurrencyLimiter
+from harness.db import get_db_config
+from harness.http2 import Http2Client
+from harness.http_timing import PHASES, TimedHttpClient
+from harness.tracing import new_traceparent, parse_server_timing, server_timing_header, server_total
+from harness.resources import ResourceSampler
+from harness.stats import summarize, format_seconds, format_bytes
+from harness.terraform import DEFAULT_TERRAFORM_DIR, load_cloud_run_settings, settings_label
+from harness.trends import detect_growth
+
 # Test API endpoints
 API_ENDPOINTS = [
     {"name": "Get entries", "method": "GET", "path": "/api/entries", "params": {"page": 1, "perPage": 30}},
+    {"name": "Get entries (metadata)", "method": "GET", "path": "/api/entries", "params": {"page": 1, "perPage": 30},
+     "metadata_only": True},
     {"name": "Get entry by ID", "method": "GET", "path": "/api/entries/{entry_id}", "params": {}},
     {"name": "Search entries", "method": "GET", "path": "/api/search", "params": {"term": "test", "page": 1}},
     {"name": "Get tags", "method": "GET", "path": "/api/tags", "params": {}},
@@ -34,6 +50,42 @@ TEST_CONFIGS = [
     {"name": "Heavy load", "concurrent_requests": 10, "repeats": 15},
 ]
 
+# Request mix for soak runs, weighted by relative frequency
+SOAK_WORKLOAD = [
+    {"endpoint": "Get entries", "weight": 40},
+    {"endpoint": "Get entry by ID", "weight": 30},
+    {"endpoint": "Search entries", "weight": 15},
+    {"endpoint": "Get tags", "weight": 10},
+    {"endpoint": "Create entry", "weight": 5},
+]
+
+# Default soak settings
+DEFAULT_SOAK_DURATION = "1h"
+DEFAULT_SOAK_RPS = 5
+DEFAULT_SOAK_WINDOW = 60
+DEFAULT_SAMPLE_INTERVAL = 30
+
+# Default stress (saturation search) settings
+DEFAULT_SLO_P99 = 1.0
+DEFAULT_MAX_ERROR_RATE = 0.01
+DEFAULT_STRESS_START_RPS = 2
+DEFAULT_STRESS_MAX_RPS = 500
+DEFAULT_STRESS_STEP_DURATION = 30
+DEFAULT_STRESS_PRECISION = 0.1
+STRESS_MIN_THROUGHPUT_RATIO = 0.9
+
+# Default adaptive concurrency (capacity search) settings
+DEFAULT_ADAPTIVE_DURATION = 60
+DEFAULT_INITIAL_CONCURRENCY = 2
+DEFAULT_MAX_CONCURRENCY = 128
+DEFAULT_LATENCY_TOLERANCE = 2.0
+
+# Number of slowest requests whose trace IDs are listed in reports
+SLOWEST_TRACES = 5
+
+# Upper bound on client threads used to keep a fixed request rate
+MAX_OPEN_LOOP_WORKERS = 256
+
 # Default settings
 DEFAULT_BASE_URL = "http://localhost:8080"
 DEFAULT_CLIENT_ID = "wallabag_client_id"
@@ -42,11 +94,22 @@ DEFAULT_USERNAME = "wallabag"
 DEFAULT_PASSWORD = "wallabag"
 
 
+def parse_duration(value):
+    """Parse a duration such as '90', '30m' or '4h' into seconds"""
+    value = str(value).strip().lower()
+    multipliers = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in multipliers:
+        return float(value[:-1]) * multipliers[value[-1]]
+    return float(value)
+
+
 class WallabagApiTester:
     def __init__(self, base_url, api_key=None, client_id=None, client_secret=None,
-                 username=None, password=None, verbose=False):
+                 username=None, password=None, verbose=False, keep_alive=False, http2=False):
         self.base_url = base_url
         self.verbose = verbose
+        self.http = Http2Client() if http2 else TimedHttpClient(keep_alive=keep_alive)
+        self.metrics = None
         self.token = None
         self.api_key = api_key
         self.auth_data = {
@@ -58,7 +121,12 @@ class WallabagApiTester:
         
         # Internal storage
         self.entry_id = None
+        self.seeded_ids = []
+        self.metadata_params = {"detail": "metadata"}
         self.results = []
+        self.soak_results = None
+        self.stress_results = None
+        self.adaptive_results = None
     
     def authenticate(self):
         """Authenticate with the Wallabag API"""
@@ -103,6 +171,10 @@ class WallabagApiTester:
         else:
             return {"Content-Type": "application/json"}
     
+    def api_client(self, timeout=None):
+        """ApiClient for the API of the instance under test with the current credentials"""
+        return ApiClient(f"{self.base_url.rstrip('/')}/{API_VERSION}", self.get_headers(), timeout=timeout)
+    
     def prepare_test_data(self):
         """Create test data to use in performance tests"""
         if self.verbose:
@@ -127,13 +199,63 @@ class WallabagApiTester:
                 
                 requests.post(tags_url, headers=self.get_headers(), json=tags_payload)
             
+            # Metadata-only listings use field selection when the server offers it
+            client = self.api_client(timeout=30)
+            self.metadata_params = client.listing_params(metadata_only=True)
+            if self.verbose:
+                print(f"Metadata-only listings use {self.metadata_params}")
+            
             return True
         except requests.exceptions.RequestException as e:
             print(f"Failed to prepare test data: {e}")
             return False
     
+    def seed_entries(self, articles, workers=4):
+        """Create entries with provided content, e.g. from harness.corpus, through the API"""
+        url = urljoin(self.base_url, "/api/entries")
+
+        def create(article):
+            payload = {"url": article["url"], "title": article["title"], "content": article["content"]}
+            response = requests.post(url, headers=self.get_headers(), json=payload)
+            response.raise_for_status()
+            return response.json().get("id")
+
+        print(f"Seeding {len(articles)} entries through the API...")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(create, article) for article in articles]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    self.seeded_ids.append(future.result())
+                except requests.exceptions.RequestException as e:
+                    print(f"Failed to seed entry: {e}")
+
+        return len(self.seeded_ids) > 0
+
+    def cleanup_entries(self):
+        """Delete the entries created by seed_entries"""
+        for entry_id in self.seeded_ids:
+            try:
+                requests.delete(urljoin(self.base_url, f"/api/entries/{entry_id}"), headers=self.get_headers())
+            except requests.exceptions.RequestException:
+                pass
+        self.seeded_ids = []
+    
+    def request_base_url(self):
+        """Base URL for the next load request; subclasses may spread load over instances"""
+        return self.base_url
+    
     def make_request(self, endpoint):
         """Make a request to the specified API endpoint"""
+        if not self.metrics:
+            return self.send_request(endpoint)
+        
+        with self.metrics.track(endpoint["name"]):
+            result = self.send_request(endpoint)
+        self.metrics.observe(result)
+        return result
+    
+    def send_request(self, endpoint):
+        """Send one request and return its timing result"""
         method = endpoint["method"]
         path = endpoint["path"]
         
@@ -141,49 +263,45 @@ class WallabagApiTester:
         if "{entry_id}" in path and self.entry_id:
             path = path.replace("{entry_id}", str(self.entry_id))
         
-        url = urljoin(self.base_url, path)
-        start_time = time.time()
+        url = urljoin(self.request_base_url(), path)
+        
+        if method not in ("GET", "POST", "PUT", "PATCH", "DELETE"):
+            return {
+                "endpoint": endpoint["name"],
+                "status": "error",
+                "time": 0,
+                "error": f"Unsupported HTTP method: {method}"
+            }
+        
+        params = endpoint.get("params", {})
+        if endpoint.get("metadata_only"):
+            params = dict(params, **self.metadata_params)
+        
+        headers = self.get_headers()
+        headers["traceparent"], trace_id = new_traceparent()
+        
+        start_time = time.perf_counter()
         
         try:
-            if method == "GET":
-                response = requests.get(
-                    url,
-                    headers=self.get_headers(),
-                    params=endpoint.get("params", {})
-                )
-            elif method == "POST":
-                response = requests.post(
-                    url,
-                    headers=self.get_headers(),
-                    json=endpoint.get("data", {})
-                )
-            elif method == "PUT" or method == "PATCH":
-                response = requests.patch(
-                    url,
-                    headers=self.get_headers(),
-                    json=endpoint.get("data", {})
-                )
-            elif method == "DELETE":
-                response = requests.delete(
-                    url,
-                    headers=self.get_headers()
-                )
-            else:
-                return {
-                    "endpoint": endpoint["name"],
-                    "status": "error",
-                    "time": 0,
-                    "error": f"Unsupported HTTP method: {method}"
-                }
+            response = self.http.request(
+                "PATCH" if method == "PUT" else method,
+                url,
+                headers=headers,
+                params=params if method == "GET" else None,
+                json_body=endpoint.get("data", {}) if method in ("POST", "PUT", "PATCH") else None
+            )
             
-            end_time = time.time()
-            elapsed_time = end_time - start_time
+            elapsed_time = time.perf_counter() - start_time
             
             result = {
                 "endpoint": endpoint["name"],
                 "status": "success" if response.status_code < 400 else "error",
                 "time": elapsed_time,
                 "status_code": response.status_code,
+                "phases": response.timings,
+                "reused": response.reused,
+                "trace_id": trace_id,
+                "server_timing": parse_server_timing(server_timing_header(response.headers)),
             }
             
             # Add response size if successful
@@ -194,14 +312,14 @@ class WallabagApiTester:
             
             return result
             
-        except requests.exceptions.RequestException as e:
-            end_time = time.time()
-            elapsed_time = end_time - start_time
+        except (OSError, http.client.HTTPException) as e:
+            elapsed_time = time.perf_counter() - start_time
             
             return {
                 "endpoint": endpoint["name"],
                 "status": "error",
                 "time": elapsed_time,
+                "trace_id": trace_id,
                 "error": str(e)
             }
     
@@ -254,6 +372,427 @@ class WallabagApiTester:
         
         return True
     
+    def run_open_loop(self, endpoints, rps, duration, weights=None):
+        """Send requests at a fixed rate for duration seconds and return their results
+        
+        Open-loop scheduling: requests are sent on time even if earlier ones are slow,
+        so server slowdowns show up as latency instead of a lower request rate. Each
+        result gets its send offset and the client-side scheduling lag.
+        """
+        futures = []
+        start_time = time.monotonic()
+        
+        def timed_request(endpoint, sent_at):
+            lag = time.monotonic() - sent_at
+            result = self.make_request(endpoint)
+            result["offset"] = sent_at - start_time
+            result["lag"] = lag
+            return result
+        
+        interval = 1.0 / rps
+        max_workers = min(max(4, int(rps * 10)), MAX_OPEN_LOOP_WORKERS)
+        next_send = start_time
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                now = time.monotonic()
+                if now - start_time >= duration:
+                    break
+                if now < next_send:
+                    time.sleep(next_send - now)
+                    continue
+                
+                endpoint = random.choices(endpoints, weights=weights, k=1)[0]
+                futures.append((endpoint, next_send, executor.submit(timed_request, endpoint, next_send)))
+                next_send += interval
+        
+        # A request that raised still counts, as an error, so the rate stays honest
+        results = []
+        for endpoint, sent_at, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({
+                    "endpoint": endpoint["name"],
+                    "status": "error",
+                    "time": 0,
+                    "offset": sent_at - start_time,
+                    "lag": 0,
+                    "error": str(e)
+                })
+        
+        return results
+    
+    def run_soak(self, duration, rps, window=DEFAULT_SOAK_WINDOW, sample_interval=DEFAULT_SAMPLE_INTERVAL,
+                 container=None, db_config=None):
+        """Run a mixed workload at a fixed request rate for a long period"""
+        if not self.authenticate():
+            return False
+        
+        if not self.prepare_test_data():
+            return False
+        
+        endpoints = {endpoint["name"]: endpoint for endpoint in API_ENDPOINTS}
+        workload = [endpoints[item["endpoint"]] for item in SOAK_WORKLOAD]
+        weights = [item["weight"] for item in SOAK_WORKLOAD]
+        
+        print(f"Running soak test against {self.base_url} for {duration:.0f}s at {rps} req/s")
+        
+        sampler = ResourceSampler(sample_interval, container=container, db_config=db_config, verbose=self.verbose)
+        sampler.start()
+        
+        try:
+            results = self.run_open_loop(workload, rps, duration, weights)
+        finally:
+            samples = sampler.stop()
+        
+        self.soak_results = {
+            "duration": duration,
+            "rps": rps,
+            "window": window,
+            "results": results,
+            "windows": self.compute_windows(results, window),
+            "resource_samples": samples,
+        }
+        self.soak_results["trends"] = self.analyze_soak_trends(self.soak_results)
+        
+        return True
+    
+    def evaluate_step(self, results, rps, duration, slo_p99, max_error_rate):
+        """Check the results of one fixed-rate step against the SLO"""
+        successful = [r for r in results if r["status"] == "success"]
+        # Latency as seen by an open-loop user includes time spent waiting for a client slot
+        latencies = [r["time"] + r.get("lag", 0) for r in successful]
+        stats = summarize(latencies)
+        error_rate = (len(results) - len(successful)) / len(results) if results else 1.0
+        throughput = len(successful) / duration
+        
+        violations = []
+        if stats["p99"] is None or stats["p99"] > slo_p99:
+            violations.append("p99")
+        if error_rate > max_error_rate:
+            violations.append("errors")
+        if throughput < rps * STRESS_MIN_THROUGHPUT_RATIO:
+            violations.append("throughput")
+        
+        return {
+            "rps": rps,
+            "requests": len(results),
+            "throughput": throughput,
+            "p50": stats["p50"],
+            "p99": stats["p99"],
+            "error_rate": error_rate,
+            "violations": violations,
+            "passed": not violations,
+        }
+    
+    def run_stress_endpoint(self, endpoint, strategy, start_rps, max_rps, step_duration,
+                            slo_p99, max_error_rate, precision=DEFAULT_STRESS_PRECISION):
+        """Search for the highest request rate an endpoint sustains within the SLO"""
+        steps = []
+        
+        def step(rps):
+            results = self.run_open_loop([endpoint], rps, step_duration)
+            outcome = self.evaluate_step(results, rps, step_duration, slo_p99, max_error_rate)
+            steps.append(outcome)
+            if self.verbose:
+                verdict = "ok" if outcome["passed"] else f"violated {', '.join(outcome['violations'])}"
+                print(f"  {endpoint['name']} @ {rps:.1f} req/s: p99 {format_seconds(outcome['p99'])}, "
+                      f"errors {outcome['error_rate'] * 100:.1f}% -> {verdict}")
+            return outcome["passed"]
+        
+        best = None
+        failed_at = None
+        rps = start_rps
+        
+        # Ramp: linear steps, or geometric growth to bracket the limit for binary search
+        while rps <= max_rps:
+            if not step(rps):
+                failed_at = rps
+                break
+            best = rps
+            rps = rps + start_rps if strategy == "ramp" else rps * 2
+        
+        if strategy == "binary" and failed_at is not None:
+            low, high = (best or 0), failed_at
+            while high - low > max(precision * high, 0.5):
+                middle = (low + high) / 2
+                if step(middle):
+                    low = best = middle
+                else:
+                    high = middle
+        
+        return {
+            "endpoint": endpoint["name"],
+            "max_sustainable_rps": best,
+            "first_violation_rps": failed_at,
+            "steps": steps,
+        }
+    
+    def run_stress(self, endpoint_names=None, strategy="binary", start_rps=DEFAULT_STRESS_START_RPS,
+                   max_rps=DEFAULT_STRESS_MAX_RPS, step_duration=DEFAULT_STRESS_STEP_DURATION,
+                   slo_p99=DEFAULT_SLO_P99, max_error_rate=DEFAULT_MAX_ERROR_RATE, settings=None):
+        """Find the maximum sustainable throughput of each endpoint"""
+        if not self.authenticate():
+            return False
+        
+        if not self.prepare_test_data():
+            return False
+        
+        endpoints = [e for e in API_ENDPOINTS if not endpoint_names or e["name"] in endpoint_names]
+        settings = settings if settings is not None else load_cloud_run_settings()
+        
+        print(f"Running stress test against {self.base_url} ({settings_label(settings)})")
+        print(f"SLO: p99 <= {slo_p99:.3f}s, error rate <= {max_error_rate * 100:.1f}%, strategy: {strategy}")
+        
+        self.stress_results = {
+            "settings": settings,
+            "slo": {"p99": slo_p99, "error_rate": max_error_rate},
+            "strategy": strategy,
+            "endpoints": [],
+        }
+        
+        for endpoint in endpoints:
+            print(f"Searching saturation point for {endpoint['name']}")
+            self.stress_results["endpoints"].append(self.run_stress_endpoint(
+                endpoint, strategy, start_rps, max_rps, step_duration, slo_p99, max_error_rate
+            ))
+        
+        return True
+    
+    def report_stress_results(self, history=None):
+        """Report maximum sustainable throughput per endpoint and Cloud Run setting"""
+        runs = list(history or [])
+        if self.stress_results:
+            runs.append(self.stress_results)
+        
+        if not runs:
+            print("No stress results to report")
+            return
+        
+        print("\n========== API STRESS TEST RESULTS ==========")
+        
+        table_data = []
+        for run in runs:
+            settings = run["settings"]
+            for endpoint_result in run["endpoints"]:
+                passing = [s for s in endpoint_result["steps"] if s["rps"] == endpoint_result["max_sustainable_rps"]]
+                best_step = passing[-1] if passing else None
+                table_data.append([
+                    endpoint_result["endpoint"],
+                    settings.get("container_concurrency"),
+                    settings.get("cpu"),
+                    settings.get("memory"),
+                    settings.get("max_instances"),
+                    f"{endpoint_result['max_sustainable_rps']:.1f}" if endpoint_result["max_sustainable_rps"] else "< start",
+                    format_seconds(best_step["p99"]) if best_step else "N/A",
+                    f"{endpoint_result['first_violation_rps']:.1f}" if endpoint_result["first_violation_rps"] else "not reached",
+                ])
+        
+        headers = ["Endpoint", "Concurrency", "CPU", "Memory", "Max Inst.", "Max RPS", "p99 @ Max", "Violated @"]
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+    
+    def run_adaptive_endpoint(self, endpoint, duration, limiter):
+        """Keep one endpoint busy for duration seconds with the limiter choosing the concurrency"""
+        results = []
+        start_time = time.monotonic()
+        deadline = start_time + duration
+        
+        def worker():
+            while time.monotonic() < deadline:
+                limiter.acquire()
+                request_start = time.monotonic()
+                status_code = None
+                try:
+                    result = self.make_request(endpoint)
+                    status_code = result.get("status_code")
+                finally:
+                    limiter.release(status_code, time.monotonic() - request_start)
+                result["offset"] = time.monotonic() - start_time
+                result["concurrency"] = limiter.current
+                results.append(result)
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+            for future in [executor.submit(worker) for _ in range(limiter.maximum)]:
+                future.result()
+        
+        successful = [r for r in results if r["status"] == "success"]
+        latency = summarize([r["time"] for r in successful])
+        
+        return {
+            "endpoint": endpoint["name"],
+            "requests": len(results),
+            "errors": len(results) - len(successful),
+            "throughput": len(successful) / duration,
+            "p50": latency.get("p50"),
+            "p99": latency.get("p99"),
+            "concurrency": limiter.summary(),
+            "window_history": limiter.history,
+        }
+    
+    def run_adaptive(self, endpoint_names=None, duration=DEFAULT_ADAPTIVE_DURATION,
+                     initial=DEFAULT_INITIAL_CONCURRENCY, maximum=DEFAULT_MAX_CONCURRENCY,
+                     latency_tolerance=DEFAULT_LATENCY_TOLERANCE):
+        """Let an adaptive limiter find the concurrency each endpoint sustains
+        
+        The window widens while latency stays near its baseline and shrinks on
+        429/5xx or latency inflation, so where it converges is a capacity signal
+        that does not depend on a hand-picked worker count.
+        """
+        if not self.authenticate():
+            return False
+        
+        if not self.prepare_test_data():
+            return False
+        
+        endpoints = [e for e in API_ENDPOINTS if not endpoint_names or e["name"] in endpoint_names]
+        
+        print(f"Running adaptive concurrency test against {self.base_url}")
+        print(f"Window {initial}-{maximum}, latency tolerance {latency_tolerance}x baseline, "
+              f"{duration:.0f}s per endpoint")
+        
+        self.adaptive_results = {
+            "duration": duration,
+            "initial": initial,
+            "maximum": maximum,
+            "latency_tolerance": latency_tolerance,
+            "endpoints": [],
+        }
+        
+        for endpoint in endpoints:
+            print(f"Probing capacity of {endpoint['name']}")
+            limiter = AdaptiveConcurrencyLimiter(initial=initial, maximum=maximum,
+                                                 latency_tolerance=latency_tolerance)
+            self.adaptive_results["endpoints"].append(self.run_adaptive_endpoint(endpoint, duration, limiter))
+        
+        return True
+    
+    def report_adaptive_results(self):
+        """Report the concurrency each endpoint converged to"""
+        if not self.adaptive_results:
+            print("No adaptive concurrency results to report")
+            return
+        
+        print("\n========== ADAPTIVE CONCURRENCY RESULTS ==========")
+        
+        table_data = []
+        for endpoint_result in self.adaptive_results["endpoints"]:
+            window = endpoint_result["concurrency"]
+            table_data.append([
+                endpoint_result["endpoint"],
+                endpoint_result["requests"],
+                endpoint_result["errors"],
+                f"{endpoint_result['throughput']:.1f}",
+                format_seconds(endpoint_result["p50"]),
+                format_seconds(endpoint_result["p99"]),
+                f"{window['converged']:.1f}",
+                f"{window['min']:.0f}-{window['max']:.0f}",
+                window["decreases"]["overload"],
+                window["decreases"]["latency"],
+                format_seconds(window["baseline_latency"]),
+            ])
+        
+        headers = ["Endpoint", "Requests", "Errors", "RPS", "p50", "p99", "Converged", "Range",
+                   "Overload Cuts", "Latency Cuts", "Baseline"]
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Converged: time-weighted mean window over the second half of the run")
+    
+    def compute_windows(self, results, window):
+        """Group soak results into consecutive time windows with latency percentiles"""
+        buckets = {}
+        for result in results:
+            buckets.setdefault(int(result["offset"] // window), []).append(result)
+        
+        windows = []
+        for index in sorted(buckets):
+            bucket = buckets[index]
+            times = [r["time"] for r in bucket if r["status"] == "success"]
+            stats = summarize(times)
+            windows.append({
+                "offset": index * window,
+                "requests": len(bucket),
+                "errors": len(bucket) - len(times),
+                "p50": stats["p50"],
+                "p95": stats["p95"],
+                "p99": stats["p99"],
+            })
+        
+        return windows
+    
+    def analyze_soak_trends(self, soak_results):
+        """Flag latency and resource series that grow monotonically over the run"""
+        windows = soak_results["windows"]
+        samples = soak_results["resource_samples"]
+        
+        series = {
+            "Latency p50": ([w["offset"] for w in windows], [w["p50"] for w in windows]),
+            "Latency p99": ([w["offset"] for w in windows], [w["p99"] for w in windows]),
+            "Error count": ([w["offset"] for w in windows], [w["errors"] for w in windows]),
+        }
+        for key, label in [("memory_bytes", "Container memory"),
+                           ("db_connections", "DB connections"),
+                           ("dead_tuples", "Dead tuples"),
+                           ("database_size", "Database size")]:
+            series[label] = ([s["offset"] for s in samples], [s.get(key) for s in samples])
+        
+        trends = {}
+        for label, (xs, ys) in series.items():
+            trend = detect_growth(xs, ys)
+            present = [y for y in ys if y is not None]
+            trend["first"] = present[0] if present else None
+            trend["last"] = present[-1] if present else None
+            trends[label] = trend
+        
+        return trends
+    
+    def report_soak_results(self):
+        """Report latency drift and resource trends of a soak run"""
+        if not self.soak_results:
+            print("No soak results to report")
+            return
+        
+        soak = self.soak_results
+        print("\n========== API SOAK TEST RESULTS ==========")
+        print(f"Duration: {soak['duration']:.0f}s, target rate: {soak['rps']} req/s, "
+              f"requests sent: {len(soak['results'])}")
+        
+        print(f"\n=== Latency per {soak['window']}s window ===")
+        table_data = [
+            [f"{w['offset']:.0f}s", w["requests"], w["errors"],
+             format_seconds(w["p50"]), format_seconds(w["p95"]), format_seconds(w["p99"])]
+            for w in soak["windows"]
+        ]
+        print(tabulate(table_data, headers=["Window", "Requests", "Errors", "p50", "p95", "p99"], tablefmt="grid"))
+        
+        print("\n=== Growth trends ===")
+        table_data = []
+        for label, trend in soak["trends"].items():
+            if trend["samples"] == 0:
+                continue
+            
+            if label in ("Container memory", "Database size"):
+                first, last = format_bytes(trend["first"]), format_bytes(trend["last"])
+            elif label.startswith("Latency"):
+                first, last = format_seconds(trend["first"]), format_seconds(trend["last"])
+            else:
+                first, last = trend["first"], trend["last"]
+            
+            table_data.append([
+                label,
+                trend["samples"],
+                first,
+                last,
+                f"{trend['relative_growth'] * 100:+.1f}%",
+                f"{trend['z']:.2f}",
+                "GROWING" if trend["flagged"] else "stable",
+            ])
+        print(tabulate(table_data, headers=["Series", "Samples", "First", "Last", "Growth", "MK z", "Verdict"],
+                       tablefmt="grid"))
+        
+        flagged = [label for label, trend in soak["trends"].items() if trend["flagged"]]
+        if flagged:
+            print(f"\nWARNING: monotonic growth detected in: {', '.join(flagged)}")
+    
     def report_results(self):
         """Generate a report of performance test results"""
         if not self.results:
@@ -316,9 +855,110 @@ class WallabagApiTester:
             # Print table
             headers = ["Endpoint", "Success", "Failed", "Avg Time", "Median", "Min", "Max", "Std Dev"]
             print(tabulate(table_data, headers=headers, tablefmt="grid"))
+            
+            self.report_phases(endpoint_results)
+            self.report_server_timing(endpoint_results)
+            self.report_listing_savings(endpoint_results)
+    
+    def report_listing_savings(self, endpoint_results, full="Get entries", slim="Get entries (metadata)"):
+        """Compare full and metadata-only listings: bytes and latency saved by dropping content"""
+        rows = {}
+        for name in (full, slim):
+            successful = [r for r in endpoint_results.get(name, []) if r["status"] == "success"]
+            if not successful:
+                return
+            rows[name] = (
+                sum(r["response_size"] for r in successful) / len(successful),
+                summarize([r["time"] for r in successful]),
+            )
+        
+        (full_bytes, full_time), (slim_bytes, slim_time) = rows[full], rows[slim]
+        table_data = [
+            [name, format_bytes(size), format_seconds(times["mean"]), format_seconds(times["p95"])]
+            for name, (size, times) in rows.items()
+        ]
+        table_data.append([
+            "Saved",
+            f"{format_bytes(full_bytes - slim_bytes)} ({(1 - slim_bytes / full_bytes) * 100:.0f}%)" if full_bytes else "N/A",
+            format_seconds(full_time["mean"] - slim_time["mean"]),
+            format_seconds(full_time["p95"] - slim_time["p95"]),
+        ])
+        
+        print("\n--- Metadata-only listing ---")
+        print(tabulate(table_data, headers=["Listing", "Avg Size", "Avg Time", "p95"], tablefmt="grid"))
+    
+    def report_server_timing(self, endpoint_results):
+        """Join client latency with Server-Timing durations; the difference is queueing and network"""
+        table_data = []
+        slowest = []
+        # db metrics are only sent when a server component adds them, so their columns are optional
+        show_db = any((r.get("server_timing") or {}).get("db") is not None
+                      for results in endpoint_results.values() for r in results)
+        for endpoint, endpoint_results_list in endpoint_results.items():
+            timed = [r for r in endpoint_results_list
+                     if r["status"] == "success" and server_total(r.get("server_timing") or {}) is not None]
+            if not timed:
+                continue
+            
+            app = [r["server_timing"]["app"] for r in timed if r["server_timing"].get("app") is not None]
+            overhead = [r["time"] - server_total(r["server_timing"]) for r in timed]
+            
+            row = [
+                endpoint,
+                f"{len(timed)}/{len(endpoint_results_list)}",
+                format_seconds(summarize([r["time"] for r in timed])["p50"]),
+                format_seconds(summarize(app)["p50"]),
+            ]
+            if show_db:
+                db = [r["server_timing"]["db"] for r in timed if r["server_timing"].get("db") is not None]
+                shares = [r["server_timing"]["db"] / r["server_timing"]["app"] for r in timed
+                          if r["server_timing"].get("db") is not None and r["server_timing"].get("app")]
+                share = summarize(shares)["p50"]
+                row += [format_seconds(summarize(db)["p50"]), f"{share:.0%}" if share is not None else "N/A"]
+            row += [
+                format_seconds(summarize(overhead)["p50"]),
+                format_seconds(summarize(overhead)["p95"]),
+            ]
+            table_data.append(row)
+            slowest.extend(timed)
+        
+        if not table_data:
+            return
+        
+        headers = ["Server-Timing", "Samples", "Client p50", "App p50"]
+        if show_db:
+            headers += ["DB p50", "DB share of app p50"]
+        headers += ["Overhead p50", "Overhead p95"]
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        
+        # Trace IDs of the slowest requests, to look up in the server logs
+        for r in sorted(slowest, key=lambda r: r["time"], reverse=True)[:SLOWEST_TRACES]:
+            print(f"  slow: {r['endpoint']} {format_seconds(r['time'])} trace_id={r['trace_id']}")
+    
+    def report_phases(self, endpoint_results):
+        """Print p50/p95 of each request phase per endpoint"""
+        table_data = []
+        for endpoint, endpoint_results_list in endpoint_results.items():
+            timed = [r for r in endpoint_results_list if "phases" in r]
+            if not timed:
+                continue
+            
+            row = [endpoint]
+            for phase in PHASES:
+                stats = summarize([r["phases"][phase] for r in timed])
+                row.append(f"{format_seconds(stats['p50'])} / {format_seconds(stats['p95'])}")
+            row.append(f"{sum(1 for r in timed if r['reused']) / len(timed) * 100:.0f}%")
+            table_data.append(row)
+        
+        if table_data:
+            headers = ["Phase p50 / p95"] + [phase.upper() if phase in ("dns", "tls", "ttfb") else phase.capitalize()
+                                              for phase in PHASES] + ["Reused"]
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
     
     def generate_charts(self, output_dir):
         """Generate performance charts from test results"""
+        import matplotlib.pyplot as plt
+        
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
@@ -368,7 +1008,10 @@ class WallabagApiTester:
             json.dump({
                 "base_url": self.base_url,
                 "timestamp": time.time(),
-                "results": self.results
+                "results": self.results,
+                "soak": self.soak_results,
+                "stress": self.stress_results,
+                "adaptive": self.adaptive_results
             }, f, indent=2)
             
         if self.verbose:
@@ -393,6 +1036,60 @@ def main():
                         help='Output file for test results')
     parser.add_argument('--charts', default='performance_charts',
                         help='Directory to output performance charts')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve live Prometheus metrics on this port while the test runs')
+    parser.add_argument('--metrics-linger', type=float, default=0,
+                        help='Seconds to keep serving metrics after the run for a final scrape')
+    parser.add_argument('--keep-alive', action='store_true',
+                        help='Reuse connections between requests (default: new connection per request)')
+    parser.add_argument('--http2', action='store_true',
+                        help='Multiplex requests over one HTTP/2 connection (h2c for http:// URLs; needs httpx and h2)')
+    parser.add_argument('--soak', action='store_true',
+                        help='Run a long mixed workload at fixed RPS instead of the load configurations')
+    parser.add_argument('--soak-duration', default=DEFAULT_SOAK_DURATION,
+                        help='Soak duration, e.g. 3600, 90m or 4h')
+    parser.add_argument('--soak-rps', type=float, default=DEFAULT_SOAK_RPS,
+                        help='Target requests per second during the soak run')
+    parser.add_argument('--soak-window', type=int, default=DEFAULT_SOAK_WINDOW,
+                        help='Window size in seconds for rolling latency percentiles')
+    parser.add_argument('--sample-interval', type=int, default=DEFAULT_SAMPLE_INTERVAL,
+                        help='Seconds between server resource samples')
+    parser.add_argument('--container', default=os.environ.get('WALLABAG_CONTAINER'),
+                        help='Docker container name of the local Wallabag instance for memory sampling')
+    parser.add_argument('--sample-db', action='store_true',
+                        help='Sample pg_stat_activity and table bloat using the TEST_DATABASE_* settings')
+    parser.add_argument('--stress', action='store_true',
+                        help='Search for the maximum sustainable request rate per endpoint')
+    parser.add_argument('--stress-strategy', choices=['ramp', 'binary'], default='binary',
+                        help='Increase load in fixed steps (ramp) or bracket and bisect (binary)')
+    parser.add_argument('--stress-endpoints', nargs='*', default=None,
+                        help='Endpoint names to stress (default: all)')
+    parser.add_argument('--start-rps', type=float, default=DEFAULT_STRESS_START_RPS,
+                        help='Initial request rate (and ramp step size)')
+    parser.add_argument('--max-rps', type=float, default=DEFAULT_STRESS_MAX_RPS,
+                        help='Upper bound for the request rate search')
+    parser.add_argument('--step-duration', type=float, default=DEFAULT_STRESS_STEP_DURATION,
+                        help='Seconds of load per step')
+    parser.add_argument('--slo-p99', type=float, default=DEFAULT_SLO_P99,
+                        help='p99 latency objective in seconds')
+    parser.add_argument('--slo-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                        help='Maximum tolerated error rate (0-1)')
+    parser.add_argument('--terraform-dir', default=DEFAULT_TERRAFORM_DIR,
+                        help='Terraform directory to read the Cloud Run settings from')
+    parser.add_argument('--stress-history', default=None,
+                        help='JSON file accumulating stress runs across Cloud Run settings')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Find the concurrency each endpoint sustains with an adaptive limiter')
+    parser.add_argument('--adaptive-endpoints', nargs='*', default=None,
+                        help='Endpoint names to probe (default: all)')
+    parser.add_argument('--adaptive-duration', default=str(DEFAULT_ADAPTIVE_DURATION),
+                        help='Probe duration per endpoint, e.g. 60 or 5m')
+    parser.add_argument('--initial-concurrency', type=int, default=DEFAULT_INITIAL_CONCURRENCY,
+                        help='Starting concurrency window')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='Upper bound for the concurrency window')
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                        help='Shrink the window when latency exceeds this multiple of its baseline')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose output')
     args = parser.parse_args()
@@ -404,9 +1101,62 @@ def main():
         client_secret=args.client_secret,
         username=args.username,
         password=args.password,
-        verbose=args.verbose
+        verbose=args.verbose,
+        keep_alive=args.keep_alive,
+        http2=args.http2
     )
     
+    if args.metrics_port is not None:
+        try:
+            from harness.metrics import LoadMetrics
+            tester.metrics = LoadMetrics()
+            port = tester.metrics.serve(args.metrics_port)
+            print(f"Prometheus metrics available at http://localhost:{port}/metrics")
+        except ImportError:
+            print("Warning: prometheus_client not installed. Metrics endpoint not started.")
+    
+    try:
+        run_mode(tester, args)
+    finally:
+        if tester.metrics:
+            time.sleep(args.metrics_linger)
+            tester.metrics.shutdown()
+
+
+def run_mode(tester, args):
+    """Run the load mode selected on the command line"""
+    if args.adaptive:
+        if tester.run_adaptive(args.adaptive_endpoints, parse_duration(args.adaptive_duration),
+                               args.initial_concurrency, args.max_concurrency, args.latency_tolerance):
+            tester.report_adaptive_results()
+            tester.save_results(args.output)
+        return
+    
+    if args.stress:
+        history = []
+        if args.stress_history and os.path.exists(args.stress_history):
+            with open(args.stress_history) as f:
+                history = json.load(f)
+        
+        if tester.run_stress(args.stress_endpoints, args.stress_strategy, args.start_rps, args.max_rps,
+                             args.step_duration, args.slo_p99, args.slo_error_rate,
+                             settings=load_cloud_run_settings(args.terraform_dir)):
+            tester.report_stress_results(history)
+            tester.save_results(args.output)
+            
+            if args.stress_history:
+                with open(args.stress_history, 'w') as f:
+                    json.dump(history + [tester.stress_results], f, indent=2)
+        return
+    
+    if args.soak:
+        db_config = get_db_config() if args.sample_db else None
+        if tester.run_soak(parse_duration(args.soak_duration), args.soak_rps, args.soak_window,
+                           args.sample_interval, container=args.container, db_config=db_config):
+            tester.report_soak_results()
+            tester.save_results(args.output)
+        return
+    
     if tester.run_all_tests():
         tester.report_results()
         tester.save_results(args.output)
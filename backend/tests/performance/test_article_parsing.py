@@ -16,6 +16,10 @@ import statistics
 from urllib.parse import urljoin
 import concurrent.futures
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.concurrency import AdaptiveConcurrencyLimiter
+
 # Sample articles to test parsing performance
 TEST_ARTICLES = [
     # Simple text articles
@@ -41,6 +45,9 @@ TEST_ARTICLES = [
 DEFAULT_BASE_URL = "http://localhost:8080"
 DEFAULT_API_ENDPOINT = "/api/entries"
 
+# Endpoint label used in live metrics
+ADD_ARTICLE_ENDPOINT = "Add article"
+
 # Authentication settings
 DEFAULT_CLIENT_ID = "wallabag_client_id"
 DEFAULT_CLIENT_SECRET = "wallabag_client_secret"
@@ -65,6 +72,8 @@ class WallabagPerformanceTester:
         
         # Stats collections
         self.results = []
+        self.metrics = None
+        self.limiter = None
     
     def authenticate(self):
         """Authenticate with the Wallabag API"""
@@ -111,6 +120,16 @@ class WallabagPerformanceTester:
     
     def add_article(self, url):
         """Add an article to Wallabag and measure parsing time"""
+        if not self.metrics:
+            return self.post_article(url)
+        
+        with self.metrics.track(ADD_ARTICLE_ENDPOINT):
+            result = self.post_article(url)
+        self.metrics.observe(dict(result, endpoint=ADD_ARTICLE_ENDPOINT))
+        return result
+    
+    def post_article(self, url):
+        """POST a single article URL and return its timing result"""
         start_time = time.time()
         
         payload = {
@@ -158,22 +177,44 @@ class WallabagPerformanceTester:
                 "time": elapsed_time,
                 "error": error_message
             }
+            if hasattr(e, 'response') and e.response is not None:
+                result["status_code"] = e.response.status_code
             
             if self.verbose:
                 print(f"Failed to add article {url}: {error_message}")
                 
             return result
     
+    def limited_add_article(self, url):
+        """Add an article within the adaptive concurrency window"""
+        self.limiter.acquire()
+        start_time = time.monotonic()
+        status_code = None
+        try:
+            result = self.add_article(url)
+            status_code = result.get("status_code")
+        finally:
+            self.limiter.release(status_code, time.monotonic() - start_time)
+        return result
+    
     def run_tests(self, urls, max_workers=4):
         """Run performance tests for all URLs"""
         if not self.authenticate():
             return False
             
         print(f"Running article parsing performance tests against {self.base_url}")
-        print(f"Testing {len(urls)} articles with {max_workers} concurrent workers")
+        
+        add_article = self.add_article
+        if self.limiter:
+            print(f"Testing {len(urls)} articles with adaptive concurrency "
+                  f"({self.limiter.current}-{self.limiter.maximum} workers)")
+            max_workers = self.limiter.maximum
+            add_article = self.limited_add_article
+        else:
+            print(f"Testing {len(urls)} articles with {max_workers} concurrent workers")
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_url = {executor.submit(self.add_article, url): url for url in urls}
+            future_to_url = {executor.submit(add_article, url): url for url in urls}
             for future in concurrent.futures.as_completed(future_to_url):
                 result = future.result()
                 self.results.append(result)
@@ -225,6 +266,14 @@ class WallabagPerformanceTester:
             print(f"Average word count: {avg_words:.0f} words")
             print(f"Average parsing speed: {avg_wps:.0f} words/second")
         
+        if self.limiter:
+            window = self.limiter.summary()
+            print("\n--- Adaptive Concurrency ---")
+            print(f"Converged concurrency: {window['converged']:.1f} (final {window['final']:.0f}, "
+                  f"range {window['min']:.0f}-{window['max']:.0f})")
+            print(f"Back-offs: {window['decreases']['overload']} on errors, "
+                  f"{window['decreases']['latency']} on latency inflation")
+        
         if failed:
             print("\n--- Failed Articles ---")
             for result in failed:
@@ -236,7 +285,8 @@ class WallabagPerformanceTester:
             json.dump({
                 "base_url": self.base_url,
                 "timestamp": time.time(),
-                "results": self.results
+                "results": self.results,
+                "concurrency": self.limiter.summary() if self.limiter else None
             }, f, indent=2)
             
         if self.verbose:
@@ -263,6 +313,15 @@ def main():
                         help='Output file for test results')
     parser.add_argument('--workers', type=int, default=4,
                         help='Number of concurrent workers')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt the number of concurrent workers to server latency and errors '
+                             '(--workers is the upper bound)')
+    parser.add_argument('--latency-tolerance', type=float, default=2.0,
+                        help='With --adaptive, back off when latency exceeds this multiple of its baseline')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve live Prometheus metrics on this port while the test runs')
+    parser.add_argument('--metrics-linger', type=float, default=0,
+                        help='Seconds to keep serving metrics after the run for a final scrape')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose output')
     args = parser.parse_args()
@@ -290,9 +349,27 @@ def main():
         verbose=args.verbose
     )
     
-    if tester.run_tests(test_urls, args.workers):
-        tester.report_results()
-        tester.save_results(args.output)
+    if args.adaptive:
+        tester.limiter = AdaptiveConcurrencyLimiter(initial=1, maximum=args.workers,
+                                                    latency_tolerance=args.latency_tolerance)
+    
+    if args.metrics_port is not None:
+        try:
+            from harness.metrics import LoadMetrics
+            tester.metrics = LoadMetrics()
+            port = tester.metrics.serve(args.metrics_port)
+            print(f"Prometheus metrics available at http://localhost:{port}/metrics")
+        except ImportError:
+            print("Warning: prometheus_client not installed. Metrics endpoint not started.")
+    
+    try:
+        if tester.run_tests(test_urls, args.workers):
+            tester.report_results()
+            tester.save_results(args.output)
+    finally:
+        if tester.metrics:
+            time.sleep(args.metrics_linger)
+            tester.metrics.shutdown()
     
 
 if __name__ == "__main__":
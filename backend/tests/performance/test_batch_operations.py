@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Performance test for batched entry operations
+Compares per-item, concurrent and list-endpoint create/tag/archive/delete
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import uuid
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.batch import DEFAULT_LIST_BATCH_SIZE, BatchClient
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_WORKERS = 16
+
+# Mode name -> (workers, use list endpoints); "sequential" is one request at a time
+BATCH_MODES = {
+    "sequential": (1, False),
+    "concurrent": (None, False),
+    "lists": (None, True),
+}
+
+# The .invalid TLD never resolves, so Wallabag's content fetch fails fast and
+# the same way in every mode instead of timing external sites
+BENCH_URL_PREFIX = "https://bench.invalid/batch"
+
+BENCH_TAGS = ["batch-bench"]
+
+
+class WallabagBatchBenchmark(WallabagApiTester):
+    def __init__(self, base_url, sizes=None, modes=None, workers=DEFAULT_WORKERS,
+                 list_batch_size=DEFAULT_LIST_BATCH_SIZE, timeout=30, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.sizes = sizes or DEFAULT_SIZES
+        self.modes = modes or list(BATCH_MODES)
+        self.workers = workers
+        self.list_batch_size = list_batch_size
+        self.timeout = timeout
+
+        # Internal storage
+        self.results = []
+
+    def batch_client(self, mode):
+        workers, use_lists = BATCH_MODES[mode]
+        return BatchClient(self.api_client(timeout=self.timeout), workers=workers or self.workers,
+                           list_batch_size=self.list_batch_size, use_lists=use_lists, verbose=self.verbose)
+
+    def run_cycle(self, mode, size):
+        """Create, tag, archive and delete size entries in one mode"""
+        batch = self.batch_client(mode)
+        run_id = uuid.uuid4().hex[:8]
+        urls = [f"{BENCH_URL_PREFIX}/{run_id}/{i}" for i in range(size)]
+
+        print(f"{mode}: {size} entries")
+        created = batch.create(urls)
+        entries = created.succeeded
+        operations = [
+            created,
+            batch.add_tags(entries, BENCH_TAGS),
+            batch.patch([entry["id"] for entry in entries], {"archive": 1}),
+            batch.delete(entries),
+        ]
+
+        for result in operations:
+            row = result.as_dict()
+            row.update({"run_mode": mode, "size": size, "workers": batch.limiter.maximum})
+            self.results.append(row)
+            if self.verbose:
+                print(f"  {result.operation}: {row['succeeded']} ok, {row['failed']} failed, "
+                      f"{row['requests']} requests in {row['elapsed']:.1f}s")
+
+        # Entries whose delete failed would otherwise pollute the account
+        deleted = set(operations[-1].succeeded)
+        remaining = [entry["id"] for entry in entries if entry["id"] not in deleted]
+        if remaining:
+            self.batch_client("concurrent").delete(remaining)
+
+        return len(entries) > 0
+
+    def run_all_tests(self):
+        """Run every size in every mode"""
+        if not self.authenticate():
+            return False
+
+        print(f"Running batch operations benchmark against {self.base_url}")
+        print(f"Modes: {', '.join(self.modes)}; sizes: {self.sizes}; "
+              f"{self.workers} workers; {self.list_batch_size} items per list request")
+
+        for size in self.sizes:
+            for mode in self.modes:
+                if not self.run_cycle(mode, size):
+                    print(f"No entries created in {mode} mode; aborting")
+                    return bool(self.results)
+
+        return True
+
+    def speedup(self, operation, size, mode):
+        """Throughput of mode relative to sequential per-item requests"""
+        rows = {r["run_mode"]: r for r in self.results
+                if r["operation"] == operation and r["size"] == size}
+        baseline = rows.get("sequential")
+        if not baseline or not baseline["throughput"] or mode not in rows:
+            return None
+        return rows[mode]["throughput"] / baseline["throughput"]
+
+    def report_results(self):
+        """Generate a report of batch benchmark results"""
+        if not self.results:
+            print("No batch results to report")
+            return
+
+        print("\n========== BATCH OPERATIONS RESULTS ==========")
+
+        headers = ["Size", "Mode", "Operation", "Succeeded", "Failed", "Requests", "Elapsed", "Items/s", "Speedup"]
+        table_data = []
+        for r in self.results:
+            speedup = self.speedup(r["operation"], r["size"], r["run_mode"])
+            table_data.append([
+                r["size"],
+                r["run_mode"],
+                f"{r['operation']} ({r['mode']})",
+                r["succeeded"],
+                r["failed"],
+                r["requests"],
+                f"{r['elapsed']:.1f}s",
+                f"{r['throughput']:.1f}",
+                f"{speedup:.1f}x" if speedup else "-",
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "workers": self.workers,
+                "list_batch_size": self.list_batch_size,
+                "results": self.results
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Batch Operations Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Numbers of entries per cycle (up to 100000)')
+    parser.add_argument('--modes', nargs='+', choices=list(BATCH_MODES), default=list(BATCH_MODES),
+                        help='Modes to compare')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Concurrent requests in the concurrent and lists modes')
+    parser.add_argument('--list-batch-size', type=int, default=DEFAULT_LIST_BATCH_SIZE,
+                        help='Items per list request (must not exceed the server\'s api_limit_mass_actions)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--output', default='batch_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagBatchBenchmark(
+        base_url=args.base_url,
+        sizes=args.sizes,
+        modes=args.modes,
+        workers=args.workers,
+        list_batch_size=args.list_batch_size,
+        timeout=args.timeout,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Performance test for response compression of Wallabag entry listings
+Compares identity, gzip, br and zstd on /api/entries at several page sizes
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from urllib.parse import urljoin
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.corpus import generate_corpus
+from harness.encodings import DEFAULT_LEVELS, available_encodings, decode, encode
+from harness.http_timing import TimedHttpClient
+from harness.stats import summarize, format_seconds, format_bytes
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Accept-Encoding values compared; the ones the client cannot decode are skipped
+BENCHMARK_ENCODINGS = ["identity", "gzip", "br", "zstd"]
+
+DEFAULT_PAGE_SIZES = [10, 30, 100, 250]
+DEFAULT_REPEATS = 10
+
+# Link speed used to weigh bytes saved against CPU spent (Cloud Run egress to a
+# typical client, not the local loopback the benchmark usually runs on)
+DEFAULT_BANDWIDTH_MBPS = 20
+
+# How to enable each coding for application/json in the php:apache image;
+# codings missing here cannot be served by Apache 2.4 itself
+APACHE_CONFIG = {
+    "identity": "No change needed",
+    "gzip": "mod_deflate is enabled by default but not for JSON: "
+            "AddOutputFilterByType DEFLATE application/json",
+    "br": "RUN a2enmod brotli, then: AddOutputFilterByType BROTLI_COMPRESS application/json",
+}
+
+
+class WallabagCompressionBenchmark(WallabagApiTester):
+    def __init__(self, base_url, page_sizes=None, repeats=DEFAULT_REPEATS, seed_entries=0, seed=42,
+                 bandwidth_mbps=DEFAULT_BANDWIDTH_MBPS, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.page_sizes = page_sizes or DEFAULT_PAGE_SIZES
+        self.repeats = repeats
+        self.corpus = generate_corpus(seed_entries, seed=seed,
+                                      url_prefix="https://bench.example.org/compression") if seed_entries else []
+        self.bandwidth_mbps = bandwidth_mbps
+        self.encodings = [e for e in BENCHMARK_ENCODINGS if e in available_encodings()]
+
+        # Internal storage
+        self.measurements = []
+        self.estimates = []
+
+    def measure(self, per_page, encoding):
+        """Fetch one listing page repeatedly with a single Accept-Encoding"""
+        client = TimedHttpClient(keep_alive=True, accept_encoding=encoding)
+        url = urljoin(self.base_url, "/api/entries")
+        params = {"page": 1, "perPage": per_page, "detail": "full"}
+
+        samples = []
+        body = None
+        try:
+            # The first request opens the connection; keep handshakes out of the samples
+            client.request("GET", url, headers=self.get_headers(), params=params)
+            for _ in range(self.repeats):
+                start = time.perf_counter()
+                response = client.request("GET", url, headers=self.get_headers(), params=params)
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    print(f"perPage={per_page} {encoding}: HTTP {response.status_code}")
+                    continue
+                samples.append({
+                    "time": elapsed,
+                    "ttfb": response.timings["ttfb"],
+                    "transfer": response.timings["transfer"],
+                    "decode": response.timings["decode"],
+                    "wire_bytes": response.wire_bytes,
+                    "decoded_bytes": len(response.content),
+                    "content_encoding": response.content_encoding,
+                })
+                body = response.content
+        except (OSError, ValueError) as e:
+            print(f"perPage={per_page} {encoding}: {e}")
+        finally:
+            client.close()
+
+        negotiated = sorted({s["content_encoding"] for s in samples})
+        return {
+            "per_page": per_page,
+            "encoding": encoding,
+            "negotiated": negotiated,
+            "samples": len(samples),
+            "wire_bytes": summarize([s["wire_bytes"] for s in samples])["mean"],
+            "decoded_bytes": summarize([s["decoded_bytes"] for s in samples])["mean"],
+            "latency": summarize([s["time"] for s in samples]),
+            "ttfb": summarize([s["ttfb"] for s in samples]),
+            "decode": summarize([s["decode"] for s in samples]),
+        }, body
+
+    def estimate(self, per_page, body):
+        """Compress an identity body locally to estimate what the server would send and spend"""
+        for encoding in self.encodings:
+            start = time.thread_time()
+            for _ in range(self.repeats):
+                compressed = encode(body, encoding)
+            compress_cpu = (time.thread_time() - start) / self.repeats
+
+            start = time.thread_time()
+            for _ in range(self.repeats):
+                decode(compressed, encoding)
+            decompress_cpu = (time.thread_time() - start) / self.repeats
+
+            self.estimates.append({
+                "per_page": per_page,
+                "encoding": encoding,
+                "level": DEFAULT_LEVELS.get(encoding),
+                "raw_bytes": len(body),
+                "wire_bytes": len(compressed),
+                "ratio": len(body) / len(compressed) if compressed else None,
+                "compress_cpu": compress_cpu,
+                "decompress_cpu": decompress_cpu,
+            })
+
+    def run_all_tests(self, keep_entries=False):
+        """Measure every page size with every encoding"""
+        if not self.authenticate():
+            return False
+
+        if self.corpus and not self.seed_entries(self.corpus):
+            return False
+
+        try:
+            print(f"Running compression benchmark against {self.base_url}")
+            print(f"Encodings: {', '.join(self.encodings)}; page sizes: {self.page_sizes}")
+            skipped = [e for e in BENCHMARK_ENCODINGS if e not in self.encodings]
+            if skipped:
+                print(f"Skipping {', '.join(skipped)}: install brotli/zstandard to decode them")
+
+            for per_page in self.page_sizes:
+                identity_body = None
+                for encoding in self.encodings:
+                    if self.verbose:
+                        print(f"perPage={per_page} Accept-Encoding: {encoding}")
+                    measurement, body = self.measure(per_page, encoding)
+                    self.measurements.append(measurement)
+                    if encoding == "identity":
+                        identity_body = body
+
+                if identity_body:
+                    self.estimate(per_page, identity_body)
+        finally:
+            if not keep_entries:
+                self.cleanup_entries()
+
+        return True
+
+    def recommend(self):
+        """Pick the coding Apache can serve with the lowest estimated cost per response
+
+        Cost is transfer time at the configured bandwidth plus compression and
+        decompression CPU, estimated at the largest page size.
+        """
+        largest = max(self.page_sizes)
+        bytes_per_second = self.bandwidth_mbps * 1_000_000 / 8
+
+        costs = {}
+        for estimate in self.estimates:
+            if estimate["per_page"] == largest:
+                costs[estimate["encoding"]] = (estimate["wire_bytes"] / bytes_per_second
+                                               + estimate["compress_cpu"] + estimate["decompress_cpu"])
+
+        servable = [e for e in costs if e in APACHE_CONFIG]
+        if not servable:
+            return None, costs
+        return min(servable, key=costs.get), costs
+
+    def report_results(self):
+        """Generate a report of compression benchmark results"""
+        if not self.measurements:
+            print("No compression results to report")
+            return
+
+        print("\n========== COMPRESSION BENCHMARK RESULTS ==========")
+        print(f"{self.repeats} requests per page size and encoding")
+
+        headers = ["perPage", "Accept-Encoding", "Served", "Wire", "Decoded", "p50", "p95", "TTFB p50", "Decode"]
+        table_data = []
+        for m in self.measurements:
+            table_data.append([
+                m["per_page"],
+                m["encoding"],
+                ",".join(m["negotiated"]) or "-",
+                format_bytes(m["wire_bytes"]),
+                format_bytes(m["decoded_bytes"]),
+                format_seconds(m["latency"]["p50"]),
+                format_seconds(m["latency"]["p95"]),
+                format_seconds(m["ttfb"]["p50"]),
+                format_seconds(m["decode"]["mean"]),
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+        not_served = sorted({m["encoding"] for m in self.measurements
+                             if m["samples"] and m["encoding"] not in m["negotiated"]})
+        if not_served:
+            print(f"The server did not apply: {', '.join(not_served)} (see the estimates below)")
+
+        if self.estimates:
+            print("\n=== Estimated server-side compression (identity body compressed locally) ===")
+            table_data = [
+                [e["per_page"], e["encoding"], e["level"], format_bytes(e["raw_bytes"]), format_bytes(e["wire_bytes"]),
+                 f"{e['ratio']:.1f}x", format_seconds(e["compress_cpu"]), format_seconds(e["decompress_cpu"])]
+                for e in self.estimates
+            ]
+            print(tabulate(table_data, headers=["perPage", "Encoding", "Level", "Raw", "Compressed", "Ratio",
+                                                "Compress CPU", "Decompress CPU"], tablefmt="grid"))
+
+        best, costs = self.recommend()
+        if best:
+            print(f"\nAt {self.bandwidth_mbps} Mbit/s and perPage={max(self.page_sizes)}, estimated cost per response:")
+            for encoding, cost in sorted(costs.items(), key=lambda item: item[1]):
+                note = "" if encoding in APACHE_CONFIG else " (not available in Apache 2.4)"
+                print(f"  {encoding}: {format_seconds(cost)}{note}")
+            print(f"Recommendation: {best} - {APACHE_CONFIG[best]}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        best, costs = self.recommend()
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "bandwidth_mbps": self.bandwidth_mbps,
+                "measurements": self.measurements,
+                "estimates": self.estimates,
+                "recommendation": best,
+                "costs": costs
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Response Compression Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=DEFAULT_PAGE_SIZES,
+                        help='perPage values to fetch')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Requests per page size and encoding')
+    parser.add_argument('--seed-entries', type=int, default=0,
+                        help='Create this many generated entries first (default: use existing entries)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the generated corpus')
+    parser.add_argument('--keep-entries', action='store_true',
+                        help='Do not delete seeded entries after the run')
+    parser.add_argument('--bandwidth-mbps', type=float, default=DEFAULT_BANDWIDTH_MBPS,
+                        help='Client link speed used for the recommendation')
+    parser.add_argument('--output', default='compression_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagCompressionBenchmark(
+        base_url=args.base_url,
+        page_sizes=args.page_sizes,
+        repeats=args.repeats,
+        seed_entries=args.seed_entries,
+        seed=args.seed,
+        bandwidth_mbps=args.bandwidth_mbps,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests(keep_entries=args.keep_entries):
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
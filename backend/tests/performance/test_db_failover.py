@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Database failover and connection-drop recovery benchmark for Wallabag
+Runs steady load, breaks the database mid-run and measures errors,
+time to recovery and latency overshoot per endpoint
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.docker import DEFAULT_IMAGE, DockerError, docker, remove_container, start_wallabag
+from harness.fault_proxy import DEFAULT_DB_TARGET, DEFAULT_PROXY_LISTEN, FaultProxy, parse_address, proxy_listen_address
+from harness.recovery import DEFAULT_LATENCY_TOLERANCE, error_timeline, recovery_metrics
+from harness.stats import format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    API_ENDPOINTS,
+    SOAK_WORKLOAD,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Faults that go through the proxy (Wallabag must reach Postgres through it)
+# and faults applied to the Postgres container with the docker CLI
+PROXY_FAULTS = {
+    "sever": "Reset every open database connection; Postgres stays up",
+    "outage": "Reset every connection and refuse new ones for --outage seconds",
+}
+DOCKER_FAULTS = {
+    "restart": "docker restart of the Postgres container (graceful shutdown, like a maintenance restart)",
+    "kill": "docker kill, then docker start after --outage seconds (crash recovery)",
+    "pause": "docker pause for --outage seconds (connections hang instead of failing)",
+}
+
+# Faults that keep the database unavailable for --outage seconds
+TIMED_FAULTS = ("outage", "kill", "pause")
+
+DEFAULT_RPS = 10
+DEFAULT_WARMUP = 30
+DEFAULT_OUTAGE = 10
+DEFAULT_OBSERVE = 60
+DEFAULT_DB_CONTAINER = "backend-postgres-1"
+
+# Wallabag container started by --image
+CONTAINER_NAME = "wallabag-dbfailover"
+DEFAULT_CONTAINER_PORT = 18181
+
+
+class WallabagFailoverBenchmark(WallabagApiTester):
+    def __init__(self, base_url, fault, proxy=None, db_container=None, rps=DEFAULT_RPS, warmup=DEFAULT_WARMUP,
+                 outage=DEFAULT_OUTAGE, observe=DEFAULT_OBSERVE, latency_tolerance=DEFAULT_LATENCY_TOLERANCE,
+                 endpoint_names=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.fault = fault
+        self.proxy = proxy
+        self.db_container = db_container
+        self.rps = rps
+        self.warmup = warmup
+        self.outage = outage if fault in TIMED_FAULTS else 0
+        self.observe = observe
+        self.latency_tolerance = latency_tolerance
+
+        workload = [w for w in SOAK_WORKLOAD if not endpoint_names or w["endpoint"] in endpoint_names]
+        by_name = {e["name"]: e for e in API_ENDPOINTS}
+        self.endpoints = [by_name[w["endpoint"]] for w in workload]
+        self.weights = [w["weight"] for w in workload]
+
+        # Internal storage
+        self.load_results = []
+        self.fault_window = None
+        self.analysis = {}
+
+    def inject_fault(self):
+        """Apply the fault; return when it has been lifted"""
+        if self.fault == "sever":
+            dropped = self.proxy.reset_connections()
+            print(f"Severed {dropped} database connections")
+        elif self.fault == "outage":
+            self.proxy.configure(down=True)
+            dropped = self.proxy.reset_connections()
+            print(f"Database unreachable for {self.outage}s ({dropped} connections severed)")
+            time.sleep(self.outage)
+            self.proxy.configure(down=False)
+        elif self.fault == "restart":
+            print(f"Restarting {self.db_container}...")
+            docker("restart", self.db_container)
+        elif self.fault == "kill":
+            print(f"Killing {self.db_container} for {self.outage}s...")
+            docker("kill", self.db_container)
+            time.sleep(self.outage)
+            docker("start", self.db_container)
+        elif self.fault == "pause":
+            print(f"Pausing {self.db_container} for {self.outage}s...")
+            docker("pause", self.db_container)
+            time.sleep(self.outage)
+            docker("unpause", self.db_container)
+
+    def run_all_tests(self):
+        """Run steady load and inject the fault after the warm-up"""
+        if not self.authenticate():
+            return False
+
+        if not self.prepare_test_data():
+            return False
+
+        duration = self.warmup + self.outage + self.observe
+        print(f"Running {self.fault} failover scenario against {self.base_url}: {self.rps} RPS for "
+              f"{duration:.0f}s, fault after {self.warmup:.0f}s")
+
+        def load():
+            self.load_results = self.run_open_loop(self.endpoints, self.rps, duration, self.weights)
+
+        start_time = time.monotonic()
+        thread = threading.Thread(target=load)
+        thread.start()
+
+        try:
+            time.sleep(self.warmup)
+            fault_start = time.monotonic() - start_time
+            self.inject_fault()
+            fault_end = time.monotonic() - start_time
+            self.fault_window = (fault_start, fault_end)
+            print(f"Fault lifted after {fault_end - fault_start:.1f}s; observing recovery...")
+        except DockerError as e:
+            print(f"Docker error: {e}")
+            return False
+        finally:
+            # A failed injection still has to wait for the load thread
+            thread.join()
+
+        self.analyze()
+        return True
+
+    def analyze(self):
+        """Recovery metrics per endpoint and for all requests"""
+        fault_start, fault_end = self.fault_window
+        groups = {"All": self.load_results}
+        for endpoint in self.endpoints:
+            groups[endpoint["name"]] = [r for r in self.load_results if r["endpoint"] == endpoint["name"]]
+        self.analysis = {
+            name: recovery_metrics(results, fault_start, fault_end, self.latency_tolerance)
+            for name, results in groups.items() if results
+        }
+        return self.analysis
+
+    def report_results(self):
+        """Generate a report of the failover scenario"""
+        if not self.analysis:
+            print("No failover results to report")
+            return
+
+        fault_start, fault_end = self.fault_window
+        print("\n========== DATABASE FAILOVER RESULTS ==========")
+        description = PROXY_FAULTS.get(self.fault) or DOCKER_FAULTS.get(self.fault)
+        print(f"Fault: {self.fault} - {description}")
+        print(f"Fault window: {fault_start:.1f}s - {fault_end:.1f}s; disrupted = failed or slower than "
+              f"{self.latency_tolerance}x the pre-fault p95")
+
+        headers = ["Endpoint", "Requests", "Errors", "Slow", "Time to Recovery", "Disruption",
+                   "Baseline p50", "Baseline p95", "Disrupted p95", "Peak", "Overshoot"]
+        table_data = []
+        for name, m in self.analysis.items():
+            table_data.append([
+                name,
+                m["requests"],
+                m["errors"],
+                m["slow"],
+                f"{m['time_to_recovery']:.1f}s" if m["recovered"] else "not recovered",
+                f"{m['disruption']:.1f}s",
+                format_seconds(m["baseline"]["p50"]),
+                format_seconds(m["baseline"]["p95"]),
+                format_seconds(m["disrupted_p95"]),
+                format_seconds(m["peak_latency"]),
+                f"{m['overshoot']:.1f}x" if m["overshoot"] else "-",
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+        timeline = error_timeline(self.load_results)
+        if timeline:
+            print("Errors by send time: " + ", ".join(
+                f"{offset - fault_start:+.0f}s: {count}" for offset, count in timeline.items()))
+
+        if self.proxy:
+            stats = self.proxy.stats()
+            print(f"Proxy: {stats['connections']} connections, {stats['resets']} reset, {stats['refused']} refused")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "fault": self.fault,
+                "fault_window": self.fault_window,
+                "rps": self.rps,
+                "latency_tolerance": self.latency_tolerance,
+                "analysis": self.analysis,
+                "error_timeline": error_timeline(self.load_results),
+                "results": [{k: r.get(k) for k in ("endpoint", "offset", "time", "status", "status_code")}
+                            for r in self.load_results]
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Database Failover Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--fault', choices=list(PROXY_FAULTS) + list(DOCKER_FAULTS), default='sever',
+                        help='How to break the database: ' + '; '.join(
+                            f"{name}: {text}" for name, text in {**PROXY_FAULTS, **DOCKER_FAULTS}.items()))
+    parser.add_argument('--db-container', default=os.environ.get('WALLABAG_DB_CONTAINER', DEFAULT_DB_CONTAINER),
+                        help='Postgres container for the docker faults')
+    parser.add_argument('--proxy-listen', default=None,
+                        help=f'Address the database proxy listens on, host:port (proxy faults; default: '
+                             f'{DEFAULT_PROXY_LISTEN}, or the docker bridge gateway with --image)')
+    parser.add_argument('--db-target', default=DEFAULT_DB_TARGET,
+                        help='Postgres address the proxy forwards to, host:port')
+    parser.add_argument('--image', nargs='?', const=os.environ.get('WALLABAG_IMAGE', DEFAULT_IMAGE), default=None,
+                        help='Start a Wallabag container (default image: %(const)s) whose database '
+                             'connection goes through the proxy')
+    parser.add_argument('--container-port', type=int, default=DEFAULT_CONTAINER_PORT,
+                        help='Host port for the --image container')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS,
+                        help='Steady request rate')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP,
+                        help='Seconds of load before the fault (the latency baseline)')
+    parser.add_argument('--outage', type=float, default=DEFAULT_OUTAGE,
+                        help='Seconds the database stays unavailable (outage, kill, pause)')
+    parser.add_argument('--observe', type=float, default=DEFAULT_OBSERVE,
+                        help='Seconds of load after the fault window (a restart\'s duration counts toward it)')
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                        help='Requests slower than this multiple of the pre-fault p95 count as disrupted')
+    parser.add_argument('--endpoints', nargs='+', default=None,
+                        help='Endpoint names from the soak workload to include (default: all)')
+    parser.add_argument('--output', default='db_failover_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    proxy = None
+    base_url = args.base_url
+    try:
+        if args.fault in PROXY_FAULTS or args.image:
+            listen = proxy_listen_address(args.proxy_listen, for_containers=bool(args.image))
+            listen_host, listen_port = parse_address(listen)
+            proxy = FaultProxy(*parse_address(args.db_target), listen_host=listen_host,
+                               listen_port=listen_port).start()
+
+        if args.image:
+            print(f"Starting {args.image} with its database at host.docker.internal:{proxy.port}...")
+            base_url = start_wallabag(args.image, CONTAINER_NAME, args.container_port, proxy.port)
+
+        tester = WallabagFailoverBenchmark(
+            base_url=base_url,
+            fault=args.fault,
+            proxy=proxy,
+            db_container=args.db_container,
+            rps=args.rps,
+            warmup=args.warmup,
+            outage=args.outage,
+            observe=args.observe,
+            latency_tolerance=args.latency_tolerance,
+            endpoint_names=args.endpoints,
+            api_key=args.api_key,
+            client_id=args.client_id,
+            client_secret=args.client_secret,
+            username=args.username,
+            password=args.password,
+            verbose=args.verbose,
+            keep_alive=True
+        )
+
+        if tester.run_all_tests():
+            if proxy and args.fault in PROXY_FAULTS and proxy.stats()["connections"] == 0:
+                print("Warning: no database connections went through the proxy, so the fault had no effect. "
+                      f"Point WALLABAG_DATABASE_HOST/PORT at {proxy.address} or use --image.")
+            tester.report_results()
+            tester.save_results(args.output)
+    except DockerError as e:
+        print(f"Docker error: {e}")
+        sys.exit(1)
+    finally:
+        if args.image:
+            remove_container(CONTAINER_NAME)
+        if proxy:
+            proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
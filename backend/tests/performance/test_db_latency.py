@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Database round-trip time sweep for the Wallabag API
+Routes Wallabag's Postgres connection through the fault-injecting proxy,
+adds 0-80ms of RTT and counts the database round trips of every endpoint
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import statistics
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.docker import DEFAULT_IMAGE, DockerError, remove_container, start_wallabag
+from harness.fault_proxy import DEFAULT_DB_TARGET, DEFAULT_PROXY_LISTEN, FaultProxy, parse_address, proxy_listen_address
+from harness.stats import summarize, format_seconds
+from harness.trends import theil_sen_slope
+from test_api_response import (
+    WallabagApiTester,
+    API_ENDPOINTS,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Added database RTTs in milliseconds
+DEFAULT_RTTS = [0, 10, 20, 40, 80]
+DEFAULT_REPEATS = 10
+
+# RTT to project latencies to: Cloud Run and Supabase in neighbouring regions
+DEFAULT_TARGET_RTT = 30
+
+CONTAINER_NAME = "wallabag-dblatency"
+DEFAULT_CONTAINER_PORT = 18180
+
+
+class WallabagDbLatencyBenchmark(WallabagApiTester):
+    def __init__(self, base_url, proxy, rtts=None, repeats=DEFAULT_REPEATS, target_rtt=DEFAULT_TARGET_RTT,
+                 endpoint_names=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.proxy = proxy
+        self.rtts = rtts or DEFAULT_RTTS
+        self.repeats = repeats
+        self.target_rtt = target_rtt
+        self.endpoints = [e for e in API_ENDPOINTS if not endpoint_names or e["name"] in endpoint_names]
+
+        # Internal storage
+        self.measurements = []
+
+    def measure_request(self, endpoint):
+        """One request with the database round trips and connections it caused"""
+        before = self.proxy.stats()
+        result = self.make_request(endpoint)
+        after = self.proxy.stats()
+        result["db_round_trips"] = after["round_trips"] - before["round_trips"]
+        result["db_connections"] = after["connections"] - before["connections"]
+        return result
+
+    def measure(self, endpoint, rtt):
+        """Sequential requests to one endpoint at one added RTT"""
+        # Warm up so the first request's cache misses are not attributed to the RTT
+        self.measure_request(endpoint)
+        results = [self.measure_request(endpoint) for _ in range(self.repeats)]
+
+        successful = [r for r in results if r["status"] == "success"]
+        return {
+            "endpoint": endpoint["name"],
+            "rtt_ms": rtt,
+            "requests": len(results),
+            "errors": len(results) - len(successful),
+            "latency": summarize([r["time"] for r in successful]),
+            "round_trips": statistics.median([r["db_round_trips"] for r in results]),
+            "connections": statistics.median([r["db_connections"] for r in results]),
+        }
+
+    def run_all_tests(self):
+        """Sweep the added RTT for every endpoint"""
+        if not self.authenticate():
+            return False
+
+        if not self.prepare_test_data():
+            return False
+
+        print(f"Running database RTT sweep against {self.base_url} via proxy {self.proxy.address} "
+              f"-> {self.proxy.target[0]}:{self.proxy.target[1]}")
+
+        # Sequential requests only: round trips are attributed by counter deltas
+        probe = self.measure_request(self.endpoints[0])
+        if probe["db_round_trips"] == 0:
+            print("Error: the request caused no traffic through the proxy. Point Wallabag's "
+                  f"WALLABAG_DATABASE_HOST/PORT at {self.proxy.address} or use --image.")
+            return False
+
+        for rtt in self.rtts:
+            self.proxy.configure(latency=rtt / 2000)
+            print(f"\n=== Added database RTT: {rtt}ms ===")
+            for endpoint in self.endpoints:
+                measurement = self.measure(endpoint, rtt)
+                self.measurements.append(measurement)
+                if self.verbose:
+                    print(f"{endpoint['name']}: p50 {format_seconds(measurement['latency']['p50'])}, "
+                          f"{measurement['round_trips']:g} round trips")
+
+        self.proxy.configure(latency=0)
+        return True
+
+    def analyze(self):
+        """Per endpoint: counted round trips and latency added per ms of RTT
+
+        The Theil-Sen slope of p50 latency over RTT is the number of round
+        trips that are actually serial; it is lower than the counted round
+        trips when some overlap, and higher when connections are set up lazily.
+        """
+        analysis = []
+        for endpoint in self.endpoints:
+            points = [(m["rtt_ms"] / 1000, m["latency"]["p50"]) for m in self.measurements
+                      if m["endpoint"] == endpoint["name"] and m["latency"]["p50"] is not None]
+            counted = [m["round_trips"] for m in self.measurements if m["endpoint"] == endpoint["name"]]
+            if len(points) < 2:
+                continue
+
+            xs, ys = zip(*points)
+            slope = theil_sen_slope(list(xs), list(ys))
+            intercept = statistics.median(y - slope * x for x, y in points)
+            analysis.append({
+                "endpoint": endpoint["name"],
+                "round_trips": statistics.median(counted),
+                "latency_per_rtt": slope,
+                "base_latency": intercept,
+                "projected_latency": intercept + slope * self.target_rtt / 1000,
+            })
+        return analysis
+
+    def report_results(self):
+        """Generate a report of the RTT sweep"""
+        if not self.measurements:
+            print("No database latency results to report")
+            return
+
+        print("\n========== DATABASE RTT SWEEP RESULTS ==========")
+
+        headers = ["Endpoint"] + [f"p50 @{rtt:g}ms" for rtt in self.rtts] + ["Errors"]
+        table_data = []
+        for endpoint in self.endpoints:
+            rows = {m["rtt_ms"]: m for m in self.measurements if m["endpoint"] == endpoint["name"]}
+            table_data.append(
+                [endpoint["name"]]
+                + [format_seconds(rows[rtt]["latency"]["p50"]) if rtt in rows else "-" for rtt in self.rtts]
+                + [sum(m["errors"] for m in rows.values())]
+            )
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+        print("\n=== Database round trips per request ===")
+        headers = ["Endpoint", "Round trips (counted)", "Connections", "Serial round trips",
+                   "Base latency", f"Projected @{self.target_rtt:g}ms"]
+        table_data = []
+        for a in self.analyze():
+            connections = statistics.median(m["connections"] for m in self.measurements
+                                            if m["endpoint"] == a["endpoint"])
+            table_data.append([
+                a["endpoint"],
+                f"{a['round_trips']:g}",
+                f"{connections:g}",
+                f"{a['latency_per_rtt']:.1f}",
+                format_seconds(a["base_latency"]),
+                format_seconds(a["projected_latency"]),
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Serial round trips = added latency per ms of RTT; counted round trips include "
+              "connection startup and authentication")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "target_rtt_ms": self.target_rtt,
+                "measurements": self.measurements,
+                "analysis": self.analyze()
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Database RTT Sweep')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of a Wallabag instance whose database connection goes through the proxy')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--proxy-listen', default=None,
+                        help=f'Address the database proxy listens on, host:port (default: {DEFAULT_PROXY_LISTEN}, '
+                             'or the docker bridge gateway with --image)')
+    parser.add_argument('--db-target', default=DEFAULT_DB_TARGET,
+                        help='Postgres address the proxy forwards to, host:port')
+    parser.add_argument('--image', nargs='?', const=os.environ.get('WALLABAG_IMAGE', DEFAULT_IMAGE), default=None,
+                        help='Start a Wallabag container (default image: %(const)s) wired to the proxy '
+                             'instead of using --base-url')
+    parser.add_argument('--container-port', type=int, default=DEFAULT_CONTAINER_PORT,
+                        help='Host port for the --image container')
+    parser.add_argument('--rtts', type=float, nargs='+', default=DEFAULT_RTTS,
+                        help='Added database RTTs in milliseconds')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Sequential requests per endpoint and RTT')
+    parser.add_argument('--target-rtt', type=float, default=DEFAULT_TARGET_RTT,
+                        help='RTT in milliseconds to project latencies to')
+    parser.add_argument('--endpoints', nargs='+', default=None,
+                        help='Endpoint names to measure (default: all)')
+    parser.add_argument('--output', default='db_latency_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    proxy = None
+    try:
+        listen = proxy_listen_address(args.proxy_listen, for_containers=bool(args.image))
+        listen_host, listen_port = parse_address(listen)
+        proxy = FaultProxy(*parse_address(args.db_target), listen_host=listen_host,
+                           listen_port=listen_port).start()
+
+        if args.image:
+            print(f"Starting {args.image} with its database at host.docker.internal:{proxy.port}...")
+            base_url = start_wallabag(args.image, CONTAINER_NAME, args.container_port, proxy.port)
+
+        tester = WallabagDbLatencyBenchmark(
+            base_url=base_url,
+            proxy=proxy,
+            rtts=args.rtts,
+            repeats=args.repeats,
+            target_rtt=args.target_rtt,
+            endpoint_names=args.endpoints,
+            api_key=args.api_key,
+            client_id=args.client_id,
+            client_secret=args.client_secret,
+            username=args.username,
+            password=args.password,
+            verbose=args.verbose,
+            keep_alive=True
+        )
+
+        if tester.run_all_tests():
+            tester.report_results()
+            tester.save_results(args.output)
+    except DockerError as e:
+        print(f"Docker error: {e}")
+        sys.exit(1)
+    finally:
+        if args.image:
+            remove_container(CONTAINER_NAME)
+        if proxy:
+            proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
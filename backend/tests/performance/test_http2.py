@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Performance test comparing HTTP/1.1 keep-alive pools with HTTP/2 multiplexing
+Runs the TEST_CONFIGS concurrency levels over both protocols
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.http2 import Http2Client, http2_available
+from harness.http_timing import TimedHttpClient
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    API_ENDPOINTS,
+    TEST_CONFIGS,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# One keep-alive connection per worker thread vs. one multiplexed connection
+PROTOCOLS = {
+    "HTTP/1.1": lambda: TimedHttpClient(keep_alive=True),
+    "HTTP/2": Http2Client,
+}
+
+# Read-only endpoints by default so repeated runs do not grow the account
+DEFAULT_ENDPOINTS = [e["name"] for e in API_ENDPOINTS if e["method"] == "GET"]
+
+
+class WallabagHttp2Benchmark(WallabagApiTester):
+    def __init__(self, base_url, endpoint_names=None, repeats=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        names = endpoint_names or DEFAULT_ENDPOINTS
+        self.endpoints = [e for e in API_ENDPOINTS if e["name"] in names]
+        self.repeats = repeats
+
+        # Internal storage
+        self.measurements = []
+
+    def measure(self, protocol, endpoint, concurrency, repeats):
+        """Run one endpoint at one concurrency level on a fresh client"""
+        self.http = PROTOCOLS[protocol]()
+        try:
+            start = time.perf_counter()
+            results = self.run_test(endpoint, concurrency, repeats)
+            wall_time = time.perf_counter() - start
+        finally:
+            self.http.close()
+
+        latencies = [r["time"] for r in results if r["status"] == "success"]
+        return {
+            "protocol": protocol,
+            "endpoint": endpoint["name"],
+            "concurrency": concurrency,
+            "requests": len(results),
+            "errors": sum(1 for r in results if r["status"] != "success"),
+            "connections": sum(1 for r in results if r.get("reused") is False),
+            "throughput": len(results) / wall_time if wall_time else 0,
+            "latency": summarize(latencies),
+            "ttfb": summarize([r["phases"]["ttfb"] for r in results if r.get("phases")]),
+        }
+
+    def run_all_tests(self):
+        """Run every TEST_CONFIGS level over both protocols"""
+        if not http2_available():
+            print("Error: HTTP/2 needs the httpx and h2 packages (pip install httpx h2)")
+            return False
+
+        if not self.authenticate():
+            return False
+
+        if not self.prepare_test_data():
+            return False
+
+        print(f"Running HTTP/1.1 vs HTTP/2 benchmark against {self.base_url}")
+
+        for config in TEST_CONFIGS:
+            concurrency = config["concurrent_requests"]
+            repeats = self.repeats or config["repeats"]
+            print(f"\n=== {config['name']}: {concurrency} concurrent, {repeats} requests per endpoint ===")
+
+            for endpoint in self.endpoints:
+                # Alternate the order so neither protocol always runs on a warmer server
+                protocols = list(PROTOCOLS)
+                if len(self.measurements) // len(PROTOCOLS) % 2:
+                    protocols.reverse()
+                for protocol in protocols:
+                    measurement = self.measure(protocol, endpoint, concurrency, repeats)
+                    self.measurements.append(measurement)
+                    if self.verbose:
+                        print(f"{protocol} {endpoint['name']}: {measurement['throughput']:.1f} req/s, "
+                              f"{measurement['connections']} connections, {measurement['errors']} errors")
+
+        return True
+
+    def compare(self, measurement):
+        """HTTP/2 throughput relative to HTTP/1.1 for the same endpoint and concurrency"""
+        for other in self.measurements:
+            if (other["protocol"] == "HTTP/1.1" and other["endpoint"] == measurement["endpoint"]
+                    and other["concurrency"] == measurement["concurrency"] and other["throughput"]):
+                return measurement["throughput"] / other["throughput"]
+        return None
+
+    def report_results(self):
+        """Generate a report of protocol comparison results"""
+        if not self.measurements:
+            print("No HTTP/2 results to report")
+            return
+
+        print("\n========== HTTP/1.1 VS HTTP/2 RESULTS ==========")
+
+        headers = ["Concurrency", "Endpoint", "Protocol", "Requests", "Errors", "Connections",
+                   "p50", "p95", "TTFB p50", "Req/s", "vs HTTP/1.1"]
+        table_data = []
+        for m in sorted(self.measurements, key=lambda m: (m["concurrency"], m["endpoint"], m["protocol"])):
+            ratio = self.compare(m) if m["protocol"] == "HTTP/2" else None
+            table_data.append([
+                m["concurrency"],
+                m["endpoint"],
+                m["protocol"],
+                m["requests"],
+                m["errors"],
+                m["connections"],
+                format_seconds(m["latency"]["p50"]),
+                format_seconds(m["latency"]["p95"]),
+                format_seconds(m["ttfb"]["p50"]),
+                f"{m['throughput']:.1f}",
+                f"{ratio:.2f}x" if ratio else "-",
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+        failed = sorted({m["endpoint"] for m in self.measurements if m["protocol"] == "HTTP/2"
+                         and m["errors"] == m["requests"]})
+        if failed:
+            print("Every HTTP/2 request failed for: " + ", ".join(failed))
+            print("Check that the server accepts h2c (Cloud Run: use_http2 on the service, "
+                  "and a container that speaks HTTP/2 cleartext)")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "measurements": self.measurements
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag HTTP/1.1 vs HTTP/2 Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS,
+                        help='Endpoint names to compare (default: all GET endpoints)')
+    parser.add_argument('--repeats', type=int, default=None,
+                        help='Requests per endpoint and level (default: the TEST_CONFIGS repeats)')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='Run against a local HTTP/1.1 + h2c stand-in server instead of Wallabag')
+    parser.add_argument('--service-time', type=float, default=0.02,
+                        help='Stand-in server time per request in seconds')
+    parser.add_argument('--output', default='http2_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    server = None
+    if args.stand_in:
+        from harness.h2c_server import H2cStandInServer
+        server = H2cStandInServer(service_time=args.service_time).start()
+        args.base_url, args.api_key = server.url, "stand-in"
+        print(f"Stand-in server listening on {server.url}")
+
+    tester = WallabagHttp2Benchmark(
+        base_url=args.base_url,
+        endpoint_names=args.endpoints,
+        repeats=args.repeats,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    try:
+        if tester.run_all_tests():
+            tester.report_results()
+            tester.save_results(args.output)
+    finally:
+        if server:
+            print(f"Stand-in server counters: {server.counters}")
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Image-download cost benchmark for the clip pipeline
+Clips image-heavy corpus pages with Wallabag's image download setting off and
+on, and compares clip latency, bytes fetched, disk written and container memory
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from tabulate import tabulate
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.corpus_server import CORPUS_CLASSES, DEFAULT_CORPUS_HOST, DEFAULT_IMAGE_COUNT, CorpusServer
+from harness.db import get_db_config, connect
+from harness.docker import WALLABAG_ROOT, DockerError, exec_in_container
+from harness.resources import ResourceSampler, cgroup_memory
+from harness.stats import summarize, format_seconds, format_bytes
+from harness.terraform import load_cloud_run_settings, parse_memory
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+DEFAULT_CLIPS = 20
+DEFAULT_CLASSES = ["images"]
+DEFAULT_IMAGE_SIZE = "320x240"
+
+# Modes in run order; "on" last, so the container memory high-water mark of "off" is not inflated
+MODES = {"off": False, "on": True}
+
+# Internal setting behind "Download images locally" and the tables it has lived in
+DOWNLOAD_IMAGES_SETTING = "download_images_enabled"
+SETTING_TABLES = ("wallabag_internal_setting", "wallabag_craue_config_setting", "craue_config_setting")
+
+# Mount point of the wallabag_images volume in docker-compose.yml
+IMAGES_PATH = "/var/www/html/web/assets/images"
+
+# Wallabag caches internal settings, so a changed setting only applies after a
+# cache clear; the cache keeps the owner of the web server, not of docker exec
+CACHE_CLEAR_COMMAND = (
+    "cd {root} && owner=$(stat -c %u:%g var/cache) && bin/console cache:clear --no-warmup"
+    " && chown -R \"$owner\" var/cache"
+)
+
+# Downloaded images are referenced from the entry content under this path
+LOCAL_IMAGE_MARKER = "/assets/images/"
+
+MEMORY_SAMPLE_INTERVAL = 1
+
+
+def parse_image_size(value):
+    """Parse 'WIDTHxHEIGHT' into a (width, height) tuple"""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+class WallabagImageDownloadBenchmark(WallabagApiTester):
+    def __init__(self, base_url, clips=DEFAULT_CLIPS, classes=None, image_count=DEFAULT_IMAGE_COUNT,
+                 image_size=DEFAULT_IMAGE_SIZE, container=None, images_path=IMAGES_PATH,
+                 corpus_host=DEFAULT_CORPUS_HOST, corpus_port=0, db_config=None, terraform_settings=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.clips = clips
+        self.classes = classes or DEFAULT_CLASSES
+        self.container = container
+        self.images_path = images_path
+        self.db_config = db_config or get_db_config()
+        self.corpus = CorpusServer(port=corpus_port, advertised_host=corpus_host, image_count=image_count,
+                                   image_size=parse_image_size(image_size))
+
+        settings = terraform_settings or load_cloud_run_settings()
+        self.memory_limit = parse_memory(settings["memory"])
+
+        # Internal storage
+        self.setting_table = None
+        self.original_setting = None
+        self.entry_ids = []
+        self.results = []
+
+    def find_setting_table(self, cursor):
+        for table in SETTING_TABLES:
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0]:
+                return table
+        raise RuntimeError(f"No Wallabag internal settings table found (tried {', '.join(SETTING_TABLES)})")
+
+    def set_download_images(self, enabled):
+        """Switch the download images setting and return its previous value"""
+        conn = connect(self.db_config, autocommit=True)
+        try:
+            with conn.cursor() as cursor:
+                self.setting_table = self.setting_table or self.find_setting_table(cursor)
+                cursor.execute(f"SELECT value FROM {self.setting_table} WHERE name = %s", (DOWNLOAD_IMAGES_SETTING,))
+                row = cursor.fetchone()
+                if row is None:
+                    raise RuntimeError(f"{DOWNLOAD_IMAGES_SETTING} is missing from {self.setting_table}")
+                cursor.execute(f"UPDATE {self.setting_table} SET value = %s WHERE name = %s",
+                               ("1" if enabled else "0", DOWNLOAD_IMAGES_SETTING))
+        finally:
+            conn.close()
+
+        self.clear_cache()
+        return row[0]
+
+    def restore_setting(self):
+        if self.original_setting is None:
+            return
+        conn = connect(self.db_config, autocommit=True)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"UPDATE {self.setting_table} SET value = %s WHERE name = %s",
+                               (self.original_setting, DOWNLOAD_IMAGES_SETTING))
+        finally:
+            conn.close()
+
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Clear Wallabag's cache so the changed setting is read again"""
+        if not self.container:
+            print("No --container to clear the Wallabag cache in; the setting may not change until it expires")
+            return
+        exec_in_container(self.container, CACHE_CLEAR_COMMAND.format(root=WALLABAG_ROOT))
+
+    def check_toggle(self, result, enabled):
+        """Fail when the clips show the setting did not take effect"""
+        if "images" not in self.classes or not result["succeeded"]:
+            return
+        if enabled and result["image_requests"] == 0 and result["local_images"] == 0:
+            raise RuntimeError("images were neither fetched nor stored with download images on; "
+                               "the setting did not take effect")
+        if not enabled and result["local_images"]:
+            raise RuntimeError("images were stored locally with download images off; "
+                               "the setting did not take effect")
+
+    def images_disk_usage(self):
+        """Bytes under the images directory in the container, or None without a container"""
+        if not self.container:
+            return None
+        try:
+            output = exec_in_container(self.container, f"du -sb {self.images_path} 2>/dev/null || echo 0")
+            return int(output.split()[0])
+        except (DockerError, ValueError, IndexError):
+            return None
+
+    def clip(self, client, corpus_class, index):
+        """POST one corpus page and count the images Wallabag stored locally"""
+        url = f"{self.corpus.page_url(corpus_class, index)}?run={time.time_ns()}"
+        start_time = time.perf_counter()
+        try:
+            response = client.post("entries", {"url": url})
+        except requests.exceptions.RequestException as e:
+            return {"class": corpus_class, "status": "error", "time": time.perf_counter() - start_time, "error": str(e)}
+
+        elapsed = time.perf_counter() - start_time
+        if response.status_code >= 400:
+            return {"class": corpus_class, "status": "error", "time": elapsed, "error": f"HTTP {response.status_code}"}
+
+        entry = response.json()
+        self.entry_ids.append(entry["id"])
+        return {
+            "class": corpus_class,
+            "status": "success",
+            "time": elapsed,
+            "local_images": (entry.get("content") or "").count(LOCAL_IMAGE_MARKER),
+        }
+
+    def run_mode(self, mode, enabled):
+        """Clip every class with the setting in one state and collect fetch, disk and memory usage"""
+        previous = self.set_download_images(enabled)
+        if self.original_setting is None:
+            self.original_setting = previous
+
+        self.corpus.reset_counters()
+        disk_before = self.images_disk_usage()
+        memory_before = cgroup_memory(self.container) if self.container else None
+        sampler = None
+        if self.container:
+            sampler = ResourceSampler(interval=MEMORY_SAMPLE_INTERVAL, container=self.container)
+            sampler.start()
+
+        client = self.api_client(timeout=300)
+        clips = []
+        for corpus_class in self.classes:
+            for index in range(self.clips):
+                clips.append(self.clip(client, corpus_class, index))
+
+        samples = sampler.stop() if sampler else []
+        memory_after = cgroup_memory(self.container) if self.container else None
+        disk_after = self.images_disk_usage()
+        fetched = self.corpus.stats()
+
+        succeeded = [c for c in clips if c["status"] == "success"]
+        sampled = [s["memory_bytes"] for s in samples if s["memory_bytes"] is not None]
+        disk_written = disk_after - disk_before if disk_before is not None and disk_after is not None else None
+
+        result = {
+            "mode": mode,
+            "clips": len(clips),
+            "succeeded": len(succeeded),
+            "latency": summarize([c["time"] for c in succeeded]),
+            "page_bytes": fetched["page"]["bytes"],
+            "image_requests": fetched["image"]["requests"],
+            "image_bytes": fetched["image"]["bytes"],
+            "local_images": sum(c["local_images"] for c in succeeded),
+            "disk_written": disk_written,
+            "disk_per_clip": disk_written / len(succeeded) if disk_written is not None and succeeded else None,
+            "memory_sampled_peak": max(sampled) if sampled else None,
+            "memory_peak": memory_after["peak"] if memory_after else None,
+            "memory_growth": (memory_after["current"] - memory_before["current"]
+                              if memory_before and memory_after and memory_before["current"] is not None
+                              and memory_after["current"] is not None else None),
+            "errors": [c["error"] for c in clips if c["status"] == "error"],
+        }
+        self.results.append(result)
+        return result
+
+    def run_all_tests(self):
+        """Run the clip workload with image downloading off and then on"""
+        if not self.authenticate():
+            return False
+
+        self.corpus.start()
+        print(f"Running image download benchmark against {self.base_url} with corpus pages from "
+              f"http://{self.corpus.advertised_address} ({self.clips} clips of {', '.join(self.classes)} per mode)")
+
+        client = self.api_client(timeout=300)
+        try:
+            for mode, enabled in MODES.items():
+                result = self.run_mode(mode, enabled)
+                self.check_toggle(result, enabled)
+                if self.verbose:
+                    print(f"download images {mode}: p50 {format_seconds(result['latency']['p50'])}, "
+                          f"{result['image_requests']} image fetches, {format_bytes(result['disk_written'])} written")
+            return True
+        except Exception as e:
+            print(f"Image download benchmark failed: {e}")
+            return False
+        finally:
+            self.corpus.stop()
+            for entry_id in self.entry_ids:
+                try:
+                    client.delete(f"entries/{entry_id}")
+                except requests.exceptions.RequestException:
+                    pass
+            try:
+                self.restore_setting()
+            except Exception as e:
+                print(f"Could not restore {DOWNLOAD_IMAGES_SETTING}: {e}")
+
+    def report_results(self):
+        """Generate a report comparing clips with and without image downloading"""
+        if not self.results:
+            print("No image download results to report")
+            return
+
+        print("\n========== IMAGE DOWNLOAD RESULTS ==========")
+        print(f"{self.clips} clips per class of {', '.join(self.classes)}; "
+              f"{self.corpus.image_count} images of {self.corpus.image_size[0]}x{self.corpus.image_size[1]} per image page")
+
+        headers = ["Download", "OK", "p50", "p95", "Page bytes", "Image fetches", "Image bytes",
+                   "Local images", "Disk written", "Disk/clip", "Memory peak", "Memory growth"]
+        table_data = []
+        for r in self.results:
+            table_data.append([
+                r["mode"],
+                f"{r['succeeded']}/{r['clips']}",
+                format_seconds(r["latency"]["p50"]),
+                format_seconds(r["latency"]["p95"]),
+                format_bytes(r["page_bytes"]),
+                r["image_requests"],
+                format_bytes(r["image_bytes"]),
+                r["local_images"],
+                format_bytes(r["disk_written"]),
+                format_bytes(r["disk_per_clip"]),
+                format_bytes(r["memory_peak"] or r["memory_sampled_peak"]),
+                format_bytes(r["memory_growth"]),
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Local images = image references rewritten to the local copy in the returned content; "
+              "memory peak is the container high-water mark")
+
+        off = next((r for r in self.results if r["mode"] == "off"), None)
+        on = next((r for r in self.results if r["mode"] == "on"), None)
+        if off and on and off["latency"]["p50"] and on["latency"]["p50"]:
+            print(f"\nDownloading images adds {format_seconds(on['latency']['p50'] - off['latency']['p50'])} "
+                  f"to the p50 clip ({on['latency']['p50'] / off['latency']['p50']:.1f}x)")
+        if on and on["disk_per_clip"]:
+            # The writable filesystem of a Cloud Run instance is in memory
+            clips_to_fill = self.memory_limit / on["disk_per_clip"]
+            print(f"On Cloud Run the images are kept in instance memory: about {clips_to_fill:.0f} clips fill "
+                  f"the {format_bytes(self.memory_limit)} limit until the instance is replaced")
+
+        for r in self.results:
+            if r["errors"]:
+                print(f"download images {r['mode']}: {len(r['errors'])} failed clips, e.g. {r['errors'][0]}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "classes": self.classes,
+                "image_count": self.corpus.image_count,
+                "image_size": self.corpus.image_size,
+                "memory_limit": self.memory_limit,
+                "results": self.results
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Image Download Cost Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--clips', type=int, default=DEFAULT_CLIPS,
+                        help='Clips per corpus class and mode')
+    parser.add_argument('--classes', nargs='+', choices=list(CORPUS_CLASSES), default=DEFAULT_CLASSES,
+                        help='Corpus page classes to clip')
+    parser.add_argument('--image-count', type=int, default=DEFAULT_IMAGE_COUNT,
+                        help='Images per image page')
+    parser.add_argument('--image-size', default=DEFAULT_IMAGE_SIZE,
+                        help='Image dimensions as WIDTHxHEIGHT (about 3 bytes per pixel)')
+    parser.add_argument('--container', default=os.environ.get('WALLABAG_CONTAINER'),
+                        help='Docker container of the Wallabag instance, for disk and memory usage')
+    parser.add_argument('--images-path', default=IMAGES_PATH,
+                        help='Directory of downloaded images inside the container')
+    parser.add_argument('--corpus-host', default=DEFAULT_CORPUS_HOST,
+                        help='Host name under which Wallabag reaches this machine '
+                             '(e.g. the docker network gateway on Linux)')
+    parser.add_argument('--corpus-port', type=int, default=0,
+                        help='Port of the local corpus server (default: any free port)')
+    parser.add_argument('--output', default='image_download_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagImageDownloadBenchmark(
+        base_url=args.base_url,
+        clips=args.clips,
+        classes=args.classes,
+        image_count=args.image_count,
+        image_size=args.image_size,
+        container=args.container,
+        images_path=args.images_path,
+        corpus_host=args.corpus_host,
+        corpus_port=args.corpus_port,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
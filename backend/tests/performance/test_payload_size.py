@@ -0,0 +1,511 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Article payload-size sweep for POST /api/entries with provided content
+Clips entries with 1KB to 20MB of HTML and reports latency, container memory
+and reading-time/domain cost, up to the size that breaks a Cloud Run limit
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+from tabulate import tabulate
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.corpus import content_of_size, reading_time
+from harness.docker import (
+    DEFAULT_CONTAINER_ENV,
+    DEFAULT_IMAGE,
+    DEFAULT_NETWORK,
+    WALLABAG_ROOT,
+    DockerError,
+    docker,
+    run_container,
+    remove_container,
+    exec_in_container,
+    wait_for_http,
+)
+from harness.resources import ResourceSampler, cgroup_memory, parse_size
+from harness.stats import summarize, format_seconds, format_bytes
+from harness.terraform import load_cloud_run_settings, parse_cpu, parse_memory
+from harness.tracing import parse_server_timing, server_timing_header
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Content sizes, smallest first; the sweep stops after the first size that fails
+DEFAULT_SIZES = ["1KB", "10KB", "100KB", "1MB", "5MB", "10MB", "20MB"]
+DEFAULT_REPEATS = 3
+
+# Cloud Run rejects HTTP/1 request bodies above 32 MiB with 413
+CLOUD_RUN_MAX_REQUEST_BYTES = 32 * 1024 ** 2
+
+# Interval of the docker stats memory sampler during each size
+MEMORY_SAMPLE_INTERVAL = 1
+
+# Runs of the in-container reading time and domain timing per size
+PHP_TIMING_ITERATIONS = 5
+
+BENCH_URL_PREFIX = "https://bench.invalid/payload/"
+BENCH_DOMAIN = "bench.invalid"
+
+# Container started with the Cloud Run memory and CPU limits when --image is given
+LOCAL_CONTAINER = "wallabag-payload"
+LOCAL_PORT = 18090
+
+# Times the two values Wallabag derives from provided content: the reading
+# time (Utils::getReadingTime, or an inline copy on versions without it) and
+# the domain name taken from the URL host
+PHP_TIMING_SCRIPT = r"""<?php
+[, $contentFile, $url, $iterations, $root] = $argv;
+if (file_exists("$root/vendor/autoload.php")) {
+    require "$root/vendor/autoload.php";
+}
+
+$content = file_get_contents($contentFile);
+$implementation = 'inline';
+$readingTime = function ($text) {
+    return floor(count(preg_split('~([^\p{L}\p{N}\']+)~u', strip_tags($text))) / 200);
+};
+foreach (['Wallabag\CoreBundle\Tools\Utils', 'Wallabag\Tools\Utils'] as $class) {
+    if (class_exists($class) && method_exists($class, 'getReadingTime')) {
+        $readingTime = [$class, 'getReadingTime'];
+        $implementation = $class;
+        break;
+    }
+}
+
+$reading = [];
+$domain = [];
+for ($i = 0; $i < (int) $iterations; $i++) {
+    $start = microtime(true);
+    $minutes = call_user_func($readingTime, $content);
+    $reading[] = microtime(true) - $start;
+
+    $start = microtime(true);
+    $host = parse_url($url, PHP_URL_HOST);
+    $domain[] = microtime(true) - $start;
+}
+sort($reading);
+sort($domain);
+
+echo json_encode([
+    'implementation' => $implementation,
+    'reading_time' => $minutes,
+    'reading_seconds' => $reading[intdiv(count($reading), 2)],
+    'domain_name' => $host,
+    'domain_seconds' => $domain[intdiv(count($domain), 2)],
+    'peak_memory' => memory_get_peak_usage(true),
+]);
+"""
+
+
+def classify_failure(status_code, error, oom_kills=0):
+    """Name the limit behind a failed clip request"""
+    if oom_kills:
+        return "container OOM"
+    if isinstance(error, requests.exceptions.Timeout) or status_code in (408, 504):
+        return "request timeout"
+    if status_code == 413:
+        return "request too large"
+    if status_code is None:
+        return "connection dropped"
+    if "Allowed memory size" in str(error or ""):
+        return "PHP memory_limit"
+    return f"HTTP {status_code}"
+
+
+def linear_fit(xs, ys):
+    """Least-squares slope and intercept, or None with fewer than two distinct x"""
+    if len(set(xs)) < 2:
+        return None
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    slope = (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+             / sum((x - mean_x) ** 2 for x in xs))
+    return slope, mean_y - slope * mean_x
+
+
+def project_size(xs, ys, limit):
+    """Size at which a linear trend of ys over sizes reaches limit, or None if it does not grow"""
+    fit = linear_fit(xs, ys)
+    if fit is None or fit[0] <= 0:
+        return None
+    slope, intercept = fit
+    return max((limit - intercept) / slope, 0)
+
+
+class WallabagPayloadSizeBenchmark(WallabagApiTester):
+    def __init__(self, base_url, sizes=None, repeats=DEFAULT_REPEATS, container=None, image=None,
+                 network=DEFAULT_NETWORK, terraform_settings=None, keep_going=False, seed=42, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.sizes = sizes or DEFAULT_SIZES
+        self.repeats = repeats
+        self.container = container
+        self.image = image
+        self.network = network
+        self.keep_going = keep_going
+        self.seed = seed
+
+        settings = terraform_settings or load_cloud_run_settings()
+        self.memory_limit = parse_memory(settings["memory"])
+        self.cpu = settings["cpu"]
+        self.request_timeout = settings["timeout"]
+
+        # Internal storage
+        self.entry_ids = []
+        self.baseline_memory = None
+        self.limit = None
+        self.projections = {}
+        self.results = []
+
+    def start_local_container(self):
+        """Start the image with the Cloud Run memory and CPU limits so limits are hit as in production"""
+        remove_container(LOCAL_CONTAINER)
+        run_container(
+            self.image, LOCAL_CONTAINER,
+            ports={LOCAL_PORT: 80},
+            env=dict(DEFAULT_CONTAINER_ENV, WALLABAG_SERVER_TIMING="1"),
+            network=self.network,
+            cpus=parse_cpu(self.cpu),
+            memory=self.memory_limit,
+        )
+        self.base_url = f"http://localhost:{LOCAL_PORT}"
+        self.container = LOCAL_CONTAINER
+        return wait_for_http(self.base_url) is not None
+
+    def time_computation(self, content, url):
+        """Median reading time and domain computation inside the Wallabag container"""
+        with tempfile.TemporaryDirectory() as directory:
+            content_file = os.path.join(directory, "payload.html")
+            script_file = os.path.join(directory, "payload-timing.php")
+            with open(content_file, "w", encoding="utf-8") as f:
+                f.write(content)
+            with open(script_file, "w") as f:
+                f.write(PHP_TIMING_SCRIPT)
+
+            docker("cp", content_file, f"{self.container}:/tmp/payload.html")
+            docker("cp", script_file, f"{self.container}:/tmp/payload-timing.php")
+
+        try:
+            output = exec_in_container(
+                self.container,
+                f"php -d memory_limit=-1 /tmp/payload-timing.php /tmp/payload.html '{url}' "
+                f"{PHP_TIMING_ITERATIONS} {WALLABAG_ROOT}"
+            )
+        finally:
+            exec_in_container(self.container, "rm -f /tmp/payload.html /tmp/payload-timing.php")
+
+        return json.loads(output)
+
+    def post_entry(self, client, content, url):
+        """Clip one entry with provided content and time it"""
+        payload = {"url": url, "title": f"Payload bench {len(content)} bytes", "content": content}
+        result = {"body_bytes": len(json.dumps(payload).encode("utf-8")), "status_code": None}
+
+        start_time = time.perf_counter()
+        try:
+            response = client.post("entries", payload)
+        except requests.exceptions.RequestException as e:
+            result.update(time=time.perf_counter() - start_time, status="error", error=e)
+            return result
+
+        result.update(time=time.perf_counter() - start_time, status_code=response.status_code,
+                      server_timing=parse_server_timing(server_timing_header(response.headers)))
+        if response.status_code >= 400:
+            result.update(status="error", error=response.text[:500])
+            return result
+
+        entry = response.json()
+        self.entry_ids.append(entry["id"])
+        result.update(status="success", reading_time=entry.get("reading_time"),
+                      domain_name=entry.get("domain_name"))
+        return result
+
+    def run_size(self, label):
+        """Clip repeats entries of one content size and collect latency, memory and limit hits"""
+        size = parse_size(label)
+        content = content_of_size(size, seed=self.seed)
+        expected_reading_time = reading_time(content)
+
+        computation = None
+        if self.container:
+            try:
+                computation = self.time_computation(content, f"{BENCH_URL_PREFIX}timing")
+            except (DockerError, ValueError) as e:
+                if self.verbose:
+                    print(f"Could not time reading time computation: {e}")
+
+        memory_before = cgroup_memory(self.container) if self.container else None
+        sampler = None
+        if self.container:
+            sampler = ResourceSampler(interval=MEMORY_SAMPLE_INTERVAL, container=self.container)
+            sampler.start()
+
+        # Waiting a little past the Cloud Run timeout tells a local timeout apart from a slow success
+        client = self.api_client(timeout=self.request_timeout + 30)
+        requests_made = []
+        for i in range(self.repeats):
+            requests_made.append(self.post_entry(client, content, f"{BENCH_URL_PREFIX}{size}/{time.time_ns()}-{i}"))
+
+        samples = sampler.stop() if sampler else []
+        memory_after = cgroup_memory(self.container) if self.container else None
+
+        oom_kills = 0
+        if memory_before and memory_after and memory_after["oom_kills"] is not None:
+            oom_kills = memory_after["oom_kills"] - (memory_before["oom_kills"] or 0)
+
+        succeeded = [r for r in requests_made if r["status"] == "success"]
+        failures = [classify_failure(r["status_code"], r.get("error"), oom_kills)
+                    for r in requests_made if r["status"] == "error"]
+        latencies = [r["time"] for r in succeeded]
+        server_times = [r["server_timing"]["app"] for r in succeeded if r["server_timing"].get("app") is not None]
+        sampled = [s["memory_bytes"] for s in samples if s["memory_bytes"] is not None]
+
+        result = {
+            "size": label,
+            "bytes": size,
+            "body_bytes": requests_made[0]["body_bytes"],
+            "requests": len(requests_made),
+            "succeeded": len(succeeded),
+            "latency": summarize(latencies),
+            "server": summarize(server_times),
+            "expected_reading_time": expected_reading_time,
+            "reading_time_ok": all(r["reading_time"] == expected_reading_time for r in succeeded),
+            "domain_ok": all(r["domain_name"] == BENCH_DOMAIN for r in succeeded),
+            "computation": computation,
+            "memory_sampled_peak": max(sampled) if sampled else None,
+            "memory_peak": memory_after["peak"] if memory_after else None,
+            "oom_kills": oom_kills,
+            "failures": failures,
+        }
+
+        # Limits of the Cloud Run service, whether or not the local run enforced them
+        limits = sorted(set(failures))
+        if result["body_bytes"] > CLOUD_RUN_MAX_REQUEST_BYTES:
+            limits.append("request too large")
+        if latencies and max(latencies) > self.request_timeout:
+            limits.append("request timeout")
+        peak = result["memory_peak"] or result["memory_sampled_peak"]
+        if peak is not None and peak >= self.memory_limit:
+            limits.append("memory limit")
+        result["limits"] = sorted(set(limits))
+
+        return result
+
+    def project_limits(self):
+        """Extrapolate the content size that would reach the memory limit and the request timeout"""
+        ok = [r for r in self.results if r["succeeded"]]
+        sizes = [r["bytes"] for r in ok]
+
+        memory = [(r["bytes"], r["memory_peak"] or r["memory_sampled_peak"]) for r in ok
+                  if (r["memory_peak"] or r["memory_sampled_peak"]) is not None]
+        if memory:
+            self.projections["memory_limit"] = project_size(
+                [m[0] for m in memory], [m[1] for m in memory], self.memory_limit)
+
+        self.projections["request_timeout"] = project_size(
+            sizes, [r["latency"]["max"] for r in ok], self.request_timeout)
+
+    def run_all_tests(self):
+        """Clip increasing content sizes until one fails or breaks a Cloud Run limit"""
+        if self.image:
+            print(f"Starting {self.image} with {format_bytes(self.memory_limit)} and {self.cpu} vCPU...")
+            try:
+                if not self.start_local_container():
+                    print("Container did not become ready")
+                    return False
+            except DockerError as e:
+                print(f"Could not start container: {e}")
+                return False
+
+        try:
+            if not self.authenticate():
+                return False
+
+            if self.container:
+                memory = cgroup_memory(self.container)
+                self.baseline_memory = memory["current"] if memory else None
+
+            print(f"Running payload-size sweep against {self.base_url} "
+                  f"({self.repeats} clips per size, Cloud Run limits: {format_bytes(self.memory_limit)}, "
+                  f"{self.request_timeout}s)")
+
+            for label in self.sizes:
+                result = self.run_size(label)
+                self.results.append(result)
+
+                if self.verbose:
+                    print(f"{label}: {result['succeeded']}/{result['requests']} ok, "
+                          f"p50 {format_seconds(result['latency']['p50'])}, "
+                          f"peak {format_bytes(result['memory_peak'])}")
+
+                if result["limits"] and self.limit is None:
+                    self.limit = {"size": label, "limits": result["limits"]}
+                    if not self.keep_going:
+                        break
+
+            self.project_limits()
+            return True
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        """Delete the clipped entries and the local container"""
+        if self.entry_ids:
+            client = self.api_client(timeout=self.request_timeout + 30)
+            for entry_id in self.entry_ids:
+                try:
+                    client.delete(f"entries/{entry_id}")
+                except requests.exceptions.RequestException:
+                    pass
+            self.entry_ids = []
+
+        if self.image:
+            remove_container(LOCAL_CONTAINER)
+
+    def report_results(self):
+        """Generate a report of the payload-size sweep"""
+        if not self.results:
+            print("No payload-size results to report")
+            return
+
+        print("\n========== PAYLOAD SIZE RESULTS ==========")
+        print(f"Cloud Run limits: memory {format_bytes(self.memory_limit)}, timeout {self.request_timeout}s, "
+              f"request body {format_bytes(CLOUD_RUN_MAX_REQUEST_BYTES)}")
+        if self.baseline_memory is not None:
+            print(f"Container memory before the sweep: {format_bytes(self.baseline_memory)}")
+
+        headers = ["Content", "Body", "OK", "p50", "Max", "Server p50", "Reading time", "Domain",
+                   "Share", "PHP peak", "Container peak", "Limits"]
+        table_data = []
+        for r in self.results:
+            computation = r["computation"] or {}
+            share = None
+            server = r["server"]["p50"] or r["latency"]["p50"]
+            if computation and server:
+                share = (computation["reading_seconds"] + computation["domain_seconds"]) / server
+            table_data.append([
+                r["size"],
+                format_bytes(r["body_bytes"]),
+                f"{r['succeeded']}/{r['requests']}",
+                format_seconds(r["latency"]["p50"]),
+                format_seconds(r["latency"]["max"]),
+                format_seconds(r["server"]["p50"]),
+                format_seconds(computation.get("reading_seconds")),
+                format_seconds(computation.get("domain_seconds")),
+                f"{share:.1%}" if share is not None else "N/A",
+                format_bytes(computation.get("peak_memory")),
+                format_bytes(r["memory_peak"] or r["memory_sampled_peak"]),
+                ", ".join(r["limits"]) or "-",
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Share = reading time + domain computation over the server time (client time without "
+              "Server-Timing); PHP peak = memory of that computation alone; container peak is a high-water mark")
+
+        for r in self.results:
+            if r["succeeded"] and not (r["reading_time_ok"] and r["domain_ok"]):
+                print(f"{r['size']}: stored reading time or domain differs from the expected "
+                      f"{r['expected_reading_time']} min on {BENCH_DOMAIN}")
+            if r["oom_kills"]:
+                print(f"{r['size']}: {r['oom_kills']} process(es) OOM-killed in the container")
+
+        if self.limit:
+            print(f"\nFirst failure or Cloud Run limit at {self.limit['size']}: {', '.join(self.limit['limits'])}")
+        else:
+            print(f"\nNo failure or Cloud Run limit up to {self.results[-1]['size']}")
+
+        for name, label in (("memory_limit", "memory limit"), ("request_timeout", "request timeout")):
+            projected = self.projections.get(name)
+            if projected is not None:
+                print(f"Linear projection reaches the {label} at about {format_bytes(projected)} of content")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "memory_limit": self.memory_limit,
+                "request_timeout": self.request_timeout,
+                "baseline_memory": self.baseline_memory,
+                "limit": self.limit,
+                "projections": self.projections,
+                "results": self.results
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Article Payload-Size Sweep')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Content sizes to clip, smallest first (e.g. 1KB 1MB 20MB)')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Clips per content size')
+    parser.add_argument('--container', default=os.environ.get('WALLABAG_CONTAINER'),
+                        help='Docker container of the Wallabag instance, for memory and computation timing')
+    parser.add_argument('--image',
+                        help=f'Start this image (e.g. {DEFAULT_IMAGE}) with the Cloud Run memory and CPU limits '
+                             'instead of using --base-url')
+    parser.add_argument('--network', default=DEFAULT_NETWORK,
+                        help='Docker network of the database when --image is given')
+    parser.add_argument('--keep-going', action='store_true',
+                        help='Continue with larger sizes after the first limit is hit')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the generated content')
+    parser.add_argument('--output', default='payload_size_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagPayloadSizeBenchmark(
+        base_url=args.base_url,
+        sizes=args.sizes,
+        repeats=args.repeats,
+        container=args.container,
+        image=args.image,
+        network=args.network,
+        keep_going=args.keep_going,
+        seed=args.seed,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Server resource telemetry for local load runs
+Runs one load phase per request type while sampling the Wallabag and Postgres
+containers' cgroup CPU, memory, IO and network counters, and reports the CPU
+time and peak RSS each request type costs, for sizing var.cpu and var.memory
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.stats import summarize, format_seconds, format_bytes
+from harness.resources import DEFAULT_TELEMETRY_INTERVAL, TelemetrySampler, phase_usage
+from harness.terraform import load_cloud_run_settings, parse_cpu, parse_memory
+from test_api_response import (
+    WallabagApiTester,
+    API_ENDPOINTS,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Container names of the docker-compose.yml services
+DEFAULT_WALLABAG_CONTAINER = "backend-wallabag-1"
+DEFAULT_POSTGRES_CONTAINER = "backend-postgres-1"
+
+DEFAULT_REQUESTS = 200
+DEFAULT_CONCURRENCY = 5
+
+# Quiet period before the load phases; its CPU rate is subtracted from every phase
+DEFAULT_IDLE_DURATION = 10
+
+# Pause between phases so one phase's tail does not land in the next
+PHASE_GAP = 2
+
+IDLE_PHASE = "idle"
+
+
+class WallabagTelemetryBenchmark(WallabagApiTester):
+    def __init__(self, base_url, containers=None, endpoint_names=None, requests_per_phase=DEFAULT_REQUESTS,
+                 concurrency=DEFAULT_CONCURRENCY, interval=DEFAULT_TELEMETRY_INTERVAL,
+                 idle_duration=DEFAULT_IDLE_DURATION, terraform_settings=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.containers = containers or {"wallabag": DEFAULT_WALLABAG_CONTAINER,
+                                         "postgres": DEFAULT_POSTGRES_CONTAINER}
+        self.endpoints = [e for e in API_ENDPOINTS if not endpoint_names or e["name"] in endpoint_names]
+        self.requests_per_phase = requests_per_phase
+        self.concurrency = concurrency
+        self.interval = interval
+        self.idle_duration = idle_duration
+
+        settings = terraform_settings or load_cloud_run_settings()
+        self.cpu = parse_cpu(settings["cpu"])
+        self.memory_limit = parse_memory(settings["memory"])
+
+        # Internal storage
+        self.start_time = None
+        self.phases = []
+        self.samples = []
+        self.timeline = []
+        self.results = []
+
+    def make_request(self, endpoint):
+        """Send a request and stamp it on the sampler's clock"""
+        started = time.monotonic()
+        result = super().make_request(endpoint)
+        result["started"] = started
+        result["finished"] = time.monotonic()
+        return result
+
+    def run_phase(self, name, run):
+        """Run one phase and record its boundaries"""
+        start = time.monotonic()
+        results = run()
+        phase = {"name": name, "start": start, "end": time.monotonic(), "results": results}
+        self.phases.append(phase)
+        return phase
+
+    def idle(self):
+        time.sleep(self.idle_duration)
+        return []
+
+    def run_all_tests(self):
+        """Sample the containers through an idle phase and one load phase per request type"""
+        if not self.authenticate():
+            return False
+
+        if not self.prepare_test_data():
+            return False
+
+        sampler = TelemetrySampler(self.containers, interval=self.interval)
+        print(f"Running resource telemetry against {self.base_url}, sampling "
+              f"{', '.join(f'{label} ({name})' for label, name in self.containers.items())} "
+              f"every {self.interval}s")
+
+        self.start_time = time.monotonic()
+        sampler.start()
+        try:
+            self.run_phase(IDLE_PHASE, self.idle)
+            for endpoint in self.endpoints:
+                time.sleep(PHASE_GAP)
+                if self.verbose:
+                    print(f"Phase: {endpoint['name']} ({self.requests_per_phase} requests "
+                          f"at concurrency {self.concurrency})")
+                self.run_phase(endpoint["name"], lambda: self.run_test(
+                    endpoint, self.concurrency, self.requests_per_phase))
+        finally:
+            self.samples = sampler.stop()
+
+        if not self.samples:
+            print("No telemetry samples; are the containers running and named "
+                  f"{', '.join(self.containers.values())}?")
+            return False
+
+        self.analyze()
+        return True
+
+    def analyze(self):
+        """Attribute container resources to each phase and build the aligned timeline"""
+        idle = next(p for p in self.phases if p["name"] == IDLE_PHASE)
+        idle_rates = {}
+        for label in self.containers:
+            usage = phase_usage(self.samples, label, idle["start"], idle["end"])
+            idle_rates[label] = (usage["cpu_seconds"] or 0) / usage["duration"] if usage["duration"] else 0
+
+        for phase in self.phases:
+            results = phase["results"]
+            succeeded = [r for r in results if r["status"] == "success"]
+            row = {
+                "phase": phase["name"],
+                "start": phase["start"] - self.start_time,
+                "end": phase["end"] - self.start_time,
+                "requests": len(results),
+                "failed": len(results) - len(succeeded),
+                "latency": summarize([r["time"] for r in succeeded]),
+                "containers": {},
+            }
+            for label in self.containers:
+                usage = phase_usage(self.samples, label, phase["start"], phase["end"])
+                if usage["cpu_seconds"] is not None:
+                    # CPU the container burns anyway (cron, autovacuum, idle workers) is not request cost
+                    usage["cpu_seconds_net"] = max(usage["cpu_seconds"] - idle_rates[label] * usage["duration"], 0)
+                    usage["cpu_cores"] = usage["cpu_seconds"] / usage["duration"] if usage["duration"] else None
+                    usage["cpu_per_request"] = usage["cpu_seconds_net"] / len(results) if results else None
+                for key in ("io_write_bytes", "net_tx_bytes"):
+                    if usage[key] is not None and results:
+                        usage[f"{key}_per_request"] = usage[key] / len(results)
+                row["containers"][label] = usage
+            self.results.append(row)
+
+            for r in results:
+                self.timeline.append({
+                    "phase": phase["name"],
+                    "start": r["started"] - self.start_time,
+                    "end": r["finished"] - self.start_time,
+                    "status_code": r.get("status_code"),
+                    "status": r["status"],
+                })
+
+        self.samples = [dict(s, time=s["time"] - self.start_time) for s in self.samples]
+
+    def report_results(self):
+        """Generate a report of per-request-type resource cost"""
+        if not self.results:
+            print("No telemetry results to report")
+            return
+
+        print("\n========== RESOURCE TELEMETRY RESULTS ==========")
+        print(f"{len(self.samples)} samples every {self.interval}s; {self.requests_per_phase} requests per type "
+              f"at concurrency {self.concurrency}; CPU/req excludes the idle CPU rate")
+
+        headers = ["Request type", "Requests", "p50"]
+        for label in self.containers:
+            headers += [f"{label} CPU/req", f"{label} cores", f"{label} peak RSS"]
+        headers += ["Disk write/req", "Net tx/req"]
+
+        table_data = []
+        for row in self.results:
+            line = [row["phase"], row["requests"], format_seconds(row["latency"]["p50"])]
+            for label in self.containers:
+                usage = row["containers"][label]
+                line += [
+                    format_seconds(usage.get("cpu_per_request")),
+                    f"{usage['cpu_cores']:.2f}" if usage.get("cpu_cores") is not None else "N/A",
+                    format_bytes(usage["peak_memory_rss"]),
+                ]
+            first = row["containers"][next(iter(self.containers))]
+            line += [format_bytes(first.get("io_write_bytes_per_request")),
+                     format_bytes(first.get("net_tx_bytes_per_request"))]
+            table_data.append(line)
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        first_label = next(iter(self.containers))
+        print(f"Disk write and net tx per request are for {first_label}")
+
+        if "wallabag" not in self.containers:
+            return
+
+        # Sizing against the Cloud Run container, which runs Wallabag only
+        print(f"\nWith var.cpu = {self.cpu:g} and var.memory = {format_bytes(self.memory_limit)}:")
+        for row in self.results:
+            usage = row["containers"]["wallabag"]
+            if row["phase"] == IDLE_PHASE or not usage.get("cpu_per_request"):
+                continue
+            rps = self.cpu / usage["cpu_per_request"]
+            rss = usage["peak_memory_rss"]
+            memory = f", peak RSS {rss / self.memory_limit:.0%} of memory" if rss else ""
+            print(f"  {row['phase']}: about {rps:.0f} req/s per instance when CPU-bound{memory}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "containers": self.containers,
+                "interval": self.interval,
+                "results": self.results,
+                "samples": self.samples,
+                "timeline": self.timeline
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Server Resource Telemetry')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--wallabag-container',
+                        default=os.environ.get('WALLABAG_CONTAINER', DEFAULT_WALLABAG_CONTAINER),
+                        help='Docker container of the Wallabag service')
+    parser.add_argument('--postgres-container',
+                        default=os.environ.get('POSTGRES_CONTAINER', DEFAULT_POSTGRES_CONTAINER),
+                        help='Docker container of the Postgres service (empty to skip)')
+    parser.add_argument('--endpoints', nargs='+', choices=[e["name"] for e in API_ENDPOINTS],
+                        help='Request types to run (default: all)')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='Requests per request type')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Concurrent requests during each phase')
+    parser.add_argument('--interval', type=float, default=DEFAULT_TELEMETRY_INTERVAL,
+                        help='Seconds between telemetry samples')
+    parser.add_argument('--idle', type=float, default=DEFAULT_IDLE_DURATION,
+                        help='Seconds of idle baseline before the load phases')
+    parser.add_argument('--output', default='resource_telemetry_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    containers = {"wallabag": args.wallabag_container}
+    if args.postgres_container:
+        containers["postgres"] = args.postgres_container
+
+    tester = WallabagTelemetryBenchmark(
+        base_url=args.base_url,
+        containers=containers,
+        endpoint_names=args.endpoints,
+        requests_per_phase=args.requests,
+        concurrency=args.concurrency,
+        interval=args.interval,
+        idle_duration=args.idle,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Performance test for Wallabag full-text search
+Seeds a multilingual corpus and compares LIKE, tsvector+GIN and pg_trgm search
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from tabulate import tabulate
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.corpus import generate_corpus
+from harness.db import get_db_config, connect, scratch_database
+from harness.stats import summarize, format_seconds, format_bytes
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Queries run against every variant. Values are taken from the corpus vocabulary.
+SEARCH_QUERIES = [
+    {"name": "Common term", "type": "term", "value": "performance"},
+    {"name": "Rare term", "type": "term", "value": "observability"},
+    {"name": "Non-Latin term", "type": "term", "value": "図書館"},
+    {"name": "Phrase", "type": "phrase", "value": "database performance"},
+    {"name": "Phrase (fr)", "type": "phrase", "value": "base de données"},
+    {"name": "Prefix", "type": "prefix", "value": "archi"},
+    {"name": "Prefix (de)", "type": "prefix", "value": "zusammen"},
+]
+
+# Page size used by the Wallabag search endpoint
+SEARCH_PAGE_SIZE = 30
+
+SCRATCH_DATABASE_NAME = "wallabag_search_bench"
+
+# Wallabag's EntryRepository search: lower(...) LIKE lower('%term%') on content, title and url
+LIKE_WHERE = "lower(content) LIKE lower(%(pattern)s) OR lower(title) LIKE lower(%(pattern)s) OR lower(url) LIKE lower(%(pattern)s)"
+
+# Index variants installed one after another on the scratch database
+SEARCH_VARIANTS = [
+    {
+        "name": "LIKE (default)",
+        "setup": [],
+        "teardown": [],
+        "indexes": [],
+        "where": {"term": LIKE_WHERE, "phrase": LIKE_WHERE, "prefix": LIKE_WHERE},
+    },
+    {
+        "name": "tsvector + GIN",
+        "setup": [
+            "ALTER TABLE bench_entry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+            "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, ''))) STORED",
+            "CREATE INDEX bench_entry_search_vector_idx ON bench_entry USING GIN (search_vector)",
+        ],
+        "teardown": [
+            "DROP INDEX IF EXISTS bench_entry_search_vector_idx",
+            "ALTER TABLE bench_entry DROP COLUMN IF EXISTS search_vector",
+        ],
+        "indexes": ["bench_entry_search_vector_idx"],
+        "where": {
+            "term": "search_vector @@ plainto_tsquery('simple', %(value)s)",
+            "phrase": "search_vector @@ phraseto_tsquery('simple', %(value)s)",
+            "prefix": "search_vector @@ to_tsquery('simple', %(prefix)s)",
+        },
+    },
+    {
+        "name": "pg_trgm + GIN",
+        "setup": [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX bench_entry_content_trgm_idx ON bench_entry USING GIN (lower(content) gin_trgm_ops)",
+            "CREATE INDEX bench_entry_title_trgm_idx ON bench_entry USING GIN (lower(title) gin_trgm_ops)",
+            "CREATE INDEX bench_entry_url_trgm_idx ON bench_entry USING GIN (lower(url) gin_trgm_ops)",
+        ],
+        "teardown": [
+            "DROP INDEX IF EXISTS bench_entry_content_trgm_idx",
+            "DROP INDEX IF EXISTS bench_entry_title_trgm_idx",
+            "DROP INDEX IF EXISTS bench_entry_url_trgm_idx",
+        ],
+        "indexes": [
+            "bench_entry_content_trgm_idx",
+            "bench_entry_title_trgm_idx",
+            "bench_entry_url_trgm_idx",
+        ],
+        "where": {"term": LIKE_WHERE, "phrase": LIKE_WHERE, "prefix": LIKE_WHERE},
+    },
+]
+
+
+def query_params(query):
+    """Build the SQL parameters for a search query"""
+    return {
+        "value": query["value"],
+        "pattern": f"%{query['value']}%",
+        "prefix": f"{query['value']}:*",
+    }
+
+
+class WallabagSearchBenchmark(WallabagApiTester):
+    def __init__(self, base_url, corpus_size=500, repeats=20, seed=42,
+                 db_config=None, keep_scratch=False, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.corpus = generate_corpus(corpus_size, seed=seed,
+                                      url_prefix="https://bench.example.org/search")
+        self.repeats = repeats
+        self.db_config = db_config or get_db_config()
+        self.keep_scratch = keep_scratch
+
+        # Internal storage
+        self.api_results = []
+        self.variant_results = []
+
+    def run_api_queries(self):
+        """Measure /api/search, which uses Wallabag's LIKE-based search"""
+        for query in SEARCH_QUERIES:
+            endpoint = {
+                "name": query["name"],
+                "method": "GET",
+                "path": "/api/search",
+                "params": {"term": query["value"], "page": 1, "perPage": SEARCH_PAGE_SIZE},
+            }
+
+            # Warm up caches so the first sample is not an outlier
+            self.make_request(endpoint)
+            results = [self.make_request(endpoint) for _ in range(self.repeats)]
+
+            times = [r["time"] for r in results if r["status"] == "success"]
+            self.api_results.append({
+                "query": query,
+                "failed": len(results) - len(times),
+                "stats": summarize(times),
+            })
+
+    def load_scratch_table(self, conn):
+        """Copy the generated corpus into the scratch database"""
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE bench_entry (
+                    id SERIAL PRIMARY KEY,
+                    title TEXT,
+                    url TEXT,
+                    content TEXT,
+                    language TEXT
+                )
+            """)
+            execute_values(
+                cursor,
+                "INSERT INTO bench_entry (title, url, content, language) VALUES %s",
+                [(a["title"], a["url"], a["content"], a["language"]) for a in self.corpus]
+            )
+            cursor.execute("ANALYZE bench_entry")
+        conn.commit()
+
+    def time_query(self, cursor, where, params):
+        """Run one search page (count + first page) and return elapsed time and match count"""
+        start_time = time.perf_counter()
+        cursor.execute(f"SELECT count(*) FROM bench_entry WHERE {where}", params)
+        matches = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT id, title, url FROM bench_entry WHERE {where} ORDER BY id DESC LIMIT {SEARCH_PAGE_SIZE}",
+            params
+        )
+        cursor.fetchall()
+        return time.perf_counter() - start_time, matches
+
+    def run_variant(self, conn, variant):
+        """Install an index variant, measure build cost and query latency, then remove it"""
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_total_relation_size('bench_entry')")
+            table_size_before = cursor.fetchone()[0]
+
+            start_time = time.perf_counter()
+            for statement in variant["setup"]:
+                cursor.execute(statement)
+            cursor.execute("ANALYZE bench_entry")
+            conn.commit()
+            build_time = time.perf_counter() - start_time
+
+            index_size = 0
+            for index_name in variant["indexes"]:
+                cursor.execute("SELECT pg_relation_size(%s::regclass)", (index_name,))
+                index_size += cursor.fetchone()[0]
+
+            cursor.execute("SELECT pg_total_relation_size('bench_entry')")
+            table_growth = cursor.fetchone()[0] - table_size_before
+
+            query_results = []
+            for query in SEARCH_QUERIES:
+                where = variant["where"][query["type"]]
+                params = query_params(query)
+
+                self.time_query(cursor, where, params)
+                samples = [self.time_query(cursor, where, params) for _ in range(self.repeats)]
+
+                query_results.append({
+                    "query": query,
+                    "matches": samples[0][1],
+                    "stats": summarize([elapsed for elapsed, _ in samples]),
+                })
+
+            for statement in variant["teardown"]:
+                cursor.execute(statement)
+            conn.commit()
+
+        if self.verbose:
+            print(f"Variant {variant['name']}: build {build_time:.2f}s, index size {format_bytes(index_size)}")
+
+        return {
+            "variant": variant["name"],
+            "build_time": build_time,
+            "index_size": index_size,
+            "table_growth": table_growth,
+            "queries": query_results,
+        }
+
+    def run_db_variants(self):
+        """Compare the search variants on a scratch copy of the corpus"""
+        print(f"Comparing search variants on scratch database {SCRATCH_DATABASE_NAME}")
+
+        with scratch_database(SCRATCH_DATABASE_NAME, self.db_config, keep=self.keep_scratch) as scratch_config:
+            conn = connect(scratch_config)
+            try:
+                self.load_scratch_table(conn)
+                for variant in SEARCH_VARIANTS:
+                    self.variant_results.append(self.run_variant(conn, variant))
+            finally:
+                conn.close()
+
+    def run_all_tests(self, skip_api=False, skip_db=False, keep_entries=False):
+        """Run the API and database search benchmarks"""
+        if not skip_api:
+            if not self.authenticate():
+                return False
+
+            if not self.seed_entries(self.corpus):
+                return False
+
+            try:
+                print(f"Running search performance tests against {self.base_url}")
+                self.run_api_queries()
+            finally:
+                if not keep_entries:
+                    self.cleanup_entries()
+
+        if not skip_db:
+            self.run_db_variants()
+
+        return True
+
+    def report_results(self):
+        """Generate a report of search benchmark results"""
+        print("\n========== SEARCH PERFORMANCE TEST RESULTS ==========")
+        print(f"Corpus size: {len(self.corpus)} entries, {self.repeats} repeats per query")
+
+        headers = ["Variant", "Query", "Type", "Matches", "p50", "p95", "p99", "Mean"]
+        table_data = []
+
+        for api_result in self.api_results:
+            stats = api_result["stats"]
+            table_data.append([
+                "API /api/search",
+                api_result["query"]["name"],
+                api_result["query"]["type"],
+                "-",
+                format_seconds(stats["p50"]),
+                format_seconds(stats["p95"]),
+                format_seconds(stats["p99"]),
+                format_seconds(stats["mean"]),
+            ])
+
+        for variant_result in self.variant_results:
+            for query_result in variant_result["queries"]:
+                stats = query_result["stats"]
+                table_data.append([
+                    variant_result["variant"],
+                    query_result["query"]["name"],
+                    query_result["query"]["type"],
+                    query_result["matches"],
+                    format_seconds(stats["p50"]),
+                    format_seconds(stats["p95"]),
+                    format_seconds(stats["p99"]),
+                    format_seconds(stats["mean"]),
+                ])
+
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+        if self.variant_results:
+            print("\n=== Index build cost ===")
+            index_table = [
+                [r["variant"], f"{r['build_time']:.2f}s", format_bytes(r["index_size"]), format_bytes(r["table_growth"])]
+                for r in self.variant_results
+            ]
+            print(tabulate(index_table, headers=["Variant", "Build Time", "Index Size", "Table Growth"], tablefmt="grid"))
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "corpus_size": len(self.corpus),
+                "api_results": self.api_results,
+                "variant_results": self.variant_results
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Search Performance Test')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--entries', type=int, default=500,
+                        help='Number of corpus entries to generate')
+    parser.add_argument('--repeats', type=int, default=20,
+                        help='Timed repeats per query and variant')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the generated corpus')
+    parser.add_argument('--skip-api', action='store_true',
+                        help='Only compare index variants on the scratch database')
+    parser.add_argument('--skip-db', action='store_true',
+                        help='Only measure the /api/search endpoint')
+    parser.add_argument('--keep-entries', action='store_true',
+                        help='Do not delete seeded entries after the run')
+    parser.add_argument('--keep-scratch', action='store_true',
+                        help='Do not drop the scratch database after the run')
+    parser.add_argument('--output', default='search_performance_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagSearchBenchmark(
+        base_url=args.base_url,
+        corpus_size=args.entries,
+        repeats=args.repeats,
+        seed=args.seed,
+        keep_scratch=args.keep_scratch,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests(skip_api=args.skip_api, skip_db=args.skip_db, keep_entries=args.keep_entries):
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Concurrent tag-creation race benchmark
+Floods entry creation with overlapping new tag labels and measures
+duplicate-key failures, retry cost and tag table growth
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import threading
+import uuid
+import requests
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.batch import BatchClient
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+DEFAULT_WORKERS = 16
+DEFAULT_ROUNDS = 20
+DEFAULT_TAGS_PER_ENTRY = 3
+
+# "shared": every worker of a round posts the same new labels at once;
+# "disjoint": every worker posts its own new labels (creation without a race);
+# "existing": the labels already exist (the upsert's lookup path)
+MODES = ["shared", "disjoint", "existing"]
+
+# Client-side retries of failed creations, as a browser extension would do
+DEFAULT_MAX_RETRIES = 3
+RETRY_BACKOFF = 0.1
+
+# Error texts of a unique constraint violation from Postgres through Doctrine
+UNIQUE_VIOLATION_MARKERS = ("duplicate key", "23505", "UniqueConstraintViolation", "unique constraint")
+
+BENCH_URL_PREFIX = "https://bench.invalid/tag-race"
+TAG_PREFIX = "race"
+
+
+def is_unique_violation(text):
+    """Whether an error response reports a duplicate key"""
+    text = (text or "").lower()
+    return any(marker.lower() in text for marker in UNIQUE_VIOLATION_MARKERS)
+
+
+class WallabagTagRaceBenchmark(WallabagApiTester):
+    def __init__(self, base_url, modes=None, workers=DEFAULT_WORKERS, rounds=DEFAULT_ROUNDS,
+                 tags_per_entry=DEFAULT_TAGS_PER_ENTRY, max_retries=DEFAULT_MAX_RETRIES, timeout=30, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.modes = modes or MODES
+        self.workers = workers
+        self.rounds = rounds
+        self.tags_per_entry = tags_per_entry
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+
+        # Internal storage
+        self.created = []
+        self.results = []
+        self._local = threading.local()
+
+    def client(self):
+        """API client of the calling worker thread"""
+        if not hasattr(self._local, "client"):
+            self._local.client = self.api_client(timeout=self.timeout)
+        return self._local.client
+
+    def list_tags(self):
+        """All tags of the account, as {label: [ids]}"""
+        response = self.client().get("tags")
+        response.raise_for_status()
+        tags = {}
+        for tag in response.json():
+            tags.setdefault(tag["label"], []).append(tag["id"])
+        return tags
+
+    def labels_for(self, mode, round_number, worker):
+        """New (or pre-created) tag labels one worker posts in one round"""
+        if mode == "disjoint":
+            key = f"{round_number}-w{worker}"
+        elif mode == "existing":
+            key = "existing"
+        else:
+            key = str(round_number)
+        return [f"{TAG_PREFIX}-{self.run_id}-{mode}-{key}-{i}" for i in range(self.tags_per_entry)]
+
+    def create_entry(self, url, labels):
+        """POST one entry with tags, retrying failures; returns the attempt log"""
+        attempts = []
+        start_time = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            attempt_start = time.perf_counter()
+            try:
+                response = self.client().post("entries", {"url": url, "tags": ",".join(labels)})
+                status_code, text = response.status_code, response.text
+            except requests.exceptions.RequestException as e:
+                response, status_code, text = None, None, str(e)
+
+            attempts.append({
+                "status_code": status_code,
+                "time": time.perf_counter() - attempt_start,
+                "unique_violation": status_code is not None and status_code >= 400 and is_unique_violation(text),
+            })
+            if status_code is not None and status_code < 400:
+                entry = response.json()
+                return {"id": entry.get("id"), "labels": labels, "attempts": attempts, "success": True,
+                        "tags": {tag["label"] for tag in entry.get("tags", [])},
+                        "total_time": time.perf_counter() - start_time}
+            # Client errors other than a duplicate key will not succeed on retry
+            if status_code is not None and status_code < 500 and not attempts[-1]["unique_violation"]:
+                break
+            if attempt < self.max_retries:
+                time.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        return {"id": None, "labels": labels, "attempts": attempts, "success": False, "tags": set(),
+                "total_time": time.perf_counter() - start_time}
+
+    def run_round(self, mode, round_number):
+        """All workers create one entry each, released together"""
+        barrier = threading.Barrier(self.workers)
+        outcomes = [None] * self.workers
+
+        def worker(index):
+            url = f"{BENCH_URL_PREFIX}/{self.run_id}/{mode}/{round_number}/{index}"
+            labels = self.labels_for(mode, round_number, index)
+            barrier.wait()
+            outcomes[index] = self.create_entry(url, labels)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def run_mode(self, mode):
+        """Run all rounds of one mode and compare the tag table before and after"""
+        if mode == "existing":
+            # Create the labels once, without contention
+            seed = self.create_entry(f"{BENCH_URL_PREFIX}/{self.run_id}/existing/seed",
+                                     self.labels_for(mode, 0, 0))
+            if seed["success"]:
+                self.created.append(seed["id"])
+
+        tags_before = self.list_tags()
+        start_time = time.perf_counter()
+        outcomes = []
+        for round_number in range(self.rounds):
+            outcomes.extend(self.run_round(mode, round_number))
+        elapsed = time.perf_counter() - start_time
+        tags_after = self.list_tags()
+
+        self.created.extend(o["id"] for o in outcomes if o["success"] and o["id"] is not None)
+
+        expected_labels = {label for o in outcomes for label in o["labels"]}
+        new_labels = expected_labels - set(tags_before)
+        prefix = f"{TAG_PREFIX}-{self.run_id}-{mode}-"
+        race_tags = {label: ids for label, ids in tags_after.items() if label.startswith(prefix)}
+
+        attempts = [a for o in outcomes for a in o["attempts"]]
+        failed_attempts = [a for a in attempts if a["status_code"] is None or a["status_code"] >= 400]
+        first_try = [o for o in outcomes if o["success"] and len(o["attempts"]) == 1]
+        retried = [o for o in outcomes if len(o["attempts"]) > 1]
+
+        return {
+            "mode": mode,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "entries": len(outcomes),
+            "created": sum(1 for o in outcomes if o["success"]),
+            "failed": sum(1 for o in outcomes if not o["success"]),
+            "requests": len(attempts),
+            "failed_attempts": len(failed_attempts),
+            "unique_violations": sum(1 for a in failed_attempts if a["unique_violation"]),
+            "status_codes": self.count_status_codes(failed_attempts),
+            "retried_entries": len(retried),
+            "throughput": sum(1 for o in outcomes if o["success"]) / elapsed if elapsed else 0.0,
+            "first_try_latency": summarize([o["total_time"] for o in first_try]),
+            "retried_latency": summarize([o["total_time"] for o in retried if o["success"]]),
+            # Time spent on attempts that failed plus the backoff after them
+            "retry_cost": sum(o["total_time"] - o["attempts"][-1]["time"] for o in retried),
+            "tag_growth": len(tags_after) - len(tags_before),
+            "tag_rows_growth": sum(len(ids) for ids in tags_after.values())
+                               - sum(len(ids) for ids in tags_before.values()),
+            "expected_growth": len(new_labels),
+            "duplicate_labels": sum(1 for ids in race_tags.values() if len(ids) > 1),
+            "missing_labels": len(new_labels - set(tags_after)),
+            "entries_missing_tags": sum(1 for o in outcomes if o["success"] and not set(o["labels"]) <= o["tags"]),
+        }
+
+    @staticmethod
+    def count_status_codes(attempts):
+        counts = {}
+        for attempt in attempts:
+            code = str(attempt["status_code"]) if attempt["status_code"] is not None else "no response"
+            counts[code] = counts.get(code, 0) + 1
+        return counts
+
+    def delete_race_tags(self):
+        """Remove the tags this run created"""
+        prefix = f"{TAG_PREFIX}-{self.run_id}-"
+        for label, ids in self.list_tags().items():
+            if label.startswith(prefix):
+                for tag_id in ids:
+                    self.client().delete(f"tags/{tag_id}")
+
+    def run_all_tests(self):
+        """Run every mode"""
+        if not self.authenticate():
+            return False
+
+        print(f"Running tag creation race benchmark against {self.base_url}")
+        print(f"Modes: {', '.join(self.modes)}; {self.workers} concurrent entries per round, {self.rounds} rounds, "
+              f"{self.tags_per_entry} tags each; up to {self.max_retries} retries")
+
+        try:
+            for mode in self.modes:
+                print(f"{mode}...")
+                result = self.run_mode(mode)
+                self.results.append(result)
+                if self.verbose:
+                    print(f"  {result['created']}/{result['entries']} created, "
+                          f"{result['unique_violations']} duplicate-key failures, "
+                          f"{result['tag_growth']} tags added (expected {result['expected_growth']})")
+        except requests.exceptions.RequestException as e:
+            print(f"Tag race benchmark failed: {e}")
+            return bool(self.results)
+        finally:
+            if self.created:
+                BatchClient(self.client(), workers=self.workers).delete(self.created)
+            self.delete_race_tags()
+
+        return True
+
+    def report_results(self):
+        """Generate a report of tag race results"""
+        if not self.results:
+            print("No tag race results to report")
+            return
+
+        print("\n========== TAG CREATION RACE RESULTS ==========")
+
+        headers = ["Mode", "Entries", "Failed", "Requests", "Duplicate-key", "Retried", "Entries/s",
+                   "p50 (1st try)", "p50 (retried)", "Retry cost", "Tags added", "Expected", "Duplicates",
+                   "Entries missing tags"]
+        table_data = []
+        for r in self.results:
+            table_data.append([
+                r["mode"],
+                r["entries"],
+                r["failed"],
+                r["requests"],
+                r["unique_violations"],
+                r["retried_entries"],
+                f"{r['throughput']:.1f}",
+                format_seconds(r["first_try_latency"]["p50"]),
+                format_seconds(r["retried_latency"]["p50"]),
+                f"{r['retry_cost']:.1f}s",
+                r["tag_growth"],
+                r["expected_growth"],
+                r["duplicate_labels"],
+                r["entries_missing_tags"],
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Retry cost = time spent in failed attempts and backoff; Duplicates = labels stored more than once")
+
+        for r in self.results:
+            if r["status_codes"]:
+                print(f"{r['mode']} failed attempts: "
+                      + ", ".join(f"{code} x{count}" for code, count in r["status_codes"].items()))
+
+        baseline = next((r for r in self.results if r["mode"] == "disjoint"), None)
+        shared = next((r for r in self.results if r["mode"] == "shared"), None)
+        if baseline and shared and baseline["throughput"]:
+            print(f"\nShared new labels run at {shared['throughput'] / baseline['throughput']:.2f}x "
+                  f"the throughput of disjoint ones")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "results": self.results
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Tag Creation Race Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES,
+                        help='Label patterns to run')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Entries created at the same moment in each round')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help='Rounds per mode, each with fresh labels')
+    parser.add_argument('--tags-per-entry', type=int, default=DEFAULT_TAGS_PER_ENTRY,
+                        help='Tag labels posted with every entry')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='Client retries of a failed creation')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--output', default='tag_race_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagTagRaceBenchmark(
+        base_url=args.base_url,
+        modes=args.modes,
+        workers=args.workers,
+        rounds=args.rounds,
+        tags_per_entry=args.tags_per_entry,
+        max_retries=args.max_retries,
+        timeout=args.timeout,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tag and tag-filter scaling benchmark for large accounts
+Sweeps tag cardinality and tags per entry on a scratch copy of Wallabag's tag
+schema, measures /api/tags and tag filters on a seeded account, and captures
+the SQL plans of both
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import uuid
+import requests
+import concurrent.futures
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.batch import BatchClient
+from harness.db import get_db_config, connect, scratch_database
+from harness.plans import explain, plan_outline, plan_summary
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Scratch database sweep: power users have 5k+ tags and 100k tagged entries
+DEFAULT_ENTRIES = 100000
+DEFAULT_TAG_COUNTS = [100, 1000, 5000]
+DEFAULT_FAN_OUTS = [1, 5, 20]
+DEFAULT_REPEATS = 10
+
+# Seeded account for the API measurements
+DEFAULT_API_ENTRIES = 1000
+DEFAULT_API_TAGS = 500
+DEFAULT_API_FAN_OUT = 5
+
+# Page size of /api/entries listings
+PAGE_SIZE = 30
+
+SCRATCH_DATABASE_NAME = "wallabag_tag_bench"
+BENCH_USER_ID = 1
+
+# Table names of the scratch copy and of a live Wallabag database
+SCRATCH_TABLES = {"entry": "bench_entry", "tag": "bench_tag", "entry_tag": "bench_entry_tag"}
+LIVE_TABLE_PREFIX = "wallabag_"
+
+# Scratch copy of the entry/tag tables with the indexes Doctrine creates for Wallabag
+SCRATCH_SCHEMA = [
+    """CREATE TABLE bench_entry (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        url TEXT,
+        title TEXT,
+        is_archived BOOLEAN NOT NULL DEFAULT false,
+        is_starred BOOLEAN NOT NULL DEFAULT false,
+        created_at TIMESTAMP NOT NULL,
+        updated_at TIMESTAMP NOT NULL
+    )""",
+    "CREATE INDEX bench_entry_user_id_idx ON bench_entry (user_id)",
+    "CREATE INDEX bench_entry_created_at_idx ON bench_entry (created_at)",
+    """CREATE TABLE bench_tag (
+        id SERIAL PRIMARY KEY,
+        label TEXT NOT NULL,
+        slug TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE bench_entry_tag (
+        entry_id INTEGER NOT NULL REFERENCES bench_entry (id) ON DELETE CASCADE,
+        tag_id INTEGER NOT NULL REFERENCES bench_tag (id) ON DELETE CASCADE,
+        PRIMARY KEY (entry_id, tag_id)
+    )""",
+    "CREATE INDEX bench_entry_tag_tag_id_idx ON bench_entry_tag (tag_id)",
+]
+
+# floor((n + 1) ^ random()) is log-uniform over 1..n: a few tags are on most
+# entries and most tags are on a few, as with real tagging habits
+SEED_TAGS = """
+    INSERT INTO bench_tag (label, slug)
+    SELECT 'tag-' || i, 'tag-' || i FROM generate_series(1, %(tags)s) AS i
+"""
+SEED_ENTRY_TAGS = """
+    INSERT INTO bench_entry_tag (entry_id, tag_id)
+    SELECT e.id, least(%(tags)s, floor(power(%(tags)s + 1, random())))::int
+    FROM bench_entry e CROSS JOIN generate_series(1, %(fan_out)s)
+    ON CONFLICT DO NOTHING
+"""
+SEED_ENTRIES = """
+    INSERT INTO bench_entry (user_id, url, title, is_archived, is_starred, created_at, updated_at)
+    SELECT %(user_id)s, 'https://bench.example.org/tags/' || i, 'Entry ' || i,
+           random() < 0.5, random() < 0.1, now() - i * interval '1 minute', now()
+    FROM generate_series(1, %(entries)s) AS i
+"""
+
+
+def tag_list_query(tables):
+    """GET /api/tags: the user's tags with their entry counts"""
+    return f"""
+        SELECT t.id, t.label, t.slug, count(e.id) AS nb_entries
+        FROM {tables['tag']} t
+        JOIN {tables['entry_tag']} et ON et.tag_id = t.id
+        JOIN {tables['entry']} e ON e.id = et.entry_id
+        WHERE e.user_id = %(user_id)s
+        GROUP BY t.id, t.label, t.slug
+        ORDER BY t.slug
+    """
+
+
+def tag_filter_where(tables, labels):
+    """Wallabag's tags=a,b,c filter: one IN subquery per label, all required"""
+    clauses = ["e.user_id = %(user_id)s"]
+    for i in range(len(labels)):
+        clauses.append(
+            f"e.id IN (SELECT e{i}.id FROM {tables['entry']} e{i} "
+            f"LEFT JOIN {tables['entry_tag']} et{i} ON et{i}.entry_id = e{i}.id "
+            f"LEFT JOIN {tables['tag']} t{i} ON t{i}.id = et{i}.tag_id "
+            f"WHERE t{i}.label = %(label{i})s)"
+        )
+    return " AND ".join(clauses)
+
+
+def tag_filter_queries(tables, labels):
+    """Count and first page of /api/entries?tags=..., as the paginator runs them"""
+    where = tag_filter_where(tables, labels)
+    return {
+        "count": f"SELECT count(e.id) FROM {tables['entry']} e WHERE {where}",
+        "page": f"SELECT e.id, e.title, e.url FROM {tables['entry']} e WHERE {where} "
+                f"ORDER BY e.created_at DESC LIMIT {PAGE_SIZE}",
+    }
+
+
+def filter_params(user_id, labels):
+    params = {"user_id": user_id}
+    params.update({f"label{i}": label for i, label in enumerate(labels)})
+    return params
+
+
+def pick_filters(tag_counts):
+    """Single popular, single rare and multi-tag filters from {label: entry count}"""
+    ranked = sorted(tag_counts, key=lambda label: (-tag_counts[label], label))
+    if not ranked:
+        return {}
+    return {
+        "Single tag (popular)": [ranked[0]],
+        "Single tag (rare)": [ranked[-1]],
+        "Multi-tag (3 popular)": ranked[:3],
+    }
+
+
+class WallabagTagScalingBenchmark(WallabagApiTester):
+    def __init__(self, base_url, entries=DEFAULT_ENTRIES, tag_counts=None, fan_outs=None,
+                 repeats=DEFAULT_REPEATS, api_entries=DEFAULT_API_ENTRIES, api_tags=DEFAULT_API_TAGS,
+                 api_fan_out=DEFAULT_API_FAN_OUT, table_prefix=LIVE_TABLE_PREFIX, seed=42,
+                 db_config=None, keep_scratch=False, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.entries = entries
+        self.tag_counts = tag_counts or DEFAULT_TAG_COUNTS
+        self.fan_outs = fan_outs or DEFAULT_FAN_OUTS
+        self.repeats = repeats
+        self.api_entries = api_entries
+        self.api_tags = api_tags
+        self.api_fan_out = api_fan_out
+        self.live_tables = {name: f"{table_prefix}{name}" for name in SCRATCH_TABLES}
+        self.rng = random.Random(seed)
+        self.db_config = db_config or get_db_config()
+        self.keep_scratch = keep_scratch
+        self.run_id = uuid.uuid4().hex[:8]
+
+        # Internal storage
+        self.seeded_ids = []
+        self.api_results = []
+        self.live_plans = []
+        self.scratch_results = []
+
+    def time_queries(self, cursor, queries, params):
+        """Run the statements of one request and return the elapsed time and first result"""
+        start_time = time.perf_counter()
+        first = None
+        for sql in queries:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            if first is None:
+                first = rows
+        return time.perf_counter() - start_time, first
+
+    def capture_plans(self, cursor, queries, params):
+        """Analyzed plans of the statements of one request, by statement name"""
+        plans = {}
+        for name, sql in queries.items():
+            plan = explain(cursor, sql, params)
+            plans[name] = {"summary": plan_summary(plan), "outline": plan_outline(plan), "plan": plan}
+        return plans
+
+    # Scratch database sweep
+
+    def seed_scratch(self, conn, tags, fan_out):
+        """Replace the scratch tags and taggings with one cardinality and fan-out"""
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE bench_entry_tag, bench_tag RESTART IDENTITY")
+            start_time = time.perf_counter()
+            cursor.execute(SEED_TAGS, {"tags": tags})
+            cursor.execute(SEED_ENTRY_TAGS, {"tags": tags, "fan_out": fan_out})
+            taggings = cursor.rowcount
+            cursor.execute("ANALYZE bench_tag")
+            cursor.execute("ANALYZE bench_entry_tag")
+        conn.commit()
+        return taggings, time.perf_counter() - start_time
+
+    def scratch_tag_counts(self, cursor):
+        cursor.execute("SELECT t.label, count(*) FROM bench_tag t JOIN bench_entry_tag et ON et.tag_id = t.id "
+                       "GROUP BY t.label")
+        return dict(cursor.fetchall())
+
+    def run_scratch_point(self, conn, tags, fan_out):
+        """Measure the tag list and tag filters at one cardinality and fan-out"""
+        taggings, seed_time = self.seed_scratch(conn, tags, fan_out)
+        if self.verbose:
+            print(f"  {tags} tags x {fan_out}: {taggings} taggings seeded in {seed_time:.1f}s")
+
+        queries = {"Tag list": ([], {"list": tag_list_query(SCRATCH_TABLES)})}
+        with conn.cursor() as cursor:
+            tag_counts = self.scratch_tag_counts(cursor)
+            for name, labels in pick_filters(tag_counts).items():
+                queries[name] = (labels, tag_filter_queries(SCRATCH_TABLES, labels))
+
+            for name, (labels, statements) in queries.items():
+                params = filter_params(BENCH_USER_ID, labels)
+                self.time_queries(cursor, statements.values(), params)
+                samples = [self.time_queries(cursor, statements.values(), params) for _ in range(self.repeats)]
+                first_rows = samples[0][1]
+                self.scratch_results.append({
+                    "tags": tags,
+                    "fan_out": fan_out,
+                    "taggings": taggings,
+                    "query": name,
+                    "labels": labels,
+                    # Entries matching a filter, or tags in the list
+                    "matches": first_rows[0][0] if "count" in statements else len(first_rows),
+                    "stats": summarize([elapsed for elapsed, _ in samples]),
+                    "plans": self.capture_plans(cursor, statements, params),
+                })
+            conn.rollback()
+
+    def run_scratch_sweep(self):
+        """Sweep tag cardinality and fan-out on a scratch copy of the tag schema"""
+        print(f"Sweeping {self.tag_counts} tags x {self.fan_outs} tags per entry over {self.entries} entries "
+              f"on scratch database {SCRATCH_DATABASE_NAME}")
+
+        with scratch_database(SCRATCH_DATABASE_NAME, self.db_config, keep=self.keep_scratch) as scratch_config:
+            conn = connect(scratch_config)
+            try:
+                with conn.cursor() as cursor:
+                    for statement in SCRATCH_SCHEMA:
+                        cursor.execute(statement)
+                    cursor.execute("SELECT setseed(%s)", (self.rng.random(),))
+                    cursor.execute(SEED_ENTRIES, {"user_id": BENCH_USER_ID, "entries": self.entries})
+                    cursor.execute("ANALYZE bench_entry")
+                conn.commit()
+
+                for tags in self.tag_counts:
+                    for fan_out in self.fan_outs:
+                        self.run_scratch_point(conn, tags, fan_out)
+            finally:
+                conn.close()
+
+    # Seeded account through the API
+
+    def seed_account(self, workers=8):
+        """Create tagged entries through the API; returns {label: entry count}"""
+        labels = [f"scale-{self.run_id}-{i}" for i in range(self.api_tags)]
+        # Log-uniform like the scratch seeding: a few labels are on most entries
+        assignments = [{labels[min(len(labels), int((len(labels) + 1) ** self.rng.random())) - 1]
+                        for _ in range(self.api_fan_out)} for _ in range(self.api_entries)]
+        client = self.api_client(timeout=60)
+
+        def create(i):
+            chosen = assignments[i]
+            response = client.post("entries", {"url": f"https://bench.invalid/tag-scaling/{self.run_id}/{i}",
+                                               "tags": ",".join(sorted(chosen))})
+            response.raise_for_status()
+            return response.json().get("id"), chosen
+
+        print(f"Seeding {self.api_entries} entries with up to {self.api_fan_out} of {self.api_tags} tags "
+              f"through the API...")
+        tag_counts = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(create, i) for i in range(self.api_entries)]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    entry_id, chosen = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Failed to seed entry: {e}")
+                    continue
+                self.seeded_ids.append(entry_id)
+                for label in chosen:
+                    tag_counts[label] = tag_counts.get(label, 0) + 1
+        return tag_counts
+
+    def cleanup_account(self):
+        """Delete the seeded entries and their tags"""
+        client = self.api_client(timeout=60)
+        BatchClient(client).delete(self.seeded_ids)
+        self.seeded_ids = []
+        try:
+            for tag in client.get("tags").json():
+                if tag["label"].startswith(f"scale-{self.run_id}-"):
+                    client.delete(f"tags/{tag['id']}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Failed to delete seeded tags: {e}")
+
+    def run_api_queries(self, filters):
+        """Measure /api/tags and the tag filters on the seeded account"""
+        endpoints = [{"name": "Tag list", "method": "GET", "path": "/api/tags", "params": {}}]
+        for name, labels in filters.items():
+            endpoints.append({"name": name, "method": "GET", "path": "/api/entries",
+                              "params": {"tags": ",".join(labels), "perPage": PAGE_SIZE, "page": 1},
+                              "labels": labels})
+
+        for endpoint in endpoints:
+            self.make_request(endpoint)
+            results = [self.make_request(endpoint) for _ in range(self.repeats)]
+            times = [r["time"] for r in results if r["status"] == "success"]
+            self.api_results.append({
+                "query": endpoint["name"],
+                "labels": endpoint.get("labels"),
+                "failed": len(results) - len(times),
+                "stats": summarize(times),
+            })
+
+    def capture_live_plans(self, filters):
+        """Plans of the same queries on the live Wallabag tables, for the seeded user"""
+        conn = connect(self.db_config)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT user_id FROM {self.live_tables['entry']} WHERE id = %s",
+                               (self.seeded_ids[0],))
+                row = cursor.fetchone()
+                if row is None:
+                    print("Seeded entries not found in the database; skipping live plans")
+                    return
+                user_id = row[0]
+
+                queries = {"Tag list": ([], {"list": tag_list_query(self.live_tables)})}
+                for name, labels in filters.items():
+                    queries[name] = (labels, tag_filter_queries(self.live_tables, labels))
+                for name, (labels, statements) in queries.items():
+                    plans = self.capture_plans(cursor, statements, filter_params(user_id, labels))
+                    self.live_plans.append({"query": name, "plans": plans})
+            conn.rollback()
+        finally:
+            conn.close()
+
+    def run_all_tests(self, skip_api=False, skip_db=False, keep_entries=False):
+        """Run the API measurements and the scratch database sweep"""
+        if not skip_api:
+            if not self.authenticate():
+                return False
+
+            tag_counts = self.seed_account()
+            if not self.seeded_ids:
+                return False
+
+            try:
+                filters = pick_filters(tag_counts)
+                print(f"Running tag scaling tests against {self.base_url}")
+                self.run_api_queries(filters)
+                if not skip_db:
+                    try:
+                        self.capture_live_plans(filters)
+                    except Exception as e:
+                        print(f"Could not capture plans from the live database: {e}")
+            finally:
+                if not keep_entries:
+                    self.cleanup_account()
+
+        if not skip_db:
+            self.run_scratch_sweep()
+
+        return True
+
+    def report_plans(self, label, plans):
+        for name, captured in plans.items():
+            summary = captured["summary"]
+            print(f"\n{label} [{name}] {summary['execution_time']:.2f}ms, "
+                  f"seq scans: {', '.join(summary['seq_scans']) or 'none'}")
+            for line in captured["outline"]:
+                print(f"  {line}")
+
+    def report_results(self):
+        """Generate a report of tag scaling results"""
+        print("\n========== TAG SCALING RESULTS ==========")
+
+        if self.api_results:
+            print(f"Seeded account: {self.api_entries} entries, {self.api_tags} tags, "
+                  f"up to {self.api_fan_out} tags per entry")
+            headers = ["Request", "Tags", "p50", "p95", "p99", "Failed"]
+            table_data = [[
+                r["query"],
+                ",".join(r["labels"]) if r["labels"] else "-",
+                format_seconds(r["stats"]["p50"]),
+                format_seconds(r["stats"]["p95"]),
+                format_seconds(r["stats"]["p99"]),
+                r["failed"],
+            ] for r in self.api_results]
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+            for live in self.live_plans:
+                self.report_plans(f"Live plan: {live['query']}", live["plans"])
+
+        if self.scratch_results:
+            print(f"\n=== Scratch database: {self.entries} entries ===")
+            queries = list(dict.fromkeys(r["query"] for r in self.scratch_results))
+            headers = ["Tags", "Tags/entry", "Taggings"] + [f"{q} p50" for q in queries]
+            table_data = []
+            for tags in self.tag_counts:
+                for fan_out in self.fan_outs:
+                    rows = {r["query"]: r for r in self.scratch_results
+                            if r["tags"] == tags and r["fan_out"] == fan_out}
+                    if not rows:
+                        continue
+                    taggings = next(iter(rows.values()))["taggings"]
+                    table_data.append([tags, fan_out, taggings] + [
+                        format_seconds(rows[q]["stats"]["p50"]) if q in rows else "-" for q in queries
+                    ])
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+            # Plans at the largest point, where a bad plan costs the most
+            largest = [r for r in self.scratch_results
+                       if r["tags"] == max(self.tag_counts) and r["fan_out"] == max(self.fan_outs)]
+            for r in largest if not self.verbose else self.scratch_results:
+                self.report_plans(f"{r['tags']} tags x {r['fan_out']}: {r['query']}", r["plans"])
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "entries": self.entries,
+                "api_results": self.api_results,
+                "live_plans": self.live_plans,
+                "scratch_results": self.scratch_results
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Tag Scaling Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--entries', type=int, default=DEFAULT_ENTRIES,
+                        help='Entries in the scratch database')
+    parser.add_argument('--tag-counts', type=int, nargs='+', default=DEFAULT_TAG_COUNTS,
+                        help='Tag cardinalities to sweep on the scratch database')
+    parser.add_argument('--fan-outs', type=int, nargs='+', default=DEFAULT_FAN_OUTS,
+                        help='Tags per entry to sweep on the scratch database')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Timed repeats per query')
+    parser.add_argument('--api-entries', type=int, default=DEFAULT_API_ENTRIES,
+                        help='Entries seeded through the API')
+    parser.add_argument('--api-tags', type=int, default=DEFAULT_API_TAGS,
+                        help='Distinct tags on the entries seeded through the API')
+    parser.add_argument('--api-fan-out', type=int, default=DEFAULT_API_FAN_OUT,
+                        help='Tags per entry seeded through the API')
+    parser.add_argument('--table-prefix', default=LIVE_TABLE_PREFIX,
+                        help='Table prefix of the live Wallabag database, for plan capture')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for tag assignment')
+    parser.add_argument('--skip-api', action='store_true',
+                        help='Only run the scratch database sweep')
+    parser.add_argument('--skip-db', action='store_true',
+                        help='Only measure the API (no plans, no scratch sweep)')
+    parser.add_argument('--keep-entries', action='store_true',
+                        help='Do not delete seeded entries and tags after the run')
+    parser.add_argument('--keep-scratch', action='store_true',
+                        help='Do not drop the scratch database after the run')
+    parser.add_argument('--output', default='tag_scaling_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output and print every captured plan')
+    args = parser.parse_args()
+
+    tester = WallabagTagScalingBenchmark(
+        base_url=args.base_url,
+        entries=args.entries,
+        tag_counts=args.tag_counts,
+        fan_outs=args.fan_outs,
+        repeats=args.repeats,
+        api_entries=args.api_entries,
+        api_tags=args.api_tags,
+        api_fan_out=args.api_fan_out,
+        table_prefix=args.table_prefix,
+        seed=args.seed,
+        keep_scratch=args.keep_scratch,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests(skip_api=args.skip_api, skip_db=args.skip_db, keep_entries=args.keep_entries):
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
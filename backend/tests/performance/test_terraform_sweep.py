@@ -0,0 +1,403 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Terraform parameter sweep for Wallabag Cloud Run sizing
+Runs the standard API workload against local containers for a grid of
+concurrency/cpu/memory/instance settings and compares cost with latency
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import itertools
+import threading
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.docker import (
+    DEFAULT_CONTAINER_ENV,
+    DEFAULT_IMAGE,
+    DEFAULT_NETWORK,
+    DockerError,
+    run_container,
+    remove_container,
+    exec_in_container,
+    wait_for_http,
+)
+from harness.stats import summarize, format_seconds
+from harness.terraform import load_cloud_run_settings, parse_cpu, parse_memory
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Default grid; every combination except min_instances is run, and
+# min_instances only changes the cold start and idle cost derived from a run
+DEFAULT_GRID = {
+    "concurrency": [10, 40, 80],
+    "cpu": ["1", "2"],
+    "memory": ["512Mi", "1Gi"],
+    "min_instances": [0, 1],
+    "max_instances": [1, 2],
+}
+
+# Cloud Run list prices (USD, tier 1 region, request-based billing)
+CLOUD_RUN_PRICING = {
+    "vcpu_second": 0.000024,
+    "gib_second": 0.0000025,
+    "per_million_requests": 0.40,
+    "idle_vcpu_second": 0.0000025,
+    "idle_gib_second": 0.0000025,
+}
+
+SECONDS_PER_MONTH = 30 * 24 * 3600
+
+DEFAULT_BASE_PORT = 18080
+CONTAINER_PREFIX = "wallabag-sweep"
+
+# Commands that set the request worker count to the Cloud Run concurrency
+WORKER_CONFIG_COMMANDS = {
+    "apache": (
+        "printf '<IfModule mpm_prefork_module>\\n"
+        "    StartServers {workers}\\n"
+        "    ServerLimit {workers}\\n"
+        "    MaxRequestWorkers {workers}\\n"
+        "</IfModule>\\n' > /etc/apache2/conf-enabled/zz-sweep-workers.conf"
+        " && apachectl -k graceful"
+    ),
+    "php-fpm": (
+        "for d in /usr/local/etc/php-fpm.d /etc/php*/php-fpm.d; do "
+        "[ -d \"$d\" ] && printf '[www]\\npm = static\\npm.max_children = {workers}\\n' > \"$d/zz-sweep.conf\"; "
+        "done; pkill -USR2 -o php-fpm"
+    ),
+}
+
+
+class RoundRobinApiTester(WallabagApiTester):
+    """API tester that spreads requests over several local instances"""
+
+    def __init__(self, base_urls, **kwargs):
+        super().__init__(base_urls[0], **kwargs)
+        self.base_urls = base_urls
+        self._cycle = itertools.cycle(base_urls)
+        self._lock = threading.Lock()
+
+    def request_base_url(self):
+        with self._lock:
+            return next(self._cycle)
+
+
+def build_grid(grid):
+    """Expand a parameter grid into the settings dicts that need a workload run
+
+    min_instances does not change how the local containers serve the
+    workload, so it is left out; with_min_instances() applies it to results.
+    """
+    names = [name for name in grid if name != "min_instances"]
+    settings = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    return [s for s in settings if any(m <= s["max_instances"] for m in grid["min_instances"])]
+
+
+def with_min_instances(result, min_instances_values):
+    """One result per min_instances value, with the cold start and idle cost it implies
+
+    A failed run is returned once, as there is nothing to derive from it.
+    """
+    if result["status"] != "success":
+        return [result]
+
+    results = []
+    for min_instances in min_instances_values:
+        if min_instances > result["setting"]["max_instances"]:
+            continue
+        setting = dict(result["setting"], min_instances=min_instances)
+        derived = dict(result, setting=setting)
+        # With min_instances > 0 users never see a cold start
+        derived["cold_start"] = 0.0 if min_instances > 0 else result["measured_cold_start"]
+        derived["cost"] = estimate_cost(setting, result["instance_seconds"], result["requests"] - result["errors"])
+        results.append(derived)
+    return results
+
+
+def estimate_cost(setting, instance_seconds, requests_served, pricing=CLOUD_RUN_PRICING):
+    """Estimate Cloud Run cost per million requests and the monthly idle cost of min instances"""
+    vcpus = parse_cpu(setting["cpu"])
+    gib = parse_memory(setting["memory"]) / 1024 ** 3
+
+    active = instance_seconds * (vcpus * pricing["vcpu_second"] + gib * pricing["gib_second"])
+    per_million = (active / requests_served * 1_000_000 + pricing["per_million_requests"]) if requests_served else None
+
+    idle_monthly = setting["min_instances"] * SECONDS_PER_MONTH * (
+        vcpus * pricing["idle_vcpu_second"] + gib * pricing["idle_gib_second"]
+    )
+
+    return {"per_million_requests": per_million, "idle_monthly": idle_monthly}
+
+
+class TerraformSweepOrchestrator:
+    def __init__(self, grid, image=DEFAULT_IMAGE, network=DEFAULT_NETWORK, env=None, env_file=None,
+                 server="apache", base_port=DEFAULT_BASE_PORT, startup_timeout=180,
+                 tester_kwargs=None, verbose=False):
+        self.settings = build_grid(grid)
+        self.min_instances = grid["min_instances"]
+        self.image = image
+        self.network = network
+        self.env = env if env is not None else DEFAULT_CONTAINER_ENV
+        self.env_file = env_file
+        self.server = server
+        self.base_port = base_port
+        self.startup_timeout = startup_timeout
+        self.tester_kwargs = tester_kwargs or {}
+        self.verbose = verbose
+
+        # Stats collections
+        self.results = []
+
+    def start_instances(self, setting):
+        """Start max_instances containers with the CPU/memory limits of the setting"""
+        instances = []
+        for index in range(setting["max_instances"]):
+            name = f"{CONTAINER_PREFIX}-{index}"
+            port = self.base_port + index
+            remove_container(name)
+            run_container(
+                self.image, name,
+                ports={port: 80},
+                env=self.env,
+                env_file=self.env_file,
+                network=self.network,
+                cpus=parse_cpu(setting["cpu"]),
+                memory=parse_memory(setting["memory"]),
+            )
+            instances.append({"name": name, "base_url": f"http://localhost:{port}"})
+
+        return instances
+
+    def configure_workers(self, instance, workers):
+        """Match the web server worker count to the Cloud Run container concurrency"""
+        exec_in_container(instance["name"], WORKER_CONFIG_COMMANDS[self.server].format(workers=workers))
+
+    def stop_instances(self, instances):
+        """Remove the sweep containers"""
+        for instance in instances:
+            remove_container(instance["name"])
+
+    def run_setting(self, setting):
+        """Run the standard API workload against one setting"""
+        print(f"\n=== concurrency={setting['concurrency']} cpu={setting['cpu']} memory={setting['memory']} "
+              f"max_instances={setting['max_instances']} ===")
+
+        result = {"setting": setting, "status": "error"}
+        instances = []
+
+        try:
+            start_time = time.monotonic()
+            instances = self.start_instances(setting)
+
+            cold_starts = []
+            for instance in instances:
+                waited = wait_for_http(instance["base_url"], timeout=self.startup_timeout)
+                if waited is None:
+                    result["error"] = f"{instance['name']} did not become ready"
+                    return result
+                cold_starts.append(time.monotonic() - start_time)
+
+            for instance in instances:
+                self.configure_workers(instance, setting["concurrency"])
+            # Give the graceful restart time to finish before measuring
+            for instance in instances:
+                wait_for_http(instance["base_url"], timeout=self.startup_timeout)
+
+            tester = RoundRobinApiTester([i["base_url"] for i in instances], verbose=self.verbose,
+                                         **self.tester_kwargs)
+
+            workload_start = time.monotonic()
+            if not tester.run_all_tests():
+                result["error"] = "workload failed"
+                return result
+            workload_time = time.monotonic() - workload_start
+
+            all_results = [r for config in tester.results for r in config["results"]]
+            times = [r["time"] for r in all_results if r["status"] == "success"]
+            stats = summarize(times)
+
+            # Request-based billing charges each instance while it serves requests;
+            # during a sustained workload all instances are busy.
+            instance_seconds = workload_time * len(instances)
+
+            result.update({
+                "status": "success",
+                "requests": len(all_results),
+                "errors": len(all_results) - len(times),
+                "workload_time": workload_time,
+                "throughput": len(times) / workload_time if workload_time else 0,
+                "latency": stats,
+                "measured_cold_start": max(cold_starts),
+                "instance_seconds": instance_seconds,
+            })
+            return result
+
+        except DockerError as e:
+            result["error"] = str(e)
+            print(f"Docker error: {e}")
+            return result
+        finally:
+            self.stop_instances(instances)
+
+    def run_all(self):
+        """Run every setting in the grid"""
+        print(f"Sweeping {len(self.settings)} Cloud Run settings with image {self.image}, "
+              f"each costed for min_instances {', '.join(str(m) for m in self.min_instances)}")
+        current = load_cloud_run_settings()
+        print(f"Current Terraform settings: {current}")
+
+        for setting in self.settings:
+            self.results.extend(with_min_instances(self.run_setting(setting), self.min_instances))
+
+        return any(r["status"] == "success" for r in self.results)
+
+    def pareto_optimal(self, results):
+        """Settings for which no other setting is both cheaper and faster (p95)"""
+        optimal = []
+        for candidate in results:
+            dominated = any(
+                other is not candidate
+                and other["cost"]["per_million_requests"] <= candidate["cost"]["per_million_requests"]
+                and other["latency"]["p95"] <= candidate["latency"]["p95"]
+                and (other["cost"]["per_million_requests"] < candidate["cost"]["per_million_requests"]
+                     or other["latency"]["p95"] < candidate["latency"]["p95"])
+                for other in results
+            )
+            if not dominated:
+                optimal.append(candidate)
+        return optimal
+
+    def report_results(self):
+        """Print the cost-vs-latency table"""
+        successful = [r for r in self.results
+                      if r["status"] == "success" and r["latency"]["p95"] is not None
+                      and r["cost"]["per_million_requests"] is not None]
+        failed = [r for r in self.results if r not in successful]
+
+        print("\n========== TERRAFORM SWEEP RESULTS ==========")
+
+        optimal = self.pareto_optimal(successful)
+        table_data = []
+        for r in sorted(successful, key=lambda r: r["cost"]["per_million_requests"]):
+            s = r["setting"]
+            table_data.append([
+                s["concurrency"], s["cpu"], s["memory"], f"{s['min_instances']}-{s['max_instances']}",
+                f"{r['throughput']:.1f}",
+                format_seconds(r["latency"]["p50"]),
+                format_seconds(r["latency"]["p95"]),
+                format_seconds(r["latency"]["p99"]),
+                r["errors"],
+                f"{r['cold_start']:.1f}s",
+                f"${r['cost']['per_million_requests']:.2f}",
+                f"${r['cost']['idle_monthly']:.2f}",
+                "*" if r in optimal else "",
+            ])
+
+        headers = ["Concurrency", "CPU", "Memory", "Instances", "Req/s", "p50", "p95", "p99",
+                   "Errors", "Cold Start", "$/1M req", "Idle $/month", "Pareto"]
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("* = no other setting is both cheaper and faster at p95")
+        print("Settings that differ only in min instances share one run; their latency is the same")
+
+        if failed:
+            print("\n--- Failed Settings ---")
+            for r in failed:
+                print(f"{r['setting']}: {r.get('error', 'no successful requests')}")
+
+    def save_results(self, filename):
+        """Save sweep results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "image": self.image,
+                "timestamp": time.time(),
+                "pricing": CLOUD_RUN_PRICING,
+                "results": self.results
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Cloud Run Terraform Parameter Sweep')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_GRID["concurrency"],
+                        help='container_concurrency values (also used as web server worker count)')
+    parser.add_argument('--cpu', nargs='+', default=DEFAULT_GRID["cpu"],
+                        help='CPU limits, e.g. 1 2 or 500m')
+    parser.add_argument('--memory', nargs='+', default=DEFAULT_GRID["memory"],
+                        help='Memory limits, e.g. 512Mi 1Gi')
+    parser.add_argument('--min-instances', type=int, nargs='+', default=DEFAULT_GRID["min_instances"],
+                        help='min_instances values (affects cold start and idle cost)')
+    parser.add_argument('--max-instances', type=int, nargs='+', default=DEFAULT_GRID["max_instances"],
+                        help='max_instances values (number of local containers)')
+    parser.add_argument('--image', default=os.environ.get('WALLABAG_IMAGE', DEFAULT_IMAGE),
+                        help='Wallabag Docker image to run')
+    parser.add_argument('--network', default=os.environ.get('WALLABAG_DOCKER_NETWORK', DEFAULT_NETWORK),
+                        help='Docker network where the database is reachable')
+    parser.add_argument('--env-file', default=None,
+                        help='Docker env file replacing the default container environment')
+    parser.add_argument('--server', choices=sorted(WORKER_CONFIG_COMMANDS), default='apache',
+                        help='Web server in the image, used to set the worker count')
+    parser.add_argument('--base-port', type=int, default=DEFAULT_BASE_PORT,
+                        help='First host port for the sweep containers')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--output', default='terraform_sweep_results.json',
+                        help='Output file for sweep results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    grid = {
+        "concurrency": args.concurrency,
+        "cpu": args.cpu,
+        "memory": args.memory,
+        "min_instances": args.min_instances,
+        "max_instances": args.max_instances,
+    }
+
+    orchestrator = TerraformSweepOrchestrator(
+        grid,
+        image=args.image,
+        network=args.network,
+        env={} if args.env_file else None,
+        env_file=args.env_file,
+        server=args.server,
+        base_port=args.base_port,
+        tester_kwargs={
+            "api_key": args.api_key,
+            "client_id": args.client_id,
+            "client_secret": args.client_secret,
+            "username": args.username,
+            "password": args.password,
+        },
+        verbose=args.verbose
+    )
+
+    if orchestrator.run_all():
+        orchestrator.report_results()
+    orchestrator.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
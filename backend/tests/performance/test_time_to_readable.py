@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Time-to-readable benchmark for the clip flow
+Clips pages of each corpus class and polls every entry until its content,
+reading time and preview picture are set, so asynchronous fetching is timed too
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from collections import Counter
+from tabulate import tabulate
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.corpus_server import CORPUS_CLASSES, DEFAULT_CORPUS_HOST, CorpusServer
+from harness.polling import DEFAULT_INITIAL_DELAY, DEFAULT_MAX_DELAY, poll_until
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+DEFAULT_CLIPS = 20
+
+# Longest wait for an entry to become readable after the POST returned
+DEFAULT_POLL_TIMEOUT = 60
+
+# Entry fields a reader needs, in the order they are reported
+READABLE_FIELDS = ("content", "reading_time", "preview_picture")
+
+# Wallabag stores this message as the content when fetching the page failed
+FETCH_FAILED_MARKER = "can't retrieve contents"
+
+
+def readable_fields(entry):
+    """Fields of READABLE_FIELDS the entry already has a usable value for"""
+    fields = set()
+    content = entry.get("content") or ""
+    if content.strip() and FETCH_FAILED_MARKER not in content:
+        fields.add("content")
+    if entry.get("reading_time") is not None:
+        fields.add("reading_time")
+    if entry.get("preview_picture"):
+        fields.add("preview_picture")
+    return fields
+
+
+def fetch_failed(entry):
+    return FETCH_FAILED_MARKER in (entry.get("content") or "")
+
+
+class WallabagTimeToReadableBenchmark(WallabagApiTester):
+    def __init__(self, base_url, classes=None, clips=DEFAULT_CLIPS, poll_timeout=DEFAULT_POLL_TIMEOUT,
+                 poll_initial_delay=DEFAULT_INITIAL_DELAY, poll_max_delay=DEFAULT_MAX_DELAY,
+                 corpus_host=DEFAULT_CORPUS_HOST, corpus_port=0, page_delay=0.0, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.classes = classes or list(CORPUS_CLASSES)
+        self.clips = clips
+        self.poll_timeout = poll_timeout
+        self.poll_initial_delay = poll_initial_delay
+        self.poll_max_delay = poll_max_delay
+        self.corpus = CorpusServer(port=corpus_port, advertised_host=corpus_host, page_delay=page_delay)
+
+        # Internal storage
+        self.entry_ids = []
+        self.results = []
+
+    def clip(self, client, corpus_class, index):
+        """POST one page and poll the entry until it is readable, the fetch failed or the poll times out"""
+        # A fresh query string keeps Wallabag from matching an entry of an earlier run
+        url = f"{self.corpus.page_url(corpus_class, index)}?run={time.time_ns()}"
+        result = {"class": corpus_class, "url": url, "polls": 0, "field_times": {}}
+
+        start_time = time.perf_counter()
+        try:
+            response = client.post("entries", {"url": url})
+        except requests.exceptions.RequestException as e:
+            result.update(status="error", error=str(e), post_time=time.perf_counter() - start_time)
+            return result
+
+        result["post_time"] = time.perf_counter() - start_time
+        if response.status_code >= 400:
+            result.update(status="error", error=f"HTTP {response.status_code}")
+            return result
+
+        entry = response.json()
+        self.entry_ids.append(entry["id"])
+
+        def observe(current):
+            elapsed = time.perf_counter() - start_time
+            for field in readable_fields(current):
+                result["field_times"].setdefault(field, elapsed)
+            return current
+
+        def done(current):
+            return current is not None and (fetch_failed(current) or len(readable_fields(current)) == len(READABLE_FIELDS))
+
+        def fetch():
+            try:
+                poll = client.get(f"entries/{entry['id']}")
+            except requests.exceptions.RequestException:
+                return None
+            return observe(poll.json()) if poll.status_code == 200 else None
+
+        observe(entry)
+        result["readable_on_post"] = done(entry) and not fetch_failed(entry)
+        if not done(entry):
+            entry, result["polls"], _ = poll_until(fetch, done, self.poll_timeout,
+                                                   initial_delay=self.poll_initial_delay,
+                                                   max_delay=self.poll_max_delay)
+
+        if entry is not None and fetch_failed(entry):
+            result["status"] = "fetch failed"
+        elif len(result["field_times"]) == len(READABLE_FIELDS):
+            result["status"] = "readable"
+            result["time_to_readable"] = max(result["field_times"].values())
+            result["last_field"] = max(result["field_times"], key=result["field_times"].get)
+        else:
+            result["status"] = "not readable"
+            result["missing"] = sorted(set(READABLE_FIELDS) - set(result["field_times"]))
+
+        return result
+
+    def run_all_tests(self):
+        """Clip every corpus class and record the time until each entry is readable"""
+        if not self.authenticate():
+            return False
+
+        self.corpus.start()
+        print(f"Running time-to-readable benchmark against {self.base_url} with corpus pages from "
+              f"http://{self.corpus.advertised_address} ({self.clips} clips per class)")
+
+        client = self.api_client(timeout=120)
+        try:
+            for corpus_class in self.classes:
+                for index in range(self.clips):
+                    result = self.clip(client, corpus_class, index)
+                    self.results.append(result)
+                    if self.verbose:
+                        print(f"{corpus_class} #{index}: {result['status']}, post {format_seconds(result['post_time'])}, "
+                              f"readable {format_seconds(result.get('time_to_readable'))} after {result['polls']} polls")
+
+            return True
+        finally:
+            self.corpus.stop()
+            for entry_id in self.entry_ids:
+                try:
+                    client.delete(f"entries/{entry_id}")
+                except requests.exceptions.RequestException:
+                    pass
+
+    def class_summary(self, corpus_class):
+        results = [r for r in self.results if r["class"] == corpus_class]
+        readable = [r for r in results if r["status"] == "readable"]
+        return {
+            "class": corpus_class,
+            "clips": len(results),
+            "readable": len(readable),
+            "post": summarize([r["post_time"] for r in results if r["status"] != "error"]),
+            "time_to_readable": summarize([r["time_to_readable"] for r in readable]),
+            "readable_on_post": sum(1 for r in readable if r["readable_on_post"]),
+            "polls": summarize([r["polls"] for r in results]),
+            "last_fields": Counter(r["last_field"] for r in readable if not r["readable_on_post"]),
+            "statuses": Counter(r["status"] for r in results if r["status"] != "readable"),
+            "missing": Counter(field for r in results for field in r.get("missing", [])),
+        }
+
+    def report_results(self):
+        """Generate a report of time-to-readable per corpus class"""
+        if not self.results:
+            print("No time-to-readable results to report")
+            return
+
+        print("\n========== TIME-TO-READABLE RESULTS ==========")
+        print(f"Polled with backoff from {format_seconds(self.poll_initial_delay)} up to "
+              f"{format_seconds(self.poll_max_delay)} for at most {self.poll_timeout}s")
+
+        headers = ["Class", "Clips", "Readable", "POST p50", "TTR p50", "TTR p95", "TTR p99", "TTR max",
+                   "Ready on POST", "Polls (mean)"]
+        table_data = []
+        for corpus_class in self.classes:
+            summary = self.class_summary(corpus_class)
+            table_data.append([
+                corpus_class,
+                summary["clips"],
+                summary["readable"],
+                format_seconds(summary["post"]["p50"]),
+                format_seconds(summary["time_to_readable"]["p50"]),
+                format_seconds(summary["time_to_readable"]["p95"]),
+                format_seconds(summary["time_to_readable"]["p99"]),
+                format_seconds(summary["time_to_readable"]["max"]),
+                f"{summary['readable_on_post']}/{summary['readable']}",
+                f"{summary['polls']['mean']:.1f}" if summary["polls"]["mean"] is not None else "N/A",
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("TTR = time from sending the POST until content, reading_time and preview_picture are all set; "
+              "Ready on POST = readable in the POST response itself (synchronous fetch)")
+
+        for corpus_class in self.classes:
+            summary = self.class_summary(corpus_class)
+            if summary["last_fields"]:
+                fields = ", ".join(f"{field} ({count})" for field, count in summary["last_fields"].most_common())
+                print(f"{corpus_class}: last field to appear: {fields}")
+            if summary["statuses"]:
+                statuses = ", ".join(f"{status} ({count})" for status, count in summary["statuses"].most_common())
+                print(f"{corpus_class}: {statuses}")
+            if summary["missing"]:
+                missing = ", ".join(f"{field} ({count})" for field, count in summary["missing"].most_common())
+                print(f"{corpus_class}: still missing at the poll timeout: {missing}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "poll_timeout": self.poll_timeout,
+                "classes": {c: self.class_summary(c) for c in self.classes},
+                "results": self.results
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Time-to-Readable Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--classes', nargs='+', choices=list(CORPUS_CLASSES), default=list(CORPUS_CLASSES),
+                        help='Corpus page classes to clip')
+    parser.add_argument('--clips', type=int, default=DEFAULT_CLIPS,
+                        help='Clips per corpus class')
+    parser.add_argument('--poll-timeout', type=float, default=DEFAULT_POLL_TIMEOUT,
+                        help='Seconds to wait for an entry to become readable')
+    parser.add_argument('--poll-initial-delay', type=float, default=DEFAULT_INITIAL_DELAY,
+                        help='First poll delay in seconds; later delays back off')
+    parser.add_argument('--poll-max-delay', type=float, default=DEFAULT_MAX_DELAY,
+                        help='Longest delay between polls in seconds')
+    parser.add_argument('--corpus-host', default=DEFAULT_CORPUS_HOST,
+                        help='Host name under which Wallabag reaches this machine '
+                             '(e.g. the docker network gateway on Linux)')
+    parser.add_argument('--corpus-port', type=int, default=0,
+                        help='Port of the local corpus server (default: any free port)')
+    parser.add_argument('--page-delay', type=float, default=0.0,
+                        help='Seconds the corpus server waits before sending a page, like a slow origin')
+    parser.add_argument('--output', default='time_to_readable_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagTimeToReadableBenchmark(
+        base_url=args.base_url,
+        classes=args.classes,
+        clips=args.clips,
+        poll_timeout=args.poll_timeout,
+        poll_initial_delay=args.poll_initial_delay,
+        poll_max_delay=args.poll_max_delay,
+        corpus_host=args.corpus_host,
+        corpus_port=args.corpus_port,
+        page_delay=args.page_delay,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
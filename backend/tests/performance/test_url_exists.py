@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+URL-existence lookup benchmark for deduplicating clip requests
+Measures /api/entries/exists with single and batched, plain and hashed URLs
+on a large seeded account, against naive lookups through search and listings
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import hashlib
+import argparse
+from tabulate import tabulate
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.db import get_db_config, connect
+from harness.plans import explain, plan_outline, plan_summary
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+DEFAULT_ACCOUNT_SIZE = 1000000
+DEFAULT_BATCH_SIZES = [10, 50, 100]
+DEFAULT_REPEATS = 50
+DEFAULT_CONCURRENCY = 1
+
+# Latency a lookup may add to a page view before the extension should stop
+# calling it on every page
+DEFAULT_PAGE_VIEW_BUDGET = 0.1
+
+# Share of looked-up URLs that are already saved
+DEFAULT_HIT_RATIO = 0.5
+
+# Seeded entries share this prefix, so a later run can reuse them
+BENCH_URL_PREFIX = "https://bench.invalid/exists/"
+TEMPLATE_URL = "https://bench.invalid/exists-template"
+
+# Page size of the naive listing scan
+LISTING_PAGE_SIZE = 100
+
+LIVE_TABLE_PREFIX = "wallabag_"
+
+# Rows sent per INSERT when loading the URLs to seed
+SEED_PAGE_SIZE = 10000
+
+# Columns of the copied template row (t) that get per-entry values from the
+# seed URLs (s); hashes are computed here, as Postgres has no built-in sha1
+# and installing pgcrypto on a shared database is not the benchmark's call
+SEED_OVERRIDES = {
+    "url": "s.url",
+    "given_url": "s.url",
+    "hashed_url": "s.hashed_url",
+    "hashed_given_url": "s.hashed_url",
+    "title": "'Exists bench ' || s.i",
+    "created_at": "now() - s.i * interval '1 second'",
+    "updated_at": "now() - s.i * interval '1 second'",
+    "uid": "NULL",
+}
+
+
+def bench_url(i):
+    return f"{BENCH_URL_PREFIX}{i}"
+
+
+def hash_url(url):
+    """Wallabag's hashed_url form of a URL"""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class WallabagUrlExistsBenchmark(WallabagApiTester):
+    def __init__(self, base_url, account_size=DEFAULT_ACCOUNT_SIZE, batch_sizes=None, repeats=DEFAULT_REPEATS,
+                 concurrency=DEFAULT_CONCURRENCY, hit_ratio=DEFAULT_HIT_RATIO,
+                 page_view_budget=DEFAULT_PAGE_VIEW_BUDGET, table_prefix=LIVE_TABLE_PREFIX, seed=42,
+                 db_config=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.account_size = account_size
+        self.batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+        self.repeats = repeats
+        self.concurrency = concurrency
+        self.hit_ratio = hit_ratio
+        self.page_view_budget = page_view_budget
+        self.entry_table = f"{table_prefix}entry"
+        self.rng = random.Random(seed)
+        self.db_config = db_config or get_db_config()
+
+        # Internal storage
+        self.template_id = None
+        self.user_id = None
+        self.seeded = 0
+        self.results = []
+        self.plans = []
+
+    def seeded_count(self, cursor):
+        cursor.execute(f"SELECT count(*) FROM {self.entry_table} WHERE user_id = %s AND url LIKE %s",
+                       (self.user_id, BENCH_URL_PREFIX + "%"))
+        return cursor.fetchone()[0]
+
+    def seed_account(self):
+        """Top the account up to account_size bench entries by copying a template entry in SQL
+
+        Creating a million entries through the API would take days, so one
+        entry is created through the API and its row is copied with new
+        URLs, which keeps every column Wallabag sets without listing them.
+        """
+        response = self.api_client(timeout=120).post("entries", {"url": TEMPLATE_URL, "title": "Exists bench template"})
+        response.raise_for_status()
+        self.template_id = response.json()["id"]
+
+        conn = connect(self.db_config)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT user_id FROM {self.entry_table} WHERE id = %s", (self.template_id,))
+                self.user_id = cursor.fetchone()[0]
+
+                # Only the indexes without an entry, so gaps left by a partial delete are filled
+                cursor.execute(
+                    f"SELECT i FROM generate_series(0, %(last)s) AS i WHERE NOT EXISTS ("
+                    f"SELECT 1 FROM {self.entry_table} WHERE user_id = %(user)s AND url = %(prefix)s || i)",
+                    {"last": self.account_size - 1, "user": self.user_id, "prefix": BENCH_URL_PREFIX}
+                )
+                missing = [row[0] for row in cursor.fetchall()]
+                if missing:
+                    print(f"Seeding {len(missing)} entries ({self.account_size - len(missing)} already present)...")
+                    cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s "
+                                   "AND column_name <> 'id' ORDER BY ordinal_position", (self.entry_table,))
+                    columns = [row[0] for row in cursor.fetchall()]
+                    expressions = [SEED_OVERRIDES.get(column, f"t.{column}") for column in columns]
+
+                    start_time = time.perf_counter()
+                    cursor.execute("CREATE TEMP TABLE exists_bench_seed (i INTEGER, url TEXT, hashed_url TEXT) "
+                                   "ON COMMIT DROP")
+                    execute_values(
+                        cursor,
+                        "INSERT INTO exists_bench_seed (i, url, hashed_url) VALUES %s",
+                        [(i, bench_url(i), hash_url(bench_url(i))) for i in missing],
+                        page_size=SEED_PAGE_SIZE
+                    )
+                    cursor.execute(
+                        f"INSERT INTO {self.entry_table} ({', '.join(columns)}) "
+                        f"SELECT {', '.join(expressions)} FROM {self.entry_table} AS t "
+                        f"CROSS JOIN exists_bench_seed AS s WHERE t.id = %s",
+                        (self.template_id,)
+                    )
+                    conn.commit()
+                    cursor.execute(f"ANALYZE {self.entry_table}")
+                    conn.commit()
+                    print(f"Seeded in {time.perf_counter() - start_time:.1f}s")
+                self.seeded = self.seeded_count(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+
+        return self.seeded >= self.account_size
+
+    def remove_seeded(self):
+        """Delete the seeded bench entries"""
+        conn = connect(self.db_config)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.entry_table} WHERE user_id = %s AND url LIKE %s",
+                               (self.user_id, BENCH_URL_PREFIX + "%"))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lookup_urls(self, count):
+        """URLs to look up, hit_ratio of them saved and the rest new"""
+        urls = []
+        for _ in range(count):
+            if self.rng.random() < self.hit_ratio:
+                urls.append(bench_url(self.rng.randrange(self.account_size)))
+            else:
+                urls.append(f"https://bench.invalid/not-saved/{self.rng.getrandbits(64):x}")
+        return urls
+
+    def lookup_cases(self):
+        """Endpoint definitions of every lookup variant, with the URLs each one covers"""
+        saved = bench_url(self.rng.randrange(self.account_size))
+        cases = [
+            {"name": "exists url (saved)", "kind": "exists", "urls": 1,
+             "params": {"url": saved}},
+            {"name": "exists url (not saved)", "kind": "exists", "urls": 1,
+             "params": {"url": f"https://bench.invalid/not-saved/{self.rng.getrandbits(64):x}"}},
+            {"name": "exists hashed_url", "kind": "exists", "urls": 1,
+             "params": {"hashed_url": hash_url(saved)}},
+        ]
+        for size in self.batch_sizes:
+            urls = self.lookup_urls(size)
+            cases.append({"name": f"exists urls[] x{size}", "kind": "exists", "urls": size,
+                          "params": {"urls[]": urls}})
+            cases.append({"name": f"exists hashed_urls[] x{size}", "kind": "exists", "urls": size,
+                          "params": {"hashed_urls[]": [hash_url(url) for url in urls]}})
+
+        # What a client without the exists endpoint would do: search for the
+        # URL, or scan the listing page by page
+        cases.append({"name": "naive: search term=url", "kind": "search", "urls": 1,
+                      "path": "/api/search", "params": {"term": saved, "perPage": 1}})
+        cases.append({"name": f"naive: listing page ({LISTING_PAGE_SIZE})", "kind": "listing", "urls": 1,
+                      "path": "/api/entries",
+                      "params": {"perPage": LISTING_PAGE_SIZE, "page": 1, "detail": "metadata"}})
+        return cases
+
+    def run_case(self, case):
+        endpoint = {"name": case["name"], "method": "GET", "path": case.get("path", "/api/entries/exists"),
+                    "params": case["params"]}
+        self.make_request(endpoint)
+        results = self.run_test(endpoint, self.concurrency, self.repeats)
+        times = [r["time"] for r in results if r["status"] == "success"]
+        stats = summarize(times)
+
+        row = {
+            "name": case["name"],
+            "kind": case["kind"],
+            "urls": case["urls"],
+            "failed": len(results) - len(times),
+            "status_codes": sorted({r.get("status_code") for r in results if r["status"] != "success"}, key=str),
+            "stats": stats,
+            "per_url": stats["p50"] / case["urls"] if stats["p50"] is not None else None,
+        }
+        if case["kind"] == "listing" and stats["p50"] is not None:
+            # Finding one URL by listing needs on average half of all pages
+            row["per_url"] = stats["p50"] * self.seeded / LISTING_PAGE_SIZE / 2
+        return row
+
+    def capture_plans(self):
+        """Plans of Wallabag's existence queries and of the naive URL search"""
+        urls = self.lookup_urls(max(self.batch_sizes))
+        hashes = [hash_url(url) for url in urls]
+        queries = {
+            "hashed_url": (f"SELECT id FROM {self.entry_table} WHERE user_id = %(user)s "
+                           f"AND (hashed_url = %(hash)s OR hashed_given_url = %(hash)s)",
+                           {"user": self.user_id, "hash": hashes[0]}),
+            f"hashed_urls x{len(hashes)}": (f"SELECT id, hashed_url FROM {self.entry_table} WHERE user_id = %(user)s "
+                                            f"AND (hashed_url IN %(hashes)s OR hashed_given_url IN %(hashes)s)",
+                                            {"user": self.user_id, "hashes": tuple(hashes)}),
+            "search url": (f"SELECT id FROM {self.entry_table} WHERE user_id = %(user)s "
+                           f"AND lower(url) LIKE lower(%(pattern)s) ORDER BY id DESC LIMIT 1",
+                           {"user": self.user_id, "pattern": f"%{urls[0]}%"}),
+        }
+
+        conn = connect(self.db_config)
+        try:
+            with conn.cursor() as cursor:
+                for name, (sql, params) in queries.items():
+                    plan = explain(cursor, sql, params)
+                    self.plans.append({"query": name, "summary": plan_summary(plan),
+                                       "outline": plan_outline(plan), "plan": plan})
+            conn.rollback()
+        finally:
+            conn.close()
+
+    def run_all_tests(self, keep_entries=False):
+        """Seed the account, then time every lookup variant"""
+        if not self.authenticate():
+            return False
+
+        try:
+            if not self.seed_account():
+                print(f"Only {self.seeded} of {self.account_size} entries could be seeded")
+                return False
+
+            print(f"Running URL existence benchmark against {self.base_url} "
+                  f"({self.seeded} seeded entries, concurrency {self.concurrency})")
+            for case in self.lookup_cases():
+                row = self.run_case(case)
+                self.results.append(row)
+                if self.verbose:
+                    print(f"{row['name']}: p50 {format_seconds(row['stats']['p50'])}")
+
+            try:
+                self.capture_plans()
+            except Exception as e:
+                print(f"Could not capture query plans: {e}")
+        finally:
+            if self.template_id is not None:
+                self.api_client(timeout=120).delete(f"entries/{self.template_id}")
+            if self.user_id is not None and not keep_entries:
+                print("Removing seeded entries...")
+                self.remove_seeded()
+
+        return True
+
+    def report_results(self):
+        """Generate a report of URL existence lookup results"""
+        if not self.results:
+            print("No URL existence results to report")
+            return
+
+        print("\n========== URL EXISTENCE LOOKUP RESULTS ==========")
+        print(f"{self.seeded} seeded entries; {self.repeats} requests per lookup at concurrency "
+              f"{self.concurrency}; {self.hit_ratio:.0%} of batched URLs saved")
+
+        headers = ["Lookup", "URLs", "p50", "p95", "p99", "Per URL", "Failed", "Within budget"]
+        table_data = []
+        for r in self.results:
+            p95 = r["stats"]["p95"]
+            table_data.append([
+                r["name"],
+                r["urls"],
+                format_seconds(r["stats"]["p50"]),
+                format_seconds(p95),
+                format_seconds(r["stats"]["p99"]),
+                format_seconds(r["per_url"]),
+                r["failed"],
+                "-" if p95 is None or r["kind"] == "listing" else ("yes" if p95 <= self.page_view_budget else "no"),
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print(f"Within budget = p95 of one request <= {format_seconds(self.page_view_budget)} per page view; "
+              f"listing 'Per URL' extrapolates a scan of half the account")
+
+        for r in self.results:
+            if r["status_codes"]:
+                print(f"{r['name']} failed with: {', '.join(str(code) for code in r['status_codes'])}")
+
+        single = next((r for r in self.results if r["name"] == "exists hashed_url"), None)
+        batched = [r for r in self.results if r["name"].startswith("exists hashed_urls[]") and r["per_url"]]
+        if single and single["per_url"] and batched:
+            best = min(batched, key=lambda r: r["per_url"])
+            print(f"\nBatched hashed lookups: {format_seconds(best['per_url'])} per URL at {best['urls']} URLs "
+                  f"({single['per_url'] / best['per_url']:.1f}x cheaper than one request per URL)")
+
+        for plan in self.plans:
+            summary = plan["summary"]
+            print(f"\nPlan [{plan['query']}] {summary['execution_time']:.2f}ms, "
+                  f"seq scans: {', '.join(summary['seq_scans']) or 'none'}")
+            for line in plan["outline"]:
+                print(f"  {line}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "seeded_entries": self.seeded,
+                "concurrency": self.concurrency,
+                "page_view_budget": self.page_view_budget,
+                "results": self.results,
+                "plans": self.plans
+            }, f, indent=2, default=str)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag URL Existence Lookup Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--account-size', type=int, default=DEFAULT_ACCOUNT_SIZE,
+                        help='Entries to seed into the account (through SQL, TEST_DATABASE_* settings)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES,
+                        help='URLs per batched exists request')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Requests per lookup variant')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Concurrent lookups, as from many page views at once')
+    parser.add_argument('--hit-ratio', type=float, default=DEFAULT_HIT_RATIO,
+                        help='Share of batched URLs that are already saved')
+    parser.add_argument('--page-view-budget', type=float, default=DEFAULT_PAGE_VIEW_BUDGET,
+                        help='Acceptable p95 in seconds for a lookup on every page view')
+    parser.add_argument('--table-prefix', default=LIVE_TABLE_PREFIX,
+                        help='Table prefix of the Wallabag database')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the looked-up URLs')
+    parser.add_argument('--keep-entries', action='store_true',
+                        help='Keep the seeded entries for the next run')
+    parser.add_argument('--output', default='url_exists_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagUrlExistsBenchmark(
+        base_url=args.base_url,
+        account_size=args.account_size,
+        batch_sizes=args.batch_sizes,
+        repeats=args.repeats,
+        concurrency=args.concurrency,
+        hit_ratio=args.hit_ratio,
+        page_view_budget=args.page_view_budget,
+        table_prefix=args.table_prefix,
+        seed=args.seed,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests(keep_entries=args.keep_entries):
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Write contention benchmark for entry PATCH and tagging
+Hammers starred/archive/tags updates on overlapping entry sets while sampling
+Postgres lock waits, and reads the entries back to check for lost updates
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import concurrent.futures
+import threading
+import uuid
+import requests
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.batch import BatchClient
+from harness.contention import DEFAULT_LOCK_SAMPLE_INTERVAL, LockSampler, lost_updates, summarize_locks
+from harness.db import get_db_config
+from harness.stats import summarize, format_seconds
+from test_api_response import (
+    WallabagApiTester,
+    DEFAULT_BASE_URL,
+    DEFAULT_CLIENT_ID,
+    DEFAULT_CLIENT_SECRET,
+    DEFAULT_USERNAME,
+    DEFAULT_PASSWORD,
+)
+
+# Number of entries all workers share; smaller sets mean more overlap
+DEFAULT_HOT_SETS = [1, 5, 25]
+DEFAULT_WORKERS = 16
+DEFAULT_DURATION = 20
+
+# Writes per worker between two read-back checks
+DEFAULT_ROUND_WRITES = 4
+
+# "patch": PATCH starred, archive or tags (tags replace the entry's tags);
+# "append": POST a new tag to the entry, which must never drop another one
+PHASES = ["patch", "append"]
+PATCH_FIELDS = ["starred", "archive", "tags"]
+TAG_POOL = ["a", "b", "c"]
+
+# Tags of a run are labelled "<prefix>-<run id>-..." so they can be removed afterwards
+TAG_PREFIX = "contention"
+
+# Entry fields read back after a run, by PATCH field
+ENTRY_FIELDS = {"starred": "is_starred", "archive": "is_archived"}
+
+# Never resolves, so entry creation does not wait for a content fetch
+BENCH_URL_PREFIX = "https://bench.invalid/contention"
+
+# Lost updates listed in the report per run
+LOST_UPDATE_EXAMPLES = 3
+
+
+class WallabagWriteContentionBenchmark(WallabagApiTester):
+    def __init__(self, base_url, hot_sets=None, phases=None, workers=DEFAULT_WORKERS, duration=DEFAULT_DURATION,
+                 round_writes=DEFAULT_ROUND_WRITES, db_config=None, sample_interval=DEFAULT_LOCK_SAMPLE_INTERVAL,
+                 timeout=30, seed=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.hot_sets = hot_sets or DEFAULT_HOT_SETS
+        self.phases = phases or PHASES
+        self.workers = workers
+        self.duration = duration
+        self.round_writes = round_writes
+        self.db_config = db_config
+        self.sample_interval = sample_interval
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.tag_pool = [self.tag_label(name) for name in TAG_POOL]
+
+        # Internal storage
+        self.entries = []
+        self.results = []
+        self._local = threading.local()
+
+    def tag_label(self, name):
+        return f"{TAG_PREFIX}-{self.run_id}-{name}"
+
+    def create_entries(self, count):
+        """Create the shared entries, all unstarred, unarchived and untagged"""
+        urls = [f"{BENCH_URL_PREFIX}/{self.run_id}/{i}" for i in range(count)]
+        batch = BatchClient(self.api_client(timeout=self.timeout), workers=self.workers, verbose=self.verbose)
+        created = batch.create(urls)
+        self.entries = [entry["id"] for entry in created.succeeded]
+        return len(self.entries) == count
+
+    def next_write(self, phase, hot_set, label):
+        """Pick the entry, request and expected value of one write"""
+        entry = self.rng.choice(self.entries[:hot_set])
+        if phase == "append":
+            return entry, "append", label, "POST", f"entries/{entry}/tags", {"tags": label}
+
+        field = self.rng.choice(PATCH_FIELDS)
+        if field == "tags":
+            labels = tuple(sorted(self.rng.sample(self.tag_pool, self.rng.randint(1, len(self.tag_pool)))))
+            return entry, field, labels, "PATCH", f"entries/{entry}", {"tags": ",".join(labels)}
+        value = self.rng.random() < 0.5
+        return entry, field, value, "PATCH", f"entries/{entry}", {field: int(value)}
+
+    def send_write(self, planned, start_time):
+        """Send one planned write and time it"""
+        if not hasattr(self._local, "client"):
+            self._local.client = self.api_client(timeout=self.timeout)
+
+        entry, field, value, method, path, data = planned
+        write = {"entry": entry, "field": field, "value": value,
+                 "start": time.monotonic() - start_time, "status_code": None}
+        try:
+            response = self._local.client.request(method, path, data=data)
+            write["status_code"] = response.status_code
+            write["status"] = "success" if response.status_code < 400 else "error"
+        except requests.exceptions.RequestException as e:
+            write["status"] = "error"
+            write["error"] = str(e)
+        write["end"] = time.monotonic() - start_time
+        write["time"] = write["end"] - write["start"]
+        return write
+
+    def read_back(self, hot_set):
+        """Final starred/archive/tag values of the hot entries, as {(entry, field): value}"""
+        client = self.api_client(timeout=self.timeout)
+        final_values = {}
+        tags = {}
+        for entry in self.entries[:hot_set]:
+            response = client.get(f"entries/{entry}")
+            if response.status_code != 200:
+                continue
+            article = response.json()
+            for field, key in ENTRY_FIELDS.items():
+                final_values[(entry, field)] = bool(article[key])
+            labels = {tag["label"] for tag in article.get("tags", [])}
+            final_values[(entry, "tags")] = tuple(sorted(labels & set(self.tag_pool)))
+            tags[entry] = labels
+        return final_values, tags
+
+    def check_round(self, phase, hot_set, writes):
+        """Lost updates of one round, from the state read back after it"""
+        final_values, tags = self.read_back(hot_set)
+        if phase == "append":
+            # Every acknowledged tag must still be on its entry
+            return [{"entry": w["entry"], "field": "append", "final": None, "possible": [w["value"]]}
+                    for w in writes if w["status"] == "success" and w["entry"] in tags
+                    and w["value"] not in tags[w["entry"]]]
+        return lost_updates(writes, final_values)
+
+    def run_contention(self, phase, hot_set):
+        """Run rounds of concurrent writes on the hot set for the configured duration
+
+        Checking the final state only catches an update lost in the last
+        moments of a run, so writes go in rounds of round_writes per worker
+        and the hot entries are read back and checked after every round.
+        """
+        writes = []
+        lost = []
+        rounds = 0
+        elapsed = 0.0
+        sampler = None
+        if self.db_config:
+            sampler = LockSampler(self.sample_interval, db_config=self.db_config, verbose=self.verbose)
+            sampler.start()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            deadline = time.monotonic() + self.duration
+            while time.monotonic() < deadline:
+                planned = [self.next_write(phase, hot_set, self.tag_label(f"{hot_set}-{rounds}-{i}"))
+                           for i in range(self.workers * self.round_writes)]
+                start_time = time.monotonic()
+                round_writes = list(executor.map(self.send_write, planned, [start_time] * len(planned)))
+                elapsed += time.monotonic() - start_time
+
+                writes.extend(round_writes)
+                lost.extend(self.check_round(phase, hot_set, round_writes))
+                rounds += 1
+
+        lock_samples = sampler.stop() if sampler else []
+
+        successful = [w for w in writes if w["status"] == "success"]
+        status_codes = {}
+        for w in writes:
+            code = str(w["status_code"]) if w["status_code"] is not None else "no response"
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+        return {
+            "phase": phase,
+            "hot_set": hot_set,
+            "workers": self.workers,
+            "rounds": rounds,
+            "requests": len(writes),
+            "errors": len(writes) - len(successful),
+            "status_codes": status_codes,
+            "elapsed": elapsed,
+            "throughput": len(successful) / elapsed if elapsed else 0.0,
+            "latency": summarize([w["time"] for w in successful]),
+            "locks": summarize_locks(lock_samples, self.sample_interval) if lock_samples else None,
+            "deadlocks": sampler.deadlocks if sampler else None,
+            "lost_updates": len(lost),
+            "lost": lost,
+        }
+
+    def delete_run_tags(self):
+        """Remove the tags this run created; Wallabag keeps tags that no entry uses any more"""
+        client = self.api_client(timeout=self.timeout)
+        response = client.get("tags")
+        response.raise_for_status()
+        prefix = self.tag_label("")
+        for tag in response.json():
+            if tag["label"].startswith(prefix):
+                client.delete(f"tags/{tag['id']}")
+
+    def run_all_tests(self):
+        """Run every phase on every hot set size"""
+        if not self.authenticate():
+            return False
+
+        print(f"Running write contention benchmark against {self.base_url}")
+        print(f"Hot sets: {self.hot_sets}; {self.workers} workers, {self.round_writes} writes each per round; "
+              f"{self.duration}s per run; "
+              f"lock sampling {'every ' + format_seconds(self.sample_interval) if self.db_config else 'off'}")
+
+        if not self.create_entries(max(self.hot_sets)):
+            print("Failed to create the shared entries")
+            return False
+
+        try:
+            for hot_set in self.hot_sets:
+                for phase in self.phases:
+                    print(f"{phase}: {self.workers} workers on {hot_set} entries")
+                    result = self.run_contention(phase, hot_set)
+                    self.results.append(result)
+                    if self.verbose:
+                        print(f"  {result['requests']} requests, {result['errors']} errors, "
+                              f"{result['lost_updates']} lost updates")
+        finally:
+            BatchClient(self.api_client(timeout=self.timeout), workers=self.workers).delete(self.entries)
+            self.delete_run_tags()
+
+        return True
+
+    def report_results(self):
+        """Generate a report of write contention results"""
+        if not self.results:
+            print("No write contention results to report")
+            return
+
+        print("\n========== WRITE CONTENTION RESULTS ==========")
+
+        headers = ["Phase", "Hot entries", "Requests", "Errors", "Writes/s", "p50", "p99",
+                   "Lock wait", "Peak waiters", "Deadlocks", "Lost updates"]
+        table_data = []
+        for r in self.results:
+            locks = r["locks"]
+            table_data.append([
+                r["phase"],
+                r["hot_set"],
+                r["requests"],
+                r["errors"],
+                f"{r['throughput']:.1f}",
+                format_seconds(r["latency"]["p50"]),
+                format_seconds(r["latency"]["p99"]),
+                f"{locks['lock_wait_seconds']:.1f}s" if locks else "-",
+                locks["peak_lock_waiters"] if locks else "-",
+                r["deadlocks"] if r["deadlocks"] is not None else "-",
+                r["lost_updates"],
+            ])
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        print("Lock wait = backend-seconds spent in Lock wait events, from pg_stat_activity samples")
+
+        for r in self.results:
+            failures = {code: count for code, count in r["status_codes"].items()
+                        if code == "no response" or int(code) >= 400}
+            if failures:
+                print(f"\n{r['phase']} on {r['hot_set']} entries failed with: "
+                      + ", ".join(f"{code} x{count}" for code, count in failures.items()))
+            if r["locks"] and r["locks"]["waiting_locks"]:
+                print(f"\n{r['phase']} on {r['hot_set']} entries, peak waiting locks:")
+                for lock, count in list(r["locks"]["waiting_locks"].items())[:5]:
+                    print(f"  {lock}: {count}")
+            for lost in r["lost"][:LOST_UPDATE_EXAMPLES]:
+                print(f"Lost update on entry {lost['entry']} {lost['field']}: "
+                      f"final {lost['final']}, expected one of {lost['possible']}")
+
+    def save_results(self, filename):
+        """Save test results to JSON file"""
+        with open(filename, 'w') as f:
+            json.dump({
+                "base_url": self.base_url,
+                "timestamp": time.time(),
+                "workers": self.workers,
+                "duration": self.duration,
+                "results": self.results
+            }, f, indent=2)
+
+        if self.verbose:
+            print(f"Results saved to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Write Contention Benchmark')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--hot-sets', type=int, nargs='+', default=DEFAULT_HOT_SETS,
+                        help='Numbers of entries shared by all workers')
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=PHASES,
+                        help='Write patterns to run')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Concurrent writers')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help='Seconds per phase and hot set')
+    parser.add_argument('--round-writes', type=int, default=DEFAULT_ROUND_WRITES,
+                        help='Writes per worker between two lost-update checks')
+    parser.add_argument('--sample-interval', type=float, default=DEFAULT_LOCK_SAMPLE_INTERVAL,
+                        help='Seconds between pg_locks/pg_stat_activity samples')
+    parser.add_argument('--no-db', action='store_true',
+                        help='Do not sample Postgres (TEST_DATABASE_* settings); lock waits and deadlocks '
+                             'are not reported')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for the write sequence')
+    parser.add_argument('--output', default='write_contention_results.json',
+                        help='Output file for test results')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    tester = WallabagWriteContentionBenchmark(
+        base_url=args.base_url,
+        hot_sets=args.hot_sets,
+        phases=args.phases,
+        workers=args.workers,
+        duration=args.duration,
+        round_writes=args.round_writes,
+        db_config=None if args.no_db else get_db_config(),
+        sample_interval=args.sample_interval,
+        timeout=args.timeout,
+        seed=args.seed,
+        api_key=args.api_key,
+        client_id=args.client_id,
+        client_secret=args.client_secret,
+        username=args.username,
+        password=args.password,
+        verbose=args.verbose
+    )
+
+    if tester.run_all_tests():
+        tester.report_results()
+        tester.save_results(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bulk import of a URL list into Wallabag
+Streams URLs from a file, skips entries that already exist, adapts concurrency
+to server pressure and checkpoints progress so an interrupted run can resume
+"""
+
+import os
+import sys
+import time
+import json
+import signal
+import argparse
+import threading
+import concurrent.futures
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.api_client import DEFAULT_MAX_RETRIES, ApiClient, call_with_backoff
+from harness.concurrency import AdaptiveConcurrencyLimiter
+
+# Default settings
+DEFAULT_BASE_URL = "http://localhost:8080"
+DEFAULT_CLIENT_ID = "wallabag_client_id"
+DEFAULT_CLIENT_SECRET = "wallabag_client_secret"
+DEFAULT_USERNAME = "wallabag"
+DEFAULT_PASSWORD = "wallabag"
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_DEDUP_BATCH = 50
+DEFAULT_CHECKPOINT_INTERVAL = 5
+DEFAULT_REQUEST_TIMEOUT = 120
+
+
+def read_urls(path, start_index=0):
+    """Yield (index, url) for every URL line, skipping blanks, comments and already processed URLs"""
+    index = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith("#"):
+                continue
+            if index >= start_index:
+                yield index, url
+            index += 1
+
+
+def batched(iterable, size):
+    """Group an iterable into lists of at most size items"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportCheckpoint:
+    """Progress of an import, persisted atomically to a JSON file
+
+    URLs complete out of order, so the checkpoint stores the highest index
+    below which every URL has been processed, plus the indexes already done
+    past that watermark. On resume only the URLs in neither are processed, so
+    no outcome is counted or written to the failures file twice.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.state = {
+            "source": source,
+            "next_index": 0,
+            "counts": {"imported": 0, "existing": 0, "duplicate": 0, "failed": 0},
+            "done": [],
+            "completed": False,
+        }
+        self._done = set()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("source") == source:
+                self.state.update(saved)
+                self._done = set(self.state["done"])
+
+    @property
+    def next_index(self):
+        return self.state["next_index"]
+
+    def is_done(self, index):
+        """Whether the URL at index was processed before the checkpoint was saved"""
+        with self._lock:
+            return index < self.state["next_index"] or index in self._done
+
+    def mark_done(self, index, outcome):
+        """Record the outcome of a URL and advance the watermark"""
+        with self._lock:
+            self.state["counts"][outcome] += 1
+            self._done.add(index)
+            while self.state["next_index"] in self._done:
+                self._done.remove(self.state["next_index"])
+                self.state["next_index"] += 1
+
+    def save(self, completed=False):
+        """Write the checkpoint via a temporary file so a crash never leaves it truncated"""
+        if not self.path:
+            return
+        with self._lock:
+            self.state["done"] = sorted(self._done)
+            self.state["completed"] = completed
+            self.state["saved_at"] = time.time()
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(temporary, self.path)
+
+
+class BulkImporter:
+    def __init__(self, client, checkpoint, limiter, tags=None, archive=False,
+                 dedup_batch=DEFAULT_DEDUP_BATCH, max_retries=DEFAULT_MAX_RETRIES,
+                 failures_path=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, verbose=False):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.limiter = limiter
+        self.tags = tags or []
+        self.archive = archive
+        self.dedup_batch = dedup_batch
+        self.max_retries = max_retries
+        self.failures_path = failures_path
+        self.checkpoint_interval = checkpoint_interval
+        self.verbose = verbose
+
+        self.exists_supported = True
+        self.elapsed = 0
+        self._seen = set()
+        self._failures_lock = threading.Lock()
+
+    def call(self, method, endpoint, params=None, data=None):
+        """Send a request through the limiter, retrying with backoff while the server is overloaded"""
+        return call_with_backoff(self.client, self.limiter, method, endpoint, params=params, data=data,
+                                 max_retries=self.max_retries, verbose=self.verbose)
+
+    def check_existing(self, urls):
+        """Return the subset of urls that already exist as entries"""
+        if not self.exists_supported:
+            return set()
+
+        try:
+            response = self.call("GET", "entries/exists", params={"urls[]": urls})
+            if response.status_code == 404:
+                print("Warning: /api/entries/exists not available; relying on server-side deduplication")
+                self.exists_supported = False
+                return set()
+            if response.status_code != 200:
+                return set()
+            return {url for url, exists in response.json().items() if exists}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Existence check failed, importing batch without it: {e}")
+            return set()
+
+    def record_failure(self, index, url, reason):
+        """Append a failed URL to the failures file for a later retry"""
+        if not self.failures_path:
+            return
+        with self._failures_lock:
+            with open(self.failures_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"index": index, "url": url, "error": reason}) + "\n")
+
+    def import_url(self, index, url):
+        """Create one entry and record the outcome"""
+        payload = {"url": url}
+        if self.tags:
+            payload["tags"] = ",".join(self.tags)
+        if self.archive:
+            payload["archive"] = 1
+
+        try:
+            response = self.call("POST", "entries", data=payload)
+            if response.status_code < 400:
+                outcome = "imported"
+            else:
+                outcome = "failed"
+                self.record_failure(index, url, f"HTTP {response.status_code}: {response.text[:200]}")
+        except requests.exceptions.RequestException as e:
+            outcome = "failed"
+            self.record_failure(index, url, str(e))
+
+        self.checkpoint.mark_done(index, outcome)
+
+    def run(self, path):
+        """Import every URL in path, resuming from the checkpoint"""
+        start_index = self.checkpoint.next_index
+        if start_index:
+            print(f"Resuming import of {path} at URL #{start_index}")
+
+        # Keep reading ahead bounded so huge files are streamed, not loaded
+        pending = threading.BoundedSemaphore(self.limiter.maximum * 2)
+        last_save = time.monotonic()
+        start_time = time.monotonic()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            try:
+                remaining = (item for item in read_urls(path, start_index) if not self.checkpoint.is_done(item[0]))
+                for batch in batched(remaining, self.dedup_batch):
+                    existing = self.check_existing([url for _, url in batch])
+
+                    for index, url in batch:
+                        if url in self._seen:
+                            self.checkpoint.mark_done(index, "duplicate")
+                            continue
+                        self._seen.add(url)
+
+                        if url in existing:
+                            self.checkpoint.mark_done(index, "existing")
+                            continue
+
+                        pending.acquire()
+                        future = executor.submit(self.import_url, index, url)
+                        future.add_done_callback(lambda f: pending.release())
+
+                    if time.monotonic() - last_save >= self.checkpoint_interval:
+                        self.checkpoint.save()
+                        last_save = time.monotonic()
+                        if self.verbose:
+                            self.print_progress(start_time)
+            except KeyboardInterrupt:
+                print("\nInterrupted; waiting for in-flight requests before saving the checkpoint")
+                # A second Ctrl-C must not abort the shutdown and lose progress
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                executor.shutdown(wait=True, cancel_futures=True)
+                self.checkpoint.save()
+                return False
+
+        self.checkpoint.save(completed=True)
+        self.elapsed = time.monotonic() - start_time
+        return True
+
+    def print_progress(self, start_time):
+        counts = self.checkpoint.state["counts"]
+        elapsed = time.monotonic() - start_time
+        print(f"[{elapsed:.0f}s] next #{self.checkpoint.next_index} "
+              f"imported={counts['imported']} existing={counts['existing']} "
+              f"failed={counts['failed']} concurrency={self.limiter.current}")
+
+    def report_results(self):
+        """Print a summary of the import"""
+        counts = self.checkpoint.state["counts"]
+        elapsed = self.elapsed
+
+        print("\n========== BULK IMPORT RESULTS ==========")
+        print(f"Imported: {counts['imported']}")
+        print(f"Already existing: {counts['existing']}")
+        print(f"Duplicates in file: {counts['duplicate']}")
+        print(f"Failed: {counts['failed']}")
+        if elapsed:
+            print(f"Elapsed: {elapsed:.0f}s ({counts['imported'] / elapsed:.1f} entries/s this run)")
+        window = self.limiter.summary()
+        print(f"Concurrency: final {window['final']:.0f}, converged {window['converged']:.1f} "
+              f"(range {window['min']:.0f}-{window['max']:.0f}, {window['decreases']['overload']} overload "
+              f"and {window['decreases']['latency']} latency back-offs)")
+        if counts["failed"] and self.failures_path:
+            print(f"Failed URLs written to {self.failures_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Bulk URL Import')
+    parser.add_argument('urls_file',
+                        help='Text file with one URL per line (blank lines and # comments ignored)')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Checkpoint file (default: <urls_file>.checkpoint.json)')
+    parser.add_argument('--failures', default=None,
+                        help='File collecting failed URLs as JSON lines (default: <urls_file>.failures.jsonl)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore an existing checkpoint and start from the first URL')
+    parser.add_argument('--tags', default='',
+                        help='Comma separated tags added to every imported entry')
+    parser.add_argument('--archive', action='store_true',
+                        help='Mark imported entries as read')
+    parser.add_argument('--initial-concurrency', type=int, default=DEFAULT_INITIAL_CONCURRENCY,
+                        help='Concurrent requests at start')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='Upper bound for concurrent requests')
+    parser.add_argument('--latency-tolerance', type=float, default=None,
+                        help='Also back off when latency exceeds this multiple of its baseline '
+                             '(default: back off on 429/5xx only, as import latency depends on the source site)')
+    parser.add_argument('--dedup-batch', type=int, default=DEFAULT_DEDUP_BATCH,
+                        help='URLs per existence check request')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='Retries per request on 429/5xx or connection errors')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.urls_file}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    try:
+        client = ApiClient.from_credentials(
+            args.base_url,
+            api_key=args.api_key,
+            client_id=args.client_id,
+            client_secret=args.client_secret,
+            username=args.username,
+            password=args.password,
+            timeout=args.timeout
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"Authentication failed: {e}")
+        sys.exit(1)
+
+    # One pooled connection per worker thread
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.max_concurrency)
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+
+    importer = BulkImporter(
+        client,
+        ImportCheckpoint(checkpoint_path, os.path.abspath(args.urls_file)),
+        AdaptiveConcurrencyLimiter(initial=args.initial_concurrency, maximum=args.max_concurrency,
+                                   latency_tolerance=args.latency_tolerance),
+        tags=[t.strip() for t in args.tags.split(",") if t.strip()],
+        archive=args.archive,
+        dedup_batch=args.dedup_batch,
+        max_retries=args.max_retries,
+        failures_path=args.failures or f"{args.urls_file}.failures.jsonl",
+        verbose=args.verbose
+    )
+
+    completed = importer.run(args.urls_file)
+    importer.report_results()
+    if not completed:
+        print(f"Progress saved to {checkpoint_path}; run the same command again to resume")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
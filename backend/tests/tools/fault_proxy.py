@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run the fault-injecting TCP proxy on its own
+Put it between Wallabag and Postgres (point WALLABAG_DATABASE_HOST/PORT at
+it) or between a load client and Wallabag (point --base-url at it)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.fault_proxy import FaultProxy, parse_address
+from harness.stats import format_bytes
+
+DEFAULT_LISTEN = "127.0.0.1:15432"
+DEFAULT_TARGET = "localhost:5432"
+DEFAULT_STATS_INTERVAL = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fault-Injecting TCP Proxy')
+    parser.add_argument('--listen', default=DEFAULT_LISTEN,
+                        help='Address to listen on, host:port (0.0.0.0 to reach it from containers)')
+    parser.add_argument('--target', default=DEFAULT_TARGET,
+                        help='Address to forward to, host:port')
+    parser.add_argument('--rtt', type=float, default=0,
+                        help='Added round-trip time in milliseconds (half in each direction)')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='Uniform jitter per direction in milliseconds (+/-)')
+    parser.add_argument('--bandwidth', type=float, default=None,
+                        help='Bandwidth cap per direction in Mbit/s')
+    parser.add_argument('--reset-probability', type=float, default=0,
+                        help='Probability of resetting the connection after each forwarded chunk')
+    parser.add_argument('--stats-interval', type=float, default=DEFAULT_STATS_INTERVAL,
+                        help='Seconds between counter printouts')
+    args = parser.parse_args()
+
+    listen_host, listen_port = parse_address(args.listen)
+    target_host, target_port = parse_address(args.target)
+    proxy = FaultProxy(
+        target_host, target_port,
+        listen_host=listen_host,
+        listen_port=listen_port,
+        latency=args.rtt / 2000,
+        jitter=args.jitter / 1000,
+        bandwidth=args.bandwidth * 1_000_000 / 8 if args.bandwidth else None,
+        reset_probability=args.reset_probability
+    ).start()
+
+    print(f"Proxying {proxy.address} -> {target_host}:{target_port} "
+          f"(+{args.rtt}ms RTT, +/-{args.jitter}ms jitter, "
+          f"{f'{args.bandwidth} Mbit/s' if args.bandwidth else 'unlimited'}, "
+          f"reset probability {args.reset_probability})")
+
+    try:
+        while True:
+            time.sleep(args.stats_interval)
+            stats = proxy.stats()
+            print(f"{stats['active']} open, {stats['connections']} total, {stats['refused']} refused, "
+                  f"{stats['resets']} resets, {stats['round_trips']} round trips, "
+                  f"up {format_bytes(stats['bytes_up'])}, down {format_bytes(stats['bytes_down'])}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental sync of a Wallabag account into a local SQLite mirror
+Fetches only entries changed since the last sync, pages by update time, and
+stores content compressed so the mirror can be queried offline
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime
+import requests
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.api_client import DEFAULT_MAX_RETRIES, ApiClient, call_with_backoff
+from harness.concurrency import AdaptiveConcurrencyLimiter
+from harness.mirror import MirrorStore
+from harness.stats import format_bytes
+
+# Default settings
+DEFAULT_BASE_URL = "http://localhost:8080"
+DEFAULT_CLIENT_ID = "wallabag_client_id"
+DEFAULT_CLIENT_SECRET = "wallabag_client_secret"
+DEFAULT_USERNAME = "wallabag"
+DEFAULT_PASSWORD = "wallabag"
+
+DEFAULT_MIRROR = "wallabag_mirror.sqlite"
+DEFAULT_PER_PAGE = 100
+DEFAULT_REQUEST_TIMEOUT = 120
+
+# Seconds subtracted from the last sync time to absorb clock skew between
+# this machine and the server; re-fetching a few entries is harmless
+SYNC_OVERLAP = 300
+
+UPDATED_AT_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def updated_timestamp(item):
+    """Unix time of an entry's updated_at"""
+    return datetime.strptime(item["updated_at"], UPDATED_AT_FORMAT).timestamp()
+
+
+class MirrorSync:
+    """Keep a MirrorStore in step with the API
+
+    Entries are listed by updated_at with a keyset cursor: each request asks
+    for the first page updated since the last entry already seen, instead of
+    for page N. Entries updated or deleted during the listing then cannot
+    shift unseen entries onto pages that were already fetched; an updated
+    entry moves past the cursor and is fetched again. Only when more than a
+    page of entries share one second does the listing page by offset within
+    that second.
+    """
+
+    def __init__(self, client, store, limiter, per_page=DEFAULT_PER_PAGE,
+                 max_retries=DEFAULT_MAX_RETRIES, verbose=False):
+        self.client = client
+        self.store = store
+        self.limiter = limiter
+        self.per_page = per_page
+        self.max_retries = max_retries
+        self.verbose = verbose
+
+        self.stats = {
+            "mode": None,
+            "since": None,
+            "pages": 0,
+            "entries": 0,
+            "deleted": 0,
+            "wire_bytes": 0,
+            "content_bytes": 0,
+            "stored_bytes": 0,
+            "failed_pages": 0,
+            "elapsed": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def fetch_page(self, page, since=None, metadata_only=False):
+        """Fetch one page of the entries updated after since, ordered by update time"""
+        params = {"page": page, "perPage": self.per_page, "sort": "updated", "order": "asc"}
+        params.update(self.client.listing_params(metadata_only))
+        if since is not None:
+            params["since"] = int(since)
+
+        response = call_with_backoff(self.client, self.limiter, "GET", "entries", params=params,
+                                     max_retries=self.max_retries, verbose=self.verbose)
+        response.raise_for_status()
+        with self._stats_lock:
+            self.stats["wire_bytes"] += int(response.headers.get("Content-Length") or len(response.content))
+        return response.json()
+
+    def fetch_all_pages(self, since=None, metadata_only=False):
+        """Yield the items of every page, each entry once
+
+        Wallabag's since is a whole second and exclusive, so the cursor is
+        one second before the last entry seen and entries of that second are
+        fetched again and skipped. A failed page ends the listing, as the
+        cursor cannot move past it.
+        """
+        seen = set()
+        cursor, page = since, 1
+        while True:
+            try:
+                response = self.fetch_page(page, cursor, metadata_only)
+            except requests.exceptions.RequestException as e:
+                if page == 1 and cursor == since:
+                    raise
+                print(f"Failed to fetch entries updated since {cursor}: {e}")
+                self.stats["failed_pages"] += 1
+                return
+            self.stats["pages"] += 1
+            if cursor == since and page == 1 and self.verbose:
+                print(f"{response.get('total', 0)} entries to fetch")
+
+            items = response["_embedded"]["items"]
+            new = [item for item in items if int(item["id"]) not in seen]
+            seen.update(int(item["id"]) for item in new)
+            if new:
+                yield new
+            if page >= response.get("pages", 1) or not items:
+                return
+
+            last = int(updated_timestamp(items[-1])) - 1
+            if cursor is not None and last <= cursor:
+                # A whole page updated within the same second; step through it by offset
+                page += 1
+            else:
+                cursor, page = last, 1
+
+    def sync_tags(self):
+        response = call_with_backoff(self.client, self.limiter, "GET", "tags",
+                                     max_retries=self.max_retries, verbose=self.verbose)
+        response.raise_for_status()
+        self.store.upsert_tags(response.json())
+
+    def sync(self, full=False):
+        """Fetch entries changed since the last successful sync (everything when full)
+
+        Returns True when every page was stored, in which case the sync start
+        time becomes the starting point of the next delta.
+        """
+        started_at = time.time()
+        start = time.monotonic()
+        last_sync = None if full else self.store.get_state("last_sync")
+        since = last_sync - SYNC_OVERLAP if last_sync else None
+        self.stats["mode"] = "delta" if since else "full"
+        self.stats["since"] = since
+
+        if since:
+            print(f"Fetching entries updated since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(since))}")
+        else:
+            print("Fetching all entries")
+
+        self.sync_tags()
+        for items in self.fetch_all_pages(since):
+            raw_bytes, stored_bytes = self.store.upsert_entries(items)
+            self.stats["entries"] += len(items)
+            self.stats["content_bytes"] += raw_bytes
+            self.stats["stored_bytes"] += stored_bytes
+
+        self.stats["elapsed"] = time.monotonic() - start
+        if self.stats["failed_pages"]:
+            return False
+
+        self.store.set_state("last_sync", started_at)
+        return True
+
+    def count_entries(self):
+        """Number of entries on the server"""
+        return self.fetch_page(1, metadata_only=True).get("total", 0)
+
+    def prune(self):
+        """Remove mirrored entries that no longer exist on the server
+
+        A delta cannot see deletions, so this lists every entry without
+        content and drops the local ones not listed. Nothing is dropped
+        unless the entry count before and after the listing matches the
+        number of entries listed.
+        """
+        total_before = self.count_entries()
+        remote_ids = set()
+        for items in self.fetch_all_pages(metadata_only=True):
+            remote_ids.update(int(item["id"]) for item in items)
+
+        if self.stats["failed_pages"]:
+            print("Not pruning: the entry listing is incomplete")
+            return False
+
+        total_after = self.count_entries()
+        if not total_before == total_after == len(remote_ids):
+            print(f"Not pruning: entries changed during the listing ({total_before} before, "
+                  f"{len(remote_ids)} listed, {total_after} after)")
+            return False
+
+        deleted = self.store.entry_ids() - remote_ids
+        self.store.delete_entries(deleted)
+        self.stats["deleted"] = len(deleted)
+        return True
+
+    def report_results(self):
+        """Print a summary of the sync and the mirror"""
+        stats = self.stats
+        mirror = self.store.stats()
+
+        print("\n========== MIRROR SYNC RESULTS ==========")
+        table_data = [
+            ["Mode", stats["mode"]],
+            ["Pages fetched", stats["pages"]],
+            ["Entries updated", stats["entries"]],
+            ["Entries pruned", stats["deleted"]],
+            ["Downloaded", format_bytes(stats["wire_bytes"])],
+            ["Content stored", f"{format_bytes(stats['stored_bytes'])} "
+                               f"(from {format_bytes(stats['content_bytes'])})"],
+            ["Elapsed", f"{stats['elapsed']:.1f}s"],
+            ["Failed pages", stats["failed_pages"]],
+            ["Mirror entries / tags", f"{mirror['entries']} / {mirror['tags']}"],
+            ["Mirror content", format_bytes(mirror["stored_bytes"])],
+        ]
+        print(tabulate(table_data, tablefmt="grid"))
+
+
+def show_entry(store, entry_id):
+    """Print a mirrored entry without contacting the server"""
+    entry = store.get_entry(entry_id)
+    if entry is None:
+        print(f"Entry {entry_id} is not in the mirror")
+        return False
+
+    print(f"{entry['title']}\n{entry['url']}")
+    print(f"Updated {entry['updated_at']}, tags: {', '.join(entry['tags']) or '-'}")
+    print()
+    print(entry["content"] or "")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallabag Incremental Mirror Sync')
+    parser.add_argument('--mirror', default=DEFAULT_MIRROR,
+                        help='SQLite mirror file')
+    parser.add_argument('--base-url', default=os.environ.get('WALLABAG_URL', DEFAULT_BASE_URL),
+                        help='Base URL of the Wallabag instance')
+    parser.add_argument('--api-key', default=os.environ.get('WALLABAG_API_KEY'),
+                        help='API key for authentication')
+    parser.add_argument('--client-id', default=os.environ.get('WALLABAG_CLIENT_ID', DEFAULT_CLIENT_ID),
+                        help='OAuth client ID')
+    parser.add_argument('--client-secret', default=os.environ.get('WALLABAG_CLIENT_SECRET', DEFAULT_CLIENT_SECRET),
+                        help='OAuth client secret')
+    parser.add_argument('--username', default=os.environ.get('WALLABAG_USERNAME', DEFAULT_USERNAME),
+                        help='Wallabag username')
+    parser.add_argument('--password', default=os.environ.get('WALLABAG_PASSWORD', DEFAULT_PASSWORD),
+                        help='Wallabag password')
+    parser.add_argument('--full', action='store_true',
+                        help='Fetch every entry instead of the changes since the last sync')
+    parser.add_argument('--prune', action='store_true',
+                        help='Also remove mirrored entries deleted on the server (lists all entry IDs)')
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE,
+                        help='Entries per page request')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='Retries per page on 429/5xx or connection errors')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--show', type=int, default=None, metavar='ENTRY_ID',
+                        help='Print a mirrored entry and exit (offline)')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose output')
+    args = parser.parse_args()
+
+    store = MirrorStore(args.mirror)
+
+    if args.show is not None:
+        found = show_entry(store, args.show)
+        store.close()
+        sys.exit(0 if found else 1)
+
+    try:
+        client = ApiClient.from_credentials(
+            args.base_url,
+            api_key=args.api_key,
+            client_id=args.client_id,
+            client_secret=args.client_secret,
+            username=args.username,
+            password=args.password,
+            timeout=args.timeout
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"Authentication failed: {e}")
+        sys.exit(1)
+
+    syncer = MirrorSync(
+        client,
+        store,
+        AdaptiveConcurrencyLimiter(initial=1, maximum=1),
+        per_page=args.per_page,
+        max_retries=args.max_retries,
+        verbose=args.verbose
+    )
+
+    try:
+        completed = syncer.sync(full=args.full)
+        if completed and args.prune:
+            completed = syncer.prune()
+    except requests.exceptions.RequestException as e:
+        print(f"Sync failed: {e}")
+        completed = False
+
+    syncer.report_results()
+    store.close()
+    if not completed:
+        print("Sync incomplete; the next run fetches the same delta again")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from harness.concurrency import AdaptiveConcurrencyLimiter
+
+
+def run_window(limiter, status_code=200, latency=0.0):
+    """Send one window's worth of requests with the same outcome, keeping the window full"""
+    for _ in range(limiter.current):
+        limiter.acquire()
+    for _ in range(limiter.current):
+        limiter.release(status_code, latency)
+        if limiter.in_flight < limiter.current:
+            limiter.acquire()
+    while limiter.in_flight:
+        limiter.release(status_code, latency)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Unit tests for the AIMD window shared by the load and import clients"""
+
+    def test_window_grows_additively(self):
+        """Additive increase: about one slot per full window of successes"""
+        limiter = AdaptiveConcurrencyLimiter(initial=4, maximum=10)
+
+        run_window(limiter)
+        assert 5 <= limiter.current <= 6
+
+    def test_idle_window_does_not_grow(self):
+        """Successes while the window is mostly unused are no evidence of capacity"""
+        limiter = AdaptiveConcurrencyLimiter(initial=4, maximum=10)
+
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(200, 0.0)
+
+        assert limiter.current == 4
+
+    def test_overload_halves_window_once_per_round_trip(self):
+        """A burst of 503s from one window only shrinks it once"""
+        limiter = AdaptiveConcurrencyLimiter(initial=8, maximum=10)
+
+        run_window(limiter, status_code=503, latency=60)
+
+        assert limiter.current == 4
+        assert limiter.decreases == {"overload": 1, "latency": 0}
+
+    def test_window_respects_bounds(self):
+        """The window never leaves [minimum, maximum]"""
+        limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=2, maximum=3)
+
+        for _ in range(10):
+            run_window(limiter)
+        assert limiter.current == 3
+
+        for _ in range(10):
+            run_window(limiter, status_code=None)
+        assert limiter.current == 2
+
+    def test_latency_inflation_shrinks_window(self):
+        """Latency well above the baseline counts as congestion"""
+        limiter = AdaptiveConcurrencyLimiter(initial=8, maximum=16, latency_tolerance=2.0)
+
+        for _ in range(5):
+            run_window(limiter, latency=0.01)
+        grown = limiter.current
+
+        run_window(limiter, latency=0.1)
+
+        assert limiter.current < grown
+        assert limiter.decreases["latency"] == 1
+
+    def test_latency_is_ignored_without_tolerance(self):
+        """Without a tolerance only overload responses shrink the window"""
+        limiter = AdaptiveConcurrencyLimiter(initial=8, maximum=16)
+
+        run_window(limiter, latency=0.01)
+        run_window(limiter, latency=1.0)
+
+        assert limiter.decreases == {"overload": 0, "latency": 0}
+
+    def test_converged_is_time_weighted_mean(self):
+        """The converged window averages the history over the settle period"""
+        limiter = AdaptiveConcurrencyLimiter(initial=4)
+        limiter._start_time -= 100
+        limiter.history = [(0.0, 4.0), (50.0, 10.0), (75.0, 20.0)]
+
+        # Last half: 25s at 10 and ~25s at 20
+        assert abs(limiter.converged() - 15) < 0.1
+        assert limiter.summary()["max"] == 20
@@ -0,0 +1,192 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from harness.api_client import ApiClient
+from harness.batch import BatchClient
+
+
+class EntriesHandler(BaseHTTPRequestHandler):
+    """In-memory entries API with optional list endpoints"""
+
+    lists_enabled = True
+    entries = {}
+    requests = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def parse(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        with self.lock:
+            EntriesHandler.requests.append((self.command, url.path))
+        return url.path, {k: v[0] for k, v in parse_qs(url.query).items()}, body
+
+    def create(self, url, tags=""):
+        with self.lock:
+            entry_id = len(EntriesHandler.entries) + 1
+            EntriesHandler.entries[entry_id] = {"id": entry_id, "url": url,
+                                                "tags": [t for t in tags.split(",") if t], "archived": 0}
+        return entry_id
+
+    def find(self, url):
+        return next((e for e in EntriesHandler.entries.values() if e["url"] == url), None)
+
+    def do_POST(self):
+        path, query, body = self.parse()
+        if path == "/api/entries":
+            return self.reply(200, {"id": self.create(body["url"], body.get("tags", ""))})
+        if path.endswith("/lists") and not self.lists_enabled:
+            return self.reply(404, {"error": "not found"})
+        if path == "/api/entries/lists":
+            urls = json.loads(query["urls"])
+            return self.reply(200, [{"url": url, "entry": self.create(url, query.get("tags", ""))} for url in urls])
+        if path == "/api/entries/tags/lists":
+            results = []
+            for item in json.loads(query["list"]):
+                entry = self.find(item["url"])
+                if entry:
+                    entry["tags"].extend(item["tags"].split(","))
+                results.append({"url": item["url"], "entry": entry["id"] if entry else False})
+            return self.reply(200, results)
+        entry = EntriesHandler.entries.get(int(path.split("/")[3]))
+        if entry is None:
+            return self.reply(404, {"error": "not found"})
+        entry["tags"].extend(body["tags"].split(","))
+        self.reply(200, entry)
+
+    def do_PATCH(self):
+        path, _, body = self.parse()
+        entry = EntriesHandler.entries.get(int(path.split("/")[3]))
+        if entry is None:
+            return self.reply(404, {"error": "not found"})
+        entry.update(body)
+        self.reply(200, entry)
+
+    def do_DELETE(self):
+        path, query, _ = self.parse()
+        if path == "/api/entries/list":
+            if not self.lists_enabled:
+                return self.reply(404, {"error": "not found"})
+            results = []
+            for url in json.loads(query["urls"]):
+                with self.lock:
+                    entry = self.find(url)
+                    if entry:
+                        EntriesHandler.entries.pop(entry["id"])
+                results.append({"url": url, "entry": bool(entry)})
+            return self.reply(200, results)
+        with self.lock:
+            entry = EntriesHandler.entries.pop(int(path.split("/")[3]), None)
+        self.reply(200 if entry else 404, entry or {"error": "not found"})
+
+
+@pytest.fixture(params=[True, False], ids=["lists", "fallback"])
+def batch(request):
+    """BatchClient against a server with and without the list endpoints"""
+    EntriesHandler.lists_enabled = request.param
+    EntriesHandler.entries = {}
+    EntriesHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EntriesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = ApiClient(f"http://127.0.0.1:{server.server_port}/api", {"X-API-Key": "key"}, timeout=5)
+    yield BatchClient(client, workers=4, list_batch_size=10)
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestBatchClient:
+    """Unit tests for batched create, tag, patch and delete"""
+
+    def test_full_cycle(self, batch):
+        """Every entry is created, tagged, archived and deleted"""
+        urls = [f"https://example.org/{i}" for i in range(25)]
+
+        created = batch.create(urls)
+        assert sorted(e["url"] for e in created.succeeded) == sorted(urls)
+        assert not created.failed
+
+        assert len(batch.add_tags(created.succeeded, ["a", "b"]).succeeded) == 25
+        assert all(e["tags"] == ["a", "b"] for e in EntriesHandler.entries.values())
+
+        assert len(batch.patch([e["id"] for e in created.succeeded], {"archive": 1}).succeeded) == 25
+        assert all(e["archive"] == 1 for e in EntriesHandler.entries.values())
+
+        deleted = batch.delete(created.succeeded)
+        assert len(deleted.succeeded) == 25
+        assert EntriesHandler.entries == {}
+
+    def test_list_endpoints_reduce_requests(self, batch):
+        """With list endpoints 25 creates take 3 requests; without, one per entry after the probe"""
+        result = batch.create([f"https://example.org/{i}" for i in range(25)])
+
+        posts = [r for r in EntriesHandler.requests if r[0] == "POST"]
+        if EntriesHandler.lists_enabled:
+            assert result.mode == "list"
+            assert len(posts) == 3
+        else:
+            assert batch.list_endpoints["entries/lists"] is False
+            assert len([p for p in posts if p[1] == "/api/entries"]) == 25
+
+    def test_delete_by_id_and_missing_entries(self, batch):
+        """Bare IDs are deleted per item and already-deleted entries count as done"""
+        created = batch.create(["https://example.org/1", "https://example.org/2"])
+        ids = [e["id"] for e in created.succeeded]
+        batch.delete(ids[:1])
+
+        result = batch.delete(ids)
+
+        assert result.mode == "per-item"
+        assert sorted(result.succeeded) == sorted(ids)
+        assert not result.failed
+
+    def test_failed_patch_is_reported(self, batch):
+        """Errors are collected per item instead of raised"""
+        result = batch.patch([999], {"starred": 1})
+
+        assert result.succeeded == []
+        assert result.failed == [(999, "HTTP 404")]
+
+    def test_list_results_mark_items_that_did_not_apply(self, batch):
+        """Entries a list endpoint reports as not found are failed, not counted as done"""
+        created = batch.create([f"https://example.org/{i}" for i in range(5)])
+        gone = created.succeeded[:2]
+        batch.delete(gone)
+
+        tagged = batch.add_tags(created.succeeded, ["a"])
+        deleted = batch.delete(created.succeeded)
+
+        gone_ids = {entry["id"] for entry in gone}
+        assert {entry_id for entry_id, _ in tagged.failed} == gone_ids
+        assert len(tagged.succeeded) == 3
+        # Per-item deletes count a 404 as already deleted
+        assert {entry_id for entry_id, _ in deleted.failed} == (gone_ids if EntriesHandler.lists_enabled else set())
+        assert EntriesHandler.entries == {}
+
+    def test_caller_session_is_not_changed(self):
+        """The worker pool is mounted on a private session, not on a shared client's"""
+        client = ApiClient("http://127.0.0.1:1/api", {"X-API-Key": "key"}, timeout=5)
+        adapter = client.session.get_adapter("http://127.0.0.1:1/api")
+
+        batch = BatchClient(client, workers=16)
+
+        assert client.session.get_adapter("http://127.0.0.1:1/api") is adapter
+        assert batch.client.session is not client.session
+        assert batch.client.session.get_adapter("http://127.0.0.1:1/api")._pool_maxsize == 16
+        assert batch.client.headers == client.headers
@@ -0,0 +1,90 @@
+import json
+
+from harness.concurrency import AdaptiveConcurrencyLimiter
+from tools.bulk_import import BulkImporter, ImportCheckpoint
+
+
+class FakeResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeEntriesApi:
+    """Records created URLs; failing URLs get a 400 and the existence check returns exists_body"""
+
+    def __init__(self, failing=(), exists_body="{}"):
+        self.failing = set(failing)
+        self.exists_body = exists_body
+        self.created = []
+
+    def request(self, method, endpoint, params=None, data=None):
+        if endpoint == "entries/exists":
+            return FakeResponse(200, self.exists_body)
+        if data["url"] in self.failing:
+            return FakeResponse(400, "bad url")
+        self.created.append(data["url"])
+        return FakeResponse(200, "{}")
+
+
+def write_urls(tmp_path, count):
+    path = tmp_path / "urls.txt"
+    path.write_text("".join(f"https://example.com/{i}\n" for i in range(count)))
+    return str(path)
+
+
+def importer(api, checkpoint, tmp_path):
+    return BulkImporter(api, checkpoint, AdaptiveConcurrencyLimiter(initial=1, maximum=1), max_retries=0,
+                        failures_path=str(tmp_path / "failures.jsonl"))
+
+
+class TestBulkImport:
+    """Unit tests for the resumable bulk importer"""
+
+    def test_resume_skips_urls_done_past_the_watermark(self, tmp_path):
+        """URLs finished out of order before an interruption are neither reimported nor counted again"""
+        urls_file = write_urls(tmp_path, 4)
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        interrupted = ImportCheckpoint(checkpoint_path, urls_file)
+        interrupted.mark_done(0, "imported")
+        interrupted.mark_done(2, "failed")
+        interrupted.save()
+
+        api = FakeEntriesApi()
+        resumed = ImportCheckpoint(checkpoint_path, urls_file)
+        assert resumed.next_index == 1
+        assert importer(api, resumed, tmp_path).run(urls_file)
+
+        assert api.created == ["https://example.com/1", "https://example.com/3"]
+        assert resumed.state["counts"] == {"imported": 3, "existing": 0, "duplicate": 0, "failed": 1}
+        assert resumed.next_index == 4
+        assert resumed.state["done"] == []
+
+    def test_failures_are_written_once_across_a_resume(self, tmp_path):
+        """A failure recorded before the interruption is not appended to the failures file again"""
+        urls_file = write_urls(tmp_path, 3)
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        api = FakeEntriesApi(failing=["https://example.com/2"])
+        first = importer(api, ImportCheckpoint(checkpoint_path, urls_file), tmp_path)
+        first.import_url(2, "https://example.com/2")
+        first.checkpoint.save()
+
+        assert importer(api, ImportCheckpoint(checkpoint_path, urls_file), tmp_path).run(urls_file)
+
+        failures = (tmp_path / "failures.jsonl").read_text().splitlines()
+        assert [json.loads(line)["index"] for line in failures] == [2]
+
+    def test_invalid_existence_response_imports_without_dedup(self, tmp_path):
+        """A 200 with a body that is not JSON does not stop the import"""
+        urls_file = write_urls(tmp_path, 2)
+        api = FakeEntriesApi(exists_body="<html>maintenance</html>")
+        checkpoint = ImportCheckpoint(None, urls_file)
+
+        assert importer(api, checkpoint, tmp_path).run(urls_file)
+
+        assert len(api.created) == 2
+        assert checkpoint.state["counts"]["imported"] == 2
@@ -0,0 +1,59 @@
+from harness.contention import lost_updates, summarize_locks
+
+
+def write(value, start, end, status="success", status_code=200, entry="1", field="starred"):
+    return {"entry": entry, "field": field, "value": value, "start": start, "end": end,
+            "status": status, "status_code": status_code}
+
+
+class TestLostUpdates:
+    """Unit tests for the register check of concurrent entry writes"""
+
+    def test_last_sequential_write_wins(self):
+        """After non-overlapping writes only the last value is acceptable"""
+        writes = [write(True, 0, 1), write(False, 2, 3)]
+
+        assert lost_updates(writes, {("1", "starred"): False}) == []
+        lost = lost_updates(writes, {("1", "starred"): True})
+        assert lost[0]["possible"] == [False]
+
+    def test_overlapping_writes_may_land_in_any_order(self):
+        """Either value of two concurrent writes is a valid final state"""
+        writes = [write(True, 0, 2), write(False, 1, 3)]
+
+        assert lost_updates(writes, {("1", "starred"): True}) == []
+        assert lost_updates(writes, {("1", "starred"): False}) == []
+
+    def test_failed_write_with_unknown_outcome(self):
+        """A timed-out or 5xx write may have been applied; a 4xx one was not"""
+        writes = [write(True, 0, 1), write(False, 2, 3, status="error", status_code=None)]
+        assert lost_updates(writes, {("1", "starred"): False}) == []
+
+        writes = [write(True, 0, 1), write(False, 2, 3, status="error", status_code=404)]
+        assert len(lost_updates(writes, {("1", "starred"): False})) == 1
+
+    def test_fields_are_checked_separately(self):
+        """A write to one field does not make another field's value acceptable"""
+        writes = [write(True, 0, 1), write(("a", "b"), 2, 3, field="tags")]
+        final = {("1", "starred"): True, ("1", "tags"): ("a",)}
+
+        lost = lost_updates(writes, final)
+        assert [(item["field"], item["final"]) for item in lost] == [("tags", ("a",))]
+
+
+class TestLockSummary:
+    """Unit tests for the pg_stat_activity/pg_locks sample summary"""
+
+    def test_wait_time_and_peaks(self):
+        """Lock waits add up per sample interval; waiting locks keep their peak"""
+        samples = [
+            {"wait_events": {"Lock:tuple": 2, "CPU:running": 1}, "waiting_locks": {"tuple wallabag_entry": 2}},
+            {"wait_events": {"Lock:transactionid": 3}, "waiting_locks": {"transactionid ShareLock": 3}},
+            {"wait_events": {}, "waiting_locks": {}},
+        ]
+        summary = summarize_locks(samples, interval=0.1)
+
+        assert summary["samples"] == 3
+        assert abs(summary["lock_wait_seconds"] - 0.5) < 1e-9
+        assert summary["peak_lock_waiters"] == 3
+        assert summary["waiting_locks"] == {"transactionid ShareLock": 3, "tuple wallabag_entry": 2}
@@ -0,0 +1,51 @@
+import re
+import struct
+import zlib
+
+import requests
+
+from harness.corpus_server import CorpusServer, page_html, png_image
+
+
+class TestCorpusServer:
+    """Unit tests for the local corpus page server"""
+
+    def test_pages_are_deterministic(self):
+        """The same class, index and seed always give the same page"""
+        assert page_html("text", 1, "http://corpus") == page_html("text", 1, "http://corpus")
+        assert page_html("text", 1, "http://corpus") != page_html("text", 2, "http://corpus")
+
+    def test_page_classes(self):
+        """Image pages carry the requested images and script pages have no static article"""
+        images = page_html("images", 1, "http://corpus", image_count=5)
+        script = page_html("script", 1, "http://corpus")
+
+        assert images.count("<img") == 5
+        assert 'og:image" content="http://corpus/images/images-1-preview.png"' in images
+        assert "<p>" not in re.sub(r"<script>.*?</script>", "", script, flags=re.S)
+
+    def test_png_image(self):
+        """Images are PNGs whose pixel data has the requested dimensions"""
+        image = png_image(4, 3)
+        length = struct.unpack(">I", image[33:37])[0]
+
+        assert image[:8] == b"\x89PNG\r\n\x1a\n"
+        assert struct.unpack(">II", image[16:24]) == (4, 3)
+        assert len(zlib.decompress(image[41:41 + length])) == 3 * (1 + 4 * 3)
+
+    def test_serves_and_counts(self):
+        """Pages link images on the requested host and every response is counted"""
+        server = CorpusServer(host="127.0.0.1", advertised_host="127.0.0.1", image_size=(8, 8)).start()
+        try:
+            page = requests.get(server.page_url("images", 0), timeout=5)
+            image = requests.get(f"http://127.0.0.1:{server.port}/images/images-0-0.png", timeout=5)
+            missing = requests.get(f"http://127.0.0.1:{server.port}/other/0.html", timeout=5)
+        finally:
+            server.stop()
+
+        assert f"http://127.0.0.1:{server.port}/images/images-0-0.png" in page.text
+        assert missing.status_code == 404
+        assert server.stats() == {
+            "page": {"requests": 1, "bytes": len(page.content)},
+            "image": {"requests": 1, "bytes": len(image.content)},
+        }
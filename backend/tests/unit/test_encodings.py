@@ -0,0 +1,33 @@
+import zlib
+
+import pytest
+
+from harness.encodings import available_encodings, decode, encode
+
+BODY = b'{"items": [' + b'{"content": "<p>lorem ipsum dolor sit amet</p>"},' * 200 + b'{}]}'
+
+
+class TestEncodings:
+    """Round trips through the content codings used by the compression benchmark"""
+
+    @pytest.mark.parametrize("encoding", ["identity", "gzip", "deflate", "br", "zstd"])
+    def test_round_trip(self, encoding):
+        """Encoded bodies decode to the original and repetitive JSON shrinks"""
+        if encoding not in available_encodings():
+            pytest.skip(f"{encoding} codec not installed")
+
+        encoded = encode(BODY, encoding)
+
+        assert decode(encoded, encoding) == BODY
+        if encoding != "identity":
+            assert len(encoded) < len(BODY) / 10
+
+    def test_raw_deflate_is_accepted(self):
+        """Some servers send deflate without the zlib header"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        raw = compressor.compress(BODY) + compressor.flush()
+
+        assert decode(raw, "deflate") == BODY
+
+    def test_unknown_encoding_is_passed_through(self):
+        assert decode(b"abc", "compress") == b"abc"
@@ -0,0 +1,155 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from harness.fault_proxy import FaultProxy
+
+
+@pytest.fixture
+def echo_server():
+    """TCP server echoing everything back, as (host, port)"""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def handle(conn):
+        with conn:
+            try:
+                while True:
+                    data = conn.recv(65536)
+                    if not data:
+                        return
+                    conn.sendall(data)
+            except OSError:
+                pass
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield server.getsockname()[:2]
+    server.close()
+
+
+@pytest.fixture
+def proxy(echo_server):
+    proxy = FaultProxy(*echo_server, seed=1).start()
+    yield proxy
+    proxy.stop()
+
+
+def connect(proxy):
+    sock = socket.create_connection((proxy.host, proxy.port), timeout=5)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def exchange(sock, payload=b"ping"):
+    sock.sendall(payload)
+    received = b""
+    while len(received) < len(payload):
+        received += sock.recv(65536)
+    return received
+
+
+class TestFaultProxy:
+    """Unit tests for the fault-injecting TCP proxy"""
+
+    def test_round_trips_are_counted(self, proxy):
+        """Each request/response exchange counts once, however it is chunked"""
+        with connect(proxy) as sock:
+            for _ in range(3):
+                assert exchange(sock) == b"ping"
+
+        assert proxy.stats()["round_trips"] == 3
+        assert proxy.stats()["bytes_up"] == 12
+
+    def test_latency_is_added_in_both_directions(self, proxy):
+        """latency is one-way, so each exchange gains twice the setting"""
+        proxy.configure(latency=0.02)
+        with connect(proxy) as sock:
+            exchange(sock)
+            start = time.perf_counter()
+            for _ in range(5):
+                exchange(sock)
+            elapsed = time.perf_counter() - start
+
+        assert 0.2 <= elapsed < 0.4
+
+    def test_jitter_does_not_reorder(self, proxy):
+        """Chunks arrive in order even when their random delays differ"""
+        proxy.configure(latency=0.005, jitter=0.005)
+        payload = b"".join(str(i).encode() + b"," for i in range(500))
+        with connect(proxy) as sock:
+            for i in range(0, len(payload), 100):
+                sock.sendall(payload[i:i + 100])
+            received = b""
+            while len(received) < len(payload):
+                received += sock.recv(65536)
+
+        assert received == payload
+
+    def test_bandwidth_cap(self, proxy):
+        """Throughput is limited to the configured bytes per second"""
+        proxy.configure(bandwidth=1_000_000)
+        with connect(proxy) as sock:
+            start = time.perf_counter()
+            exchange(sock, b"x" * 200_000)
+            elapsed = time.perf_counter() - start
+
+        # 200 KB each way at 1 MB/s, pipelined through the proxy
+        assert 0.2 <= elapsed < 1.0
+
+    def test_reset_connections(self, proxy):
+        """Severed connections see a reset and new connections still work"""
+        sock = connect(proxy)
+        exchange(sock)
+
+        assert proxy.reset_connections() == 1
+        with pytest.raises(ConnectionResetError):
+            sock.recv(16)
+        sock.close()
+
+        with connect(proxy) as sock:
+            assert exchange(sock) == b"ping"
+        stats = proxy.stats()
+        assert stats["resets"] == 1
+        assert stats["connections"] == 2
+
+    def test_unreachable_target_is_refused(self):
+        """Connections are dropped and counted when the target is down"""
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+
+        proxy = FaultProxy("127.0.0.1", port).start()
+        try:
+            with connect(proxy) as sock:
+                assert sock.recv(16) == b""
+            assert proxy.stats()["refused"] == 1
+        finally:
+            proxy.stop()
+
+    def test_down_refuses_new_connections(self, proxy):
+        """While down, connections are dropped; they work again once it is lifted"""
+        proxy.configure(down=True)
+        # The reset can arrive while connecting or on the first read
+        with pytest.raises(ConnectionResetError):
+            with connect(proxy) as sock:
+                sock.recv(16)
+
+        proxy.configure(down=False)
+        with connect(proxy) as sock:
+            assert exchange(sock) == b"ping"
+        assert proxy.stats()["refused"] == 1
+
+    def test_unknown_setting_is_rejected(self, proxy):
+        """Typos in settings fail instead of being ignored"""
+        with pytest.raises(ValueError):
+            proxy.configure(latencyy=0.1)
@@ -0,0 +1,80 @@
+import concurrent.futures
+import socket
+
+import pytest
+import requests
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+from harness.api_client import ApiClient
+from harness.h2c_server import H2cStandInServer
+from harness.http2 import Http2Client
+from harness.http_timing import TimedHttpClient
+
+
+@pytest.fixture
+def server():
+    """h2c and HTTP/1.1 stand-in server with a short service time"""
+    server = H2cStandInServer(service_time=0.01, body_size=100_000).start()
+    yield server
+    server.stop()
+
+
+class TestHttp2:
+    """Unit tests for the HTTP/2 clients against the local h2c stand-in"""
+
+    def test_concurrent_requests_share_one_connection(self, server):
+        """Streams are multiplexed instead of opening a connection per worker"""
+        client = Http2Client(timeout=5)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(executor.map(lambda i: client.request("GET", f"{server.url}/api/entries/{i}"),
+                                          range(40)))
+        client.close()
+
+        assert {r.status_code for r in responses} == {200}
+        assert all(len(r.content) == 100_000 for r in responses)
+        assert sum(not r.reused for r in responses) == 1
+        assert client.connections_opened == 1
+        assert server.counters["HTTP/2"] == {"connections": 1, "requests": 40}
+
+    def test_timings_cover_the_same_phases(self, server):
+        """HTTP/2 results carry the phases the load engine reports"""
+        response = Http2Client(timeout=5).request("POST", f"{server.url}/api/entries", json_body={"url": "x"})
+        expected = TimedHttpClient().request("GET", f"{server.url}/api/entries").timings.keys()
+
+        assert response.timings.keys() == expected
+        assert response.timings["ttfb"] >= 0.01
+        assert response.json()["method"] == "POST"
+
+    def test_api_client_returns_requests_responses(self, server):
+        """ApiClient(http2=True) keeps the requests response interface"""
+        client = ApiClient(f"{server.url}/api", {"X-API-Key": "key"}, timeout=5, http2=True)
+        response = client.get("tags", params={"page": 2})
+
+        assert isinstance(response, requests.Response)
+        assert response.http_version == "HTTP/2"
+        assert response.json()["path"] == "/api/tags?page=2"
+        response.raise_for_status()
+
+    def test_connection_errors_use_requests_exceptions(self):
+        """Callers catching requests exceptions handle HTTP/2 failures too"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        client = ApiClient(f"http://127.0.0.1:{port}/api", {}, timeout=2, http2=True)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get("entries")
+
+    def test_http1_close_closes_every_worker_connection(self, server):
+        """close() from the main thread also closes the keep-alive pools of the workers"""
+        client = TimedHttpClient(timeout=5)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: client.request("GET", f"{server.url}/api/entries/{i}"), range(20)))
+        connections = [c for pool in client._pools for c in pool.values()]
+        client.close()
+
+        assert connections
+        assert all(c.sock is None for c in connections)
+        assert all(not pool for pool in client._pools)
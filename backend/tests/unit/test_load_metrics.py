@@ -0,0 +1,68 @@
+import urllib.request
+
+import pytest
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from harness.metrics import LoadMetrics
+
+
+@pytest.fixture
+def metrics():
+    """LoadMetrics serving /metrics on a free local port"""
+    load_metrics = LoadMetrics()
+    port = load_metrics.serve(0, addr="127.0.0.1")
+    load_metrics.url = f"http://127.0.0.1:{port}/metrics"
+    yield load_metrics
+    load_metrics.shutdown()
+
+
+def scrape(url):
+    """Scrape the endpoint like Prometheus and return {(name, labels): value}"""
+    with urllib.request.urlopen(url, timeout=5) as response:
+        text = response.read().decode("utf-8")
+
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+class TestLoadMetrics:
+    """Scrape tests for the live load test metrics endpoint"""
+
+    def test_requests_latency_and_errors_are_exported(self, metrics):
+        """Observed results show up as counters and histogram samples"""
+        metrics.observe({"endpoint": "Get tags", "status": "success", "time": 0.02,
+                         "status_code": 200, "response_size": 512})
+        metrics.observe({"endpoint": "Get tags", "status": "error", "time": 0.5,
+                         "status_code": 503, "error": "Service Unavailable"})
+        metrics.observe({"endpoint": "Get tags", "status": "error", "time": 1.0,
+                         "error": "Connection refused"})
+
+        samples = scrape(metrics.url)
+
+        assert samples[("wallabag_loadtest_requests_total",
+                        (("endpoint", "Get tags"), ("status_code", "200")))] == 1
+        assert samples[("wallabag_loadtest_errors_total",
+                        (("code", "503"), ("endpoint", "Get tags")))] == 1
+        assert samples[("wallabag_loadtest_errors_total",
+                        (("code", "exception"), ("endpoint", "Get tags")))] == 1
+        assert samples[("wallabag_loadtest_request_duration_seconds_count",
+                        (("endpoint", "Get tags"),))] == 3
+        assert samples[("wallabag_loadtest_request_duration_seconds_bucket",
+                        (("endpoint", "Get tags"), ("le", "0.025")))] == 1
+        assert samples[("wallabag_loadtest_response_bytes_total",
+                        (("endpoint", "Get tags"),))] == 512
+
+    def test_in_flight_gauge(self, metrics):
+        """Requests are counted as in flight only inside track()"""
+        key = ("wallabag_loadtest_in_flight_requests", (("endpoint", "Get entries"),))
+
+        with metrics.track("Get entries"):
+            assert scrape(metrics.url)[key] == 1
+
+        assert scrape(metrics.url)[key] == 0
@@ -0,0 +1,164 @@
+import json
+import time
+
+import pytest
+
+from harness.concurrency import AdaptiveConcurrencyLimiter
+from harness.mirror import MirrorStore
+from tools.sync_mirror import MirrorSync
+
+
+def make_entry(entry_id, tags=(), content="<p>Hello world</p>", updated_at="2024-01-02T00:00:00+0000"):
+    return {
+        "id": entry_id,
+        "url": f"https://example.com/{entry_id}",
+        "title": f"Entry {entry_id}",
+        "content": content,
+        "is_archived": False,
+        "is_starred": True,
+        "reading_time": 1,
+        "updated_at": updated_at,
+        "language": "en",
+        "tags": [{"id": tag_id, "label": label, "slug": label} for tag_id, label in tags],
+    }
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(body).encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeEntriesApi:
+    """Entry listing ordered by updated_at with Wallabag's page, perPage and since parameters"""
+
+    def __init__(self, count, on_request=None):
+        self.entries = {i: 1_700_000_000 + i for i in range(1, count + 1)}
+        self.on_request = on_request
+        self.requests = 0
+
+    def listing_params(self, metadata_only=False):
+        return {}
+
+    def request(self, method, endpoint, params=None, data=None):
+        if endpoint == "tags":
+            return FakeResponse([])
+        if self.on_request:
+            self.on_request(self, self.requests)
+        self.requests += 1
+        since = params.get("since", 0)
+        listed = sorted((t, i) for i, t in self.entries.items() if t > since)
+        per_page, page = params["perPage"], params["page"]
+        items = [make_entry(i, updated_at=time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(t)))
+                 for t, i in listed[(page - 1) * per_page:page * per_page]]
+        return FakeResponse({"total": len(listed), "pages": max(-(-len(listed) // per_page), 1),
+                             "_embedded": {"items": items}})
+
+
+def mirror_sync(api, store):
+    return MirrorSync(api, store, AdaptiveConcurrencyLimiter(initial=1, maximum=1), per_page=10)
+
+
+@pytest.fixture
+def store():
+    mirror = MirrorStore(":memory:")
+    yield mirror
+    mirror.close()
+
+
+class TestMirrorStore:
+    """Unit tests for the SQLite mirror used by the sync client"""
+
+    def test_content_is_compressed_and_restored(self, store):
+        """Content round-trips through compression and takes less space"""
+        content = "<p>" + "lorem ipsum " * 500 + "</p>"
+
+        raw_bytes, stored_bytes = store.upsert_entries([make_entry(1, content=content)])
+
+        assert raw_bytes == len(content)
+        assert stored_bytes < raw_bytes / 10
+        entry = store.get_entry(1)
+        assert entry["content"] == content
+        assert entry["is_starred"] == 1
+        assert entry["metadata"] == {"language": "en"}
+
+    def test_upsert_replaces_entry_and_tags(self, store):
+        """A later version of an entry replaces its fields and tag set"""
+        store.upsert_entries([make_entry(1, tags=[(1, "news"), (2, "tech")])])
+        updated = make_entry(1, tags=[(2, "tech")], updated_at="2024-02-01T00:00:00+0000")
+        updated["title"] = "Renamed"
+        store.upsert_entries([updated])
+
+        entry = store.get_entry(1)
+        assert entry["title"] == "Renamed"
+        assert entry["tags"] == ["tech"]
+        assert store.stats()["entries"] == 1
+
+    def test_delete_removes_tag_links(self, store):
+        """Deleting an entry cascades to its tag links but keeps the tags"""
+        store.upsert_entries([make_entry(1, tags=[(1, "news")]), make_entry(2)])
+        store.delete_entries({1})
+
+        assert store.entry_ids() == {2}
+        assert store.conn.execute("SELECT COUNT(*) FROM entry_tags").fetchone()[0] == 0
+        assert store.stats()["tags"] == 1
+
+    def test_missing_content(self, store):
+        """Metadata-only entries are stored without content"""
+        entry = make_entry(1)
+        del entry["content"]
+        store.upsert_entries([entry])
+
+        assert store.get_entry(1)["content"] is None
+
+    def test_sync_state(self, store):
+        """Sync state values survive as JSON"""
+        assert store.get_state("last_sync") is None
+        store.set_state("last_sync", 1700000000.5)
+        assert store.get_state("last_sync") == 1700000000.5
+
+
+class TestMirrorSync:
+    """Unit tests for listing entries with the keyset cursor"""
+
+    def test_update_during_sync_does_not_hide_entries(self, store):
+        """An entry moved to the end mid-listing does not shift others onto fetched pages"""
+        def touch_first_entry(api, request):
+            if request == 1:
+                api.entries[1] = 1_800_000_000
+
+        api = FakeEntriesApi(35, on_request=touch_first_entry)
+
+        assert mirror_sync(api, store).sync(full=True)
+        assert store.entry_ids() == set(range(1, 36))
+
+    def test_entries_of_one_second_span_pages(self, store):
+        """More than a page of entries updated in the same second are all listed once"""
+        api = FakeEntriesApi(25)
+        api.entries.update({i: 1_700_000_005 for i in range(5, 20)})
+
+        listed = [item["id"] for items in mirror_sync(api, store).fetch_all_pages() for item in items]
+
+        assert sorted(listed) == list(range(1, 26))
+
+    def test_prune_skips_changing_listing(self, store):
+        """Nothing is pruned when an entry is deleted while the listing runs"""
+        def delete_entry(api, request):
+            if request == 2:
+                api.entries.pop(3)
+
+        store.upsert_entries([make_entry(i) for i in range(1, 26)] + [make_entry(99)])
+        syncer = mirror_sync(FakeEntriesApi(25, on_request=delete_entry), store)
+
+        assert not syncer.prune()
+        assert 99 in store.entry_ids()
+
+        assert mirror_sync(FakeEntriesApi(25), store).prune()
+        assert store.entry_ids() == set(range(1, 26))
@@ -0,0 +1,30 @@
+import pytest
+
+from harness.corpus import content_of_size, count_words, reading_time
+
+
+class TestPayloadContent:
+    """Unit tests for sized article content and Wallabag's reading time"""
+
+    @pytest.mark.parametrize("size", [1, 7, 1000, 65537, 1000000])
+    def test_exact_size(self, size):
+        """Content is exactly the requested number of UTF-8 bytes"""
+        assert len(content_of_size(size).encode("utf-8")) == size
+
+    def test_multibyte_language_keeps_size(self):
+        """Cutting inside multi-byte text still gives the requested size"""
+        assert len(content_of_size(5003, language="fr").encode("utf-8")) == 5003
+
+    def test_deterministic(self):
+        """The same seed gives the same payload across runs"""
+        assert content_of_size(20000, seed=1) == content_of_size(20000, seed=1)
+        assert content_of_size(20000, seed=1) != content_of_size(20000, seed=2)
+
+    def test_reading_time_ignores_markup(self):
+        """Tags are stripped without a separator, like PHP's strip_tags, and 200 words make a minute"""
+        html = "<p>" + "word " * 399 + "</p><p>last</p>"
+
+        assert count_words("<p>one two</p> <b>three</b>") == 3
+        assert count_words("<p>one two</p><b>three</b>") == 2
+        assert reading_time(html) == 2
+
@@ -0,0 +1,69 @@
+from harness.plans import explain, plan_outline, plan_summary
+
+# EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output of a tag filter page query, trimmed
+PLAN = {
+    "Plan": {
+        "Node Type": "Limit",
+        "Actual Rows": 30,
+        "Actual Loops": 1,
+        "Shared Hit Blocks": 120,
+        "Shared Read Blocks": 4,
+        "Plans": [{
+            "Node Type": "Nested Loop",
+            "Actual Rows": 30,
+            "Actual Loops": 1,
+            "Plans": [
+                {"Node Type": "Index Scan", "Index Name": "bench_entry_created_at_idx",
+                 "Relation Name": "bench_entry", "Actual Rows": 90, "Actual Loops": 1},
+                {"Node Type": "Index Only Scan", "Index Name": "bench_entry_tag_pkey",
+                 "Relation Name": "bench_entry_tag", "Actual Rows": 1, "Actual Loops": 90},
+                {"Node Type": "Seq Scan", "Relation Name": "bench_tag", "Actual Rows": 1, "Actual Loops": 1},
+            ],
+        }],
+    },
+    "Planning Time": 0.4,
+    "Execution Time": 1.7,
+}
+
+
+class FakeCursor:
+    """Cursor returning a canned EXPLAIN result"""
+
+    def __init__(self, result):
+        self.result = result
+        self.executed = None
+
+    def execute(self, sql, params=None):
+        self.executed = sql
+
+    def fetchone(self):
+        return [self.result]
+
+
+class TestPlans:
+    """Unit tests for query plan capture and reduction"""
+
+    def test_outline_lists_nodes_with_total_rows(self):
+        """Each node is indented by depth and shows rows over all loops"""
+        outline = plan_outline(PLAN)
+
+        assert outline[0] == "Limit (rows=30)"
+        assert outline[2] == "    Index Scan using bench_entry_created_at_idx on bench_entry (rows=90)"
+        assert outline[3] == "    Index Only Scan using bench_entry_tag_pkey on bench_entry_tag (rows=90)"
+
+    def test_summary(self):
+        """Timings, buffers and the scanned relations are collected from the whole tree"""
+        summary = plan_summary(PLAN)
+
+        assert summary["execution_time"] == 1.7
+        assert summary["shared_read"] == 4
+        assert summary["seq_scans"] == ["bench_tag"]
+        assert summary["index_scans"] == ["bench_entry_created_at_idx", "bench_entry_tag_pkey"]
+
+    def test_explain_accepts_text_json(self):
+        """Plans returned as text are decoded like psycopg2's json columns"""
+        cursor = FakeCursor('[{"Plan": {"Node Type": "Result"}}]')
+
+        plan = explain(cursor, "SELECT 1", analyze=False)
+        assert plan["Plan"]["Node Type"] == "Result"
+        assert cursor.executed == "EXPLAIN (FORMAT JSON) SELECT 1"
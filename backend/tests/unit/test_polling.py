@@ -0,0 +1,47 @@
+from itertools import islice
+
+from harness.polling import backoff_delays, poll_until
+
+
+class FakeClock:
+    """Clock that only advances when sleeping"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestPolling:
+    """Unit tests for bounded backoff polling"""
+
+    def test_delays_grow_to_the_cap(self):
+        """Delays grow by the factor and then stay at the maximum"""
+        assert list(islice(backoff_delays(0.1, 2, 0.5), 5)) == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+    def test_stops_when_done(self):
+        """Polling stops at the first value that is done"""
+        clock = FakeClock()
+        values = iter([None, None, "ready"])
+
+        value, attempts, done = poll_until(lambda: next(values), lambda v: v == "ready", timeout=10,
+                                           initial_delay=0.1, factor=2, clock=clock, sleep=clock.sleep)
+
+        assert (value, attempts, done) == ("ready", 3, True)
+        assert clock.sleeps == [0.1, 0.2, 0.4]
+
+    def test_bounded_by_timeout(self):
+        """The last sleep is cut at the deadline and the last value is returned"""
+        clock = FakeClock()
+
+        value, attempts, done = poll_until(lambda: "pending", lambda v: False, timeout=1,
+                                           initial_delay=0.4, factor=1, clock=clock, sleep=clock.sleep)
+
+        assert (value, attempts, done) == ("pending", 3, False)
+        assert round(sum(clock.sleeps), 6) == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from harness.recovery import error_timeline, recovery_metrics
+
+
+def load(duration=20, rps=10, latency=0.01, faults=None):
+    """Steady open-loop results; faults maps (start, end) send windows to a status or latency"""
+    results = []
+    for i in range(int(duration * rps)):
+        offset = i / rps
+        result = {"offset": offset, "time": latency, "status": "success"}
+        for (start, end), fault in (faults or {}).items():
+            if start <= offset < end:
+                if fault == "error":
+                    result["status"] = "error"
+                else:
+                    result["time"] = fault
+        results.append(result)
+    return results
+
+
+class TestRecoveryMetrics:
+    """Unit tests for the failover recovery analysis"""
+
+    def test_undisturbed_run(self):
+        """Without failures or slow requests the service never went down"""
+        metrics = recovery_metrics(load(), fault_start=10, fault_end=10)
+
+        assert metrics["errors"] == 0
+        assert metrics["recovered"]
+        assert metrics["time_to_recovery"] == 0.0
+        assert metrics["disruption"] == 0.0
+
+    def test_errors_then_slow_recovery(self):
+        """Recovery is when the errors and the slow tail after the outage end"""
+        results = load(faults={(10, 13): "error", (13, 15): 0.2})
+        metrics = recovery_metrics(results, fault_start=10, fault_end=13)
+
+        assert metrics["errors"] == 30
+        assert metrics["slow"] == 20
+        assert metrics["first_error"] == 0
+        assert metrics["recovered"]
+        assert metrics["time_to_recovery"] == pytest.approx(2.0, abs=0.01)
+        assert metrics["overshoot"] == pytest.approx(20)
+
+    def test_stray_spike_is_not_an_outage(self):
+        """A single slow request long after recovery does not extend the disruption"""
+        results = load(faults={(10, 12): "error"})
+        results[180]["time"] = 0.5
+        metrics = recovery_metrics(results, fault_start=10, fault_end=12)
+
+        assert metrics["recovered"]
+        assert metrics["time_to_recovery"] == 0.0
+        assert metrics["disruption"] == pytest.approx(1.91)
+
+    def test_never_recovered(self):
+        """Failures until the end of the run leave time to recovery unknown"""
+        metrics = recovery_metrics(load(faults={(10, 20): "error"}), fault_start=10, fault_end=12)
+
+        assert not metrics["recovered"]
+        assert metrics["time_to_recovery"] is None
+        assert metrics["disruption"] == pytest.approx(9.91)
+
+    def test_error_timeline(self):
+        """Failures are counted per send-time bucket"""
+        timeline = error_timeline(load(faults={(10, 12): "error"}))
+
+        assert timeline == {10.0: 10, 11.0: 10}
@@ -0,0 +1,140 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from harness.api_client import ApiClient
+from harness.http_cache import ResponseCache
+
+
+class CachingHandler(BaseHTTPRequestHandler):
+    """Serves /api/tags with an ETag, /api/plain without validators, /api/fresh with max-age"""
+
+    bodies = {"/api/tags": [{"id": 1, "label": "news"}], "/api/plain": {"total": 3}, "/api/fresh": {"ok": True}}
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        CachingHandler.hits[self.path] = CachingHandler.hits.get(self.path, 0) + 1
+        body = json.dumps(self.bodies[self.path]).encode("utf-8")
+        etag = f'"{len(body)}-{hash(body) & 0xffff}"'
+
+        if self.path == "/api/tags" and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/api/tags":
+            self.send_header("ETag", etag)
+        if self.path == "/api/fresh":
+            self.send_header("Cache-Control", "max-age=60")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PATCH(self):
+        CachingHandler.bodies["/api/tags"] = [{"id": 1, "label": "renamed"}]
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def client():
+    """ApiClient with a response cache against a local server"""
+    CachingHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CachingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield ApiClient(f"http://127.0.0.1:{server.server_port}/api", {"X-API-Key": "key"}, timeout=5,
+                    cache=ResponseCache())
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestResponseCache:
+    """Unit tests for conditional requests and the LRU body store"""
+
+    def test_etag_revalidation_reuses_body(self, client):
+        """A 304 is turned back into the cached 200 response"""
+        first = client.get("tags")
+        second = client.get("tags")
+
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert second.from_cache
+        stats = client.cache.stats()
+        assert stats["revalidated"] == 1
+        assert stats["bytes_saved"] == len(first.content)
+
+    def test_changed_resource_is_refetched(self, client):
+        """After a change the server's 200 replaces the cached body"""
+        client.get("tags")
+        CachingHandler.bodies["/api/tags"] = [{"id": 1, "label": "changed"}]
+        try:
+            assert client.get("tags").json()[0]["label"] == "changed"
+        finally:
+            CachingHandler.bodies["/api/tags"] = [{"id": 1, "label": "news"}]
+
+        assert client.cache.stats()["misses"] == 2
+
+    def test_unchanged_body_without_validators_is_counted(self, client):
+        """Identical 200 bodies are what conditional GETs would save"""
+        body = client.get("plain").content
+        client.get("plain")
+
+        stats = client.cache.stats()
+        assert stats["unchanged"] == 1
+        assert stats["bytes_redundant"] == len(body)
+        assert stats["bodies"] == 1
+
+    def test_fresh_response_is_served_without_request(self, client):
+        """max-age responses are reused without contacting the server"""
+        client.get("fresh")
+        client.get("fresh")
+
+        assert CachingHandler.hits["/api/fresh"] == 1
+        assert client.cache.stats()["hits"] == 1
+
+    def test_write_invalidates_cached_resource(self, client):
+        """A successful PATCH drops the cached representation"""
+        client.get("tags")
+        client.patch("tags", {"label": "renamed"})
+        try:
+            assert client.get("tags").json()[0]["label"] == "renamed"
+        finally:
+            CachingHandler.bodies["/api/tags"] = [{"id": 1, "label": "news"}]
+
+        assert client.cache.stats()["revalidated"] == 0
+
+    def test_lru_eviction_by_size(self):
+        """Least recently used bodies are evicted once max_bytes is exceeded"""
+        cache = ResponseCache(max_bytes=250)
+        headers = {"Content-Type": "application/json"}
+        for name in ("a", "b", "c"):
+            cache.store(cache.key(f"http://x/{name}"), 200, headers, name.encode() * 100)
+            if name == "b":
+                cache.lookup(cache.key("http://x/a"))
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert cache.lookup(cache.key("http://x/b")) is None
+        assert cache.lookup(cache.key("http://x/a")) is not None
+
+    def test_identical_bodies_are_stored_once(self):
+        """Different URLs with the same content share one stored body"""
+        cache = ResponseCache()
+        cache.store(cache.key("http://x/1"), 200, {}, b"same")
+        cache.store(cache.key("http://x/2"), 200, {}, b"same")
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bodies"] == 1
+        assert stats["body_bytes"] == 4
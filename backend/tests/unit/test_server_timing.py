@@ -0,0 +1,46 @@
+import http.client
+import io
+import re
+
+from harness.tracing import new_traceparent, parse_server_timing, server_timing_header, server_total
+
+
+class TestServerTiming:
+    """Unit tests for traceparent generation and Server-Timing parsing"""
+
+    def test_traceparent_format(self):
+        """traceparent follows the W3C version-00 format and carries the trace id"""
+        header, trace_id = new_traceparent()
+        assert re.match(r"^00-[0-9a-f]{32}-[0-9a-f]{16}-01$", header)
+        assert header.split("-")[1] == trace_id
+
+    def test_parse_durations_in_seconds(self):
+        """dur values are milliseconds and are converted to seconds"""
+        metrics = parse_server_timing('app;dur=12.5, db;desc="Postgres";dur=3')
+        assert metrics == {"app": 0.0125, "db": 0.003}
+
+    def test_repeated_metrics_are_summed(self):
+        """Several entries with the same name add up"""
+        metrics = parse_server_timing("db;dur=2, db;dur=3")
+        assert abs(metrics["db"] - 0.005) < 1e-9
+
+    def test_metric_without_duration(self):
+        """Metrics without dur are kept with a None duration"""
+        assert parse_server_timing("cache;desc=hit") == {"cache": None}
+        assert parse_server_timing(None) == {}
+
+    def test_repeated_headers_are_joined(self):
+        """Metrics sent in separate headers are all kept"""
+        message = http.client.parse_headers(io.BytesIO(
+            b"Server-Timing: app;dur=5\r\nServer-Timing: db;dur=2\r\n\r\n"))
+
+        assert server_timing_header(message) == "app;dur=5, db;dur=2"
+        assert server_timing_header({"Server-Timing": "app;dur=5"}) == "app;dur=5"
+        assert server_timing_header(http.client.parse_headers(io.BytesIO(b"\r\n"))) is None
+
+    def test_server_total_prefers_total_then_app(self):
+        """The total metric wins over app, which wins over the sum of the rest"""
+        assert server_total({"total": 0.02, "app": 0.01}) == 0.02
+        assert server_total({"app": 0.01, "db": 0.005}) == 0.01
+        assert abs(server_total({"php": 0.01, "db": 0.005}) - 0.015) < 1e-9
+        assert server_total({}) is None
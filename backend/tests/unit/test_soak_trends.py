@@ -0,0 +1,51 @@
+import random
+
+from harness.trends import detect_growth, mann_kendall
+
+
+class TestSoakTrendDetection:
+    """Unit tests for the monotonic growth detection used by soak runs"""
+
+    def test_steady_growth_is_flagged(self):
+        """A slowly leaking series should be flagged"""
+        rng = random.Random(1)
+        xs = list(range(60))
+        ys = [100 + x * 2 + rng.uniform(-5, 5) for x in xs]
+
+        trend = detect_growth(xs, ys)
+        assert trend["flagged"]
+        assert trend["slope"] > 1
+
+    def test_noisy_flat_series_is_not_flagged(self):
+        """Noise around a constant level is not a leak"""
+        rng = random.Random(2)
+        xs = list(range(60))
+        ys = [100 + rng.uniform(-10, 10) for _ in xs]
+
+        assert not detect_growth(xs, ys)["flagged"]
+
+    def test_single_spike_is_not_flagged(self):
+        """One outlier must not turn a flat series into a trend"""
+        xs = list(range(30))
+        ys = [50] * 30
+        ys[-1] = 500
+
+        assert not detect_growth(xs, ys)["flagged"]
+
+    def test_too_few_samples(self):
+        """Short series are never flagged"""
+        assert not detect_growth([0, 1, 2], [1, 2, 3])["flagged"]
+
+    def test_missing_values_are_skipped(self):
+        """Unavailable samples (None) are ignored"""
+        xs = list(range(20))
+        ys = [None if x % 3 == 0 else x * 10 for x in xs]
+
+        trend = detect_growth(xs, ys)
+        assert trend["samples"] == 13
+        assert trend["flagged"]
+
+    def test_mann_kendall_sign(self):
+        """S is positive for increasing and negative for decreasing series"""
+        assert mann_kendall([1, 2, 3, 4, 5])[0] > 0
+        assert mann_kendall([5, 4, 3, 2, 1])[0] < 0
@@ -0,0 +1,77 @@
+from harness import resources
+from harness.resources import TelemetrySampler, cgroup_memory, counter_at, parse_telemetry, phase_usage
+
+
+def sample(time, cpu_usec, rss, container="wallabag", tx=0):
+    return {"container": container, "time": time, "cpu_usec": cpu_usec, "memory_rss": rss,
+            "memory_current": rss, "io_read_bytes": 0, "io_write_bytes": 0, "net_rx_bytes": 0, "net_tx_bytes": tx}
+
+
+SAMPLES = [
+    sample(0.0, 0, 100),
+    sample(1.0, 1_000_000, 300, tx=1000),
+    sample(2.0, 3_000_000, 200, tx=3000),
+    sample(1.0, 50_000_000, 999, container="postgres"),
+]
+
+
+class TestTelemetry:
+    """Unit tests for cgroup telemetry parsing and phase attribution"""
+
+    def test_parse(self):
+        """Known keys are read; missing and malformed values are None"""
+        values = parse_telemetry("cpu_usec 1500\nmemory_rss 2048\nmemory_current oops\nunknown 1\n")
+
+        assert values["cpu_usec"] == 1500
+        assert values["memory_rss"] == 2048
+        assert values["memory_current"] is None
+        assert values["net_tx_bytes"] is None
+        assert "unknown" not in values
+
+    def test_cgroup_memory(self, monkeypatch):
+        """cgroup_memory reads usage, peak and OOM kills through the telemetry reader"""
+        output = "memory_current 1024\nmemory_peak 4096\noom_kills 1\n"
+        monkeypatch.setattr(resources, "read_telemetry", lambda container: parse_telemetry(output))
+
+        assert cgroup_memory("wallabag") == {"current": 1024, "peak": 4096, "oom_kills": 1}
+
+    def test_cgroup_memory_missing_counters(self, monkeypatch):
+        """Counters the cgroup version does not offer are None, an unreadable container gives None"""
+        output = "memory_current 1024\nmemory_peak\n"
+        monkeypatch.setattr(resources, "read_telemetry", lambda container: parse_telemetry(output))
+        assert cgroup_memory("wallabag") == {"current": 1024, "peak": None, "oom_kills": None}
+
+        monkeypatch.setattr(resources, "read_telemetry", lambda container: None)
+        assert cgroup_memory("wallabag") is None
+
+    def test_counter_interpolation(self):
+        """Counters between samples are interpolated and clamped outside them"""
+        wallabag = [s for s in SAMPLES if s["container"] == "wallabag"]
+
+        assert counter_at(wallabag, "cpu_usec", 1.5) == 2_000_000
+        assert counter_at(wallabag, "cpu_usec", -1) == 0
+        assert counter_at(wallabag, "cpu_usec", 5) == 3_000_000
+
+    def test_phase_usage(self):
+        """A phase gets its counter deltas and the peak gauge of its own container"""
+        usage = phase_usage(SAMPLES, "wallabag", 0.5, 2.0)
+
+        assert usage["cpu_seconds"] == 2.5
+        assert usage["net_tx_bytes"] == 2500
+        assert usage["peak_memory_rss"] == 300
+
+    def test_short_phase_uses_nearest_sample(self):
+        """A phase between two samples still reports memory from the closest one"""
+        usage = phase_usage(SAMPLES, "wallabag", 1.1, 1.3)
+
+        assert usage["peak_memory_rss"] == 300
+        assert round(usage["cpu_seconds"], 6) == 0.4
+
+    def test_sampler_reads_every_container(self):
+        """Each sample is labelled and stamped with the middle of its read"""
+        ticks = iter(range(100))
+        sampler = TelemetrySampler({"wallabag": "w", "postgres": "p"}, read=lambda name: {"cpu_usec": 1},
+                                   clock=lambda: next(ticks))
+        sampler.sample()
+
+        assert [(s["container"], s["time"]) for s in sampler.samples] == [("wallabag", 0.5), ("postgres", 2.5)]